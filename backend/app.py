@@ -6,16 +6,47 @@ import zipfile
 import json
 import shutil
 import uuid
-import asyncio
+import hashlib
+import re
+import traceback
+import threading
 from datetime import datetime
 from pathlib import Path
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context, abort, make_response
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 import magic
-from local_code import LocalCodeClient
+from local_code import LocalCodeClient, run_sync
 from constants import CODE_EXTENSIONS
-from llm.qwen_llm import QwenLLM
+from file_priority import rank_code_files
+from file_triage import triage_files, triage_project
+from project_index import ProjectIndex, SOURCE_DIRECTORY
+from project_pack import BlobStore, ProjectPack
+from project_storage import DirectoryStorage, ArchiveStorage, PackStorage
+from trigram_index import TrigramIndexCache, TrigramIndex
+from fuzzy_finder import PathListCache
+from import_graph import ImportGraph
+from bm25_index import Bm25IndexCache
+from symbol_index import SymbolIndex, SYMBOL_EXTENSIONS
+from fs_walk import iter_tree_files, should_prune_directory
+from parallel_grep import compile_pattern, stream_grep
+from zip_project import ZipProjectCache
+from zip_extract import scan_archive, extract_archive, extract_members, normalize_member_name
+from upload_sessions import UploadSession, UploadTooLarge, OffsetMismatch, stream_to_file
+from upload_registry import (
+    UploadRegistry, SORT_COLUMNS, PROJECT_PROCESSING, PROJECT_READY, PROJECT_FAILED, decode_cursor
+)
+from disk_quota import (
+    AccessTracker, DiskQuotaManager, AREA_TEMP, AREA_EXTRACTED, AREA_UPLOADS, AREA_DOCS, QUOTA_TOTAL
+)
+from upload_pipeline import (
+    UploadPipelineManager, PipelineState, STAGE_EXTRACT, STAGE_INDEX, STAGE_STATS,
+    STAGE_SYMBOLS, STAGE_SUMMARIZE, PIPELINE_QUEUED, PIPELINE_RUNNING, PIPELINE_COMPLETED
+)
+from doc_catalog import DocCatalog
+from summarize_runs import SummarizeRun, STATUS_SUCCESS, STATUS_ERROR
+from summarize_jobs import SummarizeJobManager, JobCancelled, JOB_PAUSED
+from llm.qwen_llm import QwenLLM, LLMRequestCancelled
 from prompts.business_logic import BUSINESS_SUMMARY_PROMPT
 from prompts.technical_documentation import TECHNICAL_DOCUMENTATION_PROMPT
 from prompts.technical_summary import TECHNICAL_SUMMARY_PROMPT, DOCUMENT_TITLE_PROMPT
@@ -30,6 +61,56 @@ app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__fil
 app.config['EXTRACTED_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extracted')
 app.config['TEMP_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp')
 app.config['DOCS_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'docs')
+app.config['META_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'meta')
+app.config['SUMMARIZE_MAX_WORKERS'] = int(os.getenv('SUMMARIZE_MAX_WORKERS', '2'))
+# 上传后的处理方式：async 文件落盘后立即返回，解压与索引在后台流水线中执行；
+# extract 在上传请求中解压并构建索引；lazy 只保留压缩包，从中央目录读取结构，按需解压
+app.config['UPLOAD_EXTRACT_MODE'] = os.getenv('UPLOAD_EXTRACT_MODE', 'async')
+app.config['UPLOAD_PIPELINE_MAX_WORKERS'] = int(os.getenv('UPLOAD_PIPELINE_MAX_WORKERS', '2'))
+# 后台流水线完成索引后是否自动生成总结文档
+app.config['UPLOAD_AUTO_SUMMARIZE'] = os.getenv('UPLOAD_AUTO_SUMMARIZE', '0') == '1'
+# 解压后的保存方式：directory 展开为目录；pack 每个项目写入一个打包文件，内容在项目之间按哈希去重
+app.config['PROJECT_STORAGE'] = os.getenv('PROJECT_STORAGE', 'directory')
+# 磁盘配额（MB，0表示不限制）：超出时清理最久未访问项目的解压目录、压缩包，允许时清理文档
+app.config['DISK_QUOTAS'] = {
+    area: int(os.getenv(f'DISK_QUOTA_{area.upper()}_MB', '0')) * 1024 * 1024
+    for area in (AREA_UPLOADS, AREA_EXTRACTED, AREA_DOCS, AREA_TEMP, QUOTA_TOTAL)
+}
+app.config['DISK_QUOTA_INTERVAL'] = int(os.getenv('DISK_QUOTA_INTERVAL', '300'))
+# 项目至少多久未访问才会被清理（秒）；临时文件至少多久未修改才会被清理（秒）
+app.config['DISK_QUOTA_MIN_IDLE'] = int(os.getenv('DISK_QUOTA_MIN_IDLE', '3600'))
+app.config['DISK_QUOTA_TEMP_MAX_AGE'] = int(os.getenv('DISK_QUOTA_TEMP_MAX_AGE', '86400'))
+# 文档无法重新生成（需要重新调用大模型），默认不清理
+app.config['DISK_QUOTA_EVICT_DOCS'] = os.getenv('DISK_QUOTA_EVICT_DOCS', '0') == '1'
+
+# 本地代码客户端，文件读取在其I/O线程池中并发执行
+local_code_client = LocalCodeClient()
+
+# 总结任务管理器，支持后台执行、取消与暂停
+summarize_jobs = SummarizeJobManager(max_workers=app.config['SUMMARIZE_MAX_WORKERS'])
+
+# 内容搜索使用的三字符组索引，保留最近使用的若干个项目
+trigram_indexes = TrigramIndexCache()
+
+# 模糊文件查找使用的内存路径列表
+path_lists = PathListCache()
+
+# 相关性检索使用的BM25索引（代码标识符 + 总结文档）
+bm25_indexes = Bm25IndexCache()
+
+# 上传后处理流水线（解压、索引、统计、符号、自动总结）
+upload_pipelines = UploadPipelineManager(max_workers=app.config['UPLOAD_PIPELINE_MAX_WORKERS'])
+
+# 未解压项目的压缩包句柄与解压内容缓存
+zip_projects = ZipProjectCache()
+
+# 按需解压时每个项目一把锁，避免并发请求重复解压
+extract_locks = {}
+extract_locks_lock = threading.Lock()
+
+# 磁盘配额管理，首次使用时按当前配置创建
+disk_quota_manager = None
+disk_quota_lock = threading.Lock()
 
 
 def ensure_directories():
@@ -38,21 +119,22 @@ def ensure_directories():
         app.config['UPLOAD_FOLDER'],
         app.config['EXTRACTED_FOLDER'],
         app.config['TEMP_FOLDER'],
-        app.config['DOCS_FOLDER']
+        app.config['DOCS_FOLDER'],
+        app.config['META_FOLDER']
     ]
     
     for directory in directories:
         Path(directory).mkdir(parents=True, exist_ok=True)
         print(f"✅ 目录已创建: {directory}")
 
-def is_zip_file(file_path):
-    """检查文件是否为ZIP格式"""
+def is_zip_header(header):
+    """根据文件头部字节检查是否为ZIP格式（上传时已读到，无需再读一次文件）"""
     try:
-        mime = magic.from_file(file_path, mime=True)
+        mime = magic.from_buffer(header, mime=True)
         return mime in ['application/zip', 'application/x-zip-compressed']
     except Exception:
-        # 如果magic库不可用，检查文件扩展名
-        return file_path.lower().endswith('.zip')
+        # 如果magic库不可用，检查ZIP文件签名
+        return header[:4] in (b'PK\x03\x04', b'PK\x05\x06')
 
 def get_file_stats(file_path):
     """获取文件统计信息"""
@@ -67,60 +149,385 @@ def is_code_file(file_path):
     """检查是否为代码文件"""
     return Path(file_path).suffix.lower() in CODE_EXTENSIONS
 
-def get_directory_structure(directory_path, base_path=''):
-    """递归获取目录结构"""
-    items = []
+def get_index_path(file_id):
+    """项目索引数据库路径"""
+    return os.path.join(app.config['META_FOLDER'], 'index', f"{secure_filename(file_id)}.sqlite")
+
+def get_upload_registry():
+    """按内容哈希登记上传的登记表"""
+    return UploadRegistry(os.path.join(app.config['META_FOLDER'], 'uploads.sqlite'))
+
+def get_storage_id(file_id):
+    """将上传ID解析为共享存储的ID，上传已删除时返回None"""
+    return get_upload_registry().resolve(file_id)
+
+def get_zip_path(file_id):
+    """上传的ZIP文件路径"""
+    return os.path.join(app.config['UPLOAD_FOLDER'], f"{secure_filename(file_id)}.zip")
+
+def get_blob_store():
+    """打包文件共用的内容存储，内容按哈希去重"""
+    return BlobStore(os.path.join(app.config['META_FOLDER'], 'blobs.sqlite'))
+
+def get_project_pack(file_id):
+    """项目的打包文件"""
+    return ProjectPack(
+        os.path.join(app.config['META_FOLDER'], 'packs', f"{secure_filename(file_id)}.sqlite"), get_blob_store()
+    )
+
+def get_lazy_project(file_id):
+    """项目未解压、未打包但压缩包存在时返回ZipProject，否则返回None"""
+    if os.path.exists(os.path.join(app.config['EXTRACTED_FOLDER'], file_id)) or get_project_pack(file_id).exists():
+        return None
+    zip_path = get_zip_path(file_id)
+    if not os.path.exists(zip_path):
+        return None
+    return zip_projects.get(file_id, zip_path)
+
+def get_project_storage(file_id):
+    """
+    获取分析接口读取项目文件使用的存储：解压目录、打包文件或未解压的压缩包；
+    项目不存在时返回None
+    """
+    extracted_path = os.path.join(app.config['EXTRACTED_FOLDER'], file_id)
+    if os.path.exists(extracted_path):
+        return DirectoryStorage(file_id, extracted_path)
+    pack = get_project_pack(file_id)
+    if pack.exists():
+        return PackStorage(file_id, pack)
+    lazy_project = get_lazy_project(file_id)
+    if lazy_project is not None:
+        return ArchiveStorage(lazy_project)
+    return None
+
+def get_storage_index(storage, revalidate=False):
+    """
+    获取项目索引：解压目录的根目录有变化时重建（revalidate为True时检查全部目录），
+    其他存储在打包文件或压缩包被替换时重建
+    """
+    project_index = ProjectIndex(get_index_path(storage.key), CODE_EXTENSIONS)
+    if storage.kind == SOURCE_DIRECTORY:
+        return project_index.ensure_built(storage.root, revalidate=revalidate)
+    return project_index.ensure_built_from_storage(storage)
+
+def get_project_catalog(file_id, revalidate=False):
+    """
+    获取只需文件列表的接口（结构、统计、文件名搜索）使用的项目索引，
+    不读取任何文件内容；项目不存在时返回None
+    """
+    storage = get_project_storage(file_id)
+    return get_storage_index(storage, revalidate=revalidate) if storage is not None else None
+
+def pack_uploaded_zip(file_id, scan=None):
+    """将压缩包中的代码文件与文档、配置文件写入项目的打包文件，返回写入的文件数"""
+    zip_path = get_zip_path(file_id)
+    if scan is None:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            scan = scan_archive(zip_ref, CODE_EXTENSIONS)
+    return get_project_pack(file_id).build(zip_path, scan['members'], scan['directory_paths'])['files']
+
+def resolve_extracted_path(file_id):
+    """
+    获取需要真实目录的操作（总结、增量更新）使用的解压目录，打包或未解压的项目在此时展开；
+    项目不存在时返回None
+    """
+    extracted_path = os.path.join(app.config['EXTRACTED_FOLDER'], file_id)
+    if os.path.exists(extracted_path):
+        return extracted_path
     
+    with get_extract_lock(file_id):
+        if os.path.exists(extracted_path):
+            return extracted_path
+        started = datetime.now()
+        pack = get_project_pack(file_id)
+        if pack.exists():
+            pack.extract(extracted_path)
+        else:
+            lazy_project = get_lazy_project(file_id)
+            if lazy_project is None:
+                return None
+            lazy_project.extract(extracted_path, CODE_EXTENSIONS)
+        print(f"📦 按需解压项目 {file_id}，耗时 {(datetime.now() - started).total_seconds():.2f}s")
+    
+    # 解压后不再需要压缩包句柄
+    zip_projects.discard(file_id)
+    return extracted_path
+
+def get_extract_lock(file_id):
+    """项目的解压锁，按需解压与配额清理互斥"""
+    with extract_locks_lock:
+        return extract_locks.setdefault(file_id, threading.Lock())
+
+def is_project_busy(storage_id):
+    """项目是否正在后台处理、按需解压或生成总结文档，配额清理时跳过"""
+    if upload_pipelines.is_active(storage_id) or get_extract_lock(storage_id).locked():
+        return True
+    return any(get_uploaded_file_id(job['project_path']) == storage_id for job in summarize_jobs.list_jobs())
+
+def evict_project_area(area, storage_id):
+    """
+    配额清理回调：删除项目在某个目录中的数据，不能安全删除时返回False；
+    解压目录只在压缩包或打包文件仍在时删除，压缩包只在已解压或已打包时删除，
+    项目始终至少保留一份可读取的内容（增量更新过的项目只有解压目录，不会被清理）
+    """
+    lock = get_extract_lock(storage_id)
+    if not lock.acquire(blocking=False):
+        return False
     try:
-        for item in os.listdir(directory_path):
-            item_path = os.path.join(directory_path, item)
-            relative_path = os.path.join(base_path, item)
-            
-            if os.path.isdir(item_path):
-                # 递归处理子目录
-                children = get_directory_structure(item_path, relative_path)
-                items.append({
-                    'name': item,
-                    'type': 'directory',
-                    'path': relative_path,
-                    'children': children
-                })
-            else:
-                # 检查是否为代码文件
-                if is_code_file(item_path):
-                    stats = get_file_stats(item_path)
-                    items.append({
-                        'name': item,
-                        'type': 'file',
-                        'path': relative_path,
-                        'extension': Path(item).suffix.lower(),
-                        'size': stats['size'],
-                        'modified_at': stats['modified_at']
-                    })
-        
-        # 排序：目录在前，文件在后
-        items.sort(key=lambda x: (x['type'] != 'directory', x['name'].lower()))
-        return items
-        
-    except Exception as e:
-        print(f"读取目录失败: {directory_path}, 错误: {e}")
-        return []
+        extracted_path = os.path.join(app.config['EXTRACTED_FOLDER'], storage_id)
+        zip_path = get_zip_path(storage_id)
+        if area == AREA_EXTRACTED:
+            if not (os.path.exists(zip_path) or get_project_pack(storage_id).exists()):
+                return False
+            # 项目索引在下次访问时发现数据来源变化，改为从打包文件或压缩包重建
+            shutil.rmtree(extracted_path)
+            path_lists.discard(storage_id)
+        elif area == AREA_UPLOADS:
+            if not (os.path.exists(extracted_path) or get_project_pack(storage_id).exists()):
+                return False
+            zip_projects.discard(storage_id)
+            os.remove(zip_path)
+        elif area == AREA_DOCS:
+            shutil.rmtree(os.path.join(app.config['DOCS_FOLDER'], storage_id))
+            get_doc_catalog().delete_project(storage_id)
+            bm25_indexes.discard(storage_id)
+            if os.path.exists(get_bm25_index_path(storage_id)):
+                os.remove(get_bm25_index_path(storage_id))
+            get_upload_registry().update_storage(storage_id, doc_count=0)
+        else:
+            return False
+    finally:
+        lock.release()
+    print(f"🧹 磁盘配额清理: {area}/{storage_id}")
+    return True
+
+def get_disk_quota_manager():
+    """磁盘配额管理器"""
+    global disk_quota_manager
+    with disk_quota_lock:
+        if disk_quota_manager is None:
+            disk_quota_manager = DiskQuotaManager(
+                folders={
+                    AREA_UPLOADS: app.config['UPLOAD_FOLDER'],
+                    AREA_EXTRACTED: app.config['EXTRACTED_FOLDER'],
+                    AREA_DOCS: app.config['DOCS_FOLDER'],
+                    AREA_TEMP: app.config['TEMP_FOLDER']
+                },
+                quotas=app.config['DISK_QUOTAS'],
+                tracker=AccessTracker(os.path.join(app.config['META_FOLDER'], 'access.sqlite')),
+                evict=evict_project_area,
+                is_busy=is_project_busy,
+                interval=app.config['DISK_QUOTA_INTERVAL'],
+                min_idle=app.config['DISK_QUOTA_MIN_IDLE'],
+                temp_max_age=app.config['DISK_QUOTA_TEMP_MAX_AGE'],
+                evict_docs=app.config['DISK_QUOTA_EVICT_DOCS']
+            )
+        return disk_quota_manager
+
+def record_project_access(storage_id):
+    """记录项目的访问时间，作为配额清理的冷热依据"""
+    try:
+        get_disk_quota_manager().tracker.touch(storage_id)
+    except Exception as e:
+        print(f"记录项目访问失败: {e}")
+
+def get_trigram_index_path(file_id):
+    """内容搜索索引路径"""
+    return os.path.join(app.config['META_FOLDER'], 'index', f"{secure_filename(file_id)}.trigram")
+
+def get_trigram_index(file_id, storage):
+    """获取内容搜索索引，项目索引重建后随之重建"""
+    project_index = get_storage_index(storage)
+
+    def build():
+        return TrigramIndex.build(
+            project_index.built_at(),
+            project_index.code_files(),
+            lambda file_info: storage.read_text(file_info['path'])
+        )
+
+    return trigram_indexes.get(file_id, get_trigram_index_path(file_id), project_index.built_at(), build)
+
+def get_path_list(file_id):
+    """获取模糊查找使用的路径列表，项目索引重建后随之重新加载；项目不存在时返回None"""
+    storage = get_project_storage(file_id)
+    if storage is None:
+        return None
+    if storage.kind == SOURCE_DIRECTORY:
+        project_index = ProjectIndex(get_index_path(file_id), CODE_EXTENSIONS)
+        # 逐键查询对延迟敏感，只在索引不存在时构建；目录变化由其他接口触发的重建发现
+        if not project_index.exists():
+            project_index.build(storage.root)
+    else:
+        project_index = get_storage_index(storage)
+    return path_lists.get(file_id, project_index.built_at(), project_index.code_files)
+
+def get_symbol_index_path(file_id):
+    """符号索引数据库路径"""
+    return os.path.join(app.config['META_FOLDER'], 'index', f"{secure_filename(file_id)}.symbols.sqlite")
+
+def get_symbol_index(file_id, storage):
+    """获取符号索引，项目索引重建后只重新提取内容有变化的文件"""
+    project_index = get_storage_index(storage)
+    symbol_index = SymbolIndex(get_symbol_index_path(file_id))
+    if symbol_index.version() != project_index.built_at():
+        symbol_index.sync(project_index.built_at(), storage, project_index.code_files())
+    return symbol_index
+
+def get_import_graph_path(file_id):
+    """导入依赖图数据库路径"""
+    return os.path.join(app.config['META_FOLDER'], 'index', f"{secure_filename(file_id)}.imports.sqlite")
+
+def get_import_graph(file_id, storage):
+    """获取导入依赖图，项目索引重建后只重新读取内容有变化的文件"""
+    project_index = get_storage_index(storage)
+    import_graph = ImportGraph(get_import_graph_path(file_id))
+    if import_graph.version() != project_index.built_at():
+        import_graph.sync(project_index.built_at(), storage, project_index.code_files())
+    return import_graph
+
+def get_uploaded_file_id(project_path):
+    """项目路径是上传解压目录时返回其file_id，否则返回None"""
+    project_path = os.path.abspath(project_path)
+    if os.path.dirname(project_path) != os.path.abspath(app.config['EXTRACTED_FOLDER']):
+        return None
+    return os.path.basename(project_path)
+
+def get_bm25_index_path(file_id):
+    """相关性检索索引路径"""
+    return os.path.join(app.config['META_FOLDER'], 'index', f"{secure_filename(file_id)}.bm25.npz")
+
+def get_doc_catalog():
+    """总结文档目录，记录源文件与文档的对应关系"""
+    return DocCatalog(os.path.join(app.config['META_FOLDER'], 'docs.sqlite'))
+
+def ensure_doc_catalog(project):
+    """
+    文档目录建立之前生成的文档补登记到文档目录（每个项目只执行一次）：
+    总结任务检查点中能对应到源文件的文档，以及文档目录中其余的Markdown文件
+    """
+    catalog = get_doc_catalog()
+    if catalog.is_imported(project):
+        return catalog
+    project_docs = os.path.join(app.config['DOCS_FOLDER'], project)
+    docs = {}
+    for run in SummarizeRun.list_runs(get_runs_folder(), project_name=project):
+        for relative_path, result in run.results.items():
+            if result.get('status') != STATUS_SUCCESS or not os.path.exists(result.get('doc_path', '')):
+                continue
+            docs[relative_path] = {
+                'doc_path': os.path.relpath(result['doc_path'], project_docs),
+                'source_path': relative_path,
+                'title': result.get('doc_title'),
+                'size': result.get('file_size', 0),
+                'source_hash': result.get('source_hash'),
+                'created_at': get_file_stats(result['doc_path'])['modified_at']
+            }
+    known = {doc['doc_path'] for doc in docs.values()}
+    others = []
+    for root, _, files in os.walk(project_docs):
+        for name in files:
+            doc_path = os.path.relpath(os.path.join(root, name), project_docs)
+            if name.endswith('.md') and doc_path not in known:
+                stats = get_file_stats(os.path.join(root, name))
+                others.append({'doc_path': doc_path, 'title': name[:-3], 'size': stats['size'],
+                               'created_at': stats['modified_at']})
+    catalog.import_docs(project, list(docs.values()) + others)
+    return catalog
+
+def get_project_summaries(file_id):
+    """从文档目录获取项目中各源文件最新的总结文档"""
+    project_docs = os.path.join(app.config['DOCS_FOLDER'], file_id)
+    summaries = {}
+    for doc in ensure_doc_catalog(file_id).list_docs(file_id):
+        doc_path = os.path.join(project_docs, doc['doc_path'])
+        if doc['source_path'] is not None and os.path.exists(doc_path):
+            summaries[doc['source_path']] = {'doc_path': doc_path, 'doc_title': doc['title']}
+    return summaries
+
+def count_project_docs(storage_id):
+    """项目已生成的总结文档数"""
+    return ensure_doc_catalog(storage_id).count(storage_id)
+
+def record_summary_doc(run, relative_path, result):
+    """总结文档写入后登记到文档目录，同一源文件之前生成的标题不同的文档随之删除"""
+    previous = ensure_doc_catalog(run.project_name).record(run.project_name, {
+        'doc_path': os.path.relpath(result['doc_path'], run.summary_docs_dir),
+        'source_path': relative_path,
+        'title': result['doc_title'],
+        'size': result['file_size'],
+        'model': result.get('model'),
+        'prompt_tokens': result['usage'].get('prompt_tokens'),
+        'completion_tokens': result['usage'].get('completion_tokens'),
+        'total_tokens': result['usage'].get('total_tokens'),
+        'source_hash': result['source_hash']
+    })
+    if previous is not None:
+        previous_path = os.path.join(run.summary_docs_dir, previous['doc_path'])
+        if previous_path != result['doc_path'] and os.path.exists(previous_path):
+            os.remove(previous_path)
+
+def index_summary(index, relative_path, result):
+    """将一篇总结文档写入BM25索引"""
+    doc_path = result['doc_path']
+    with open(doc_path, 'r', encoding='utf-8') as f:
+        summary = f.read()
+    index.set_summary(relative_path, doc_path, result['doc_title'], summary, os.path.getmtime(doc_path))
+
+def get_bm25_index(file_id, storage):
+    """获取相关性检索索引，只重新切分内容有变化的源文件和新写入的总结文档"""
+    project_index = get_storage_index(storage)
+    index_path = get_bm25_index_path(file_id)
+
+    def sync_summaries(index):
+        # 载入时补上索引文件保存之后写入的总结文档
+        changed = False
+        for relative_path, result in get_project_summaries(file_id).items():
+            known = index.summaries.get(relative_path)
+            if known and known['doc_path'] == result['doc_path'] \
+                    and known['mtime'] == os.path.getmtime(result['doc_path']):
+                continue
+            index_summary(index, relative_path, result)
+            changed = True
+        if changed:
+            index.save(index_path)
+
+    # 同一项目的载入、同步与保存在项目索引锁内完成，总结线程的增量更新同样持有该锁
+    with bm25_indexes.lock(file_id):
+        index = bm25_indexes.get(file_id, index_path, on_load=sync_summaries)
+        if index.version != project_index.built_at():
+            index.sync_sources(
+                project_index.built_at(),
+                project_index.code_files(),
+                storage.read_text
+            )
+            index.save(index_path)
+    return index
+
+def update_summary_search_index(run, relative_path, result):
+    """总结文档写入后增量更新上传项目的相关性检索索引"""
+    file_id = get_uploaded_file_id(run.project_path)
+    if file_id is None:
+        return
+    index_path = get_bm25_index_path(file_id)
+    # 索引尚未建立时不必提前构建，首次检索时会读取全部总结文档
+    if bm25_indexes.peek(file_id) is None and not os.path.exists(index_path):
+        return
+    try:
+        with bm25_indexes.lock(file_id):
+            index = get_bm25_index(file_id, DirectoryStorage(file_id, run.project_path))
+            index_summary(index, relative_path, result)
+            index.save(index_path)
+    except Exception as e:
+        print(f"⚠️ 更新相关性检索索引失败: {e}")
 
 def get_all_subdirectories(directory_path):
     """获取目录下的所有子目录，按深度排序（最深层在前）"""
-    subdirs = []
-    
-    def collect_subdirs(path, depth=0):
-        try:
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                if os.path.isdir(item_path):
-                    subdirs.append((item_path, depth))
-                    collect_subdirs(item_path, depth + 1)
-        except Exception as e:
-            print(f"读取目录失败: {path}, 错误: {e}")
-    
-    collect_subdirs(directory_path)
+    # 子目录列表与之后各子目录的结构/内容都来自同一棵缓存的目录树，只遍历一次文件系统
+    subdirs = [
+        (str(path), len(path.relative_to(directory_path).parts))
+        for path in run_sync(local_code_client.get_subdirectories(Path(directory_path)))
+    ]
     
     # 按深度降序排序（最深层在前）
     subdirs.sort(key=lambda x: x[1], reverse=True)
@@ -129,14 +536,22 @@ def get_all_subdirectories(directory_path):
 def generate_documentation_for_directory(directory_path, llm_client):
     """为指定目录生成文档"""
     try:
-        # 创建LocalCodeClient实例
-        code_client = LocalCodeClient()
-        
         # 获取目录结构
-        directory_structure = asyncio.run(code_client.get_directory_structure(Path(directory_path)))
-        
-        # 获取代码内容
-        codebase = asyncio.run(code_client.get_all_content_from_directory(Path(directory_path)))
+        directory_structure = run_sync(local_code_client.get_directory_structure(Path(directory_path)))
+        
+        # 流式读取代码内容，达到提示词长度上限后停止读取其余文件，避免大目录全部读入内存
+        parts = []
+        length = 0
+        truncated = False
+        for chunk in local_code_client.iter_content_sync(Path(directory_path), chunk_size=10000):
+            if length >= 200000:  # 200K字符限制
+                truncated = True
+                break
+            parts.append(chunk)
+            length += len(chunk)
+        codebase = ''.join(parts)
+        if truncated:
+            codebase += "\n\n... (代码内容过长，已截断)"
         
         # 生成业务逻辑文档
         business_prompt = BUSINESS_SUMMARY_PROMPT.format(
@@ -197,6 +612,17 @@ def save_documentation(docs_data, base_docs_path, directory_name):
         print(f"保存文档失败: {e}")
         raise e
 
+@app.url_value_preprocessor
+def resolve_upload_storage(endpoint, values):
+    """接口中的file_id统一解析为共享存储的ID，内容相同的上传读取同一份解压目录、索引与文档"""
+    if not values or 'file_id' not in values or endpoint in ('delete_upload', 'apply_upload_delta'):
+        return
+    storage_id = get_storage_id(values['file_id'])
+    if storage_id is None:
+        abort(make_response(jsonify({'error': '项目不存在或已被删除'}), 404))
+    values['file_id'] = storage_id
+    record_project_access(storage_id)
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """健康检查端点"""
@@ -207,6 +633,246 @@ def health_check():
         'extracted_folder': app.config['EXTRACTED_FOLDER']
     })
 
+def get_upload_sessions_folder():
+    """分片上传会话目录"""
+    return os.path.join(app.config['TEMP_FOLDER'], 'uploads')
+
+def get_upload_mode(mode=None):
+    """上传请求指定的处理方式（mode参数），未指定时使用配置的默认值；取值无效时返回None"""
+    # 只读取查询参数，流式上传的请求体不能被当作表单解析
+    mode = mode or request.args.get('mode') or app.config['UPLOAD_EXTRACT_MODE']
+    return mode if mode in ('async', 'extract', 'lazy') else None
+
+def get_pipelines_folder():
+    """上传后处理进度目录"""
+    return os.path.join(app.config['META_FOLDER'], 'pipelines')
+
+def require_project_storage(file_id):
+    """流水线阶段使用的项目存储，项目已被删除时抛出异常结束流水线"""
+    storage = get_project_storage(file_id)
+    if storage is None:
+        raise FileNotFoundError('项目不存在或已被删除')
+    return storage
+
+def pipeline_extract(file_id):
+    """流水线阶段：解压（或写入打包文件）代码文件与文档、配置文件"""
+    storage = require_project_storage(file_id)
+    if app.config['PROJECT_STORAGE'] == 'pack':
+        if storage.kind == SOURCE_DIRECTORY:
+            return {'storage': storage.kind}
+        if not get_project_pack(file_id).exists():
+            pack_uploaded_zip(file_id)
+        return {'storage': 'pack', 'pack_path': get_project_pack(file_id).pack_path}
+    extracted_path = resolve_extracted_path(file_id)
+    if extracted_path is None:
+        raise FileNotFoundError('项目不存在或已被删除')
+    return {'storage': SOURCE_DIRECTORY, 'extracted_path': extracted_path}
+
+def pipeline_index(file_id):
+    """流水线阶段：构建项目索引与内容搜索索引"""
+    storage = require_project_storage(file_id)
+    project_index = get_storage_index(storage)
+    get_trigram_index(file_id, storage)
+    get_path_list(file_id)
+    return {'code_files': len(project_index.code_files()), 'built_at': project_index.built_at()}
+
+def pipeline_stats(file_id):
+    """流水线阶段：计算项目统计，首个浏览页面直接使用"""
+    return get_storage_index(require_project_storage(file_id)).stats()
+
+def pipeline_symbols(file_id):
+    """流水线阶段：提取符号并构建导入依赖图"""
+    storage = require_project_storage(file_id)
+    get_symbol_index(file_id, storage)
+    import_graph = get_import_graph(file_id, storage)
+    return {'import_cycles': len(import_graph.cycles())}
+
+def pipeline_summarize(file_id):
+    """流水线阶段：生成总结文档，任务登记在总结任务管理器中，可通过总结任务接口取消或暂停"""
+    # 先初始化LLM客户端，未配置时不创建任务检查点
+    llm_client = QwenLLM()
+    run = create_summarize_run(resolve_extracted_path(file_id))
+    if run is None:
+        return {'run_id': None}
+    job = summarize_jobs.register(run)
+    try:
+        summary = execute_summarize_run(job, llm_client)['data']
+    finally:
+        summarize_jobs.release(run.run_id)
+    return {
+        'run_id': run.run_id,
+        'success_count': summary['success_count'],
+        'error_count': summary['error_count']
+    }
+
+def start_upload_pipeline(file_id, auto_summarize=False):
+    """提交上传后处理流水线，返回初始进度"""
+    stages = [
+        (STAGE_EXTRACT, lambda: pipeline_extract(file_id)),
+        (STAGE_INDEX, lambda: pipeline_index(file_id)),
+        (STAGE_STATS, lambda: pipeline_stats(file_id)),
+        (STAGE_SYMBOLS, lambda: pipeline_symbols(file_id)),
+        (STAGE_SUMMARIZE, lambda: pipeline_summarize(file_id))
+    ]
+    state = PipelineState.create(
+        get_pipelines_folder(), file_id, [name for name, _ in stages],
+        skipped=[] if auto_summarize else [STAGE_SUMMARIZE]
+    )
+    upload_pipelines.submit(state, stages, on_finish=lambda status: get_upload_registry().update_storage(
+        file_id, status=PROJECT_READY if status == PIPELINE_COMPLETED else PROJECT_FAILED
+    ))
+    return state.to_dict(active=True)
+
+def get_auto_summarize(value=None):
+    """上传请求是否要求在后台流水线完成后自动生成总结文档（auto_summarize参数）"""
+    value = value if value is not None else request.args.get('auto_summarize')
+    if value is None:
+        return app.config['UPLOAD_AUTO_SUMMARIZE']
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def process_uploaded_zip(file_id, zip_path, filename, sha256, mode='extract', auto_summarize=False):
+    """
+    校验已保存的ZIP文件并构建项目索引，返回上传接口的响应；
+    async模式只读取中央目录后立即返回，解压与索引交给后台流水线；
+    lazy模式只从中央目录构建项目索引，不解压，上传耗时与压缩包大小无关
+    """
+    extracted_dir = os.path.join(app.config['EXTRACTED_FOLDER'], file_id)
+    
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            # 一次遍历中央目录统计文件信息，同时选出需要解压的成员
+            scan = scan_archive(zip_ref, CODE_EXTENSIONS)
+    except zipfile.BadZipFile:
+        os.remove(zip_path)
+        return jsonify({'error': 'ZIP文件格式错误或已损坏'}), 400
+    
+    if not scan['total_files']:
+        os.remove(zip_path)
+        return jsonify({'error': 'ZIP文件为空'}), 400
+    
+    # 检查是否包含代码文件
+    if not scan['code_files']:
+        os.remove(zip_path)
+        return jsonify({'error': 'ZIP文件中未找到代码文件'}), 400
+    
+    file_stats = get_file_stats(zip_path)
+    
+    # 按内容哈希登记，内容相同的压缩包直接共享已有的存储
+    registry = get_upload_registry()
+    storage_id, is_new = registry.acquire(
+        sha256, file_id, filename, file_stats['size'],
+        stats={key: scan[key] for key in ('total_files', 'code_files', 'total_size')},
+        status=PROJECT_PROCESSING if mode == 'async' else PROJECT_READY
+    )
+    record_project_access(storage_id)
+    if not is_new:
+        return reuse_uploaded_content(file_id, storage_id, zip_path, filename, sha256, scan)
+    
+    # 只并行解压（或写入打包文件）代码文件与文档、配置文件
+    extracted_files = 0
+    if mode == 'extract':
+        try:
+            if app.config['PROJECT_STORAGE'] == 'pack':
+                extracted_files = pack_uploaded_zip(file_id, scan)
+            else:
+                extracted_files = extract_archive(zip_path, extracted_dir, CODE_EXTENSIONS, scan)['extracted_files']
+        except zipfile.BadZipFile:
+            registry.release(file_id)
+            os.remove(zip_path)
+            shutil.rmtree(extracted_dir, ignore_errors=True)
+            get_project_pack(file_id).delete()
+            return jsonify({'error': 'ZIP文件格式错误或已损坏'}), 400
+    
+    # 构建项目索引，之后的结构、统计和搜索接口直接查询索引；
+    # async模式的索引由后台流水线构建，压缩包写入完成即可返回
+    try:
+        if mode == 'lazy':
+            # 结构与文件接口直接读取压缩包
+            get_project_catalog(file_id)
+        elif mode == 'extract':
+            storage = get_project_storage(file_id)
+            get_storage_index(storage)
+            get_trigram_index(file_id, storage)
+            get_symbol_index(file_id, storage)
+            get_import_graph(file_id, storage)
+    except Exception as e:
+        print(f"⚠️ 构建项目索引失败，将在首次访问时重试: {e}")
+    
+    print(f"✅ ZIP文件解析成功: {filename} -> {scan['total_files']}个文件, {scan['code_files']}个代码文件")
+    
+    pipeline = None
+    if mode == 'async':
+        pipeline = start_upload_pipeline(file_id, auto_summarize)
+    
+    return jsonify({
+        'success': True,
+        'message': 'ZIP文件上传成功，正在后台解析' if pipeline else 'ZIP文件上传并解析成功',
+        'data': {
+            **upload_response_data(file_id, file_id, filename, sha256, scan, file_stats['size'], extracted_files),
+            'mode': mode,
+            'deduplicated': False,
+            'pipeline': pipeline
+        }
+    }), 202 if pipeline else 200
+
+def upload_response_data(file_id, storage_id, filename, sha256, scan, size, extracted_files=0):
+    """上传接口响应中的公共字段"""
+    return {
+        'file_id': file_id,
+        'storage_id': storage_id,
+        'original_name': filename,
+        'file_size': size,
+        'sha256': sha256,
+        'extracted_path': os.path.join(app.config['EXTRACTED_FOLDER'], storage_id),
+        'stats': {
+            'total_files': scan['total_files'],
+            'code_files': scan['code_files'],
+            'directories': scan['directories'],
+            'extracted_files': extracted_files,
+            'total_size': size
+        },
+        'uploaded_at': datetime.now().isoformat()
+    }
+
+def reuse_uploaded_content(file_id, storage_id, zip_path, filename, sha256, scan):
+    """内容与已有上传相同：删除本次保存的压缩包，共享已有的解压目录、索引与文档"""
+    size = os.path.getsize(zip_path)
+    storage_zip = get_zip_path(storage_id)
+    if os.path.exists(storage_zip):
+        os.remove(zip_path)
+    else:
+        # 已有存储的压缩包已被清理，用本次上传的文件补回
+        os.replace(zip_path, storage_zip)
+    
+    print(f"♻️ ZIP文件内容已存在: {filename} -> 共享存储 {storage_id}")
+    
+    return jsonify({
+        'success': True,
+        'message': 'ZIP文件上传成功，内容与已有项目相同',
+        'data': {
+            **upload_response_data(file_id, storage_id, filename, sha256, scan, size),
+            'deduplicated': True,
+            **describe_storage(storage_id),
+            'pipeline': upload_pipelines.get(get_pipelines_folder(), storage_id)
+        }
+    })
+
+def save_upload_stream(stream, zip_path):
+    """将上传流分块写入磁盘并增量计算SHA-256，返回(sha256, 文件头部字节, 大小)"""
+    hasher = hashlib.sha256()
+    header = bytearray()
+    try:
+        with open(zip_path, 'wb') as f:
+            size = stream_to_file(stream, f, hasher, app.config['MAX_CONTENT_LENGTH'], header)
+            # 落盘后再返回，后台流水线与之后的请求都依赖这份文件
+            f.flush()
+            os.fsync(f.fileno())
+    except Exception:
+        if os.path.exists(zip_path):
+            os.remove(zip_path)
+        raise
+    return hasher.hexdigest(), bytes(header), size
+
 @app.route('/api/upload/zip', methods=['POST'])
 def upload_zip():
     """上传ZIP文件"""
@@ -226,97 +892,229 @@ def upload_zip():
         if file_extension.lower() != '.zip':
             return jsonify({'error': '只支持上传ZIP格式的文件'}), 400
         
-        # 保存文件
+        mode = get_upload_mode(request.form.get('mode'))
+        if mode is None:
+            return jsonify({'error': 'mode参数无效，可选值为async、extract或lazy'}), 400
+        auto_summarize = get_auto_summarize(request.form.get('auto_summarize'))
+        
+        # 分块保存文件，同时计算SHA-256
         zip_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}.zip")
-        file.save(zip_path)
+        sha256, header, _ = save_upload_stream(file.stream, zip_path)
         
         # 验证ZIP文件
-        if not is_zip_file(zip_path):
+        if not is_zip_header(header):
             os.remove(zip_path)
             return jsonify({'error': '文件格式错误，请上传有效的ZIP文件'}), 400
         
-        # 解压文件
-        extracted_dir = os.path.join(app.config['EXTRACTED_FOLDER'], file_id)
-        Path(extracted_dir).mkdir(parents=True, exist_ok=True)
+        return process_uploaded_zip(file_id, zip_path, filename, sha256, mode, auto_summarize)
+            
+    except UploadTooLarge:
+        return jsonify({'error': '文件大小超过限制'}), 413
+    except Exception as e:
+        print(f"文件上传处理失败: {e}")
+        return jsonify({'error': '文件上传失败', 'message': str(e)}), 500
+
+@app.route('/api/upload/zip/stream', methods=['POST'])
+def upload_zip_stream():
+    """以请求体直接上传ZIP文件（不经过multipart解析），边接收边写入磁盘"""
+    try:
+        filename = secure_filename(request.args.get('filename') or request.headers.get('X-File-Name', ''))
+        
+        if not filename:
+            return jsonify({'error': '文件名不能为空'}), 400
         
-        try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                # 检查ZIP文件内容
-                file_list = zip_ref.namelist()
-                
-                if not file_list:
-                    os.remove(zip_path)
-                    shutil.rmtree(extracted_dir, ignore_errors=True)
-                    return jsonify({'error': 'ZIP文件为空'}), 400
-                
-                # 检查是否包含代码文件
-                has_code_files = any(
-                    is_code_file(name) for name in file_list 
-                    if not name.endswith('/')  # 排除目录
-                )
-                
-                if not has_code_files:
-                    os.remove(zip_path)
-                    shutil.rmtree(extracted_dir, ignore_errors=True)
-                    return jsonify({'error': 'ZIP文件中未找到代码文件'}), 400
-                
-                # 解压文件
-                zip_ref.extractall(extracted_dir)
-                
-                # 统计文件信息
-                total_files = len(file_list)
-                code_files = len([name for name in file_list if is_code_file(name) and not name.endswith('/')])
-                directories = len([name for name in file_list if name.endswith('/')])
-                
-                file_stats = get_file_stats(zip_path)
-                
-                print(f"✅ ZIP文件解析成功: {filename} -> {total_files}个文件, {code_files}个代码文件")
-                
-                return jsonify({
-                    'success': True,
-                    'message': 'ZIP文件上传并解析成功',
-                    'data': {
-                        'file_id': file_id,
-                        'original_name': filename,
-                        'file_size': file_stats['size'],
-                        'extracted_path': extracted_dir,
-                        'stats': {
-                            'total_files': total_files,
-                            'code_files': code_files,
-                            'directories': directories,
-                            'total_size': file_stats['size']
-                        },
-                        'uploaded_at': datetime.now().isoformat()
-                    }
-                })
-                
-        except zipfile.BadZipFile:
+        if Path(filename).suffix.lower() != '.zip':
+            return jsonify({'error': '只支持上传ZIP格式的文件'}), 400
+        
+        mode = get_upload_mode()
+        if mode is None:
+            return jsonify({'error': 'mode参数无效，可选值为async、extract或lazy'}), 400
+        auto_summarize = get_auto_summarize()
+        
+        file_id = str(uuid.uuid4())
+        zip_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}.zip")
+        sha256, header, size = save_upload_stream(request.stream, zip_path)
+        
+        if not size:
             os.remove(zip_path)
-            shutil.rmtree(extracted_dir, ignore_errors=True)
-            return jsonify({'error': 'ZIP文件格式错误或已损坏'}), 400
-            
+            return jsonify({'error': '请选择要上传的ZIP文件'}), 400
+        
+        if not is_zip_header(header):
+            os.remove(zip_path)
+            return jsonify({'error': '文件格式错误，请上传有效的ZIP文件'}), 400
+        
+        return process_uploaded_zip(file_id, zip_path, filename, sha256, mode, auto_summarize)
+        
+    except UploadTooLarge:
+        return jsonify({'error': '文件大小超过限制'}), 413
     except Exception as e:
         print(f"文件上传处理失败: {e}")
         return jsonify({'error': '文件上传失败', 'message': str(e)}), 500
 
+@app.route('/api/upload/sessions', methods=['POST'])
+def create_upload_session():
+    """创建可续传的分片上传会话"""
+    try:
+        data = request.get_json(silent=True) or {}
+        filename = secure_filename(data.get('filename', ''))
+        
+        if not filename or Path(filename).suffix.lower() != '.zip':
+            return jsonify({'error': '只支持上传ZIP格式的文件'}), 400
+        
+        try:
+            total_size = int(data.get('size', 0))
+        except (TypeError, ValueError):
+            return jsonify({'error': '文件大小必须为整数'}), 400
+        
+        if total_size <= 0:
+            return jsonify({'error': '文件大小无效'}), 400
+        
+        if total_size > app.config['MAX_CONTENT_LENGTH']:
+            return jsonify({'error': '文件大小超过限制'}), 413
+        
+        session = UploadSession.create(get_upload_sessions_folder(), filename, total_size)
+        
+        return jsonify({
+            'success': True,
+            'data': session.to_dict()
+        })
+        
+    except Exception as e:
+        print(f"创建上传会话失败: {e}")
+        return jsonify({'error': '创建上传会话失败'}), 500
+
+@app.route('/api/upload/sessions/<upload_id>', methods=['GET'])
+def get_upload_session(upload_id):
+    """查询上传会话状态，断线后从received处继续上传"""
+    session = UploadSession.load(get_upload_sessions_folder(), upload_id)
+    if session is None:
+        return jsonify({'error': '上传会话不存在或已过期'}), 404
+    
+    return jsonify({
+        'success': True,
+        'data': session.to_dict()
+    })
+
+@app.route('/api/upload/sessions/<upload_id>', methods=['PUT'])
+def upload_session_chunk(upload_id):
+    """上传一个分片（请求体为分片内容，offset为分片起始位置）"""
+    try:
+        session = UploadSession.load(get_upload_sessions_folder(), upload_id)
+        if session is None:
+            return jsonify({'error': '上传会话不存在或已过期'}), 404
+        
+        try:
+            offset = int(request.args.get('offset', 0))
+        except ValueError:
+            return jsonify({'error': 'offset必须为整数'}), 400
+        
+        try:
+            received = session.write_chunk(request.stream, offset)
+        except OffsetMismatch as e:
+            return jsonify({
+                'error': '分片位置与已接收的数据不一致',
+                'received': e.received
+            }), 409
+        except UploadTooLarge:
+            return jsonify({'error': '上传内容超过声明的文件大小'}), 413
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'upload_id': session.upload_id,
+                'received': received,
+                'total_size': session.total_size,
+                'complete': received == session.total_size
+            }
+        })
+        
+    except Exception as e:
+        print(f"上传分片失败: {e}")
+        return jsonify({'error': '上传分片失败'}), 500
+
+@app.route('/api/upload/sessions/<upload_id>/complete', methods=['POST'])
+def complete_upload_session(upload_id):
+    """完成分片上传：校验大小与SHA-256后解析ZIP文件"""
+    try:
+        session = UploadSession.load(get_upload_sessions_folder(), upload_id)
+        if session is None:
+            return jsonify({'error': '上传会话不存在或已过期'}), 404
+        
+        if not session.is_complete:
+            return jsonify({
+                'error': '文件尚未上传完成',
+                'received': session.received,
+                'total_size': session.total_size
+            }), 409
+        
+        data = request.get_json(silent=True) or {}
+        mode = get_upload_mode(data.get('mode'))
+        if mode is None:
+            return jsonify({'error': 'mode参数无效，可选值为async、extract或lazy'}), 400
+        auto_summarize = get_auto_summarize(data.get('auto_summarize'))
+        
+        sha256 = session.sha256()
+        expected = data.get('sha256')
+        if expected and expected.lower() != sha256:
+            return jsonify({'error': '文件校验失败，SHA-256不一致', 'sha256': sha256}), 400
+        
+        if not is_zip_header(session.header()):
+            session.discard()
+            return jsonify({'error': '文件格式错误，请上传有效的ZIP文件'}), 400
+        
+        file_id = str(uuid.uuid4())
+        zip_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}.zip")
+        session.finish(zip_path)
+        
+        return process_uploaded_zip(file_id, zip_path, session.filename, sha256, mode, auto_summarize)
+        
+    except Exception as e:
+        print(f"完成上传失败: {e}")
+        return jsonify({'error': '文件上传失败', 'message': str(e)}), 500
+
+@app.route('/api/upload/sessions/<upload_id>', methods=['DELETE'])
+def delete_upload_session(upload_id):
+    """取消分片上传并删除已接收的数据"""
+    session = UploadSession.load(get_upload_sessions_folder(), upload_id)
+    if session is None:
+        return jsonify({'error': '上传会话不存在或已过期'}), 404
+    
+    session.discard()
+    return jsonify({
+        'success': True,
+        'message': '上传已取消'
+    })
+
 @app.route('/api/upload/status/<file_id>', methods=['GET'])
 def get_upload_status(file_id):
     """获取上传状态"""
     try:
         extracted_path = os.path.join(app.config['EXTRACTED_FOLDER'], file_id)
+        pipeline = upload_pipelines.get(get_pipelines_folder(), file_id)
         
-        if not os.path.exists(extracted_path):
+        if os.path.exists(extracted_path):
+            stats = get_file_stats(extracted_path)
+            mode = 'extract'
+        elif get_project_pack(file_id).exists():
+            stats = get_file_stats(get_project_pack(file_id).pack_path)
+            mode = 'extract'
+        elif os.path.exists(get_zip_path(file_id)):
+            # 未解压的项目以压缩包的时间为准
+            stats = get_file_stats(get_zip_path(file_id))
+            mode = 'async' if pipeline and pipeline['status'] in (PIPELINE_QUEUED, PIPELINE_RUNNING) else 'lazy'
+        else:
             return jsonify({'error': '文件不存在或已被删除'}), 404
         
-        stats = get_file_stats(extracted_path)
-        
         return jsonify({
             'success': True,
             'data': {
                 'file_id': file_id,
                 'exists': True,
+                'mode': mode,
+                'extracted': mode == 'extract',
                 'extracted_at': stats['created_at'],
-                'last_modified': stats['modified_at']
+                'last_modified': stats['modified_at'],
+                'pipeline': pipeline
             }
         })
         
@@ -326,18 +1124,48 @@ def get_upload_status(file_id):
 
 @app.route('/api/upload/<file_id>', methods=['DELETE'])
 def delete_upload(file_id):
-    """删除上传的文件"""
+    """删除上传的文件；内容仍被其他上传引用时只删除本次上传的登记"""
     try:
+        registry = get_upload_registry()
+        released = registry.release(file_id)
+        if released is not None:
+            file_id, remaining = released
+            if remaining:
+                return jsonify({
+                    'success': True,
+                    'message': '文件删除成功',
+                    'data': {'storage_id': file_id, 'remaining_references': remaining}
+                })
+        elif registry.resolve(file_id) is None:
+            return jsonify({'error': '文件不存在或已被删除'}), 404
+        
         zip_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}.zip")
         extracted_path = os.path.join(app.config['EXTRACTED_FOLDER'], file_id)
         
-        # 删除ZIP文件
+        # 删除ZIP文件（先关闭未解压项目的压缩包句柄）
+        zip_projects.discard(file_id)
         if os.path.exists(zip_path):
             os.remove(zip_path)
         
-        # 删除解压目录
+        # 删除解压目录与打包文件（释放其引用的共享内容）
         if os.path.exists(extracted_path):
             shutil.rmtree(extracted_path)
+        get_project_pack(file_id).delete()
+        
+        # 删除项目索引
+        ProjectIndex(get_index_path(file_id), CODE_EXTENSIONS).delete()
+        get_disk_quota_manager().tracker.forget(file_id)
+        SymbolIndex(get_symbol_index_path(file_id)).delete()
+        ImportGraph(get_import_graph_path(file_id)).delete()
+        trigram_indexes.discard(file_id)
+        path_lists.discard(file_id)
+        pipeline_state = PipelineState.load(get_pipelines_folder(), file_id)
+        if pipeline_state is not None:
+            pipeline_state.delete()
+        bm25_indexes.discard(file_id)
+        for index_path in (get_trigram_index_path(file_id), get_bm25_index_path(file_id)):
+            if os.path.exists(index_path):
+                os.remove(index_path)
         
         return jsonify({
             'success': True,
@@ -348,47 +1176,294 @@ def delete_upload(file_id):
         print(f"删除文件失败: {e}")
         return jsonify({'error': '删除文件失败'}), 500
 
+def parse_deleted_paths(value):
+    """解析增量上传的删除列表（JSON数组或每行一个路径），包含非法路径时返回None"""
+    if not value or not value.strip():
+        return []
+    try:
+        paths = json.loads(value)
+    except ValueError:
+        paths = value.splitlines()
+    if not isinstance(paths, list):
+        return None
+    normalized = []
+    for path in paths:
+        if not isinstance(path, str):
+            return None
+        if not path.strip():
+            continue
+        path = normalize_member_name(path.strip())
+        if path is None:
+            return None
+        normalized.append(path.replace('/', os.sep))
+    return normalized
+
+def remove_stale_summaries(storage_id, paths):
+    """删除已删除或已修改的源文件对应的总结文档，paths中的目录连同其下的文件一起处理"""
+    storage_docs = os.path.join(app.config['DOCS_FOLDER'], storage_id)
+    removed = 0
+    for doc in ensure_doc_catalog(storage_id).remove_sources(storage_id, paths):
+        doc_path = os.path.join(storage_docs, doc['doc_path'])
+        if os.path.exists(doc_path):
+            os.remove(doc_path)
+            removed += 1
+    return removed
+
+@app.route('/api/upload/<file_id>/delta', methods=['POST'])
+def apply_upload_delta(file_id):
+    """
+    增量更新已上传的项目：上传只包含新增、修改文件的ZIP（deltaZip）与删除列表（deleted），
+    就地更新解压目录与项目索引，只为变化的代码文件重新生成总结文档；
+    上传量与处理时间与变化的大小成正比，与项目大小无关
+    """
+    delta_path = None
+    try:
+        deleted = parse_deleted_paths(request.form.get('deleted'))
+        if deleted is None:
+            return jsonify({'error': 'deleted参数格式错误，应为相对路径的JSON数组或每行一个路径'}), 400
+        
+        file = request.files.get('deltaZip')
+        if (file is None or file.filename == '') and not deleted:
+            return jsonify({'error': '请上传变化文件的ZIP或指定要删除的文件'}), 400
+        
+        registry = get_upload_registry()
+        source_id = registry.resolve(file_id)
+        if source_id is None or get_project_storage(source_id) is None:
+            return jsonify({'error': '项目不存在或已被删除'}), 404
+        if upload_pipelines.is_active(source_id):
+            return jsonify({'error': '项目正在后台解析，请稍后再试'}), 409
+        
+        # 保存并读取增量压缩包的中央目录
+        scan = None
+        if file is not None and file.filename != '':
+            delta_path = os.path.join(app.config['TEMP_FOLDER'], f"delta-{uuid.uuid4()}.zip")
+            _, header, size = save_upload_stream(file.stream, delta_path)
+            if not size or not is_zip_header(header):
+                return jsonify({'error': '文件格式错误，请上传有效的ZIP文件'}), 400
+            try:
+                with zipfile.ZipFile(delta_path, 'r') as zip_ref:
+                    scan = scan_archive(zip_ref, CODE_EXTENSIONS)
+            except zipfile.BadZipFile:
+                return jsonify({'error': 'ZIP文件格式错误或已损坏'}), 400
+        
+        source_path = resolve_extracted_path(source_id)
+        if source_path is None:
+            return jsonify({'error': '项目不存在或已被删除'}), 404
+        
+        # 修改后的内容不再与原压缩包一致，之后相同的上传不能复用这份存储；
+        # 存储被其他上传共享时复制一份再修改
+        storage_id = source_id
+        detached = registry.detach(file_id)
+        if detached is not None:
+            storage_id = detached[1]
+        record_project_access(storage_id)
+        extracted_path = os.path.join(app.config['EXTRACTED_FOLDER'], storage_id)
+        if storage_id != source_id:
+            shutil.copytree(source_path, extracted_path)
+            source_docs = os.path.join(app.config['DOCS_FOLDER'], source_id)
+            if os.path.exists(source_docs):
+                shutil.copytree(source_docs, os.path.join(app.config['DOCS_FOLDER'], storage_id))
+            ensure_doc_catalog(source_id).copy(source_id, storage_id)
+        
+        # 先删除再解压，同一路径既在删除列表又在压缩包中时以压缩包为准
+        deleted_paths = []
+        for path in deleted:
+            full_path = os.path.join(extracted_path, path)
+            if os.path.isdir(full_path):
+                shutil.rmtree(full_path)
+            elif os.path.exists(full_path):
+                os.remove(full_path)
+            else:
+                continue
+            deleted_paths.append(path)
+        
+        # 只解压代码文件与允许的附加文件，其余文件不会写入项目，在结果中列出
+        changed_paths = []
+        skipped_files = scan['skipped'] if scan is not None else []
+        if scan is not None and scan['members']:
+            extract_members(delta_path, scan, extracted_path)
+            changed_paths = [path.replace('/', os.sep) for path in scan['members']]
+        
+        # 压缩包与打包文件已与解压目录不一致，之后以解压目录为准
+        zip_projects.discard(storage_id)
+        storage_zip = get_zip_path(storage_id)
+        if os.path.exists(storage_zip):
+            os.remove(storage_zip)
+        get_project_pack(storage_id).delete()
+        
+        # 只重新读取变化的文件，内容搜索、符号、依赖图与相关性索引在下次使用时按内容哈希同步
+        touched = deleted_paths + changed_paths
+        project_index = ProjectIndex(get_index_path(storage_id), CODE_EXTENSIONS)
+        project_index.apply_changes(extracted_path, touched)
+        
+        # 只删除已删除文件的文档；修改过的文件保留原文档（文档过期检查会报告为changed），
+        # 重新总结完成后登记新文档时替换
+        changed_code = {path for path in changed_paths if is_code_file(path)}
+        removed_docs = remove_stale_summaries(storage_id, deleted_paths)
+        
+        # 增量更新后按解压目录中的文件更新项目列表中的统计
+        registry.update_storage(
+            storage_id, status=PROJECT_READY, doc_count=count_project_docs(storage_id), **project_index.totals()
+        )
+        
+        # 未指定summarize时，已生成过文档的项目自动更新变化文件的文档
+        summarize = request.form.get('summarize')
+        if summarize is None:
+            summarize = os.path.exists(os.path.join(app.config['DOCS_FOLDER'], storage_id))
+        else:
+            summarize = summarize.lower() in ('1', 'true', 'yes')
+        
+        summarize_run = None
+        summarize_error = None
+        if summarize and changed_code:
+            try:
+                llm_client = QwenLLM()
+                run = create_summarize_run(extracted_path, only_paths=changed_code)
+                if run is not None:
+                    job = summarize_jobs.register(run)
+                    summarize_jobs.submit(job, lambda job: execute_summarize_run(job, llm_client))
+                    summarize_run = {**run.to_dict(), 'status': job.state}
+            except Exception as e:
+                print(f"增量总结启动失败: {e}")
+                summarize_error = str(e)
+        
+        print(f"🔁 项目增量更新 {file_id} -> {storage_id}: {len(changed_paths)} 个文件更新, "
+              f"{len(deleted_paths)} 个路径删除, {len(skipped_files)} 个文件跳过")
+        
+        return jsonify({
+            'success': True,
+            'message': '项目增量更新成功',
+            'data': {
+                'file_id': file_id,
+                'storage_id': storage_id,
+                'changed_files': len(changed_paths),
+                'deleted_paths': len(deleted_paths),
+                'changed_code_files': len(changed_code),
+                'skipped_files': skipped_files,
+                'removed_docs': removed_docs,
+                'summarize_run': summarize_run,
+                'summarize_error': summarize_error,
+                'updated_at': datetime.now().isoformat()
+            }
+        })
+        
+    except UploadTooLarge:
+        return jsonify({'error': '文件大小超过限制'}), 413
+    except Exception as e:
+        print(f"项目增量更新失败: {e}")
+        return jsonify({'error': '项目增量更新失败', 'message': str(e)}), 500
+    finally:
+        if delta_path and os.path.exists(delta_path):
+            os.remove(delta_path)
+
+def describe_storage(storage_id):
+    """存储的解压与文档状态"""
+    # 检查是否有对应的解压目录或打包文件
+    has_extracted = os.path.exists(os.path.join(app.config['EXTRACTED_FOLDER'], storage_id))
+    has_pack = get_project_pack(storage_id).exists()
+    
+    # 检查是否有生成的文档
+    has_docs = os.path.exists(os.path.join(app.config['DOCS_FOLDER'], storage_id))
+    
+    return {
+        'has_extracted': has_extracted,
+        'has_pack': has_pack,
+        'mode': 'extract' if has_extracted or has_pack else 'lazy',
+        'has_docs': has_docs
+    }
+
+def import_legacy_uploads(registry):
+    """将登记表建立之前的上传（uploads目录中未登记的压缩包）补登记到登记表，只执行一次"""
+    if registry.is_legacy_imported():
+        return
+    uploads = []
+    uploads_dir = app.config['UPLOAD_FOLDER']
+    if os.path.exists(uploads_dir):
+        for filename in os.listdir(uploads_dir):
+            if not filename.endswith('.zip'):
+                continue
+            stats = get_file_stats(os.path.join(uploads_dir, filename))
+            uploads.append({
+                'file_id': filename[:-4],  # 移除.zip扩展名
+                'original_name': filename,
+                'size': stats['size'],
+                'uploaded_at': stats['created_at']
+            })
+    registry.import_legacy(uploads)
+
 @app.route('/api/projects', methods=['GET'])
 def get_projects():
-    """获取所有已上传的项目列表"""
-    try:
-        projects = []
-        
-        # 从uploads目录获取项目信息
-        uploads_dir = app.config['UPLOAD_FOLDER']
-        if os.path.exists(uploads_dir):
-            for filename in os.listdir(uploads_dir):
-                if filename.endswith('.zip'):
-                    file_id = filename[:-4]  # 移除.zip扩展名
-                    file_path = os.path.join(uploads_dir, filename)
-                    stats = get_file_stats(file_path)
-                    
-                    # 检查是否有对应的解压目录
-                    extracted_path = os.path.join(app.config['EXTRACTED_FOLDER'], file_id)
-                    has_extracted = os.path.exists(extracted_path)
-                    
-                    # 检查是否有生成的文档
-                    docs_path = os.path.join(app.config['DOCS_FOLDER'], file_id)
-                    has_docs = os.path.exists(docs_path)
-                    
-                    projects.append({
-                        'file_id': file_id,
-                        'original_name': filename,
-                        'file_size': stats['size'],
-                        'uploaded_at': stats['created_at'],
-                        'modified_at': stats['modified_at'],
-                        'has_extracted': has_extracted,
-                        'has_docs': has_docs
-                    })
-        
-        # 按上传时间倒序排序
-        projects.sort(key=lambda x: x['uploaded_at'], reverse=True)
+    """
+    分页获取已上传的项目列表（从登记表查询）
+    
+    参数: limit 每页条数，cursor 上一页返回的next_cursor，sort 排序字段（uploaded_at、name、size），
+    order 排序方向（asc、desc），status 项目状态，q 文件名关键字，has_docs 是否已生成文档，
+    with_total 是否返回项目总数（默认只在第一页返回，之后的页面total_projects为null）
+    """
+    try:
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), 200)
+        except ValueError:
+            return jsonify({'error': 'limit必须为整数'}), 400
+        
+        sort = request.args.get('sort', 'uploaded_at')
+        if sort not in SORT_COLUMNS:
+            return jsonify({'error': f"sort参数无效，可选值为{'、'.join(SORT_COLUMNS)}"}), 400
+        
+        order = request.args.get('order', 'desc').lower()
+        if order not in ('asc', 'desc'):
+            return jsonify({'error': 'order参数无效，可选值为asc或desc'}), 400
+        
+        status = request.args.get('status')
+        if status and status not in (PROJECT_PROCESSING, PROJECT_READY, PROJECT_FAILED):
+            return jsonify({'error': 'status参数无效，可选值为processing、ready或failed'}), 400
+        
+        cursor = None
+        if request.args.get('cursor'):
+            cursor = decode_cursor(request.args['cursor'])
+            if cursor is None:
+                return jsonify({'error': 'cursor参数无效'}), 400
+        
+        has_docs = request.args.get('has_docs')
+        if has_docs is not None:
+            has_docs = has_docs.lower() in ('1', 'true', 'yes')
+        
+        with_total = request.args.get('with_total')
+        if with_total is not None:
+            with_total = with_total.lower() in ('1', 'true', 'yes')
+        
+        registry = get_upload_registry()
+        import_legacy_uploads(registry)
+        rows, next_cursor, total = registry.list_projects(
+            limit=limit, cursor=cursor, sort=sort, descending=order == 'desc',
+            status=status, query=request.args.get('q'), has_docs=has_docs, with_total=with_total
+        )
+        
+        # 内容相同的上传共享同一份存储
+        projects = [{
+            'file_id': row['file_id'],
+            'original_name': row['original_name'],
+            'file_size': row['file_size'],
+            'uploaded_at': row['uploaded_at'],
+            'modified_at': row['updated_at'] or row['uploaded_at'],
+            'sha256': row['sha256'],
+            'storage_id': row['storage_id'],
+            'shared': row['refcount'] > 1,
+            'status': row['status'],
+            'total_files': row['total_files'],
+            'code_files': row['code_files'],
+            'total_size': row['total_size'],
+            'doc_count': row['doc_count'],
+            'has_docs': row['doc_count'] > 0
+        } for row in rows]
         
         return jsonify({
             'success': True,
             'data': {
                 'projects': projects,
-                'total_projects': len(projects)
+                'total_projects': total,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             }
         })
         
@@ -400,42 +1475,22 @@ def get_projects():
 def get_project_structure(file_id):
     """获取项目结构"""
     try:
-        extracted_path = os.path.join(app.config['EXTRACTED_FOLDER'], file_id)
+        # 未解压的项目直接读取ZIP中央目录；revalidate=true时检查全部目录，发现在外部修改的文件
+        revalidate = request.args.get('revalidate', 'false').lower() == 'true'
+        project_index = get_project_catalog(file_id, revalidate=revalidate)
         
-        if not os.path.exists(extracted_path):
+        if project_index is None:
             return jsonify({'error': '项目不存在或已被删除'}), 404
         
-        # 获取目录结构
-        structure = get_directory_structure(extracted_path)
-        
-        # 统计信息
-        total_files = 0
-        total_directories = 0
-        total_size = 0
-        
-        def count_items(items):
-            nonlocal total_files, total_directories, total_size
-            for item in items:
-                if item['type'] == 'directory':
-                    total_directories += 1
-                    if 'children' in item:
-                        count_items(item['children'])
-                else:
-                    total_files += 1
-                    total_size += item.get('size', 0)
-        
-        count_items(structure)
+        # 从项目索引获取目录结构与统计
+        structure, stats = project_index.structure()
         
         return jsonify({
             'success': True,
             'data': {
                 'file_id': file_id,
                 'structure': structure,
-                'stats': {
-                    'total_files': total_files,
-                    'total_directories': total_directories,
-                    'total_size': total_size
-                }
+                'stats': stats
             }
         })
         
@@ -445,62 +1500,54 @@ def get_project_structure(file_id):
 
 @app.route('/api/analysis/file/<file_id>', methods=['GET'])
 def read_file_content(file_id):
-    """读取文件内容"""
+    """读取文件内容（解压目录、打包文件或未解压的压缩包）"""
     try:
         file_path = request.args.get('filePath')
         
         if not file_path:
             return jsonify({'error': '缺少文件路径参数'}), 400
         
-        extracted_path = os.path.join(app.config['EXTRACTED_FOLDER'], file_id)
-        full_file_path = os.path.join(extracted_path, file_path)
+        storage = get_project_storage(file_id)
+        if storage is None:
+            return jsonify({'error': '项目不存在或已被删除'}), 404
         
-        # 安全检查：确保文件路径在解压目录内
-        if not os.path.abspath(full_file_path).startswith(os.path.abspath(extracted_path)):
+        # 安全检查：确保文件路径在项目内
+        if storage.normalize(file_path) is None:
             return jsonify({'error': '访问被拒绝'}), 403
         
         # 检查文件是否存在
-        if not os.path.exists(full_file_path):
+        file_stat = storage.describe(file_path)
+        if file_stat is None:
             return jsonify({'error': '文件不存在'}), 404
         
         # 检查是否为文件
-        if not os.path.isfile(full_file_path):
+        if file_stat['is_dir']:
             return jsonify({'error': '路径不是文件'}), 400
         
         # 检查文件大小（限制为1MB）
-        file_size = os.path.getsize(full_file_path)
-        if file_size > 1024 * 1024:
+        if file_stat['size'] > 1024 * 1024:
             return jsonify({'error': '文件过大，无法读取'}), 413
         
         # 检查文件扩展名
-        file_ext = Path(full_file_path).suffix.lower()
+        file_ext = Path(file_path).suffix.lower()
         if file_ext not in CODE_EXTENSIONS:
             return jsonify({'error': '不支持的文件类型'}), 400
         
-        # 读取文件内容
-        try:
-            with open(full_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except UnicodeDecodeError:
-            # 如果UTF-8解码失败，尝试其他编码
-            try:
-                with open(full_file_path, 'r', encoding='gbk') as f:
-                    content = f.read()
-            except UnicodeDecodeError:
-                return jsonify({'error': '文件编码不支持'}), 400
-        
-        stats = get_file_stats(full_file_path)
+        # 读取文件内容，依次尝试utf-8、gbk编码
+        content = storage.read_text(file_path)
+        if content is None:
+            return jsonify({'error': '文件编码不支持'}), 400
         
         return jsonify({
             'success': True,
             'data': {
                 'file_id': file_id,
                 'file_path': file_path,
-                'file_name': Path(full_file_path).name,
+                'file_name': Path(file_path).name,
                 'extension': file_ext,
-                'size': file_size,
+                'size': file_stat['size'],
                 'content': content,
-                'modified_at': stats['modified_at'],
+                'modified_at': file_stat['modified_at'],
                 'lines': len(content.split('\n'))
             }
         })
@@ -519,46 +1566,13 @@ def search_files(file_id):
         if not query:
             return jsonify({'error': '搜索关键词不能为空'}), 400
         
-        extracted_path = os.path.join(app.config['EXTRACTED_FOLDER'], file_id)
+        project_index = get_project_catalog(file_id)
         
-        if not os.path.exists(extracted_path):
+        if project_index is None:
             return jsonify({'error': '项目不存在或已被删除'}), 404
         
-        results = []
-        
-        def search_files_recursive(dir_path, base_path=''):
-            try:
-                for item in os.listdir(dir_path):
-                    item_path = os.path.join(dir_path, item)
-                    relative_path = os.path.join(base_path, item)
-                    
-                    if os.path.isdir(item_path):
-                        search_files_recursive(item_path, relative_path)
-                    else:
-                        file_ext = Path(item).suffix.lower()
-                        
-                        # 检查扩展名过滤
-                        if extension and file_ext != extension.lower():
-                            continue
-                        
-                        # 检查是否为代码文件
-                        if file_ext not in CODE_EXTENSIONS:
-                            continue
-                        
-                        # 检查文件名是否匹配
-                        if query.lower() in item.lower():
-                            stats = get_file_stats(item_path)
-                            results.append({
-                                'name': item,
-                                'path': relative_path,
-                                'extension': file_ext,
-                                'size': stats['size'],
-                                'modified_at': stats['modified_at']
-                            })
-            except Exception as e:
-                print(f"搜索目录失败: {dir_path}, 错误: {e}")
-        
-        search_files_recursive(extracted_path)
+        # 从项目索引按文件名搜索
+        results = project_index.search_by_name(query, extension)
         
         return jsonify({
             'success': True,
@@ -575,67 +1589,482 @@ def search_files(file_id):
         print(f"搜索文件失败: {e}")
         return jsonify({'error': '搜索文件失败'}), 500
 
-@app.route('/api/analysis/stats/<file_id>', methods=['GET'])
-def get_project_stats(file_id):
-    """获取项目统计信息"""
+@app.route('/api/analysis/find/<file_id>', methods=['GET'])
+def find_files(file_id):
+    """模糊查找文件（子序列匹配，按路径段边界、驼峰、修改时间打分排序）"""
     try:
-        extracted_path = os.path.join(app.config['EXTRACTED_FOLDER'], file_id)
+        query = request.args.get('query', '')
+        extension = request.args.get('extension')
+        
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 200)
+        except ValueError:
+            return jsonify({'error': 'limit必须为整数'}), 400
+        
+        path_list = get_path_list(file_id)
         
-        if not os.path.exists(extracted_path):
+        if path_list is None:
             return jsonify({'error': '项目不存在或已被删除'}), 404
         
-        stats = {
-            'total_files': 0,
-            'total_directories': 0,
-            'total_size': 0,
-            'extensions': {},
-            'largest_files': []
-        }
+        started = datetime.now()
+        found = path_list.find(query, limit, extension)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'file_id': file_id,
+                'query': query,
+                'extension': extension,
+                'results': found['results'],
+                'total_results': found['matched'],
+                'took_ms': round((datetime.now() - started).total_seconds() * 1000, 2)
+            }
+        })
+        
+    except Exception as e:
+        print(f"模糊查找文件失败: {e}")
+        return jsonify({'error': '模糊查找文件失败'}), 500
+
+@app.route('/api/analysis/grep/<file_id>', methods=['GET'])
+def grep_project(file_id):
+    """并行扫描文件内容（不依赖索引），以NDJSON流式返回匹配行"""
+    try:
+        query = request.args.get('query')
+        extension = request.args.get('extension')
+        use_regex = request.args.get('regex', 'false').lower() == 'true'
+        case_sensitive = request.args.get('case_sensitive', 'false').lower() == 'true'
+        
+        if not query:
+            return jsonify({'error': '搜索关键词不能为空'}), 400
+        
+        try:
+            max_results = min(max(int(request.args.get('max_results', 1000)), 1), 10000)
+        except ValueError:
+            return jsonify({'error': 'max_results必须为整数'}), 400
+        
+        try:
+            pattern = compile_pattern(query, use_regex, case_sensitive)
+        except re.error as e:
+            return jsonify({'error': f'正则表达式无效: {e}'}), 400
+        
+        storage = get_project_storage(file_id)
+        
+        if storage is None:
+            return jsonify({'error': '项目不存在或已被删除'}), 404
+        
+        if storage.kind == SOURCE_DIRECTORY:
+            # 跳过依赖、构建目录和被.gitignore排除的文件；边遍历边搜索，第一批结果不必等遍历完成
+            files = (
+                (entry.path, entry.relative_path)
+                for entry in iter_tree_files(storage.root, CODE_EXTENSIONS)
+                if not extension or entry.extension == extension.lower()
+            )
+            grep_storage = None
+        else:
+            # 打包或未解压的项目按项目索引中的代码文件搜索，跳过依赖与构建目录
+            files = [
+                (None, file_info['path'])
+                for file_info in get_storage_index(storage).code_files()
+                if (not extension or file_info['extension'] == extension.lower())
+                and not any(should_prune_directory(part) for part in Path(file_info['path']).parts[:-1])
+            ]
+            grep_storage = storage
+        
+        def generate():
+            started = datetime.now()
+            # 遍历目录时文件总数要到结束时才知道，随done一起返回
+            total_files = len(files) if isinstance(files, list) else None
+            yield json.dumps({'type': 'start', 'file_id': file_id, 'query': query, 'total_files': total_files}) + '\n'
+            # 客户端断开时生成器被关闭，stream_grep随之取消尚未开始的任务
+            for event in stream_grep(files, pattern, max_results, grep_storage):
+                if event['type'] == 'done':
+                    event['took_ms'] = round((datetime.now() - started).total_seconds() * 1000, 2)
+                yield json.dumps(event, ensure_ascii=False) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+    except Exception as e:
+        print(f"扫描文件内容失败: {e}")
+        return jsonify({'error': '扫描文件内容失败'}), 500
+
+@app.route('/api/analysis/content-search/<file_id>', methods=['GET'])
+def search_file_content(file_id):
+    """搜索文件内容（子串或正则），返回匹配行及上下文"""
+    try:
+        query = request.args.get('query')
+        extension = request.args.get('extension')
+        use_regex = request.args.get('regex', 'false').lower() == 'true'
+        case_sensitive = request.args.get('case_sensitive', 'false').lower() == 'true'
         
-        def collect_stats_recursive(dir_path):
+        if not query:
+            return jsonify({'error': '搜索关键词不能为空'}), 400
+        
+        try:
+            context = min(max(int(request.args.get('context', 2)), 0), 10)
+            page = max(int(request.args.get('page', 1)), 1)
+            page_size = min(max(int(request.args.get('page_size', 50)), 1), 500)
+        except ValueError:
+            return jsonify({'error': '分页参数必须为整数'}), 400
+        
+        if use_regex:
             try:
-                for item in os.listdir(dir_path):
-                    item_path = os.path.join(dir_path, item)
-                    
-                    if os.path.isdir(item_path):
-                        stats['total_directories'] += 1
-                        collect_stats_recursive(item_path)
-                    else:
-                        file_ext = Path(item).suffix.lower()
-                        
-                        if file_ext in CODE_EXTENSIONS:
-                            stats['total_files'] += 1
-                            
-                            file_size = os.path.getsize(item_path)
-                            stats['total_size'] += file_size
-                            
-                            # 统计扩展名
-                            stats['extensions'][file_ext] = stats['extensions'].get(file_ext, 0) + 1
-                            
-                            # 记录大文件
-                            relative_path = os.path.relpath(item_path, extracted_path)
-                            stats['largest_files'].append({
-                                'name': item,
-                                'path': relative_path,
-                                'size': file_size,
-                                'extension': file_ext
-                            })
-            except Exception as e:
-                print(f"统计目录失败: {dir_path}, 错误: {e}")
+                re.compile(query)
+            except re.error as e:
+                return jsonify({'error': f'正则表达式无效: {e}'}), 400
         
-        collect_stats_recursive(extracted_path)
+        storage = get_project_storage(file_id)
         
-        # 排序扩展名统计
-        sorted_extensions = sorted(
-            stats['extensions'].items(), 
-            key=lambda x: x[1], 
-            reverse=True
+        if storage is None:
+            return jsonify({'error': '项目不存在或已被删除'}), 404
+        
+        started = datetime.now()
+        index = get_trigram_index(file_id, storage)
+        found = index.search(
+            query,
+            storage.read_text,
+            regex=use_regex,
+            case_sensitive=case_sensitive,
+            extension=extension,
+            context=context,
+            offset=(page - 1) * page_size,
+            limit=page_size
         )
-        stats['extensions'] = [{'extension': ext, 'count': count} for ext, count in sorted_extensions]
         
-        # 排序大文件
-        stats['largest_files'].sort(key=lambda x: x['size'], reverse=True)
-        stats['largest_files'] = stats['largest_files'][:10]  # 只保留前10个
+        return jsonify({
+            'success': True,
+            'data': {
+                'file_id': file_id,
+                'query': query,
+                'regex': use_regex,
+                'case_sensitive': case_sensitive,
+                'extension': extension,
+                'results': found['results'],
+                'page': page,
+                'page_size': page_size,
+                'has_more': found['has_more'],
+                'candidate_files': found['candidate_files'],
+                'took_ms': round((datetime.now() - started).total_seconds() * 1000, 2)
+            }
+        })
+        
+    except Exception as e:
+        print(f"搜索文件内容失败: {e}")
+        return jsonify({'error': '搜索文件内容失败'}), 500
+
+@app.route('/api/analysis/definition/<file_id>', methods=['GET'])
+def find_definition(file_id):
+    """跳转到定义：按符号名，或按文件中的位置（path、line、column）取光标处的标识符"""
+    try:
+        name = request.args.get('name', '').strip()
+        file_path = request.args.get('path')
+        
+        storage = get_project_storage(file_id)
+        
+        if storage is None:
+            return jsonify({'error': '项目不存在或已被删除'}), 404
+        
+        if not name:
+            if not file_path or not request.args.get('line'):
+                return jsonify({'error': '请提供符号名或文件位置'}), 400
+            try:
+                line = int(request.args.get('line'))
+                column = int(request.args.get('column', 1))
+            except ValueError:
+                return jsonify({'error': '行号和列号必须为整数'}), 400
+            
+            if storage.normalize(file_path) is None:
+                return jsonify({'error': '无效的文件路径'}), 400
+            
+            content = storage.read_text(file_path)
+            lines = content.split('\n') if content is not None else []
+            if not 1 <= line <= len(lines):
+                return jsonify({'error': '文件不存在或行号超出范围'}), 404
+            
+            # 取光标所在（或紧邻其左侧）的标识符
+            for match in re.finditer(r'[A-Za-z_$][\w$]*', lines[line - 1]):
+                if match.start() < column <= match.end() + 1:
+                    name = match.group()
+                    break
+            if not name:
+                return jsonify({'error': '光标处没有标识符'}), 400
+        
+        definitions = get_symbol_index(file_id, storage).definitions(name, path=file_path)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'file_id': file_id,
+                'name': name,
+                'definitions': definitions,
+                'total_results': len(definitions)
+            }
+        })
+        
+    except Exception as e:
+        print(f"查找定义失败: {e}")
+        return jsonify({'error': '查找定义失败'}), 500
+
+@app.route('/api/analysis/symbols/<file_id>', methods=['GET'])
+def search_symbols(file_id):
+    """按名称搜索类、函数、方法等符号"""
+    try:
+        query = request.args.get('query', '').strip()
+        kind = request.args.get('kind')
+        
+        if not query:
+            return jsonify({'error': '搜索关键词不能为空'}), 400
+        
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        except ValueError:
+            return jsonify({'error': 'limit必须为整数'}), 400
+        
+        storage = get_project_storage(file_id)
+        
+        if storage is None:
+            return jsonify({'error': '项目不存在或已被删除'}), 404
+        
+        started = datetime.now()
+        results = get_symbol_index(file_id, storage).search(query, kind=kind, limit=limit)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'file_id': file_id,
+                'query': query,
+                'kind': kind,
+                'results': results,
+                'total_results': len(results),
+                'took_ms': round((datetime.now() - started).total_seconds() * 1000, 2)
+            }
+        })
+        
+    except Exception as e:
+        print(f"搜索符号失败: {e}")
+        return jsonify({'error': '搜索符号失败'}), 500
+
+@app.route('/api/analysis/outline/<file_id>', methods=['GET'])
+def get_file_outline(file_id):
+    """获取文件大纲（嵌套的类、函数、方法及其行范围）"""
+    try:
+        file_path = request.args.get('path')
+        
+        if not file_path:
+            return jsonify({'error': '文件路径不能为空'}), 400
+        
+        if Path(file_path).suffix.lower() not in SYMBOL_EXTENSIONS:
+            return jsonify({'error': '不支持提取该类型文件的符号'}), 400
+        
+        storage = get_project_storage(file_id)
+        
+        if storage is None:
+            return jsonify({'error': '项目不存在或已被删除'}), 404
+        
+        symbol_index = get_symbol_index(file_id, storage)
+        if not symbol_index.has_file(file_path):
+            return jsonify({'error': '文件不存在'}), 404
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'file_id': file_id,
+                'file_path': file_path,
+                'outline': symbol_index.outline(file_path)
+            }
+        })
+        
+    except Exception as e:
+        print(f"获取文件大纲失败: {e}")
+        return jsonify({'error': '获取文件大纲失败'}), 500
+
+def get_graph_request(file_id):
+    """解析依赖查询参数，返回(依赖图, 文件路径, 深度)或错误响应"""
+    file_path = request.args.get('path')
+    
+    if not file_path:
+        return None, (jsonify({'error': '文件路径不能为空'}), 400)
+    
+    try:
+        depth = min(max(int(request.args.get('depth', 1)), 1), 10)
+    except ValueError:
+        return None, (jsonify({'error': 'depth必须为整数'}), 400)
+    
+    storage = get_project_storage(file_id)
+    
+    if storage is None:
+        return None, (jsonify({'error': '项目不存在或已被删除'}), 404)
+    
+    import_graph = get_import_graph(file_id, storage)
+    file_path = file_path.replace('\\', '/')
+    if not import_graph.has_file(file_path):
+        return None, (jsonify({'error': '文件不存在'}), 404)
+    
+    return (import_graph, file_path, depth), None
+
+@app.route('/api/analysis/dependencies/<file_id>', methods=['GET'])
+def get_file_dependencies(file_id):
+    """获取文件导入的项目内文件（depth>1时包含间接依赖）"""
+    try:
+        params, error = get_graph_request(file_id)
+        if error:
+            return error
+        import_graph, file_path, depth = params
+        
+        dependencies = import_graph.dependencies(file_path, depth)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'file_id': file_id,
+                'file_path': file_path,
+                'depth': depth,
+                'dependencies': dependencies,
+                'total_results': len(dependencies)
+            }
+        })
+        
+    except Exception as e:
+        print(f"获取文件依赖失败: {e}")
+        return jsonify({'error': '获取文件依赖失败'}), 500
+
+@app.route('/api/analysis/dependents/<file_id>', methods=['GET'])
+def get_file_dependents(file_id):
+    """获取导入该文件的项目内文件（depth>1时包含间接依赖方）"""
+    try:
+        params, error = get_graph_request(file_id)
+        if error:
+            return error
+        import_graph, file_path, depth = params
+        
+        dependents = import_graph.dependents(file_path, depth)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'file_id': file_id,
+                'file_path': file_path,
+                'depth': depth,
+                'dependents': dependents,
+                'total_results': len(dependents)
+            }
+        })
+        
+    except Exception as e:
+        print(f"获取文件依赖方失败: {e}")
+        return jsonify({'error': '获取文件依赖方失败'}), 500
+
+@app.route('/api/analysis/import-cycles/<file_id>', methods=['GET'])
+def get_import_cycles(file_id):
+    """获取循环依赖（导入图中包含多个文件的强连通分量）"""
+    try:
+        storage = get_project_storage(file_id)
+        
+        if storage is None:
+            return jsonify({'error': '项目不存在或已被删除'}), 404
+        
+        components = get_import_graph(file_id, storage).cycles()
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'file_id': file_id,
+                'components': [{'files': files, 'size': len(files)} for files in components],
+                'total_results': len(components)
+            }
+        })
+        
+    except Exception as e:
+        print(f"获取循环依赖失败: {e}")
+        return jsonify({'error': '获取循环依赖失败'}), 500
+
+@app.route('/api/analysis/fan-in/<file_id>', methods=['GET'])
+def get_fan_in_ranking(file_id):
+    """按被导入次数排序的文件列表"""
+    try:
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        except ValueError:
+            return jsonify({'error': 'limit必须为整数'}), 400
+        
+        storage = get_project_storage(file_id)
+        
+        if storage is None:
+            return jsonify({'error': '项目不存在或已被删除'}), 404
+        
+        ranking = get_import_graph(file_id, storage).fan_in_ranking(limit)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'file_id': file_id,
+                'files': ranking,
+                'total_results': len(ranking)
+            }
+        })
+        
+    except Exception as e:
+        print(f"获取导入排行失败: {e}")
+        return jsonify({'error': '获取导入排行失败'}), 500
+
+@app.route('/api/analysis/relevance-search/<file_id>', methods=['GET'])
+def search_relevant_files(file_id):
+    """按自然语言或关键词查询检索最相关的源文件（BM25），附带各文件的总结文档"""
+    try:
+        query = request.args.get('query', '').strip()
+        
+        if not query:
+            return jsonify({'error': '搜索关键词不能为空'}), 400
+        
+        try:
+            limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+        except ValueError:
+            return jsonify({'error': 'limit必须为整数'}), 400
+        
+        storage = get_project_storage(file_id)
+        
+        if storage is None:
+            return jsonify({'error': '项目不存在或已被删除'}), 404
+        
+        started = datetime.now()
+        results = get_bm25_index(file_id, storage).search(query, limit=limit)
+        
+        # 文档路径转换为可通过文档下载接口访问的相对路径
+        docs_dir = os.path.join(app.config['DOCS_FOLDER'], file_id)
+        for result in results:
+            summary = result['summary']
+            if summary:
+                result['summary'] = {
+                    'title': summary['title'],
+                    'doc_path': os.path.relpath(summary['doc_path'], docs_dir),
+                    'snippet': summary['snippet']
+                }
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'file_id': file_id,
+                'query': query,
+                'results': results,
+                'total_results': len(results),
+                'took_ms': round((datetime.now() - started).total_seconds() * 1000, 2)
+            }
+        })
+        
+    except Exception as e:
+        print(f"相关性检索失败: {e}")
+        return jsonify({'error': '相关性检索失败'}), 500
+
+@app.route('/api/analysis/stats/<file_id>', methods=['GET'])
+def get_project_stats(file_id):
+    """获取项目统计信息"""
+    try:
+        project_index = get_project_catalog(file_id)
+        
+        if project_index is None:
+            return jsonify({'error': '项目不存在或已被删除'}), 404
+        
+        # 从项目索引获取统计信息
+        stats = project_index.stats()
         
         return jsonify({
             'success': True,
@@ -651,6 +2080,267 @@ def get_project_stats(file_id):
 
 
 
+def get_runs_folder():
+    """总结任务检查点目录"""
+    return os.path.join(app.config['META_FOLDER'], 'runs')
+
+def read_source_code(file_path):
+    """
+    读取源代码文件，依次尝试utf-8、gbk、latin-1编码
+
+    Returns:
+        (文件内容的SHA-256（与项目索引的内容哈希一致）, 源代码文本)
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    source_hash = hashlib.sha256(data).hexdigest()
+    # 与文本模式读取一致，统一换行符
+    for encoding in ('utf-8', 'gbk', 'latin-1'):
+        try:
+            return source_hash, data.decode(encoding).replace('\r\n', '\n').replace('\r', '\n')
+        except UnicodeDecodeError:
+            continue
+    raise Exception("无法读取文件编码")
+
+def summarize_code_file(code_file, llm_client, summary_docs_dir, job=None):
+    """对单个源代码文件生成技术总结文档并保存，失败时抛出异常"""
+    cancel_event = job.cancel_event if job else None
+    source_hash, source_code = read_source_code(code_file['path'])
+    # 两次大模型调用的token用量，随文档登记到文档目录
+    usage = {}
+    
+    # 检查文件内容是否为空
+    if not source_code.strip():
+        raise Exception("文件内容为空")
+    
+    # 限制文件大小，避免过大的文件导致API调用失败
+    if len(source_code) > 50000:  # 50KB限制
+        source_code = source_code[:50000] + "\n\n... (文件内容过长，已截断)"
+    
+    # 生成单个文件的总结提示词
+    file_summary_prompt = FILE_SUMMARY_PROMPT.format(
+        file_name=code_file['name'],
+        file_path=code_file['relative_path'],
+        file_extension=code_file['extension'],
+        source_code=source_code
+    )
+    
+    # 调用大模型生成文件总结
+    if job:
+        job.checkpoint()
+    try:
+        file_summary = llm_client.simple_chat(
+            file_summary_prompt,
+            "您是一位杰出的软件工程师和技术文档专家，专门进行代码技术分析和总结。请生成高质量的中文技术文档。",
+            cancel_event=cancel_event,
+            usage=usage
+        )
+        
+        # 检查响应是否为空
+        if not file_summary or not file_summary.strip():
+            raise Exception("LLM返回的总结内容为空")
+            
+    except LLMRequestCancelled:
+        raise JobCancelled(f"任务已取消: {job.run_id}")
+    except Exception as llm_error:
+        raise Exception(f"LLM调用失败: {str(llm_error)}")
+    
+    # 生成文档标题
+    if job:
+        job.checkpoint()
+    try:
+        title_prompt = FILE_TITLE_PROMPT.format(
+            summary_content=file_summary[:500] + "..."
+        )
+        
+        doc_title = llm_client.simple_chat(
+            title_prompt,
+            "您是一位文档命名专家，请生成简洁明了的中文文档标题。",
+            cancel_event=cancel_event,
+            usage=usage
+        ).strip()
+        
+        # 检查标题是否为空
+        if not doc_title:
+            doc_title = f"{code_file['name']}技术总结"
+            
+    except LLMRequestCancelled:
+        raise JobCancelled(f"任务已取消: {job.run_id}")
+    except Exception as title_error:
+        print(f"⚠️ 生成标题失败，使用默认标题: {title_error}")
+        doc_title = f"{code_file['name']}技术总结"
+    
+    # 清理标题
+    doc_title = doc_title.replace('#', '').replace('*', '').replace('`', '').strip()
+    if not doc_title:
+        doc_title = f"{code_file['name']}技术总结"
+    
+    # 确保标题是有效的文件名
+    doc_title = re.sub(r'[<>:"/\\|?*]', '_', doc_title)
+    
+    # 创建对应的目录结构
+    relative_dir = os.path.dirname(code_file['relative_path'])
+    if relative_dir:
+        target_dir = os.path.join(summary_docs_dir, relative_dir)
+        Path(target_dir).mkdir(parents=True, exist_ok=True)
+    else:
+        target_dir = summary_docs_dir
+    
+    # 保存总结文档
+    doc_filename = f"{doc_title}.md"
+    doc_path = os.path.join(target_dir, doc_filename)
+    
+    with open(doc_path, 'w', encoding='utf-8') as f:
+        f.write(file_summary)
+    
+    # 获取文档统计信息
+    doc_stats = get_file_stats(doc_path)
+    
+    return {
+        'file_name': code_file['name'],
+        'file_path': code_file['relative_path'],
+        'doc_title': doc_title,
+        'doc_filename': doc_filename,
+        'doc_path': doc_path,
+        'file_size': doc_stats['size'],
+        'priority': code_file['priority'],
+        'source_hash': source_hash,
+        'model': getattr(llm_client, 'model', None),
+        'usage': usage,
+        'status': STATUS_SUCCESS
+    }
+
+def execute_summarize_run(job, llm_client, retry_failed=True):
+    """执行（或继续执行）总结任务，每个文件处理完立即写入检查点"""
+    run = job.run
+    pending_files = run.pending_files(retry_failed=retry_failed)
+    total = len(run.files)
+    done = total - len(pending_files)
+    cancelled = False
+    
+    for i, code_file in enumerate(pending_files):
+        try:
+            print(f"📄 正在处理文件 ({done + i + 1}/{total}): {code_file['relative_path']}")
+            result = summarize_code_file(code_file, llm_client, run.summary_docs_dir, job)
+            run.record_result(code_file['relative_path'], result)
+            
+        except JobCancelled:
+            # 当前文件保持待处理状态，之后可通过resume接口继续
+            cancelled = True
+            break
+        except Exception as e:
+            error_details = traceback.format_exc()
+            print(f"❌ 处理文件 {code_file['relative_path']} 失败: {e}")
+            print(f"错误详情: {error_details}")
+            run.record_result(code_file['relative_path'], {
+                'file_name': code_file['name'],
+                'file_path': code_file['relative_path'],
+                'error': str(e),
+                'error_details': error_details,
+                'status': STATUS_ERROR
+            })
+            continue
+        
+        # 文档目录与搜索索引的登记失败不影响已写入检查点的总结结果
+        try:
+            record_summary_doc(run, code_file['relative_path'], result)
+            update_summary_search_index(run, code_file['relative_path'], result)
+        except Exception as e:
+            print(f"登记文件 {code_file['relative_path']} 的总结文档失败: {e}")
+        print(f"✅ 文件 {code_file['relative_path']} 总结完成")
+    
+    # 上传项目的文档数写入登记表，项目列表直接读取
+    storage_id = get_uploaded_file_id(run.project_path)
+    if storage_id is not None:
+        try:
+            get_upload_registry().update_storage(storage_id, doc_count=count_project_docs(storage_id))
+        except Exception as e:
+            print(f"更新项目文档数失败: {e}")
+    
+    if cancelled:
+        run.mark_cancelled()
+        summary = run.to_dict()
+        print(f"🛑 总结任务 {run.run_id} 已取消，已完成 {summary['success_count']} 个文件")
+        message = f"项目技术总结已取消，成功处理 {summary['success_count']} 个文件，失败 {summary['error_count']} 个"
+    else:
+        run.mark_finished()
+        summary = run.to_dict()
+        print(f"🎉 总结完成！成功处理 {summary['success_count']} 个文件，失败 {summary['error_count']} 个")
+        message = f"项目技术总结完成，成功处理 {summary['success_count']} 个文件，失败 {summary['error_count']} 个"
+    
+    return {
+        'success': True,
+        'message': message,
+        'data': {
+            **summary,
+            'results': run.ordered_results()
+        }
+    }
+
+def start_summarize_job(run, llm_client, background=False, retry_failed=True):
+    """登记并执行总结任务；background为True时提交到后台线程池并立即返回"""
+    job = summarize_jobs.register(run)
+    if job is None:
+        return jsonify({'error': '总结任务正在运行中'}), 409
+    
+    if background:
+        summarize_jobs.submit(
+            job, lambda job: execute_summarize_run(job, llm_client, retry_failed=retry_failed)
+        )
+        return jsonify({
+            'success': True,
+            'message': '项目技术总结任务已在后台启动',
+            'data': {**run.to_dict(), 'status': job.state}
+        }), 202
+    
+    try:
+        return jsonify(execute_summarize_run(job, llm_client, retry_failed=retry_failed))
+    finally:
+        summarize_jobs.release(run.run_id)
+
+def create_summarize_run(project_path, only_paths=None):
+    """
+    筛选并排序项目中的源代码文件，创建总结任务检查点；没有源代码文件时返回None；
+    only_paths不为None时只总结其中列出的文件（相对路径）
+    """
+    # 获取所有源代码文件，跳过依赖/构建目录以及生成或压缩的文件；
+    # 指定文件时只筛查这些文件，不遍历整个项目
+    if only_paths is not None:
+        code_files, skipped_files = triage_files(project_path, sorted(only_paths))
+        pruned_directories = []
+    else:
+        code_files, skipped_files, pruned_directories = triage_project(project_path, CODE_EXTENSIONS)
+    if skipped_files or pruned_directories:
+        print(f"🧹 已跳过 {len(pruned_directories)} 个目录、{len(skipped_files)} 个生成或压缩的文件")
+    
+    if not code_files:
+        return None
+    
+    # 按重要性排序，入口文件和被广泛引用的文件优先生成文档；上传的项目直接使用缓存的导入依赖图
+    fan_in = None
+    file_id = get_uploaded_file_id(project_path)
+    if file_id is not None:
+        try:
+            fan_in = get_import_graph(file_id, DirectoryStorage(file_id, project_path)).fan_in()
+        except Exception as e:
+            print(f"⚠️ 读取导入依赖图失败，改为直接扫描: {e}")
+    code_files = rank_code_files(code_files, fan_in)
+    
+    # 创建总结文档根目录
+    project_name = os.path.basename(project_path)
+    summary_docs_dir = os.path.join(app.config['DOCS_FOLDER'], project_name)
+    Path(summary_docs_dir).mkdir(parents=True, exist_ok=True)
+    
+    # 创建任务检查点，进程中断后可通过resume接口继续
+    run = SummarizeRun.create(
+        get_runs_folder(), project_path, project_name, summary_docs_dir, code_files,
+        skipped_files=skipped_files, pruned_directories=pruned_directories
+    )
+    
+    print(f"📝 开始处理 {len(code_files)} 个源代码文件... (任务ID: {run.run_id})")
+    
+    return run
+
 @app.route('/api/project/summarize', methods=['POST'])
 def summarize_project():
     """项目代码技术总结接口 - 对每个源代码文件分别进行总结"""
@@ -669,6 +2359,14 @@ def summarize_project():
         if not project_path:
             return jsonify({'error': '项目路径不能为空'}), 400
         
+        # 上传的项目解析为共享存储的解压目录，未解压时在此时解压
+        file_id = get_uploaded_file_id(project_path)
+        if file_id is not None:
+            storage_id = get_storage_id(file_id)
+            if storage_id is not None:
+                record_project_access(storage_id)
+                project_path = resolve_extracted_path(storage_id) or project_path
+        
         # 验证项目路径
         if not os.path.exists(project_path):
             return jsonify({'error': '项目路径不存在'}), 400
@@ -682,245 +2380,173 @@ def summarize_project():
         except Exception as e:
             return jsonify({'error': f'LLM客户端初始化失败: {str(e)}'}), 500
         
-        # 获取所有源代码文件
-        code_files = []
-        for root, dirs, files in os.walk(project_path):
-            for file in files:
-                if is_code_file(os.path.join(root, file)):
-                    file_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(file_path, project_path)
-                    code_files.append({
-                        'path': file_path,
-                        'relative_path': relative_path,
-                        'name': file,
-                        'extension': Path(file).suffix.lower()
-                    })
-        
-        if not code_files:
+        run = create_summarize_run(project_path)
+        if run is None:
             return jsonify({'error': '项目中未找到源代码文件'}), 400
         
-        # 创建总结文档根目录
-        project_name = os.path.basename(project_path)
-        summary_docs_dir = os.path.join(app.config['DOCS_FOLDER'], project_name)
-        Path(summary_docs_dir).mkdir(parents=True, exist_ok=True)
+        return start_summarize_job(run, llm_client, background=data.get('background', False))
         
-        results = []
-        success_count = 0
-        error_count = 0
-        
-        print(f"📝 开始处理 {len(code_files)} 个源代码文件...")
-        
-        # 对每个源代码文件分别进行总结
-        for i, code_file in enumerate(code_files):
-            try:
-                print(f"📄 正在处理文件 ({i+1}/{len(code_files)}): {code_file['relative_path']}")
-                
-                # 读取源代码文件内容
-                try:
-                    with open(code_file['path'], 'r', encoding='utf-8') as f:
-                        source_code = f.read()
-                except UnicodeDecodeError:
-                    # 如果UTF-8解码失败，尝试其他编码
-                    try:
-                        with open(code_file['path'], 'r', encoding='gbk') as f:
-                            source_code = f.read()
-                    except UnicodeDecodeError:
-                        try:
-                            with open(code_file['path'], 'r', encoding='latin-1') as f:
-                                source_code = f.read()
-                        except Exception as e:
-                            raise Exception(f"无法读取文件编码: {e}")
-                
-                # 检查文件内容是否为空
-                if not source_code.strip():
-                    raise Exception("文件内容为空")
-                
-                # 限制文件大小，避免过大的文件导致API调用失败
-                if len(source_code) > 50000:  # 50KB限制
-                    source_code = source_code[:50000] + "\n\n... (文件内容过长，已截断)"
-                
-                # 生成单个文件的总结提示词
-                file_summary_prompt = FILE_SUMMARY_PROMPT.format(
-                    file_name=code_file['name'],
-                    file_path=code_file['relative_path'],
-                    file_extension=code_file['extension'],
-                    source_code=source_code
-                )
-                
-                # 调用大模型生成文件总结
-                try:
-                    file_summary = llm_client.simple_chat(
-                        file_summary_prompt,
-                        "您是一位杰出的软件工程师和技术文档专家，专门进行代码技术分析和总结。请生成高质量的中文技术文档。"
-                    )
-                    
-                    # 检查响应是否为空
-                    if not file_summary or not file_summary.strip():
-                        raise Exception("LLM返回的总结内容为空")
-                        
-                except Exception as llm_error:
-                    raise Exception(f"LLM调用失败: {str(llm_error)}")
-                
-                # 生成文档标题
-                try:
-                    title_prompt = FILE_TITLE_PROMPT.format(
-                        summary_content=file_summary[:500] + "..."
-                    )
-                    
-                    doc_title = llm_client.simple_chat(
-                        title_prompt,
-                        "您是一位文档命名专家，请生成简洁明了的中文文档标题。"
-                    ).strip()
-                    
-                    # 检查标题是否为空
-                    if not doc_title:
-                        doc_title = f"{code_file['name']}技术总结"
-                        
-                except Exception as title_error:
-                    print(f"⚠️ 生成标题失败，使用默认标题: {title_error}")
-                    doc_title = f"{code_file['name']}技术总结"
-                
-                # 清理标题
-                doc_title = doc_title.replace('#', '').replace('*', '').replace('`', '').strip()
-                if not doc_title:
-                    doc_title = f"{code_file['name']}技术总结"
-                
-                # 确保标题是有效的文件名
-                import re
-                doc_title = re.sub(r'[<>:"/\\|?*]', '_', doc_title)
-                
-                # 创建对应的目录结构
-                relative_dir = os.path.dirname(code_file['relative_path'])
-                if relative_dir:
-                    target_dir = os.path.join(summary_docs_dir, relative_dir)
-                    Path(target_dir).mkdir(parents=True, exist_ok=True)
-                else:
-                    target_dir = summary_docs_dir
-                
-                # 保存总结文档
-                doc_filename = f"{doc_title}.md"
-                doc_path = os.path.join(target_dir, doc_filename)
-                
-                with open(doc_path, 'w', encoding='utf-8') as f:
-                    f.write(file_summary)
-                
-                # 获取文档统计信息
-                doc_stats = get_file_stats(doc_path)
-                
-                results.append({
-                    'file_name': code_file['name'],
-                    'file_path': code_file['relative_path'],
-                    'doc_title': doc_title,
-                    'doc_filename': doc_filename,
-                    'doc_path': doc_path,
-                    'file_size': doc_stats['size'],
-                    'status': 'success'
-                })
-                
-                success_count += 1
-                print(f"✅ 文件 {code_file['relative_path']} 总结完成")
-                
-            except Exception as e:
-                import traceback
-                error_details = traceback.format_exc()
-                print(f"❌ 处理文件 {code_file['relative_path']} 失败: {e}")
-                print(f"错误详情: {error_details}")
-                results.append({
-                    'file_name': code_file['name'],
-                    'file_path': code_file['relative_path'],
-                    'error': str(e),
-                    'error_details': error_details,
-                    'status': 'error'
-                })
-                error_count += 1
+    except Exception as e:
+        print(f"项目技术总结失败: {e}")
+        return jsonify({'error': '项目技术总结失败', 'message': str(e)}), 500
+
+@app.route('/api/project/summarize/<run_id>', methods=['GET'])
+def get_summarize_run(run_id):
+    """获取总结任务的进度"""
+    try:
+        job = summarize_jobs.get(run_id)
+        run = job.run if job else SummarizeRun.load(get_runs_folder(), run_id)
+        if run is None:
+            return jsonify({'error': '总结任务不存在'}), 404
         
-        print(f"🎉 总结完成！成功处理 {success_count} 个文件，失败 {error_count} 个")
+        summary = run.to_dict()
+        if job:
+            summary['status'] = job.state
         
         return jsonify({
             'success': True,
-            'message': f'项目技术总结完成，成功处理 {success_count} 个文件，失败 {error_count} 个',
             'data': {
-                'project_path': project_path,
-                'project_name': project_name,
-                'summary_docs_dir': summary_docs_dir,
-                'total_files': len(code_files),
-                'success_count': success_count,
-                'error_count': error_count,
-                'results': results
+                **summary,
+                'results': run.ordered_results()
             }
         })
         
     except Exception as e:
-        print(f"项目技术总结失败: {e}")
-        return jsonify({'error': '项目技术总结失败', 'message': str(e)}), 500
+        print(f"获取总结任务失败: {e}")
+        return jsonify({'error': '获取总结任务失败'}), 500
 
-@app.route('/api/analysis/docs/<file_id>', methods=['GET'])
-def get_generated_docs(file_id):
-    """获取项目技术总结文档列表"""
+@app.route('/api/project/summarize/<run_id>/resume', methods=['POST'])
+def resume_summarize_run(run_id):
+    """继续已暂停的任务，或从检查点继续中断/取消的任务，已完成的文件不会重复调用大模型"""
     try:
-        docs_path = app.config['DOCS_FOLDER']
+        data = request.get_json(silent=True) or {}
+        retry_failed = data.get('retry_failed', True)
+        
+        # 当前进程中的任务：仅暂停中的任务可以继续
+        job = summarize_jobs.get(run_id)
+        if job:
+            if job.state != JOB_PAUSED:
+                return jsonify({'error': '总结任务正在运行中'}), 409
+            job.unpause()
+            print(f"▶️ 总结任务 {run_id} 已继续")
+            return jsonify({'success': True, 'data': job.to_dict()})
+        
+        run = SummarizeRun.load(get_runs_folder(), run_id)
+        if run is None:
+            return jsonify({'error': '总结任务不存在'}), 404
+        
+        # 上传项目的解压目录可能已被配额清理，从压缩包或打包文件重新展开
+        file_id = get_uploaded_file_id(run.project_path)
+        if file_id is not None and not os.path.isdir(run.project_path):
+            resolve_extracted_path(file_id)
+        
+        if not os.path.isdir(run.project_path):
+            return jsonify({'error': '项目路径不存在'}), 400
         
-        if not os.path.exists(docs_path):
-            return jsonify({
-                'success': True,
-                'data': {
-                    'file_id': file_id,
-                    'docs': [],
-                    'total_docs': 0
-                }
-            })
+        try:
+            llm_client = QwenLLM()
+        except Exception as e:
+            return jsonify({'error': f'LLM客户端初始化失败: {str(e)}'}), 500
         
-        docs = []
+        pending_count = len(run.pending_files(retry_failed=retry_failed))
+        run.mark_resumed()
+        print(f"🔁 继续总结任务 {run.run_id}，剩余 {pending_count} 个文件")
         
-        # 查找与file_id匹配的项目文档
-        project_docs_path = os.path.join(docs_path, file_id)
-        if os.path.exists(project_docs_path) and os.path.isdir(project_docs_path):
-            # 递归搜索所有子目录中的.md文件
-            def find_md_files_recursive(directory, base_path=''):
-                files = []
-                try:
-                    for item in os.listdir(directory):
-                        item_path = os.path.join(directory, item)
-                        relative_path = os.path.join(base_path, item)
-                        
-                        if os.path.isdir(item_path):
-                            # 递归搜索子目录
-                            sub_files = find_md_files_recursive(item_path, relative_path)
-                            files.extend(sub_files)
-                        elif item.endswith('.md'):
-                            # 找到.md文件
-                            stats = get_file_stats(item_path)
-                            files.append({
-                                'name': item,
-                                'path': item_path,
-                                'relative_path': relative_path,
-                                'size': stats['size'],
-                                'modified_at': stats['modified_at']
-                            })
-                except Exception as e:
-                    print(f"搜索目录失败: {directory}, 错误: {e}")
-                
-                return files
-            
-            # 搜索所有.md文件
-            doc_files = find_md_files_recursive(project_docs_path)
-            
-            if doc_files:
-                # 按目录分组
-                docs_by_directory = {}
-                for file_info in doc_files:
-                    dir_path = os.path.dirname(file_info['relative_path'])
-                    if dir_path not in docs_by_directory:
-                        docs_by_directory[dir_path] = []
-                    docs_by_directory[dir_path].append(file_info)
-                
-                # 转换为API响应格式
-                for dir_path, files in docs_by_directory.items():
-                    docs.append({
-                        'directory_name': dir_path if dir_path else file_id,
-                        'directory_path': dir_path,
-                        'files': files
-                    })
+        return start_summarize_job(
+            run, llm_client, background=data.get('background', False), retry_failed=retry_failed
+        )
+        
+    except Exception as e:
+        print(f"继续总结任务失败: {e}")
+        return jsonify({'error': '继续总结任务失败', 'message': str(e)}), 500
+
+@app.route('/api/project/summarize/<run_id>/cancel', methods=['POST'])
+def cancel_summarize_run(run_id):
+    """取消运行中的总结任务，进行中的LLM请求会被中止，已完成的结果保留在检查点中"""
+    job = summarize_jobs.get(run_id)
+    if job is None:
+        return jsonify({'error': '总结任务未在运行'}), 404
+    
+    job.cancel()
+    print(f"🛑 正在取消总结任务 {run_id}")
+    return jsonify({'success': True, 'data': job.to_dict()})
+
+@app.route('/api/project/summarize/<run_id>/pause', methods=['POST'])
+def pause_summarize_run(run_id):
+    """暂停运行中的总结任务，进行中的LLM请求完成后不再派发新的请求"""
+    job = summarize_jobs.get(run_id)
+    if job is None:
+        return jsonify({'error': '总结任务未在运行'}), 404
+    
+    job.pause()
+    print(f"⏸️ 总结任务 {run_id} 已暂停")
+    return jsonify({'success': True, 'data': job.to_dict()})
+
+@app.route('/api/project/summarize/jobs', methods=['GET'])
+def list_summarize_jobs():
+    """获取当前进程中运行的总结任务"""
+    jobs = summarize_jobs.list_jobs()
+    return jsonify({
+        'success': True,
+        'data': {
+            'jobs': jobs,
+            'total_jobs': len(jobs)
+        }
+    })
+
+def describe_doc(project, doc):
+    """文档列表与查找接口中的单篇文档信息"""
+    return {
+        'name': os.path.basename(doc['doc_path']),
+        'path': os.path.join(app.config['DOCS_FOLDER'], project, doc['doc_path']),
+        'relative_path': doc['doc_path'],
+        'size': doc['size'],
+        'modified_at': doc['created_at'],
+        'title': doc['title'],
+        'source_path': doc['source_path'],
+        'source_hash': doc['source_hash'],
+        'model': doc['model'],
+        'usage': {
+            'prompt_tokens': doc['prompt_tokens'],
+            'completion_tokens': doc['completion_tokens'],
+            'total_tokens': doc['total_tokens']
+        }
+    }
+
+def is_sha256(value):
+    """是否为SHA-256十六进制摘要"""
+    return bool(value) and re.fullmatch(r'[0-9a-f]{64}', value) is not None
+
+def get_doc_status(doc, entry):
+    """
+    根据项目索引中的源文件条目判断文档是否过期：
+    current 源文件未变化，changed 源文件已修改，deleted 源文件已删除，unknown 无法判断；
+    从压缩包构建的索引记录的是CRC32而不是SHA-256，无法与文档的源文件哈希比较
+    """
+    if doc['source_path'] is None or not is_sha256(doc['source_hash']):
+        return 'unknown'
+    if entry is None:
+        return 'deleted'
+    if not is_sha256(entry.get('content_hash')):
+        return 'unknown'
+    return 'current' if entry['content_hash'] == doc['source_hash'] else 'changed'
+
+@app.route('/api/analysis/docs/<file_id>', methods=['GET'])
+def get_generated_docs(file_id):
+    """获取项目技术总结文档列表（从文档目录查询）"""
+    try:
+        # 按文档所在目录分组
+        docs_by_directory = {}
+        for doc in ensure_doc_catalog(file_id).list_docs(file_id):
+            dir_path = os.path.dirname(doc['doc_path'])
+            docs_by_directory.setdefault(dir_path, []).append(describe_doc(file_id, doc))
+        
+        # 转换为API响应格式
+        docs = [{
+            'directory_name': dir_path if dir_path else file_id,
+            'directory_path': dir_path,
+            'files': files
+        } for dir_path, files in docs_by_directory.items()]
         
         return jsonify({
             'success': True,
@@ -935,6 +2561,69 @@ def get_generated_docs(file_id):
         print(f"获取项目技术总结文档列表失败: {e}")
         return jsonify({'error': '获取项目技术总结文档列表失败'}), 500
 
+@app.route('/api/analysis/doc-source/<file_id>', methods=['GET'])
+def find_source_doc(file_id):
+    """按源文件查找其总结文档，并检查源文件在文档生成后是否有变化"""
+    try:
+        file_path = request.args.get('filePath', '')
+        if not file_path:
+            return jsonify({'error': '文件路径不能为空'}), 400
+        
+        file_path = normalize_member_name(file_path)
+        if file_path is None:
+            return jsonify({'error': '访问被拒绝'}), 403
+        file_path = file_path.replace('/', os.sep)
+        
+        doc = ensure_doc_catalog(file_id).get(file_id, file_path)
+        if doc is None:
+            return jsonify({'error': '该文件尚未生成总结文档'}), 404
+        
+        project_index = get_project_catalog(file_id)
+        status = get_doc_status(doc, project_index.get_entry(file_path)) if project_index else 'unknown'
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'file_id': file_id,
+                'file_path': file_path,
+                'doc': describe_doc(file_id, doc),
+                'status': status,
+                'stale': status in ('changed', 'deleted')
+            }
+        })
+        
+    except Exception as e:
+        print(f"查找总结文档失败: {e}")
+        return jsonify({'error': '查找总结文档失败'}), 500
+
+@app.route('/api/analysis/stale-docs/<file_id>', methods=['GET'])
+def get_stale_docs(file_id):
+    """列出源文件已修改或已删除的总结文档"""
+    try:
+        project_index = get_project_catalog(file_id)
+        if project_index is None:
+            return jsonify({'error': '项目不存在或已被删除'}), 404
+        
+        code_files = {entry['path']: entry for entry in project_index.code_files()}
+        stale = []
+        for doc in ensure_doc_catalog(file_id).list_docs(file_id):
+            status = get_doc_status(doc, code_files.get(doc['source_path']))
+            if status in ('changed', 'deleted'):
+                stale.append({'source_path': doc['source_path'], 'doc_path': doc['doc_path'], 'status': status})
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'file_id': file_id,
+                'stale_docs': stale,
+                'total_stale': len(stale)
+            }
+        })
+        
+    except Exception as e:
+        print(f"检查总结文档是否过期失败: {e}")
+        return jsonify({'error': '检查总结文档是否过期失败'}), 500
+
 @app.route('/api/analysis/docs/<file_id>/<path:file_path>', methods=['GET'])
 def download_doc(file_id, file_path):
     """获取或下载项目技术总结文档"""
@@ -984,6 +2673,36 @@ def download_doc(file_id, file_path):
         print(f"获取项目技术总结文档失败: {e}")
         return jsonify({'error': '获取项目技术总结文档失败'}), 500
 
+@app.route('/api/storage/quota', methods=['GET'])
+def get_disk_quota():
+    """获取各目录的磁盘占用、配额与清理统计"""
+    try:
+        manager = get_disk_quota_manager()
+        return jsonify({
+            'success': True,
+            'data': {
+                'usage': manager.usage(),
+                **manager.to_dict()
+            }
+        })
+        
+    except Exception as e:
+        print(f"获取磁盘占用失败: {e}")
+        return jsonify({'error': '获取磁盘占用失败'}), 500
+
+@app.route('/api/storage/quota/run', methods=['POST'])
+def run_disk_quota():
+    """立即执行一次配额检查与清理"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': get_disk_quota_manager().run_once()
+        })
+        
+    except Exception as e:
+        print(f"磁盘配额清理失败: {e}")
+        return jsonify({'error': '磁盘配额清理失败'}), 500
+
 @app.errorhandler(413)
 def too_large(e):
     return jsonify({'error': '文件过大'}), 413
@@ -1004,5 +2723,11 @@ if __name__ == '__main__':
     print(f"📁 解压目录: {app.config['EXTRACTED_FOLDER']}")
     print(f"📁 临时目录: {app.config['TEMP_FOLDER']}")
     print(f"📁 文档目录: {app.config['DOCS_FOLDER']}")
+    print(f"📁 元数据目录: {app.config['META_FOLDER']}")
+    
+    # 配置了磁盘配额时启动后台清理
+    if any(app.config['DISK_QUOTAS'].values()):
+        get_disk_quota_manager().start()
+        print(f"🧹 磁盘配额检查已启动，间隔 {app.config['DISK_QUOTA_INTERVAL']}s")
     
     app.run(host='0.0.0.0', port=3001, debug=True) 
\ No newline at end of file
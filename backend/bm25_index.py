@@ -0,0 +1,514 @@
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+# BM25参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 各字段的词频权重：路径中的词最能说明文件职责，总结文档次之
+PATH_WEIGHT = 3.0
+DOC_WEIGHT = 1.5
+CODE_WEIGHT = 1.0
+
+# 超过该大小的源文件不参与索引
+MAX_INDEXED_FILE_SIZE = 1024 * 1024  # 1MB
+
+# 返回给前端的总结摘要长度
+SNIPPET_LENGTH = 300
+
+# 内存中最多保留的项目索引数量
+MAX_LOADED_INDEXES = 4
+
+STOP_WORDS = {
+    'the', 'and', 'for', 'with', 'this', 'that', 'from', 'are', 'was', 'not', 'but', 'you', 'your',
+    'all', 'any', 'can', 'has', 'have', 'its', 'into', 'our', 'out', 'use', 'used', 'will', 'where',
+    'what', 'when', 'which', 'how', 'who', 'why', 'there', 'their', 'then', 'than', 'them', 'they',
+    'def', 'self', 'cls', 'return', 'import', 'const', 'let', 'var', 'function', 'class', 'elif',
+    'else', 'true', 'false', 'none', 'null', 'undefined', 'new', 'export', 'default', 'async',
+    'await', 'try', 'except', 'catch', 'finally', 'raise', 'throw', 'pass', 'str', 'int', 'void',
+    'public', 'private'
+}
+
+# 英文单词（含数字），中文连续片段
+_WORD = re.compile(r'[A-Za-z][A-Za-z0-9]*|[一-鿿]+')
+# 驼峰与大写缩写拆分：parseHTTPResponse -> parse, HTTP, Response
+_CAMEL_PART = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+')
+_MARKDOWN_NOISE = re.compile(r'[#*`>|_\-]+')
+
+
+def _stem(token: str) -> str:
+    """极简的英文词干化，使retry/retries、parse/parsing等形式落到同一个词"""
+    if len(token) <= 4:
+        return token
+    if token.endswith('ies'):
+        return token[:-3] + 'y'
+    if token.endswith('ing') and len(token) > 5:
+        return token[:-3]
+    if token.endswith('ed') and len(token) > 5:
+        return token[:-2]
+    if token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    切分代码或文档文本：标识符按驼峰、下划线拆分并小写化、词干化，
+    中文按相邻两字切分（不依赖分词模型）
+
+    Args:
+        text: 文本
+
+    Returns:
+        词列表
+    """
+    tokens = []
+    for word in _WORD.findall(text):
+        if word[0] >= '一':
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+            continue
+        parts = _CAMEL_PART.findall(word)
+        for part in parts:
+            part = part.lower()
+            if len(part) > 1 and part not in STOP_WORDS and not part.isdigit():
+                tokens.append(_stem(part))
+    return tokens
+
+
+def make_snippet(summary: str) -> str:
+    """从总结文档中提取摘要（去掉标题与Markdown标记）"""
+    lines = []
+    length = 0
+    for line in summary.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#') or line.startswith('```'):
+            continue
+        line = _MARKDOWN_NOISE.sub(' ', line).strip()
+        if line:
+            lines.append(line)
+            length += len(line)
+            if length >= SNIPPET_LENGTH:
+                break
+    return ' '.join(lines)[:SNIPPET_LENGTH]
+
+
+class _SparseVector:
+    """单个字段的稀疏词频向量"""
+
+    __slots__ = ('terms', 'counts')
+
+    def __init__(self, terms: np.ndarray, counts: np.ndarray):
+        self.terms = terms
+        self.counts = counts
+
+    @classmethod
+    def empty(cls) -> '_SparseVector':
+        return cls(np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32))
+
+
+class Bm25Index:
+    """
+    项目级BM25检索索引：每个源代码文件是一篇文档，由路径、代码标识符和对应的总结文档
+    三部分词频加权组成
+
+    每篇文档的各字段以稀疏向量（词编号数组 + 词频数组）保存，更新单个文件或单篇总结时
+    只需重新切分该文件。查询时使用按词排列的倒排矩阵（CSC格式的NumPy数组）向量化计算
+    BM25得分，矩阵在文档变化后的首次查询时由各文档向量重新拼接。
+    """
+
+    def __init__(self, version: Optional[str] = None):
+        self.version = version
+        self.vocab: Dict[str, int] = {}
+        self.paths: List[str] = []
+        self.doc_ids: Dict[str, int] = {}
+        # 文档编号 -> 字段向量，已删除的文档为None
+        self.code_vectors: List[Optional[_SparseVector]] = []
+        self.doc_vectors: List[_SparseVector] = []
+        self.code_hashes: List[Optional[str]] = []
+        # 源文件相对路径 -> 总结文档信息（doc_path、title、snippet、mtime）
+        self.summaries: Dict[str, Dict] = {}
+        self._matrix = None
+        self._lock = threading.RLock()
+
+    # ---- 构建与增量更新 ----
+
+    def _vectorize(self, tokens: List[str], weight: float) -> _SparseVector:
+        if not tokens:
+            return _SparseVector.empty()
+        counts = Counter(tokens)
+        terms = np.fromiter(
+            (self.vocab.setdefault(term, len(self.vocab)) for term in counts),
+            dtype=np.int32, count=len(counts)
+        )
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts)) * weight
+        return _SparseVector(terms, values)
+
+    def _doc_id(self, path: str) -> int:
+        doc_id = self.doc_ids.get(path)
+        if doc_id is None:
+            doc_id = self.doc_ids[path] = len(self.paths)
+            self.paths.append(path)
+            self.code_vectors.append(None)
+            self.doc_vectors.append(_SparseVector.empty())
+            self.code_hashes.append(None)
+        return doc_id
+
+    def set_source(self, path: str, content_hash: Optional[str], text: str):
+        """
+        更新单个源文件的路径与代码词频
+
+        Args:
+            path: 相对路径
+            content_hash: 内容哈希
+            text: 文件内容
+        """
+        tokens = tokenize(text)
+        path_tokens = tokenize(path.replace('\\', '/').replace('/', ' '))
+        with self._lock:
+            doc_id = self._doc_id(path)
+            code = self._vectorize(tokens, CODE_WEIGHT)
+            named = self._vectorize(path_tokens, PATH_WEIGHT)
+            self.code_vectors[doc_id] = _SparseVector(
+                np.concatenate([code.terms, named.terms]),
+                np.concatenate([code.counts, named.counts])
+            )
+            self.code_hashes[doc_id] = content_hash
+            self._matrix = None
+
+    def remove_source(self, path: str):
+        """删除源文件（文档编号保留，不再参与检索）"""
+        with self._lock:
+            doc_id = self.doc_ids.get(path)
+            if doc_id is None:
+                return
+            self.code_vectors[doc_id] = None
+            self.doc_vectors[doc_id] = _SparseVector.empty()
+            self.code_hashes[doc_id] = None
+            self.summaries.pop(path, None)
+            self._matrix = None
+
+    def set_summary(self, path: str, doc_path: str, title: str, summary: str, mtime: float):
+        """
+        更新源文件对应的总结文档
+
+        Args:
+            path: 源文件相对路径
+            doc_path: 总结文档路径
+            title: 文档标题
+            summary: 文档内容
+            mtime: 文档修改时间
+        """
+        tokens = tokenize(title) * 2 + tokenize(summary)
+        with self._lock:
+            doc_id = self._doc_id(path)
+            self.doc_vectors[doc_id] = self._vectorize(tokens, DOC_WEIGHT)
+            self.summaries[path] = {
+                'doc_path': doc_path,
+                'title': title,
+                'snippet': make_snippet(summary),
+                'mtime': mtime
+            }
+            self._matrix = None
+
+    def sync_sources(self, version: str, files: List[Dict], read_text: Callable[[str], Optional[str]]) -> int:
+        """
+        按项目索引同步源文件：只重新切分内容哈希变化的文件，并删除已不存在的文件
+
+        Args:
+            version: 项目索引版本
+            files: 代码文件列表（包含path、size、content_hash）
+            read_text: 按相对路径读取文件文本的函数
+
+        Returns:
+            重新切分的文件数
+        """
+        started = time.time()
+        updated = 0
+        current = set()
+        for file_info in files:
+            path = file_info['path']
+            if file_info['size'] > MAX_INDEXED_FILE_SIZE:
+                continue
+            current.add(path)
+            doc_id = self.doc_ids.get(path)
+            if doc_id is not None and self.code_vectors[doc_id] is not None \
+                    and self.code_hashes[doc_id] == file_info['content_hash']:
+                continue
+            text = read_text(path)
+            if text is None:
+                continue
+            self.set_source(path, file_info['content_hash'], text)
+            updated += 1
+
+        with self._lock:
+            for path in list(self.doc_ids):
+                if path not in current and self.code_vectors[self.doc_ids[path]] is not None:
+                    self.remove_source(path)
+                    updated += 1
+            self.version = version
+
+        if updated:
+            logger.info(f"BM25索引已更新 {updated} 个文件，耗时 {time.time() - started:.2f}s")
+        return updated
+
+    # ---- 查询 ----
+
+    def _build_matrix(self):
+        """由各文档的字段向量拼接出按词排列的倒排矩阵"""
+        doc_parts, term_parts, count_parts = [], [], []
+        for doc_id, (code, doc) in enumerate(zip(self.code_vectors, self.doc_vectors)):
+            if code is None:
+                continue
+            for vector in (code, doc):
+                if len(vector.terms):
+                    doc_parts.append(np.full(len(vector.terms), doc_id, dtype=np.int32))
+                    term_parts.append(vector.terms)
+                    count_parts.append(vector.counts)
+
+        vocab_size = len(self.vocab)
+        doc_count = len(self.paths)
+        if not doc_parts:
+            return {
+                'term_ptr': np.zeros(vocab_size + 1, dtype=np.int64),
+                'docs': np.zeros(0, dtype=np.int32),
+                'counts': np.zeros(0, dtype=np.float32),
+                'lengths': np.zeros(doc_count, dtype=np.float32),
+                'avg_length': 1.0,
+                'live_docs': 0
+            }
+
+        docs = np.concatenate(doc_parts)
+        terms = np.concatenate(term_parts)
+        counts = np.concatenate(count_parts)
+
+        # 同一文档不同字段中的同一个词合并为一项
+        keys = terms.astype(np.int64) * doc_count + docs
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse.ravel(), weights=counts).astype(np.float32)
+        terms = (unique_keys // doc_count).astype(np.int32)
+        docs = (unique_keys % doc_count).astype(np.int32)
+
+        # unique_keys按词编号、文档编号排序，即为CSC格式
+        term_ptr = np.zeros(vocab_size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=vocab_size), out=term_ptr[1:])
+        lengths = np.bincount(docs, weights=counts, minlength=doc_count).astype(np.float32)
+        live_docs = sum(1 for vector in self.code_vectors if vector is not None)
+        return {
+            'term_ptr': term_ptr,
+            'docs': docs,
+            'counts': counts,
+            'lengths': lengths,
+            'avg_length': float(lengths.sum() / max(live_docs, 1)) or 1.0,
+            'live_docs': live_docs
+        }
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        按BM25得分检索源文件
+
+        Args:
+            query: 自然语言或关键词查询
+            limit: 返回的最大结果数
+
+        Returns:
+            按得分降序排列的结果（path、score、matched_terms、summary）
+        """
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = self._build_matrix()
+            matrix = self._matrix
+            term_ids = {}
+            for token in tokenize(query):
+                if token in self.vocab:
+                    term_ids[token] = self.vocab[token]
+
+            if not term_ids or not matrix['live_docs']:
+                return []
+
+            scores = np.zeros(len(self.paths), dtype=np.float32)
+            matched = np.zeros(len(self.paths), dtype=np.int32)
+            norms = BM25_K1 * (1 - BM25_B + BM25_B * matrix['lengths'] / matrix['avg_length'])
+            for term_id in term_ids.values():
+                start, end = matrix['term_ptr'][term_id], matrix['term_ptr'][term_id + 1]
+                if start == end:
+                    continue
+                docs = matrix['docs'][start:end]
+                tf = matrix['counts'][start:end]
+                df = end - start
+                idf = math.log(1 + (matrix['live_docs'] - df + 0.5) / (df + 0.5))
+                scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + norms[docs])
+                matched[docs] += 1
+
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-scores[candidates], limit)[:limit]]
+            candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+            results = []
+            for doc_id in candidates:
+                path = self.paths[doc_id]
+                results.append({
+                    'path': path,
+                    'score': round(float(scores[doc_id]), 4),
+                    'matched_terms': int(matched[doc_id]),
+                    'query_terms': len(term_ids),
+                    'summary': self.summaries.get(path)
+                })
+            return results
+
+    # ---- 持久化 ----
+
+    def save(self, index_path: str):
+        """保存到.npz文件（先写临时文件再原子替换）"""
+        with self._lock:
+            Path(os.path.dirname(index_path)).mkdir(parents=True, exist_ok=True)
+            arrays = {
+                'format': np.array([INDEX_FORMAT_VERSION]),
+                'version': np.array([self.version or '']),
+                'vocab': np.array(sorted(self.vocab, key=self.vocab.get), dtype=str),
+                'paths': np.array(self.paths, dtype=str),
+                'alive': np.array([vector is not None for vector in self.code_vectors], dtype=bool),
+                'code_hashes': np.array([h or '' for h in self.code_hashes], dtype=str)
+            }
+            for name, vectors in (('code', self.code_vectors), ('doc', self.doc_vectors)):
+                vectors = [vector or _SparseVector.empty() for vector in vectors]
+                ptr = np.zeros(len(vectors) + 1, dtype=np.int64)
+                np.cumsum([len(vector.terms) for vector in vectors], out=ptr[1:])
+                arrays[f'{name}_ptr'] = ptr
+                arrays[f'{name}_terms'] = np.concatenate([v.terms for v in vectors]) if vectors \
+                    else np.zeros(0, dtype=np.int32)
+                arrays[f'{name}_counts'] = np.concatenate([v.counts for v in vectors]) if vectors \
+                    else np.zeros(0, dtype=np.float32)
+
+            summary_paths = list(self.summaries)
+            arrays['summary_paths'] = np.array(summary_paths, dtype=str)
+            for field in ('doc_path', 'title', 'snippet'):
+                arrays[f'summary_{field}'] = np.array(
+                    [self.summaries[p][field] for p in summary_paths], dtype=str
+                )
+            arrays['summary_mtime'] = np.array(
+                [self.summaries[p]['mtime'] for p in summary_paths], dtype=np.float64
+            )
+
+            tmp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, index_path)
+
+    @classmethod
+    def load(cls, index_path: str) -> Optional['Bm25Index']:
+        """从文件加载，文件不存在或格式不符时返回None"""
+        try:
+            with np.load(index_path, allow_pickle=False) as data:
+                if int(data['format'][0]) != INDEX_FORMAT_VERSION:
+                    return None
+                index = cls(str(data['version'][0]) or None)
+                index.vocab = {term: i for i, term in enumerate(data['vocab'].tolist())}
+                index.paths = data['paths'].tolist()
+                index.doc_ids = {path: i for i, path in enumerate(index.paths)}
+                index.code_hashes = [h or None for h in data['code_hashes'].tolist()]
+
+                for name in ('code', 'doc'):
+                    ptr, terms, counts = data[f'{name}_ptr'], data[f'{name}_terms'], data[f'{name}_counts']
+                    vectors = [
+                        _SparseVector(terms[ptr[i]:ptr[i + 1]], counts[ptr[i]:ptr[i + 1]])
+                        for i in range(len(index.paths))
+                    ]
+                    setattr(index, f'{name}_vectors', vectors)
+                for i, alive in enumerate(data['alive'].tolist()):
+                    if not alive:
+                        index.code_vectors[i] = None
+
+                for i, path in enumerate(data['summary_paths'].tolist()):
+                    index.summaries[path] = {
+                        'doc_path': str(data['summary_doc_path'][i]),
+                        'title': str(data['summary_title'][i]),
+                        'snippet': str(data['summary_snippet'][i]),
+                        'mtime': float(data['summary_mtime'][i])
+                    }
+                return index
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"加载BM25索引失败 {index_path}: {e}")
+            return None
+
+
+class Bm25IndexCache:
+    """进程内的索引缓存，按项目保留最近使用的若干个索引"""
+
+    def __init__(self, max_loaded: int = MAX_LOADED_INDEXES):
+        self.max_loaded = max_loaded
+        self._indexes: 'OrderedDict[str, Bm25Index]' = OrderedDict()
+        self._lock = threading.Lock()
+        # 项目 -> 索引锁，同一项目的载入、同步与保存串行执行，不同项目互不阻塞
+        self._key_locks: Dict[str, threading.RLock] = {}
+
+    def lock(self, key: str) -> threading.RLock:
+        """
+        项目的索引锁（可重入）：调用方在同步、更新并保存索引期间持有，
+        避免多个请求或总结线程同时重建同一个索引
+        """
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.RLock())
+
+    def get(self, key: str, index_path: str,
+            on_load: Optional[Callable[[Bm25Index], None]] = None) -> Bm25Index:
+        """
+        获取项目索引：优先使用内存中的索引，其次加载索引文件，都没有时新建空索引
+
+        加载与on_load只持有该项目的锁，其他项目的检索不受影响
+
+        Args:
+            key: 项目标识
+            index_path: 索引文件路径
+            on_load: 索引首次载入内存时的回调（用于与源文件、总结文档同步）
+
+        Returns:
+            BM25索引
+        """
+        index = self.peek(key)
+        if index is not None:
+            return index
+
+        with self.lock(key):
+            # 等待期间其他请求可能已完成载入
+            index = self.peek(key)
+            if index is not None:
+                return index
+
+            index = Bm25Index.load(index_path) or Bm25Index()
+            if on_load:
+                on_load(index)
+            with self._lock:
+                self._indexes[key] = index
+                while len(self._indexes) > self.max_loaded:
+                    self._indexes.popitem(last=False)
+            return index
+
+    def peek(self, key: str) -> Optional[Bm25Index]:
+        """获取已在内存中的索引，不触发加载"""
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+            return index
+
+    def discard(self, key: str):
+        with self._lock:
+            self._indexes.pop(key, None)
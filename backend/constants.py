@@ -15,3 +15,25 @@ CODE_EXTENSIONS = {
 
 # 本地代码分析支持的扩展名（与CODE_EXTENSIONS保持一致）
 VALID_FILE_EXTENSIONS = CODE_EXTENSIONS
+
+# 遍历时直接跳过的目录（依赖、构建产物、虚拟环境、缓存等）
+IGNORED_DIRECTORIES = {
+    'node_modules', 'bower_components', 'jspm_packages', 'dist', 'build', 'out',
+    '.next', '.nuxt', '.output', '.svelte-kit', 'coverage', '.venv', 'venv', 'env',
+    '__pycache__', '.git', '.hg', '.svn', '.tox', '.nox', '.mypy_cache',
+    '.pytest_cache', '.ruff_cache', '.cache', '.idea', '.vscode', 'site-packages',
+    '.eggs', '.gradle', 'target'
+}
+
+# 项目级忽略文件，格式与.gitignore相同
+PROJECT_IGNORE_FILE = '.summarizeignore'
+
+# 解压时除代码文件外保留的文档与配置文件（按扩展名）
+EXTRACT_EXTRA_EXTENSIONS = {
+    '.md', '.rst', '.txt', '.json', '.yaml', '.yml', '.toml', '.ini', '.cfg'
+}
+
+# 解压时保留的特定文件名（忽略规则与常见的无扩展名文档、构建文件）
+EXTRACT_EXTRA_FILENAMES = {
+    '.gitignore', PROJECT_IGNORE_FILE, 'README', 'LICENSE', 'Dockerfile', 'Makefile'
+}
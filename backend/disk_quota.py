@@ -0,0 +1,351 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 受配额管理的目录
+AREA_TEMP = 'temp'
+AREA_EXTRACTED = 'extracted'
+AREA_UPLOADS = 'uploads'
+AREA_DOCS = 'docs'
+
+# 超出配额时的清理顺序：过期的临时文件；可从压缩包或打包文件重新展开的解压目录；
+# 已解压或已打包项目的压缩包；文档默认不清理
+EVICTION_ORDER = [AREA_TEMP, AREA_EXTRACTED, AREA_UPLOADS, AREA_DOCS]
+
+# 所有目录合计的配额键
+QUOTA_TOTAL = 'total'
+
+# 保留最近的清理记录条数
+RECENT_EVICTIONS = 50
+
+ACCESS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS access (
+    storage_id TEXT PRIMARY KEY,
+    last_access REAL NOT NULL
+);
+"""
+
+
+def path_size(path: str) -> int:
+    """文件大小，或目录下所有文件的大小之和（不跟随符号链接）"""
+    try:
+        if not os.path.isdir(path) or os.path.islink(path):
+            return os.lstat(path).st_size
+    except OSError:
+        return 0
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+class AccessTracker:
+    """
+    记录各项目（存储ID）的最近访问时间（SQLite），作为配额清理的冷热依据
+
+    请求线程只在内存中记录访问时间，由配额检查线程在读取前批量写入数据库，
+    请求处理不打开数据库连接，也不争用写锁
+    """
+
+    def __init__(self, db_path: str):
+        """
+        初始化访问记录
+
+        Args:
+            db_path: 数据库路径
+        """
+        self.db_path = db_path
+        # 尚未写入数据库的访问时间
+        self._pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._schema_ready:
+            Path(os.path.dirname(self.db_path)).mkdir(parents=True, exist_ok=True)
+            conn.executescript(ACCESS_SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def touch(self, storage_id: str):
+        """记录一次访问（只更新内存）"""
+        now = time.time()
+        with self._lock:
+            self._pending[storage_id] = now
+
+    def flush(self):
+        """把内存中的访问时间写入数据库"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    "INSERT INTO access (storage_id, last_access) VALUES (?, ?) "
+                    "ON CONFLICT(storage_id) DO UPDATE SET last_access = MAX(last_access, excluded.last_access)",
+                    pending.items()
+                )
+        except sqlite3.Error:
+            # 写入失败时放回内存，下次再写；期间又有访问的以较新的时间为准
+            with self._lock:
+                for storage_id, accessed in pending.items():
+                    self._pending[storage_id] = max(accessed, self._pending.get(storage_id, 0))
+            raise
+
+    def last_access(self) -> Dict[str, float]:
+        """全部项目的最近访问时间"""
+        self.flush()
+        with closing(self._connect()) as conn:
+            return dict(conn.execute("SELECT storage_id, last_access FROM access").fetchall())
+
+    def forget(self, storage_id: str):
+        """项目删除后移除其访问记录"""
+        with self._lock:
+            self._pending.pop(storage_id, None)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM access WHERE storage_id = ?", (storage_id,))
+
+
+class DiskQuotaManager:
+    """
+    磁盘配额管理：后台线程定期统计上传、解压、文档与临时目录的占用，
+    超出配额时按EVICTION_ORDER从最久未访问的项目开始清理，直到回到配额以内
+
+    最近访问过或正在处理（后台流水线、总结任务、按需解压）的项目不清理；
+    某个项目的数据能否安全删除（如解压目录是否还能重新展开）由evict回调判断
+    """
+
+    def __init__(self, folders: Dict[str, str], quotas: Dict[str, int], tracker: AccessTracker,
+                 evict: Callable[[str, str], bool], is_busy: Callable[[str], bool],
+                 interval: int = 300, min_idle: int = 3600, temp_max_age: int = 86400,
+                 evict_docs: bool = False):
+        """
+        初始化配额管理
+
+        Args:
+            folders: 各目录（AREA_*）的路径
+            quotas: 各目录及合计（QUOTA_TOTAL）的配额（字节），0或缺省表示不限制
+            tracker: 项目访问记录
+            evict: 清理回调 (目录, 存储ID) -> 是否已删除，不能安全删除时返回False
+            is_busy: 项目是否正在处理
+            interval: 检查间隔（秒）
+            min_idle: 项目至少多久未访问才会被清理（秒）
+            temp_max_age: 临时文件至少多久未修改才会被清理（秒）
+            evict_docs: 是否允许清理文档
+        """
+        self.folders = folders
+        self.quotas = quotas
+        self.tracker = tracker
+        self.evict = evict
+        self.is_busy = is_busy
+        self.interval = interval
+        self.min_idle = min_idle
+        self.temp_max_age = temp_max_age
+        self.evict_docs = evict_docs
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._run_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._evictions = {area: {'count': 0, 'bytes': 0} for area in EVICTION_ORDER}
+        self._recent = deque(maxlen=RECENT_EVICTIONS)
+        self._last_run: Optional[Dict] = None
+
+    def start(self):
+        """启动后台检查线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='disk-quota', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        try:
+            self.tracker.flush()
+        except Exception as e:
+            logger.error(f"访问记录写入失败: {e}")
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"磁盘配额检查失败: {e}")
+
+    def _entries(self, area: str) -> List[Dict]:
+        """目录下的可清理单元：项目的压缩包、解压目录、文档目录；临时文件按文件名前缀分组"""
+        folder = self.folders[area]
+        if not os.path.isdir(folder):
+            return []
+
+        if area == AREA_TEMP:
+            # 分片上传会话的信息文件与数据文件（<upload_id>.json/.part）作为一个单元清理
+            groups: Dict[str, Dict] = {}
+            for root, _, files in os.walk(folder):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.lstat(path)
+                    except OSError:
+                        continue
+                    key = os.path.relpath(os.path.join(root, name.split('.')[0]), folder)
+                    group = groups.setdefault(key, {'key': key, 'paths': [], 'size': 0, 'mtime': 0})
+                    group['paths'].append(path)
+                    group['size'] += stat.st_size
+                    group['mtime'] = max(group['mtime'], stat.st_mtime)
+            return list(groups.values())
+
+        entries = []
+        with os.scandir(folder) as it:
+            for entry in it:
+                if area == AREA_UPLOADS:
+                    if not entry.name.endswith('.zip') or not entry.is_file():
+                        continue
+                    key = entry.name[:-4]
+                elif entry.is_dir(follow_symlinks=False):
+                    key = entry.name
+                else:
+                    continue
+                try:
+                    mtime = entry.stat(follow_symlinks=False).st_mtime
+                except OSError:
+                    continue
+                entries.append({'key': key, 'paths': [entry.path], 'size': path_size(entry.path), 'mtime': mtime})
+        return entries
+
+    def _is_over(self, area: str, used: Dict[str, int]) -> bool:
+        quota = self.quotas.get(area)
+        total_quota = self.quotas.get(QUOTA_TOTAL)
+        return bool(quota and used[area] > quota) or bool(total_quota and sum(used.values()) > total_quota)
+
+    def _evict_temp(self, entry: Dict, now: float) -> bool:
+        if now - entry['mtime'] < self.temp_max_age:
+            return False
+        for path in entry['paths']:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return True
+
+    def _evict_project(self, area: str, entry: Dict, last_used: float, now: float) -> bool:
+        if now - last_used < self.min_idle or self.is_busy(entry['key']):
+            return False
+        return self.evict(area, entry['key'])
+
+    def run_once(self) -> Dict:
+        """
+        检查一次配额并清理
+
+        Returns:
+            本次检查的结果：清理前后的占用与清理的条目
+        """
+        with self._run_lock:
+            started = time.time()
+            entries = {area: self._entries(area) for area in EVICTION_ORDER}
+            used = {area: sum(entry['size'] for entry in entries[area]) for area in EVICTION_ORDER}
+            before = dict(used)
+            access = self.tracker.last_access()
+            evicted = []
+
+            for area in EVICTION_ORDER:
+                if area == AREA_DOCS and not self.evict_docs:
+                    continue
+                if not self._is_over(area, used):
+                    continue
+                # 没有访问记录的项目（如记录建立前的上传）以文件修改时间为准
+                candidates = sorted(entries[area], key=lambda entry: access.get(entry['key'], entry['mtime']))
+                for entry in candidates:
+                    if not self._is_over(area, used):
+                        break
+                    last_used = access.get(entry['key'], entry['mtime'])
+                    try:
+                        if area == AREA_TEMP:
+                            removed = self._evict_temp(entry, started)
+                        else:
+                            removed = self._evict_project(area, entry, last_used, started)
+                    except Exception as e:
+                        logger.error(f"清理失败 {area}/{entry['key']}: {e}")
+                        continue
+                    if not removed:
+                        continue
+                    used[area] -= entry['size']
+                    evicted.append({
+                        'area': area,
+                        'key': entry['key'],
+                        'bytes': entry['size'],
+                        'last_access': datetime.fromtimestamp(last_used).isoformat(),
+                        'evicted_at': datetime.now().isoformat()
+                    })
+
+            with self._stats_lock:
+                for item in evicted:
+                    self._evictions[item['area']]['count'] += 1
+                    self._evictions[item['area']]['bytes'] += item['bytes']
+                    self._recent.append(item)
+                self._last_run = {
+                    'started_at': datetime.fromtimestamp(started).isoformat(),
+                    'duration': round(time.time() - started, 3),
+                    'usage_before': before,
+                    'usage_after': dict(used),
+                    'evicted': len(evicted),
+                    'freed_bytes': sum(item['bytes'] for item in evicted)
+                }
+                result = {**self._last_run, 'evictions': evicted}
+
+        if evicted:
+            logger.info(f"磁盘配额清理 {len(evicted)} 项，释放 {result['freed_bytes']} 字节")
+        return result
+
+    def usage(self) -> Dict[str, Dict]:
+        """各目录当前的占用、条目数与配额"""
+        usage = {}
+        for area in EVICTION_ORDER:
+            entries = self._entries(area)
+            usage[area] = {
+                'bytes': sum(entry['size'] for entry in entries),
+                'entries': len(entries),
+                'quota': self.quotas.get(area) or None
+            }
+        usage[QUOTA_TOTAL] = {
+            'bytes': sum(item['bytes'] for item in usage.values()),
+            'entries': sum(item['entries'] for item in usage.values()),
+            'quota': self.quotas.get(QUOTA_TOTAL) or None
+        }
+        return usage
+
+    def to_dict(self) -> Dict:
+        with self._stats_lock:
+            return {
+                'running': self._thread is not None and self._thread.is_alive() and not self._stop.is_set(),
+                'interval': self.interval,
+                'min_idle': self.min_idle,
+                'temp_max_age': self.temp_max_age,
+                'evict_docs': self.evict_docs,
+                'evictions': {area: dict(stats) for area, stats in self._evictions.items()},
+                'recent_evictions': list(self._recent),
+                'last_run': self._last_run
+            }
@@ -0,0 +1,175 @@
+import logging
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    project TEXT NOT NULL,
+    doc_path TEXT NOT NULL,
+    source_path TEXT,
+    title TEXT,
+    size INTEGER NOT NULL DEFAULT 0,
+    model TEXT,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    total_tokens INTEGER,
+    source_hash TEXT,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (project, doc_path)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_docs_source ON docs(project, source_path) WHERE source_path IS NOT NULL;
+CREATE TABLE IF NOT EXISTS imported (
+    project TEXT PRIMARY KEY,
+    imported_at TEXT NOT NULL
+);
+"""
+
+DOC_COLUMNS = ('doc_path', 'source_path', 'title', 'size', 'model', 'prompt_tokens',
+               'completion_tokens', 'total_tokens', 'source_hash', 'created_at')
+
+
+class DocCatalog:
+    """
+    总结文档目录（SQLite）：由总结任务在写入文档时登记源文件与文档的对应关系、
+    标题、大小、模型、token用量与源文件哈希
+
+    文档列表、按源文件查找文档与过期检查直接查询目录，不再遍历文档目录；
+    doc_path为相对项目文档目录（DOCS_FOLDER/<项目>）的路径
+    """
+
+    def __init__(self, db_path: str):
+        """
+        初始化文档目录
+
+        Args:
+            db_path: 数据库路径
+        """
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        Path(os.path.dirname(self.db_path)).mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(SCHEMA)
+        return conn
+
+    def record(self, project: str, doc: Dict) -> Optional[Dict]:
+        """
+        登记一篇总结文档，同一源文件已有的文档记录被替换
+
+        Args:
+            project: 项目（文档目录名，上传项目为存储ID）
+            doc: DOC_COLUMNS中的字段，created_at缺省为当前时间
+
+        Returns:
+            被替换的旧记录（文档路径不同时调用方应删除旧文档），没有时返回None
+        """
+        row = {column: doc.get(column) for column in DOC_COLUMNS}
+        row['created_at'] = row['created_at'] or datetime.now().isoformat()
+        with closing(self._connect()) as conn, conn:
+            previous = None
+            if row['source_path'] is not None:
+                previous = conn.execute(
+                    "SELECT * FROM docs WHERE project = ? AND source_path = ?", (project, row['source_path'])
+                ).fetchone()
+                conn.execute("DELETE FROM docs WHERE project = ? AND source_path = ?", (project, row['source_path']))
+            conn.execute(
+                f"INSERT OR REPLACE INTO docs (project, {', '.join(DOC_COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' for _ in DOC_COLUMNS)})",
+                (project, *(row[column] for column in DOC_COLUMNS))
+            )
+        return dict(previous) if previous else None
+
+    def get(self, project: str, source_path: str) -> Optional[Dict]:
+        """按源文件查找文档"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT * FROM docs WHERE project = ? AND source_path = ?", (project, source_path)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list_docs(self, project: str) -> List[Dict]:
+        """项目的全部文档，按文档路径排序"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT * FROM docs WHERE project = ? ORDER BY doc_path", (project,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, project: str) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM docs WHERE project = ?", (project,)).fetchone()[0]
+
+    def remove_sources(self, project: str, paths: List[str]) -> List[Dict]:
+        """
+        删除源文件对应的文档记录，paths中的目录连同其下的文件一起处理
+
+        Returns:
+            被删除的记录，调用方据此删除文档文件
+        """
+        removed = []
+        with closing(self._connect()) as conn, conn:
+            for path in paths:
+                rows = conn.execute(
+                    "SELECT * FROM docs WHERE project = ? AND (source_path = ? OR "
+                    "substr(source_path, 1, ?) = ?)", (project, path, len(path) + 1, path + os.sep)
+                ).fetchall()
+                for row in rows:
+                    conn.execute("DELETE FROM docs WHERE project = ? AND doc_path = ?", (project, row['doc_path']))
+                removed.extend(dict(row) for row in rows)
+        return removed
+
+    def copy(self, source: str, target: str):
+        """项目文档目录复制到新项目后，复制其文档记录"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO docs (project, {', '.join(DOC_COLUMNS)}) "
+                f"SELECT ?, {', '.join(DOC_COLUMNS)} FROM docs WHERE project = ?", (target, source)
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO imported (project, imported_at) "
+                "SELECT ?, imported_at FROM imported WHERE project = ?", (target, source)
+            )
+
+    def delete_project(self, project: str):
+        """项目文档目录删除后删除其全部记录"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM docs WHERE project = ?", (project,))
+
+    def is_imported(self, project: str) -> bool:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM imported WHERE project = ?", (project,)).fetchone() is not None
+
+    def import_docs(self, project: str, docs: List[Dict]):
+        """
+        登记文档目录建立之前生成的文档（每个项目只执行一次），已登记的文档不覆盖
+
+        Args:
+            project: 项目
+            docs: DOC_COLUMNS中的字段，无法对应源文件的文档source_path为None，created_at缺省为当前时间
+        """
+        with closing(self._connect()) as conn, conn:
+            if conn.execute("SELECT 1 FROM imported WHERE project = ?", (project,)).fetchone():
+                return
+            for doc in docs:
+                row = {column: doc.get(column) for column in DOC_COLUMNS}
+                # INSERT OR IGNORE同样忽略NOT NULL约束，缺少created_at的文档会被静默丢弃
+                row['created_at'] = row['created_at'] or datetime.now().isoformat()
+                if row['source_path'] is not None and conn.execute(
+                    "SELECT 1 FROM docs WHERE project = ? AND source_path = ?", (project, row['source_path'])
+                ).fetchone():
+                    row['source_path'] = None
+                conn.execute(
+                    f"INSERT OR IGNORE INTO docs (project, {', '.join(DOC_COLUMNS)}) "
+                    f"VALUES (?, {', '.join('?' for _ in DOC_COLUMNS)})",
+                    (project, *(row[column] for column in DOC_COLUMNS))
+                )
+            conn.execute(
+                "INSERT INTO imported (project, imported_at) VALUES (?, ?)", (project, datetime.now().isoformat())
+            )
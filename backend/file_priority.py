@@ -0,0 +1,113 @@
+import math
+import os
+from pathlib import PurePosixPath
+from typing import Dict, List, Optional
+
+from import_graph import scan_imports
+
+# 入口文件名（不含扩展名），命中时给予较高优先级
+ENTRY_POINT_STEMS = {
+    'main', 'app', 'index', 'server', '__main__', 'manage', 'cli', 'wsgi', 'asgi'
+}
+
+# 测试、示例等目录中的文件优先级较低
+LOW_PRIORITY_DIRS = {
+    'test', 'tests', '__tests__', 'spec', 'specs', 'example', 'examples',
+    'demo', 'demos', 'docs', 'fixtures', 'mocks', '__mocks__'
+}
+
+
+def compute_fan_in(code_files: List[Dict]) -> Dict[str, int]:
+    """
+    统计每个文件被项目内其他文件导入的次数
+
+    Args:
+        code_files: 代码文件列表，每项包含path和relative_path
+
+    Returns:
+        相对路径到被导入次数的映射
+    """
+    known_paths = {_posix(f['relative_path']) for f in code_files}
+    fan_in = {path: 0 for path in known_paths}
+
+    for code_file in code_files:
+        for target in scan_imports(code_file['path'], _posix(code_file['relative_path']), known_paths):
+            fan_in[target] += 1
+
+    return fan_in
+
+
+def score_code_file(relative_path: str, size: int, fan_in: int) -> float:
+    """
+    计算单个文件的重要性得分，得分越高越先处理
+
+    Args:
+        relative_path: 文件相对路径
+        size: 文件大小（字节）
+        fan_in: 被导入次数
+
+    Returns:
+        重要性得分
+    """
+    path = PurePosixPath(_posix(relative_path))
+    directories = [part.lower() for part in path.parent.parts]
+    depth = len(directories)
+
+    score = 3.0 * math.log1p(fan_in)
+
+    if path.stem.lower() in ENTRY_POINT_STEMS:
+        # 越靠近根目录的入口文件越可能是真正的程序入口
+        score += 4.0 if depth <= 1 else 2.0
+
+    score -= 0.5 * depth
+
+    if any(directory in LOW_PRIORITY_DIRS for directory in directories) \
+            or path.stem.lower().startswith('test_') or '.test' in path.name or '.spec' in path.name:
+        score -= 2.0
+
+    # 过小的文件（空的__init__.py、简单的重导出）信息量有限
+    if size < 200:
+        score -= 1.5
+    elif size <= 50 * 1024:
+        score += 1.0
+    else:
+        score += 0.5
+
+    return score
+
+
+def rank_code_files(code_files: List[Dict], fan_in: Optional[Dict[str, int]] = None) -> List[Dict]:
+    """
+    对代码文件按重要性排序：导入扇入、入口文件启发式、文件大小与目录深度
+
+    Args:
+        code_files: 代码文件列表，每项包含path和relative_path
+        fan_in: 已知的被导入次数（如项目的导入依赖图），未提供时扫描文件计算
+
+    Returns:
+        排序后的新列表，每项额外包含priority和fan_in字段
+    """
+    if fan_in is None:
+        fan_in = compute_fan_in(code_files)
+
+    ranked = []
+    for code_file in code_files:
+        try:
+            size = os.path.getsize(code_file['path'])
+        except OSError:
+            size = 0
+        relative_path = _posix(code_file['relative_path'])
+        file_fan_in = fan_in.get(relative_path, 0)
+        ranked.append({
+            **code_file,
+            'fan_in': file_fan_in,
+            'priority': round(score_code_file(relative_path, size, file_fan_in), 3)
+        })
+
+    ranked.sort(key=lambda item: (-item['priority'], item['relative_path']))
+    return ranked
+
+
+def _posix(path: str) -> str:
+    """统一使用/作为路径分隔符"""
+    return path.replace(os.sep, '/')
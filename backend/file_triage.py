@@ -0,0 +1,231 @@
+import fnmatch
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from fs_walk import IGNORE_FILE_NAMES, IgnoreSpec, IgnoreStack, scan_tree, should_prune_directory
+
+logger = logging.getLogger(__name__)
+
+# 生成/压缩检测只读取文件头部
+TRIAGE_SAMPLE_SIZE = 16 * 1024  # 16kb
+
+# 按文件名即可判定的生成文件
+GENERATED_NAME_PATTERNS = [
+    '*.d.ts', '*.min.js', '*.min.css', '*.bundle.js', '*.chunk.js',
+    '*_pb2.py', '*_pb2_grpc.py', '*_pb2.pyi', '*_pb.js', '*_pb.d.ts',
+    '*.pb.ts', '*_grpc_pb.js', '*.generated.ts', '*.generated.js',
+    'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml'
+]
+
+# 代码生成工具写在文件头部的标记，如 "Code generated by X. DO NOT EDIT." 与 "@generated"；
+# 单独的 "do not edit" 常见于手写的配置说明，必须与 "generated" 出现在同一行
+GENERATED_MARKER_PATTERN = re.compile(
+    r'@generated\b'
+    r'|\bgenerated\b.*\bdo not edit\b'
+    r'|\bdo not edit\b.*\bgenerated\b'
+    r'|\b(?:auto-?generated|automatically generated)\b'
+    r'|\bthis file (?:is|was) generated\b'
+    r'|\bgenerated by the protocol buffer compiler\b',
+    re.IGNORECASE
+)
+
+# 压缩代码判定阈值：平均行长，或超长行在非空行中的占比
+# （手写代码中个别超长的常量行不足以判定为压缩文件）
+MAX_AVERAGE_LINE_LENGTH = 300
+LONG_LINE_LENGTH = 1000
+MIN_LONG_LINE_RATIO = 0.1
+MIN_WHITESPACE_RATIO = 0.05
+MAX_ENTROPY = 5.7
+
+# 生成标记只在文件开头的注释行中查找
+MARKER_SCAN_LINES = 10
+COMMENT_PREFIXES = ('#', '//', '/*', '*', '<!--', '"""', "'''")
+
+REASON_IGNORE_FILE = 'ignore_file'
+REASON_GENERATED_NAME = 'generated_name'
+REASON_GENERATED_MARKER = 'generated_marker'
+REASON_MINIFIED = 'minified'
+REASON_HIGH_ENTROPY = 'high_entropy'
+
+
+def _shannon_entropy(text: str) -> float:
+    """
+    计算ASCII非空白字符的香农熵（bit/字符）
+
+    中文注释等非ASCII字符种类多，会使熵值虚高，因此不参与计算
+    """
+    counts = Counter(ch for ch in text if ch.isascii() and not ch.isspace())
+    total = sum(counts.values())
+    if not total:
+        return 0.0
+    return -sum(count / total * math.log2(count / total) for count in counts.values())
+
+
+def detect_generated_content(sample: str) -> Optional[str]:
+    """
+    根据文件头部内容判断是否为生成或压缩的代码
+
+    Args:
+        sample: 文件头部内容
+
+    Returns:
+        判定原因，正常源代码返回None
+    """
+    if not sample:
+        return None
+
+    lines = sample.splitlines() or [sample]
+
+    for line in lines[:MARKER_SCAN_LINES]:
+        line = line.strip()
+        if line.startswith(COMMENT_PREFIXES) and GENERATED_MARKER_PATTERN.search(line):
+            return REASON_GENERATED_MARKER
+
+    average_length = len(sample) / len(lines)
+    if average_length > MAX_AVERAGE_LINE_LENGTH:
+        return REASON_MINIFIED
+
+    non_blank = [line for line in lines if line.strip()]
+    long_lines = sum(1 for line in non_blank if len(line) > LONG_LINE_LENGTH)
+    if non_blank and long_lines / len(non_blank) >= MIN_LONG_LINE_RATIO:
+        return REASON_MINIFIED
+
+    whitespace = sum(1 for ch in sample if ch.isspace())
+    if len(sample) >= 1024 and whitespace / len(sample) < MIN_WHITESPACE_RATIO:
+        return REASON_MINIFIED
+
+    # 内联的base64数据、压缩后的代码熵值明显高于正常源代码
+    if len(sample) >= 1024 and _shannon_entropy(sample) > MAX_ENTROPY:
+        return REASON_HIGH_ENTROPY
+
+    return None
+
+
+def classify_file(file_path: str, relative_path: str) -> Optional[str]:
+    """
+    判断代码文件是否为生成或压缩的文件
+
+    Args:
+        file_path: 文件绝对路径
+        relative_path: 相对项目根目录的路径（使用/分隔）
+
+    Returns:
+        跳过原因，需要总结的文件返回None
+    """
+    name = os.path.basename(relative_path)
+    if any(fnmatch.fnmatch(name, pattern) for pattern in GENERATED_NAME_PATTERNS):
+        return REASON_GENERATED_NAME
+
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            sample = f.read(TRIAGE_SAMPLE_SIZE)
+    except OSError as e:
+        logger.warning(f"读取文件失败 {file_path}: {e}")
+        return None
+
+    return detect_generated_content(sample)
+
+
+def triage_project(project_path: str, extensions: Set[str]) -> Tuple[List[Dict], List[Dict], List[str]]:
+    """
+    遍历项目目录，跳过依赖与构建目录、被.gitignore或项目忽略文件排除的路径，
+    并筛除生成或压缩的代码文件
+
+    Args:
+        project_path: 项目目录路径
+        extensions: 需要处理的文件扩展名
+
+    Returns:
+        (待总结的代码文件, 被筛除的文件及原因, 被跳过的目录)
+    """
+    skipped_files = []
+    pruned_directories = []
+
+    def on_pruned(relative_path, is_dir):
+        if is_dir:
+            pruned_directories.append(relative_path)
+        else:
+            skipped_files.append({'file_path': relative_path, 'reason': REASON_IGNORE_FILE})
+
+    tree = scan_tree(project_path, extensions, skip_hidden=False, on_pruned=on_pruned)
+
+    code_files = []
+    for entry in tree.iter_files():
+        reason = classify_file(entry.path, entry.relative_path)
+        if reason:
+            skipped_files.append({'file_path': entry.relative_path, 'reason': reason})
+            continue
+
+        code_files.append({
+            'path': entry.path,
+            'relative_path': os.path.relpath(entry.path, project_path),
+            'name': entry.name,
+            'extension': entry.extension
+        })
+
+    return code_files, skipped_files, sorted(pruned_directories)
+
+
+def triage_files(project_path: str, relative_paths: List[str]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    只筛查列出的文件（如增量更新中变化的文件），不遍历整个项目：依赖与构建目录、
+    忽略规则与triage_project一致，忽略文件只读取这些文件的上级目录中的
+
+    Args:
+        project_path: 项目目录路径
+        relative_paths: 相对项目根目录的文件路径
+
+    Returns:
+        (待总结的代码文件, 被筛除的文件及原因)；不存在或位于被跳过目录中的文件不出现在结果中
+    """
+    # 目录相对路径 -> 作用于其子条目的忽略规则（含该目录的忽略文件）
+    stacks: Dict[str, Optional[IgnoreStack]] = {}
+
+    def ignores_for(directory: str) -> Optional[IgnoreStack]:
+        """目录的忽略规则，目录本身被跳过时返回None"""
+        if directory in stacks:
+            return stacks[directory]
+        if directory:
+            parent, _, name = directory.rpartition('/')
+            ignores = ignores_for(parent)
+            if ignores is not None and (should_prune_directory(name) or ignores.is_ignored(directory, True)):
+                ignores = None
+        else:
+            ignores = IgnoreStack()
+        if ignores is not None:
+            prefix = f"{directory}/" if directory else ''
+            for ignore_name in IGNORE_FILE_NAMES:
+                ignores = ignores.push(prefix, IgnoreSpec.from_file(os.path.join(project_path, prefix, ignore_name)))
+        stacks[directory] = ignores
+        return ignores
+
+    code_files = []
+    skipped_files = []
+    for relative_path in relative_paths:
+        path = relative_path.replace(os.sep, '/')
+        file_path = os.path.join(project_path, relative_path)
+        if not os.path.isfile(file_path):
+            continue
+        ignores = ignores_for(path.rpartition('/')[0])
+        if ignores is None:
+            continue
+        if ignores.is_ignored(path, False):
+            skipped_files.append({'file_path': relative_path, 'reason': REASON_IGNORE_FILE})
+            continue
+        reason = classify_file(file_path, path)
+        if reason:
+            skipped_files.append({'file_path': relative_path, 'reason': reason})
+            continue
+        name = os.path.basename(relative_path)
+        code_files.append({
+            'path': file_path,
+            'relative_path': relative_path,
+            'name': name,
+            'extension': os.path.splitext(name)[1].lower()
+        })
+
+    return code_files, skipped_files
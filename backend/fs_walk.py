@@ -0,0 +1,368 @@
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from constants import IGNORED_DIRECTORIES, PROJECT_IGNORE_FILE
+
+logger = logging.getLogger(__name__)
+
+# 遍历时读取的忽略文件，子目录中的忽略文件同样生效
+IGNORE_FILE_NAMES = ('.gitignore', PROJECT_IGNORE_FILE)
+
+
+def should_prune_directory(name: str) -> bool:
+    """判断目录是否应在遍历时直接跳过（依赖、构建产物、隐藏目录）"""
+    return name in IGNORED_DIRECTORIES or name.startswith('.')
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """将gitignore风格的glob模式转换为正则表达式"""
+    i, n = 0, len(pattern)
+    parts = []
+    while i < n:
+        ch = pattern[i]
+        if ch == '*':
+            if pattern[i:i + 3] == '**/':
+                parts.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern[i:i + 2] == '**':
+                parts.append('.*')
+                i += 2
+                continue
+            parts.append('[^/]*')
+        elif ch == '?':
+            parts.append('[^/]')
+        elif ch == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                parts.append(re.escape(ch))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append(f"[{body}]")
+                i = end
+        elif ch == '\\' and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(ch))
+        i += 1
+    return ''.join(parts)
+
+
+class IgnoreSpec:
+    """
+    一个忽略文件中的规则集合，语义与.gitignore一致：
+
+    - 以!开头的规则重新包含之前被忽略的路径，后出现的规则优先
+    - 以/结尾的规则只匹配目录
+    - 包含/的规则相对忽略文件所在目录锚定，否则匹配任意层级的名称
+    - 支持*、?、[...]和**通配
+    """
+
+    def __init__(self, lines: List[str]):
+        # (正则, 是否取反, 是否只匹配目录, 是否锚定)
+        self.rules: List[Tuple[re.Pattern, bool, bool, bool]] = []
+        for line in lines:
+            rule = self._parse_line(line)
+            if rule:
+                self.rules.append(rule)
+
+    @staticmethod
+    def _parse_line(line: str) -> Optional[Tuple[re.Pattern, bool, bool, bool]]:
+        line = line.rstrip('\n')
+        # 未转义的行尾空格会被忽略
+        while line.endswith(' ') and not line.endswith('\\ '):
+            line = line[:-1]
+        if not line or line.startswith('#'):
+            return None
+
+        negate = False
+        if line.startswith('!'):
+            negate = True
+            line = line[1:]
+        elif line.startswith('\\#') or line.startswith('\\!'):
+            line = line[1:]
+
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            return None
+
+        anchored = '/' in line
+        line = line.lstrip('/')
+        try:
+            regex = re.compile(_glob_to_regex(line) + r'\Z')
+        except re.error:
+            # 无效的模式（如[z-a]）与git一样忽略该规则
+            return None
+        return regex, negate, dir_only, anchored
+
+    @classmethod
+    def from_file(cls, file_path: str) -> Optional['IgnoreSpec']:
+        """
+        从忽略文件加载规则，文件不存在或没有有效规则时返回None
+
+        Args:
+            file_path: 忽略文件路径
+
+        Returns:
+            规则集合
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                spec = cls(f.readlines())
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"读取忽略文件失败 {file_path}: {e}")
+            return None
+        return spec if spec.rules else None
+
+    def match(self, relative_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        按规则判断路径
+
+        Args:
+            relative_path: 相对忽略文件所在目录的路径（使用/分隔）
+            is_dir: 是否为目录
+
+        Returns:
+            True表示忽略，False表示被!规则重新包含，None表示没有规则命中
+        """
+        name = relative_path.rsplit('/', 1)[-1]
+        result = None
+        for regex, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relative_path if anchored else name):
+                result = not negate
+        return result
+
+
+class IgnoreStack:
+    """遍历过程中各层目录忽略规则的叠加，深层目录的规则优先"""
+
+    def __init__(self, specs: Optional[List[Tuple[str, IgnoreSpec]]] = None):
+        # (规则所在目录相对根目录的前缀, 规则集合)
+        self.specs = specs or []
+
+    def push(self, prefix: str, spec: Optional[IgnoreSpec]) -> 'IgnoreStack':
+        if spec is None:
+            return self
+        return IgnoreStack(self.specs + [(prefix, spec)])
+
+    def is_ignored(self, relative_path: str, is_dir: bool) -> bool:
+        result = None
+        for prefix, spec in self.specs:
+            matched = spec.match(relative_path[len(prefix):], is_dir)
+            if matched is not None:
+                result = matched
+        return bool(result)
+
+
+@dataclass
+class FileEntry:
+    """遍历得到的文件，stat结果在遍历时获取一次并复用"""
+    path: str
+    relative_path: str
+    name: str
+    extension: str
+    size: int
+    mtime: float
+
+
+@dataclass
+class DirectoryNode:
+    """遍历得到的目录树节点"""
+    path: str
+    relative_path: str
+    name: str
+    directories: Dict[str, 'DirectoryNode'] = field(default_factory=dict)
+    files: Dict[str, FileEntry] = field(default_factory=dict)
+    # 遍历时目录自身的mtime，增删改名子条目都会改变它，用于判断缓存是否失效
+    mtime: float = 0.0
+    # 作用于本目录子条目的忽略规则（含本目录的忽略文件），重新遍历子树时沿用
+    ignores: IgnoreStack = field(default_factory=IgnoreStack, repr=False)
+    # 本目录中忽略文件的路径与mtime，规则被修改时同样需要失效
+    ignore_files: Dict[str, float] = field(default_factory=dict, repr=False)
+
+    def iter_files(self) -> Iterator[FileEntry]:
+        """按路径顺序遍历子树中的所有文件"""
+        for name in sorted(self.files):
+            yield self.files[name]
+        for name in sorted(self.directories):
+            yield from self.directories[name].iter_files()
+
+    def iter_directories(self) -> Iterator['DirectoryNode']:
+        """遍历子树中的所有目录（包括自身）"""
+        yield self
+        for name in sorted(self.directories):
+            yield from self.directories[name].iter_directories()
+
+    def is_empty(self) -> bool:
+        return not self.files and all(child.is_empty() for child in self.directories.values())
+
+    def is_stale(self) -> bool:
+        """目录自身或其忽略文件自遍历后是否被修改（不检查子目录）"""
+        try:
+            if os.stat(self.path).st_mtime != self.mtime:
+                return True
+            for ignore_path, mtime in self.ignore_files.items():
+                if os.stat(ignore_path).st_mtime != mtime:
+                    return True
+        except OSError:
+            return True
+        return False
+
+
+def scan_tree(
+    root: str,
+    extensions: Optional[Set[str]] = None,
+    skip_hidden: bool = True,
+    on_pruned: Optional[Callable[[str, bool], None]] = None
+) -> DirectoryNode:
+    """
+    使用os.scandir一次性遍历目录树：依赖/构建目录和被忽略文件排除的目录不会进入，
+    每个目录只列举一次，每个保留的文件只stat一次
+
+    Args:
+        root: 根目录路径
+        extensions: 只保留这些扩展名的文件，None表示保留全部
+        skip_hidden: 是否跳过以.开头的文件
+        on_pruned: 目录或文件被跳过时的回调，参数为相对路径和是否为目录
+
+    Returns:
+        根目录节点
+    """
+    root = os.path.abspath(root)
+    root_node = DirectoryNode(path=root, relative_path='', name=os.path.basename(root))
+    scan_into(root_node, IgnoreStack(), extensions, skip_hidden, on_pruned)
+    return root_node
+
+
+def iter_tree_files(
+    root: str,
+    extensions: Optional[Set[str]] = None,
+    skip_hidden: bool = True
+) -> Iterator[FileEntry]:
+    """
+    与scan_tree规则相同，但边遍历边产出文件，不必等整棵目录树遍历完成
+
+    Args:
+        root: 根目录路径
+        extensions: 只保留这些扩展名的文件，None表示保留全部
+        skip_hidden: 是否跳过以.开头的文件
+
+    Yields:
+        文件，同一目录中按文件名排序
+    """
+    root = os.path.abspath(root)
+    root_node = DirectoryNode(path=root, relative_path='', name=os.path.basename(root))
+    for node in iter_scan(root_node, IgnoreStack(), extensions, skip_hidden):
+        for name in sorted(node.files):
+            yield node.files[name]
+        # 已产出的文件不再需要保留
+        node.files.clear()
+
+
+def scan_into(
+    root_node: DirectoryNode,
+    ignores: IgnoreStack,
+    extensions: Optional[Set[str]] = None,
+    skip_hidden: bool = True,
+    on_pruned: Optional[Callable[[str, bool], None]] = None
+):
+    """
+    遍历root_node对应的目录并填充其子树，用于首次遍历或重新遍历已失效的子树
+
+    Args:
+        root_node: 待填充的目录节点（path与relative_path已设置）
+        ignores: 从上级目录继承的忽略规则
+        extensions: 只保留这些扩展名的文件，None表示保留全部
+        skip_hidden: 是否跳过以.开头的文件
+        on_pruned: 目录或文件被跳过时的回调，参数为相对路径和是否为目录
+    """
+    for _ in iter_scan(root_node, ignores, extensions, skip_hidden, on_pruned):
+        pass
+
+
+def iter_scan(
+    root_node: DirectoryNode,
+    ignores: IgnoreStack,
+    extensions: Optional[Set[str]] = None,
+    skip_hidden: bool = True,
+    on_pruned: Optional[Callable[[str, bool], None]] = None
+) -> Iterator[DirectoryNode]:
+    """
+    scan_into的逐目录版本：每个目录的条目处理完成后产出该目录节点，参数同scan_into
+    """
+    stack = [(root_node, ignores)]
+
+    while stack:
+        node, ignores = stack.pop()
+        prefix = f"{node.relative_path}/" if node.relative_path else ''
+
+        try:
+            # 先stat再列举，遍历过程中发生的修改会在下次校验时被发现
+            node.mtime = os.stat(node.path).st_mtime
+            with os.scandir(node.path) as it:
+                entries = list(it)
+        except PermissionError:
+            logger.warning(f"没有权限访问目录: {node.path}")
+            continue
+        except OSError as e:
+            logger.error(f"读取目录失败 {node.path}: {e}")
+            continue
+
+        # 先加载本目录的忽略文件，再处理其他条目
+        names = {entry.name for entry in entries}
+        for ignore_name in IGNORE_FILE_NAMES:
+            if ignore_name in names:
+                ignore_path = os.path.join(node.path, ignore_name)
+                try:
+                    node.ignore_files[ignore_path] = os.stat(ignore_path).st_mtime
+                except OSError:
+                    continue
+                ignores = ignores.push(prefix, IgnoreSpec.from_file(ignore_path))
+        node.ignores = ignores
+
+        for entry in entries:
+            name = entry.name
+            relative_path = prefix + name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if should_prune_directory(name) or ignores.is_ignored(relative_path, True):
+                        if on_pruned:
+                            on_pruned(relative_path, True)
+                        continue
+                    child = DirectoryNode(path=entry.path, relative_path=relative_path, name=name)
+                    node.directories[name] = child
+                    stack.append((child, ignores))
+                elif entry.is_file():
+                    if skip_hidden and name.startswith('.'):
+                        continue
+                    extension = os.path.splitext(name)[1].lower()
+                    if extensions is not None and extension not in extensions:
+                        continue
+                    if ignores.is_ignored(relative_path, False):
+                        if on_pruned:
+                            on_pruned(relative_path, False)
+                        continue
+                    stat = entry.stat()
+                    node.files[name] = FileEntry(
+                        path=entry.path,
+                        relative_path=relative_path,
+                        name=name,
+                        extension=extension,
+                        size=stat.st_size,
+                        mtime=stat.st_mtime
+                    )
+            except OSError as e:
+                logger.warning(f"读取文件信息失败 {entry.path}: {e}")
+
+        yield node
@@ -0,0 +1,417 @@
+import heapq
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# 各项加分，参考常见IDE文件查找器的打分方式
+SCORE_MATCH = 1
+BONUS_BOUNDARY = 8      # 匹配字符位于路径段、单词开头（/ _ - . 空格之后）
+BONUS_CAMEL = 7         # 匹配字符为驼峰命名中的大写字母
+BONUS_CONSECUTIVE = 5   # 与上一个匹配字符相邻
+BONUS_BASENAME = 10     # 全部字符都在文件名中匹配
+BONUS_RECENT = 5        # 最近修改的文件最多获得的加分
+PENALTY_GAP = 1         # 匹配字符之间每间隔一个字符扣分
+MAX_GAP_PENALTY = 10
+PENALTY_LENGTH = 0.01   # 路径每个字符的扣分，同等匹配下短路径优先
+
+BOUNDARY_CHARS = '/_-. '
+
+# 匹配的文件名过多时，只对按匹配紧凑程度粗排后的前若干个完整打分
+MAX_SCORED_NAMES = 500
+
+# 内存中最多保留的项目路径列表数量
+MAX_LOADED_PROJECTS = 16
+
+
+def _boundaries(text: str) -> List[int]:
+    """计算每个字符位置的边界加分"""
+    bonuses = [0] * len(text)
+    previous = '/'
+    for i, ch in enumerate(text):
+        if previous in BOUNDARY_CHARS:
+            bonuses[i] = BONUS_BOUNDARY
+        elif ch.isupper() and previous.islower():
+            bonuses[i] = BONUS_CAMEL
+        previous = ch
+    return bonuses
+
+
+def _score_positions(bonuses: List[int], positions: List[int]) -> int:
+    """按匹配位置计算得分"""
+    score = 0
+    previous = -1
+    for position in positions:
+        score += SCORE_MATCH + bonuses[position]
+        if previous >= 0:
+            if position == previous + 1:
+                score += BONUS_CONSECUTIVE
+            else:
+                score -= min((position - previous - 1) * PENALTY_GAP, MAX_GAP_PENALTY)
+        previous = position
+    return score
+
+
+def _forward_positions(text: str, bonuses: List[int], query: str) -> Optional[List[int]]:
+    """
+    从左到右匹配查询字符：每个字符优先取下一个字符首次出现之前的边界位置，否则取最左侧的位置
+
+    Returns:
+        匹配位置，不是子序列时返回None
+    """
+    positions = []
+    position = 0
+    previous = -1
+    for j, ch in enumerate(query):
+        found = text.find(ch, position)
+        if found == -1:
+            return None
+        # 在不影响后续字符匹配的前提下，优先选择边界位置
+        if not bonuses[found] and previous != found - 1:
+            limit = text.find(query[j + 1], found + 1) if j + 1 < len(query) else len(text)
+            if limit == -1:
+                return None
+            candidate = found
+            while True:
+                candidate = text.find(ch, candidate + 1, limit)
+                if candidate == -1:
+                    break
+                if bonuses[candidate]:
+                    found = candidate
+                    break
+        positions.append(found)
+        previous = found
+        position = found + 1
+    return positions
+
+
+def _backward_positions(text: str, query: str) -> Optional[List[int]]:
+    """从右到左匹配查询字符（目录部分优先匹配离文件最近的路径段）"""
+    positions = []
+    position = len(text)
+    for ch in reversed(query):
+        position = text.rfind(ch, 0, position)
+        if position == -1:
+            return None
+        positions.append(position)
+    positions.reverse()
+    return positions
+
+
+def _subsequence_pattern(query: str) -> 're.Pattern':
+    """
+    编译判断子序列的正则：每一步用排除该字符的字符类跳过不匹配的字符，回溯时不会重新匹配，
+    不依赖独占量词（Python 3.11+）；匹配时lastindex为从左侧起能依次匹配的查询字符数
+    """
+    pattern = ''
+    for ch in reversed(query):
+        escaped = re.escape(ch)
+        pattern = f"[^{escaped}]*({escaped})" + (f"(?:{pattern})?" if pattern else '')
+    return re.compile(pattern, re.DOTALL)
+
+
+class _Segment:
+    """去重后的文件名或目录，预先完成小写化与边界计算"""
+
+    __slots__ = ('text', 'lower', 'bonuses', 'path_ids')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self.bonuses = _boundaries(text)
+        self.path_ids: List[int] = []
+
+
+class PathList:
+    """
+    项目代码文件路径的内存列表，用于逐键触发的模糊查找
+
+    文件名和目录分别去重并预先计算边界加分。查找时先按字符集合求交集、再用不回溯的正则
+    判断子序列，只对真正匹配的文件名/目录在Python中打分。查询优先在文件名中匹配，
+    文件名匹配不足时再按“前半部分匹配目录、剩余部分匹配文件名”查找。
+    """
+
+    def __init__(self, version: str, files: List[Dict]):
+        """
+        初始化路径列表
+
+        Args:
+            version: 对应的项目索引版本
+            files: 代码文件列表（包含path、extension、size、mtime）
+        """
+        self.version = version
+        self.paths: List[str] = []
+        self.extensions: List[str] = []
+        self.sizes: List[int] = []
+        self.mtimes: List[float] = []
+        self.names: List[_Segment] = []
+        self.dirs: List[_Segment] = []
+        # 目录编号 -> {文件名编号: 文件编号}
+        self._dir_files: List[Dict[int, int]] = []
+        # 目录编号 -> 目录中的文件名编号集合
+        self._dir_names: List[Set[int]] = []
+
+        name_ids: Dict[str, int] = {}
+        dir_ids: Dict[str, int] = {}
+        for path_id, file_info in enumerate(files):
+            path = file_info['path'].replace('\\', '/')
+            split = path.rfind('/') + 1
+            name, directory = path[split:], path[:split]
+
+            name_id = name_ids.get(name.lower())
+            if name_id is None:
+                name_id = name_ids[name.lower()] = len(self.names)
+                self.names.append(_Segment(name))
+            dir_id = dir_ids.get(directory)
+            if dir_id is None:
+                dir_id = dir_ids[directory] = len(self.dirs)
+                self.dirs.append(_Segment(directory))
+                self._dir_files.append({})
+                self._dir_names.append(set())
+
+            self.paths.append(path)
+            self.extensions.append(file_info['extension'])
+            self.sizes.append(file_info['size'])
+            self.mtimes.append(file_info['mtime'])
+            self.names[name_id].path_ids.append(path_id)
+            self.dirs[dir_id].path_ids.append(path_id)
+            self._dir_files[dir_id][name_id] = path_id
+            self._dir_names[dir_id].add(name_id)
+
+        # 与匹配无关的加分：修改时间越近、路径越短越靠前
+        self.tiebreaks: List[float] = []
+        if self.mtimes:
+            oldest, newest = min(self.mtimes), max(self.mtimes)
+            span = (newest - oldest) or 1.0
+            self.tiebreaks = [
+                (mtime - oldest) / span * BONUS_RECENT - len(path) * PENALTY_LENGTH
+                for mtime, path in zip(self.mtimes, self.paths)
+            ]
+        for segment in self.names:
+            segment.path_ids.sort(key=lambda i: -self.tiebreaks[i])
+
+        # 字符 -> 包含该字符的文件名编号
+        self._name_chars: Dict[str, Set[int]] = {}
+        # 文件名首字母 -> 文件编号（按修改时间与路径长度排序），用于单字符查询
+        self._first_chars: Dict[str, List[int]] = {}
+        for name_id, segment in enumerate(self.names):
+            for ch in set(segment.lower):
+                self._name_chars.setdefault(ch, set()).add(name_id)
+            if segment.lower:
+                self._first_chars.setdefault(segment.lower[0], []).extend(segment.path_ids)
+        for path_ids in self._first_chars.values():
+            path_ids.sort(key=lambda i: -self.tiebreaks[i])
+        self._by_recency = sorted(range(len(self.paths)), key=lambda i: -self.mtimes[i])
+
+    def find(self, query: str, limit: int = 20, extension: Optional[str] = None) -> Dict:
+        """
+        模糊查找文件
+
+        Args:
+            query: 查询字符串（忽略空白，不区分大小写）
+            limit: 返回的最大结果数
+            extension: 扩展名过滤
+
+        Returns:
+            results与matched（匹配的不同文件数；文件名匹配已足够时不再统计目录匹配）
+        """
+        query = ''.join(query.lower().split())
+        extension = extension.lower() if extension else None
+
+        if len(query) <= 1:
+            # 空查询返回最近修改的文件，单字符查询只匹配文件名首字母
+            ordered = self._first_chars.get(query, []) if query else self._by_recency
+            if extension:
+                ordered = [i for i in ordered if self.extensions[i] == extension]
+            results = []
+            for path_id in ordered[:limit]:
+                if query:
+                    score = SCORE_MATCH + BONUS_BOUNDARY + BONUS_BASENAME + self.tiebreaks[path_id]
+                    positions = [self.paths[path_id].rfind('/') + 1]
+                else:
+                    score, positions = 0.0, []
+                results.append(self._result(path_id, score, positions))
+            return {'results': results, 'matched': len(ordered)}
+
+        scored, matched = self._match_names(query, limit, extension)
+        if len(scored) < limit:
+            path_scored, path_matched = self._match_paths(query, extension)
+            scored.extend(path_scored)
+            matched |= path_matched
+
+        # 同一文件可能同时在文件名和路径中匹配，只保留得分最高的一项
+        best: Dict[int, Tuple[float, int, List[int], bool]] = {}
+        for item in scored:
+            current = best.get(item[1])
+            if current is None or item[0] > current[0]:
+                best[item[1]] = item
+
+        results = []
+        for score, path_id, positions, in_name in heapq.nlargest(limit, best.values(), key=lambda item: item[0]):
+            if in_name:
+                # 文件名匹配的位置相对文件名，转换为相对完整路径
+                offset = self.paths[path_id].rfind('/') + 1
+                positions = [offset + p for p in positions]
+            results.append(self._result(path_id, score, positions))
+        return {
+            'results': results,
+            'matched': len(matched)
+        }
+
+    def _name_candidates(self, query: str) -> Set[int]:
+        """包含查询中全部字符的文件名编号"""
+        sets = []
+        for ch in set(query):
+            ids = self._name_chars.get(ch)
+            if not ids:
+                return set()
+            sets.append(ids)
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def _match_names(self, query: str, limit: int,
+                     extension: Optional[str]) -> Tuple[List[Tuple[float, int, List[int], bool]], Set[int]]:
+        """在文件名中匹配整个查询，返回打分结果与匹配的文件编号"""
+        pattern = _subsequence_pattern(query)
+        full = len(query)
+        first = query[0]
+        candidates = []
+        matched: Set[int] = set()
+        for name_id in self._name_candidates(query):
+            segment = self.names[name_id]
+            if extension and not segment.lower.endswith(extension):
+                continue
+            match = pattern.match(segment.lower)
+            if not match or match.lastindex != full:
+                continue
+            matched.update(segment.path_ids)
+            # 粗排：首字母相同、匹配结束位置靠前的文件名通常得分更高
+            candidates.append((segment.lower[0] != first, match.end(), name_id))
+
+        if len(candidates) > MAX_SCORED_NAMES:
+            candidates = heapq.nsmallest(MAX_SCORED_NAMES, candidates)
+
+        scored = []
+        for _, _, name_id in candidates:
+            segment = self.names[name_id]
+            positions = _forward_positions(segment.lower, segment.bonuses, query)
+            score = _score_positions(segment.bonuses, positions) + BONUS_BASENAME
+            # 同名文件已按修改时间与路径长度排序，只需取前limit个
+            for path_id in segment.path_ids[:limit]:
+                scored.append((score + self.tiebreaks[path_id], path_id, positions, True))
+        return scored, matched
+
+    def _match_paths(self, query: str,
+                     extension: Optional[str]) -> Tuple[List[Tuple[float, int, List[int], bool]], Set[int]]:
+        """查询的前半部分尽可能多地匹配目录，剩余部分匹配文件名，返回打分结果与匹配的文件编号"""
+        pattern = _subsequence_pattern(query)
+        # 已匹配的查询字符数 -> 能匹配剩余部分的文件名编号
+        remainders: Dict[int, Set[int]] = {}
+        name_scores: Dict[Tuple[int, int], Tuple[int, List[int]]] = {}
+        scored = []
+        matched: Set[int] = set()
+
+        for dir_id, segment in enumerate(self.dirs):
+            match = pattern.match(segment.lower)
+            consumed = match.lastindex if match else None
+            if not consumed:
+                continue
+
+            rest = query[consumed:]
+            files = self._dir_files[dir_id]
+            if rest:
+                if consumed not in remainders:
+                    remainders[consumed] = self._match_remainder(rest)
+                common = remainders[consumed] & self._dir_names[dir_id]
+                if not common:
+                    continue
+                pairs = [(files[name_id], name_id) for name_id in common]
+            else:
+                pairs = [(path_id, None) for path_id in segment.path_ids]
+
+            dir_positions = _backward_positions(segment.lower, query[:consumed])
+            dir_score = _score_positions(segment.bonuses, dir_positions)
+            offset = len(segment.lower)
+            for path_id, name_id in pairs:
+                if extension and self.extensions[path_id] != extension:
+                    continue
+                matched.add(path_id)
+                if name_id is None:
+                    scored.append((dir_score + self.tiebreaks[path_id], path_id, dir_positions, False))
+                    continue
+                key = (consumed, name_id)
+                if key not in name_scores:
+                    name = self.names[name_id]
+                    positions = _forward_positions(name.lower, name.bonuses, rest)
+                    name_scores[key] = (_score_positions(name.bonuses, positions), positions)
+                name_score, name_positions = name_scores[key]
+                scored.append((
+                    dir_score + name_score + self.tiebreaks[path_id],
+                    path_id,
+                    dir_positions + [offset + p for p in name_positions],
+                    False
+                ))
+        return scored, matched
+
+    def _match_remainder(self, rest: str) -> Set[int]:
+        """能匹配查询剩余部分的文件名编号"""
+        if len(rest) == 1:
+            return self._name_chars.get(rest, set())
+        pattern = _subsequence_pattern(rest)
+        full = len(rest)
+        matched = set()
+        for name_id in self._name_candidates(rest):
+            match = pattern.match(self.names[name_id].lower)
+            if match and match.lastindex == full:
+                matched.add(name_id)
+        return matched
+
+    def _result(self, path_id: int, score: float, positions: List[int]) -> Dict:
+        path = self.paths[path_id]
+        return {
+            'name': path[path.rfind('/') + 1:],
+            'path': path,
+            'extension': self.extensions[path_id],
+            'size': self.sizes[path_id],
+            'modified_at': datetime.fromtimestamp(self.mtimes[path_id]).isoformat(),
+            'score': round(score, 2),
+            'positions': positions
+        }
+
+
+class PathListCache:
+    """进程内的路径列表缓存，按项目保留最近使用的若干个"""
+
+    def __init__(self, max_loaded: int = MAX_LOADED_PROJECTS):
+        self.max_loaded = max_loaded
+        self._lists: 'OrderedDict[str, PathList]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: str, loader: Callable[[], List[Dict]]) -> PathList:
+        """
+        获取项目路径列表，项目索引版本变化时重新加载
+
+        Args:
+            key: 项目标识
+            version: 当前的项目索引版本
+            loader: 加载代码文件列表的函数
+
+        Returns:
+            路径列表
+        """
+        with self._lock:
+            path_list = self._lists.get(key)
+            if path_list is not None and path_list.version == version:
+                self._lists.move_to_end(key)
+                return path_list
+
+            path_list = PathList(version, loader())
+            self._lists[key] = path_list
+            while len(self._lists) > self.max_loaded:
+                self._lists.popitem(last=False)
+            return path_list
+
+    def discard(self, key: str):
+        with self._lock:
+            self._lists.pop(key, None)
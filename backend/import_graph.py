@@ -0,0 +1,487 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import closing
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = '1'
+
+# 导入扫描只读取文件头部，足以覆盖绝大多数import语句
+IMPORT_SCAN_LIMIT = 64 * 1024  # 64kb
+
+PY_EXTENSIONS = ('.py',)
+JS_EXTENSIONS = ('.ts', '.tsx', '.js', '.jsx')
+
+_PY_FROM_IMPORT = re.compile(r'^\s*from\s+(\.*)([\w.]*)\s+import\s+(.+)$', re.MULTILINE)
+_PY_IMPORT = re.compile(r'^\s*import\s+([\w.]+(?:\s*,\s*[\w.]+)*)', re.MULTILINE)
+_JS_IMPORT = re.compile(
+    r'''(?:\bimport\s+(?:[^'"]*?\s+from\s+)?|\bexport\s+[^'"]*?\s+from\s+|\brequire\s*\(\s*|\bimport\s*\(\s*)['"]([^'"]+)['"]'''
+)
+
+# 每个依赖图数据库一把同步锁，不同项目的同步互不阻塞
+_sync_locks: Dict[str, threading.Lock] = {}
+_sync_locks_lock = threading.Lock()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    content_hash TEXT
+);
+CREATE TABLE IF NOT EXISTS imports (
+    source TEXT NOT NULL,
+    module TEXT NOT NULL,
+    level INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS edges (
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    PRIMARY KEY (source, target)
+);
+CREATE INDEX IF NOT EXISTS idx_imports_source ON imports(source);
+CREATE INDEX IF NOT EXISTS idx_edges_target ON edges(target);
+"""
+
+
+def _read_head(file_path: str) -> str:
+    """读取文件头部内容用于导入扫描，读取失败返回空字符串"""
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read(IMPORT_SCAN_LIMIT)
+    except OSError as e:
+        logger.warning(f"读取文件失败 {file_path}: {e}")
+        return ""
+
+
+def _resolve_python_module(module: str, level: int, relative_path: str,
+                           known_paths: Set[str]) -> Optional[str]:
+    """
+    将Python模块名解析为项目内的相对路径
+
+    Args:
+        module: 模块名，如 a.b.c
+        level: 相对导入的层级（from .. import 中点的个数）
+        relative_path: 导入方文件的相对路径
+        known_paths: 项目内所有代码文件的相对路径集合
+
+    Returns:
+        命中的相对路径，未命中返回None
+    """
+    parts = module.split('.') if module else []
+    if level:
+        base = list(PurePosixPath(relative_path).parent.parts)
+        if level - 1 > len(base):
+            return None
+        base = base[:len(base) - (level - 1)]
+        candidates_bases = [base]
+    else:
+        # 绝对导入：从项目根目录以及导入方所在目录的各级父目录尝试
+        own = list(PurePosixPath(relative_path).parent.parts)
+        candidates_bases = [own[:i] for i in range(len(own), -1, -1)]
+
+    for base in candidates_bases:
+        stem = '/'.join(base + parts)
+        if not stem:
+            continue
+        for candidate in (f"{stem}.py", f"{stem}/__init__.py"):
+            if candidate in known_paths:
+                return candidate
+    return None
+
+
+def _resolve_js_specifier(specifier: str, relative_path: str,
+                          known_paths: Set[str]) -> Optional[str]:
+    """
+    将JS/TS的相对导入路径解析为项目内的相对路径，非相对路径（npm包）直接忽略
+
+    Args:
+        specifier: import/require中的路径
+        relative_path: 导入方文件的相对路径
+        known_paths: 项目内所有代码文件的相对路径集合
+
+    Returns:
+        命中的相对路径，未命中返回None
+    """
+    if not specifier.startswith('.'):
+        return None
+
+    joined = os.path.normpath(os.path.join(os.path.dirname(relative_path), specifier))
+    stem = joined.replace(os.sep, '/')
+    if stem.startswith('..'):
+        return None
+
+    candidates = [stem]
+    candidates.extend(f"{stem}{ext}" for ext in JS_EXTENSIONS)
+    candidates.extend(f"{stem}/index{ext}" for ext in JS_EXTENSIONS)
+    for candidate in candidates:
+        if candidate in known_paths:
+            return candidate
+    return None
+
+
+def parse_imports(content: str, extension: str) -> List[Tuple[str, int]]:
+    """
+    提取文件中的导入引用（未解析）
+
+    Args:
+        content: 文件内容
+        extension: 文件扩展名
+
+    Returns:
+        (模块名或路径, 相对导入层级)列表；JS/TS的层级恒为0
+    """
+    imports = []
+    if extension in PY_EXTENSIONS:
+        for match in _PY_FROM_IMPORT.finditer(content):
+            level = len(match.group(1))
+            module = match.group(2)
+            imports.append((module, level))
+            # from . import a, b 形式，a、b本身可能就是模块
+            names = match.group(3).strip('()\\ ')
+            for name in names.split(','):
+                name = name.strip().split(' ')[0]
+                if not name or name == '*':
+                    continue
+                imports.append((f"{module}.{name}" if module else name, level))
+        for match in _PY_IMPORT.finditer(content):
+            for module in match.group(1).split(','):
+                imports.append((module.strip(), 0))
+    elif extension in JS_EXTENSIONS:
+        for match in _JS_IMPORT.finditer(content):
+            imports.append((match.group(1), 0))
+    return imports
+
+
+def resolve_imports(imports: Iterable[Tuple[str, int]], relative_path: str,
+                    known_paths: Set[str]) -> Set[str]:
+    """
+    将导入引用解析为项目内的文件
+
+    Args:
+        imports: parse_imports的结果
+        relative_path: 导入方文件的相对路径（使用/分隔）
+        known_paths: 项目内所有代码文件的相对路径集合
+
+    Returns:
+        被导入文件的相对路径集合
+    """
+    extension = PurePosixPath(relative_path).suffix.lower()
+    targets = set()
+    for module, level in imports:
+        if extension in PY_EXTENSIONS:
+            resolved = _resolve_python_module(module, level, relative_path, known_paths)
+        else:
+            resolved = _resolve_js_specifier(module, relative_path, known_paths)
+        if resolved:
+            targets.add(resolved)
+    targets.discard(relative_path)
+    return targets
+
+
+def scan_imports(file_path: str, relative_path: str, known_paths: Set[str]) -> Set[str]:
+    """
+    快速静态扫描文件的导入语句，返回其引用的项目内文件
+
+    Args:
+        file_path: 文件绝对路径
+        relative_path: 文件相对项目根目录的路径（使用/分隔）
+        known_paths: 项目内所有代码文件的相对路径集合
+
+    Returns:
+        被导入文件的相对路径集合
+    """
+    content = _read_head(file_path)
+    if not content:
+        return set()
+    extension = PurePosixPath(relative_path).suffix.lower()
+    return resolve_imports(parse_imports(content, extension), relative_path, known_paths)
+
+
+def strongly_connected_components(nodes: Iterable[str], edges: Dict[str, List[str]]) -> List[List[str]]:
+    """
+    Tarjan算法（迭代实现）求强连通分量
+
+    Args:
+        nodes: 所有节点
+        edges: 节点到其后继节点列表的映射
+
+    Returns:
+        强连通分量列表（每个分量内按路径排序）
+    """
+    index_of: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    on_stack: Set[str] = set()
+    stack: List[str] = []
+    components = []
+    counter = 0
+
+    for root in nodes:
+        if root in index_of:
+            continue
+        work = [(root, iter(edges.get(root, ())))]
+        index_of[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            node, successors = work[-1]
+            advanced = False
+            for successor in successors:
+                if successor not in index_of:
+                    index_of[successor] = low[successor] = counter
+                    counter += 1
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(edges.get(successor, ()))))
+                    advanced = True
+                    break
+                if successor in on_stack:
+                    low[node] = min(low[node], index_of[successor])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(sorted(component))
+
+    return components
+
+
+def _get_sync_lock(db_path: str) -> threading.Lock:
+    with _sync_locks_lock:
+        return _sync_locks.setdefault(os.path.abspath(db_path), threading.Lock())
+
+
+class ImportGraph:
+    """
+    项目导入依赖图（SQLite），与项目索引一同保存。
+
+    每个文件的导入引用（未解析的模块名或路径）按内容哈希缓存，只有内容变化的文件需要重新读取；
+    文件增删时所有引用按新的文件集合重新解析为依赖边。
+    """
+
+    def __init__(self, db_path: str):
+        """
+        初始化依赖图
+
+        Args:
+            db_path: 数据库路径
+        """
+        self.db_path = db_path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        Path(os.path.dirname(self.db_path)).mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def version(self) -> Optional[str]:
+        """已同步的项目索引版本"""
+        if not self.exists():
+            return None
+        try:
+            with closing(self._connect()) as conn:
+                meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        except sqlite3.Error:
+            return None
+        if meta.get('schema_version') != SCHEMA_VERSION:
+            return None
+        return meta.get('version')
+
+    def sync(self, version: str, storage, files: List[Dict]) -> int:
+        """
+        与项目索引的代码文件列表同步
+
+        Args:
+            version: 项目索引版本
+            storage: 项目存储（ProjectStorage）
+            files: 代码文件列表（包含path、extension、content_hash）
+
+        Returns:
+            重新读取的文件数
+        """
+        with _get_sync_lock(self.db_path):
+            if self.version() == version:
+                return 0
+            started = time.time()
+            if self.exists() and self.version() is None:
+                os.remove(self.db_path)
+
+            current = {}
+            for file_info in files:
+                if file_info['extension'] in PY_EXTENSIONS + JS_EXTENSIONS:
+                    current[file_info['path'].replace(os.sep, '/')] = file_info
+
+            with closing(self._connect()) as conn:
+                conn.executescript(SCHEMA)
+                known = dict(conn.execute("SELECT path, content_hash FROM files").fetchall())
+                changed = [path for path, file_info in current.items()
+                           if path not in known or known[path] != file_info['content_hash']]
+                removed = [path for path in known if path not in current]
+
+                conn.executemany("DELETE FROM imports WHERE source = ?",
+                                 [(path,) for path in changed + removed])
+                conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+                for path in changed:
+                    file_info = current[path]
+                    content = storage.read_head(file_info['path'], IMPORT_SCAN_LIMIT)
+                    conn.executemany(
+                        "INSERT INTO imports (source, module, level) VALUES (?, ?, ?)",
+                        [(path, module, level) for module, level in parse_imports(content, file_info['extension'])]
+                    )
+                    conn.execute("INSERT OR REPLACE INTO files (path, content_hash) VALUES (?, ?)",
+                                 (path, file_info['content_hash']))
+
+                # 文件集合变化时，未变化文件的导入也可能解析到不同的目标
+                if set(known) == set(current):
+                    to_resolve = changed
+                else:
+                    to_resolve = list(current)
+                conn.executemany("DELETE FROM edges WHERE source = ?",
+                                 [(path,) for path in to_resolve + removed])
+
+                known_paths = set(current)
+                imports = {
+                    path: [(row['module'], row['level']) for row in conn.execute(
+                        "SELECT module, level FROM imports WHERE source = ?", (path,))]
+                    for path in to_resolve
+                }
+                conn.executemany("INSERT OR IGNORE INTO edges (source, target) VALUES (?, ?)", [
+                    (path, target)
+                    for path, refs in imports.items()
+                    for target in resolve_imports(refs, path, known_paths)
+                ])
+
+                conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                    ('schema_version', SCHEMA_VERSION),
+                    ('version', version)
+                ])
+                conn.commit()
+
+            logger.info(f"导入依赖图同步完成 {storage.location}: 读取 {len(changed)} 个文件，重新解析 {len(to_resolve)} 个文件，"
+                        f"耗时 {time.time() - started:.2f}s")
+            return len(changed)
+
+    def has_file(self, path: str) -> bool:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM files WHERE path = ?", (path,)).fetchone() is not None
+
+    def _traverse(self, path: str, column: str, other: str, depth: int) -> List[Dict]:
+        """沿依赖边广度优先遍历，返回各文件及其与起点的距离"""
+        seen = {path: 0}
+        queue = deque([path])
+        with closing(self._connect()) as conn:
+            while queue:
+                node = queue.popleft()
+                if seen[node] >= depth:
+                    continue
+                for row in conn.execute(f"SELECT {other} FROM edges WHERE {column} = ? ORDER BY {other}", (node,)):
+                    neighbour = row[0]
+                    if neighbour not in seen:
+                        seen[neighbour] = seen[node] + 1
+                        queue.append(neighbour)
+        return [{'path': node, 'depth': distance} for node, distance in seen.items() if node != path]
+
+    def dependencies(self, path: str, depth: int = 1) -> List[Dict]:
+        """
+        文件导入的项目内文件
+
+        Args:
+            path: 文件相对路径
+            depth: 遍历深度，1表示只返回直接依赖
+
+        Returns:
+            依赖文件列表（path、depth）
+        """
+        return self._traverse(path, 'source', 'target', depth)
+
+    def dependents(self, path: str, depth: int = 1) -> List[Dict]:
+        """
+        导入该文件的项目内文件
+
+        Args:
+            path: 文件相对路径
+            depth: 遍历深度，1表示只返回直接依赖方
+
+        Returns:
+            依赖方文件列表（path、depth）
+        """
+        return self._traverse(path, 'target', 'source', depth)
+
+    def _adjacency(self) -> Tuple[List[str], Dict[str, List[str]]]:
+        with closing(self._connect()) as conn:
+            nodes = [row[0] for row in conn.execute("SELECT path FROM files ORDER BY path")]
+            edges: Dict[str, List[str]] = {}
+            for row in conn.execute("SELECT source, target FROM edges ORDER BY source, target"):
+                edges.setdefault(row[0], []).append(row[1])
+        return nodes, edges
+
+    def cycles(self) -> List[List[str]]:
+        """
+        循环依赖：包含两个及以上文件的强连通分量，按大小降序
+
+        Returns:
+            强连通分量列表
+        """
+        nodes, edges = self._adjacency()
+        components = [component for component in strongly_connected_components(nodes, edges)
+                      if len(component) > 1]
+        components.sort(key=lambda component: (-len(component), component[0]))
+        return components
+
+    def fan_in(self) -> Dict[str, int]:
+        """每个文件被项目内其他文件导入的次数"""
+        with closing(self._connect()) as conn:
+            fan_in = {row[0]: 0 for row in conn.execute("SELECT path FROM files")}
+            for row in conn.execute("SELECT target, COUNT(*) FROM edges GROUP BY target"):
+                fan_in[row[0]] = row[1]
+        return fan_in
+
+    def fan_in_ranking(self, limit: int = 50) -> List[Dict]:
+        """
+        按被导入次数排序的文件列表
+
+        Args:
+            limit: 返回的最大数量
+
+        Returns:
+            文件列表（path、fan_in、fan_out）
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT f.path AS path, "
+                "(SELECT COUNT(*) FROM edges WHERE target = f.path) AS fan_in, "
+                "(SELECT COUNT(*) FROM edges WHERE source = f.path) AS fan_out "
+                "FROM files f ORDER BY fan_in DESC, fan_out DESC, path LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete(self):
+        """删除数据库文件"""
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
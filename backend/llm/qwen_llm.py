@@ -1,4 +1,5 @@
 import os
+import threading
 from openai import OpenAI
 from typing import List, Dict, Optional, Any
 
@@ -21,6 +22,19 @@ except ImportError:
     pass
 
 
+class LLMRequestCancelled(Exception):
+    """请求被调用方取消"""
+    pass
+
+
+def add_usage(usage: Optional[Dict[str, int]], response_usage: Any):
+    """将接口返回的token用量累加到usage中"""
+    if usage is None or response_usage is None:
+        return
+    for key in ('prompt_tokens', 'completion_tokens', 'total_tokens'):
+        usage[key] = usage.get(key, 0) + (getattr(response_usage, key, None) or 0)
+
+
 class QwenLLM:
     """通义千问大模型调用封装类"""
     
@@ -48,7 +62,8 @@ class QwenLLM:
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
         stream: bool = False,
-        enable_thinking: Optional[bool] = None
+        enable_thinking: Optional[bool] = None,
+        include_usage: bool = False
     ) -> Any:
         """
         调用通义千问进行对话补全
@@ -59,6 +74,7 @@ class QwenLLM:
             max_tokens: 最大输出token数
             stream: 是否使用流式输出
             enable_thinking: 是否启用思考过程（Qwen3模型特有）
+            include_usage: 流式输出时是否在最后一个分片中返回token用量
             
         Returns:
             模型响应结果
@@ -75,6 +91,9 @@ class QwenLLM:
             if max_tokens:
                 params["max_tokens"] = max_tokens
             
+            if stream and include_usage:
+                params["stream_options"] = {"include_usage": True}
+            
             # 添加Qwen3特有的参数
             if enable_thinking is not None:
                 params["extra_body"] = {"enable_thinking": enable_thinking}
@@ -87,13 +106,21 @@ class QwenLLM:
         except Exception as e:
             raise Exception(f"调用通义千问API失败: {str(e)}")
     
-    def simple_chat(self, user_message: str, system_message: str = "You are a helpful assistant.") -> str:
+    def simple_chat(
+        self, 
+        user_message: str, 
+        system_message: str = "You are a helpful assistant.",
+        cancel_event: Optional[threading.Event] = None,
+        usage: Optional[Dict[str, int]] = None
+    ) -> str:
         """
         简单的对话方法
         
         Args:
             user_message: 用户消息
             system_message: 系统消息，默认为"You are a helpful assistant."
+            cancel_event: 取消信号，提供时使用流式输出，信号置位后立即中断HTTP请求
+            usage: 提供时将本次调用的token用量累加到其中（prompt_tokens、completion_tokens、total_tokens）
             
         Returns:
             模型回复的文本内容
@@ -103,8 +130,30 @@ class QwenLLM:
             {"role": "user", "content": user_message}
         ]
         
-        response = self.chat_completion(messages)
-        return response.choices[0].message.content
+        if cancel_event is None:
+            response = self.chat_completion(messages)
+            add_usage(usage, response.usage)
+            return response.choices[0].message.content
+        
+        if cancel_event.is_set():
+            raise LLMRequestCancelled("请求已取消")
+        
+        # 流式读取，每个分片之间检查取消信号，取消时关闭连接以中止请求
+        stream = self.chat_completion(messages, stream=True, include_usage=usage is not None)
+        parts = []
+        try:
+            for chunk in stream:
+                if cancel_event.is_set():
+                    raise LLMRequestCancelled("请求已取消")
+                add_usage(usage, getattr(chunk, 'usage', None))
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+        finally:
+            stream.close()
+        
+        if cancel_event.is_set():
+            raise LLMRequestCancelled("请求已取消")
+        return "".join(parts)
     
     def batch_chat(self, conversations: List[Dict[str, str]], system_message: str = "You are a helpful assistant.") -> List[str]:
         """
@@ -1,27 +1,101 @@
 import asyncio
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from textwrap import dedent
-from typing import Dict, List, Optional
+from collections import deque
+from typing import AsyncIterator, Awaitable, Dict, Iterator, List, Optional, TypeVar
 import os
 from constants import VALID_FILE_EXTENSIONS
+from dataclasses import replace
+from fs_walk import DirectoryNode, FileEntry
+from tree_cache import DirectoryTreeCache
 
 logger = logging.getLogger(__name__)
 
 FILE_LIMIT = 100 * 1024  # 100kb
 
+# 文件读取的最大并发数
+DEFAULT_IO_CONCURRENCY = 32
+
+T = TypeVar('T')
+
+
+class _BackgroundLoop:
+    """在后台线程中常驻的事件循环，供同步代码（如Flask视图）复用"""
+    
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+    
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name='local-code-loop', daemon=True
+                )
+                thread.start()
+                self._loop = loop
+            return self._loop
+    
+    def run(self, coro: Awaitable[T]) -> T:
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+
+_background_loop = _BackgroundLoop()
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    在同步代码中执行协程，复用同一个后台事件循环，避免每次调用asyncio.run创建新循环
+    
+    Args:
+        coro: 协程对象
+        
+    Returns:
+        协程的返回值
+    """
+    return _background_loop.run(coro)
+
 
 class LocalCodeClient:
     """本地代码目录处理客户端，模仿GitHub客户端的接口"""
     
-    def __init__(self, base_path: str = None):
+    def __init__(self, base_path: str = None, max_concurrency: int = DEFAULT_IO_CONCURRENCY):
         """
         初始化本地代码客户端
         
         Args:
             base_path: 基础路径，如果为None则使用当前工作目录
+            max_concurrency: 文件读取、目录遍历等阻塞I/O的最大并发数
         """
         self.base_path = Path(base_path) if base_path else Path.cwd()
+        self.max_concurrency = max_concurrency
+        # 目录树缓存：同一项目的各子目录共享一次遍历结果，按目录mtime失效
+        self._tree_cache = DirectoryTreeCache(VALID_FILE_EXTENSIONS)
+        # 阻塞的文件系统调用都在该线程池中执行，不占用事件循环
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix='local-code-io'
+        )
+    
+    async def _run_blocking(self, func, *args):
+        """在I/O线程池中执行阻塞函数"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+    
+    def close(self):
+        """释放I/O线程池"""
+        self._executor.shutdown(wait=False)
+    
+    def _check_directory(self, directory_path: Path):
+        """校验路径存在且为目录"""
+        if not directory_path.exists():
+            raise FileNotFoundError(f"目录不存在: {directory_path}")
+        
+        if not directory_path.is_dir():
+            raise ValueError(f"路径不是目录: {directory_path}")
         
     async def get_directory_structure_from_path(self, code_path: str) -> str:
         """
@@ -59,15 +133,30 @@ class LocalCodeClient:
         Returns:
             格式化的目录结构字符串
         """
-        if not directory_path.exists():
-            raise FileNotFoundError(f"目录不存在: {directory_path}")
+        await self._run_blocking(self._check_directory, directory_path)
         
-        if not directory_path.is_dir():
-            raise ValueError(f"路径不是目录: {directory_path}")
+        # 从目录树缓存获取格式化结果，目录未变化时不会重新遍历
+        return await self._run_blocking(
+            self._tree_cache.get_formatted,
+            str(directory_path),
+            lambda node: self._format_directory_structure(
+                self._node_to_structure(node, self._node_prefix(node))
+            )
+        )
+    
+    async def get_subdirectories(self, directory_path: Path) -> List[Path]:
+        """
+        获取目录下的所有子目录（已跳过依赖/构建目录和被忽略的目录），结果来自目录树缓存
         
-        # 构建目录结构
-        structure = self._build_directory_structure(directory_path)
-        return self._format_directory_structure(structure)
+        Args:
+            directory_path: 目录路径
+            
+        Returns:
+            子目录路径列表（不含自身）
+        """
+        await self._run_blocking(self._check_directory, directory_path)
+        node = await self._run_blocking(self._scan, directory_path)
+        return [Path(child.path) for child in node.iter_directories() if child is not node]
     
     async def get_all_content_from_directory(self, directory_path: Path) -> str:
         """
@@ -79,35 +168,127 @@ class LocalCodeClient:
         Returns:
             所有代码文件内容的格式化字符串
         """
-        if not directory_path.exists():
-            raise FileNotFoundError(f"目录不存在: {directory_path}")
+        formatted_content = []
+        async for block in self.iter_content_from_directory(directory_path):
+            formatted_content.append(block)
         
-        if not directory_path.is_dir():
-            raise ValueError(f"路径不是目录: {directory_path}")
+        return "\n\n".join(formatted_content)
+    
+    async def iter_content_from_directory(
+        self, directory_path: Path, chunk_size: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        流式获取目录中代码文件的格式化内容，读取完成即产出，内存占用与目录大小无关
         
-        # 获取所有代码文件
-        code_files = self._get_code_files(directory_path)
+        Args:
+            directory_path: 目录路径
+            chunk_size: 为None时逐个产出文件内容块；否则将内容块（以空行连接）
+                切分为固定字符数的片段产出，最后一个片段可能较短
+            
+        Yields:
+            格式化的文件内容块或固定大小的片段
+        """
+        blocks = self._iter_formatted_blocks(directory_path)
+        if chunk_size is None:
+            async for block in blocks:
+                yield block
+            return
         
-        formatted_content = []
-        for file_path in code_files:
-            try:
-                if file_path.stat().st_size > FILE_LIMIT:
-                    logger.warning(f"跳过文件: {file_path} 因为文件过大")
-                    continue
-                
-                content = file_path.read_text(encoding='utf-8')
-                relative_path = file_path.relative_to(directory_path)
-                formatted_content.append(
-                    self._get_formatted_content(str(relative_path), content)
+        if chunk_size <= 0:
+            raise ValueError("chunk_size必须大于0")
+        
+        buffer = ""
+        first = True
+        async for block in blocks:
+            buffer += block if first else "\n\n" + block
+            first = False
+            while len(buffer) >= chunk_size:
+                yield buffer[:chunk_size]
+                buffer = buffer[chunk_size:]
+        if buffer:
+            yield buffer
+    
+    def iter_content_sync(
+        self, directory_path: Path, chunk_size: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        iter_content_from_directory的同步版本，供同步代码逐块消费
+        
+        Args:
+            directory_path: 目录路径
+            chunk_size: 同iter_content_from_directory
+            
+        Yields:
+            格式化的文件内容块或固定大小的片段
+        """
+        agen = self.iter_content_from_directory(directory_path, chunk_size)
+        try:
+            while True:
+                try:
+                    yield run_sync(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            run_sync(agen.aclose())
+    
+    async def _iter_formatted_blocks(self, directory_path: Path) -> AsyncIterator[str]:
+        """
+        按文件顺序产出格式化内容块；最多预读max_concurrency个文件，
+        既保持并发读取，又限制内存中等待产出的内容数量
+        """
+        await self._run_blocking(self._check_directory, directory_path)
+        
+        # 获取所有代码文件（遍历时已获取文件大小，无需再次stat）
+        code_files = await self._run_blocking(self._get_code_file_entries, directory_path)
+        
+        loop = asyncio.get_running_loop()
+        window = self.max_concurrency
+        pending = deque()
+        files = iter(code_files)
+        
+        def schedule():
+            for entry in files:
+                pending.append(
+                    (entry, loop.run_in_executor(self._executor, self._read_code_file, entry))
                 )
-            except UnicodeDecodeError:
-                logger.warning(f"无法解码文件内容: {file_path}")
-                continue
-            except Exception as e:
-                logger.error(f"读取文件失败 {file_path}: {e}")
-                continue
+                if len(pending) >= window:
+                    return
         
-        return "\n\n".join(formatted_content)
+        schedule()
+        try:
+            while pending:
+                entry, future = pending.popleft()
+                content = await future
+                schedule()
+                if content is not None:
+                    yield self._get_formatted_content(entry.relative_path, content)
+        finally:
+            for _, future in pending:
+                future.cancel()
+    
+    def _read_code_file(self, entry: FileEntry) -> Optional[str]:
+        """
+        读取单个代码文件，过大或无法读取时返回None
+        
+        Args:
+            entry: 遍历得到的文件
+            
+        Returns:
+            文件内容
+        """
+        file_path = Path(entry.path)
+        try:
+            if entry.size > FILE_LIMIT:
+                logger.warning(f"跳过文件: {file_path} 因为文件过大")
+                return None
+            
+            return file_path.read_text(encoding='utf-8')
+        except UnicodeDecodeError:
+            logger.warning(f"无法解码文件内容: {file_path}")
+            return None
+        except Exception as e:
+            logger.error(f"读取文件失败 {file_path}: {e}")
+            return None
     
     def _resolve_path(self, code_path: str) -> Path:
         """
@@ -125,6 +306,43 @@ class LocalCodeClient:
         else:
             return self.base_path / path
     
+    def _scan(self, directory_path: Path) -> DirectoryNode:
+        """
+        获取目录树：跳过依赖/构建目录和隐藏文件，遵循.gitignore规则，只保留代码文件。
+        优先使用缓存的树，目录有变化时只重新遍历变化的子树
+        
+        Args:
+            directory_path: 目录路径
+            
+        Returns:
+            目录树节点，其relative_path相对于缓存的根目录
+        """
+        return self._tree_cache.get(str(directory_path))
+    
+    @staticmethod
+    def _node_prefix(node: DirectoryNode) -> str:
+        """节点在缓存根目录下的相对路径前缀，用于转换为相对该节点的路径"""
+        return f"{node.relative_path}/" if node.relative_path else ''
+    
+    def _get_code_file_entries(self, directory_path: Path) -> List[FileEntry]:
+        """
+        递归获取目录中的所有代码文件及其stat信息
+        
+        Args:
+            directory_path: 目录路径
+            
+        Returns:
+            按路径排序的代码文件列表
+        """
+        node = self._scan(directory_path)
+        prefix = self._node_prefix(node)
+        entries = node.iter_files()
+        if prefix:
+            entries = (
+                replace(entry, relative_path=entry.relative_path[len(prefix):]) for entry in entries
+            )
+        return sorted(entries, key=lambda entry: entry.relative_path)
+    
     def _get_code_files(self, directory_path: Path) -> List[Path]:
         """
         递归获取目录中的所有代码文件
@@ -135,13 +353,7 @@ class LocalCodeClient:
         Returns:
             代码文件路径列表
         """
-        code_files = []
-        
-        for item in directory_path.rglob('*'):
-            if item.is_file() and item.suffix.lower() in VALID_FILE_EXTENSIONS:
-                code_files.append(item)
-        
-        return sorted(code_files)
+        return [Path(entry.path) for entry in self._get_code_file_entries(directory_path)]
     
     def _build_directory_structure(self, directory_path: Path) -> Dict:
         """
@@ -150,36 +362,40 @@ class LocalCodeClient:
         Args:
             directory_path: 目录路径
             
+        Returns:
+            目录结构字典
+        """
+        node = self._scan(directory_path)
+        return self._node_to_structure(node, self._node_prefix(node))
+    
+    def _node_to_structure(self, node: DirectoryNode, base: str = '') -> Dict:
+        """
+        将目录树节点转换为嵌套字典，路径相对于转换起点
+        
+        Args:
+            node: 目录树节点
+            base: 转换起点的相对路径前缀
+            
         Returns:
             目录结构字典
         """
         structure = {}
         
-        try:
-            for item in sorted(directory_path.iterdir()):
-                if item.name.startswith('.'):  # 跳过隐藏文件
-                    continue
-                
-                if item.is_dir():
-                    # 递归处理子目录
-                    children = self._build_directory_structure(item)
-                    if children:  # 只添加非空目录
-                        structure[item.name] = {
-                            'type': 'tree',
-                            'path': str(item.relative_to(directory_path)),
-                            'children': children
-                        }
-                elif item.is_file() and item.suffix.lower() in VALID_FILE_EXTENSIONS:
-                    # 添加代码文件
-                    structure[item.name] = {
-                        'type': 'blob',
-                        'path': str(item.relative_to(directory_path)),
-                        'size': item.stat().st_size
-                    }
-        except PermissionError:
-            logger.warning(f"没有权限访问目录: {directory_path}")
-        except Exception as e:
-            logger.error(f"构建目录结构时出错 {directory_path}: {e}")
+        for name, child in node.directories.items():
+            children = self._node_to_structure(child, base)
+            if children:  # 只添加非空目录
+                structure[name] = {
+                    'type': 'tree',
+                    'path': child.relative_path[len(base):],
+                    'children': children
+                }
+        
+        for name, entry in node.files.items():
+            structure[name] = {
+                'type': 'blob',
+                'path': entry.relative_path[len(base):],
+                'size': entry.size
+            }
         
         return structure
     
@@ -254,21 +470,17 @@ File: {path}
         """
         full_path = self._resolve_path(code_path)
         
-        if not full_path.exists():
-            raise FileNotFoundError(f"路径不存在: {full_path}")
-        
-        if not full_path.is_dir():
-            raise ValueError(f"路径不是目录: {full_path}")
+        await self._run_blocking(self._check_directory, full_path)
         
-        code_files = self._get_code_files(full_path)
+        code_files = await self._run_blocking(self._get_code_file_entries, full_path)
         
         # 按文件类型统计
         file_types = {}
         total_size = 0
         
-        for file_path in code_files:
-            ext = file_path.suffix.lower()
-            size = file_path.stat().st_size
+        for entry in code_files:
+            ext = entry.extension
+            size = entry.size
             
             if ext not in file_types:
                 file_types[ext] = {'count': 0, 'size': 0}
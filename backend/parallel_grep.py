@@ -0,0 +1,232 @@
+import logging
+import mmap
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 搜索进程数
+GREP_MAX_WORKERS = os.cpu_count() or 1
+
+# 每个任务扫描的文件数，任务越小首批结果越早返回、取消越及时
+GREP_CHUNK_SIZE = 32
+
+# 同时提交到进程池的任务数（按工作进程数的倍数），其余任务在有任务完成后再提交
+PENDING_TASKS_PER_WORKER = 2
+
+# 单行最多返回的字符数
+MAX_LINE_LENGTH = 500
+
+# 依次尝试的文本编码，与文件读取接口保持一致
+TEXT_ENCODINGS = ('utf-8', 'gbk')
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_grep_pool() -> ProcessPoolExecutor:
+    """
+    获取共享的搜索进程池（首次使用时创建）。使用spawn方式启动工作进程，
+    避免在多线程的服务进程中fork
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=GREP_MAX_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def shutdown_grep_pool():
+    """关闭进程池，取消尚未开始的任务"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def compile_pattern(query: str, regex: bool = False, case_sensitive: bool = False) -> 're.Pattern':
+    """
+    编译用于搜索的字节正则（在文件的原始字节上匹配，不需要先解码）
+
+    Args:
+        query: 子串或正则表达式
+        regex: query是否为正则表达式
+        case_sensitive: 是否区分大小写
+
+    Returns:
+        编译后的正则，表达式无效时抛出re.error
+    """
+    source = query.encode('utf-8')
+    if not regex:
+        source = re.escape(source)
+    flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+    return re.compile(source, flags)
+
+
+def _decode_line(data: bytes) -> str:
+    for encoding in TEXT_ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode('utf-8', errors='replace')
+
+
+def _grep_buffer(buffer, relative_path: str, pattern: 're.Pattern', max_matches: int) -> List[Dict]:
+    """在文件内容（mmap或bytes）中查找匹配行"""
+    matches = []
+    line_number = 1
+    counted_to = 0
+    last_line_start = -1
+    for match in pattern.finditer(buffer):
+        start = match.start()
+        line_start = buffer.rfind(b'\n', 0, start) + 1
+        if line_start == last_line_start:
+            # 同一行只返回一次
+            continue
+        line_number += buffer[counted_to:line_start].count(b'\n')
+        counted_to = line_start
+        last_line_start = line_start
+
+        line_end = buffer.find(b'\n', start)
+        if line_end == -1:
+            line_end = len(buffer)
+        line = _decode_line(buffer[line_start:line_end]).rstrip('\r')
+        matches.append({
+            'path': relative_path,
+            'line_number': line_number,
+            'line': line[:MAX_LINE_LENGTH],
+            'column': len(_decode_line(buffer[line_start:start])) + 1
+        })
+        if len(matches) >= max_matches:
+            break
+    return matches
+
+
+def _grep_file(path: str, relative_path: str, pattern: 're.Pattern', max_matches: int) -> List[Dict]:
+    """使用mmap读取单个文件并查找匹配行"""
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _grep_buffer(mm, relative_path, pattern, max_matches)
+    except (OSError, ValueError) as e:
+        logger.warning(f"搜索文件失败 {path}: {e}")
+        return []
+
+
+def _grep_storage_file(storage, relative_path: str, pattern: 're.Pattern', max_matches: int) -> List[Dict]:
+    """从项目存储（打包文件或压缩包）读取单个文件并查找匹配行"""
+    try:
+        return _grep_buffer(storage.read(relative_path), relative_path, pattern, max_matches)
+    except (KeyError, OSError, ValueError) as e:
+        logger.warning(f"搜索文件失败 {relative_path}: {e}")
+        return []
+
+
+def grep_files(files: List[Tuple[str, str]], pattern_source: bytes, flags: int,
+               max_matches: int, storage=None) -> Tuple[int, List[Dict], bool]:
+    """
+    进程池任务：在一批文件中查找匹配行
+
+    Args:
+        files: (绝对路径, 相对路径)列表
+        pattern_source: 字节正则
+        flags: 编译标志
+        max_matches: 最多返回的匹配数
+        storage: 不为None时从该项目存储按相对路径读取文件，忽略绝对路径
+
+    Returns:
+        (扫描的文件数, 匹配列表, 是否因达到上限提前停止)
+    """
+    pattern = re.compile(pattern_source, flags)
+    matches = []
+    for scanned, (path, relative_path) in enumerate(files, 1):
+        if storage is not None:
+            matches.extend(_grep_storage_file(storage, relative_path, pattern, max_matches - len(matches)))
+        else:
+            matches.extend(_grep_file(path, relative_path, pattern, max_matches - len(matches)))
+        if len(matches) >= max_matches:
+            return scanned, matches, True
+    return len(files), matches, False
+
+
+def stream_grep(files: Iterable[Tuple[str, str]], pattern: 're.Pattern',
+                max_results: int = 1000, storage=None) -> Iterator[Dict]:
+    """
+    在进程池中并行搜索文件内容，每批结果完成后立即产出
+
+    调用方关闭生成器（如客户端断开连接）时，尚未开始的任务会被取消。
+    files可以是边遍历边产出的迭代器，只在需要提交任务时取出下一批文件。
+
+    Args:
+        files: (绝对路径, 相对路径)列表或迭代器
+        pattern: compile_pattern编译的正则
+        max_results: 最多返回的匹配数，达到后停止搜索
+        storage: 未解压的项目存储（ProjectStorage），为None时直接读取磁盘文件
+
+    Yields:
+        {'type': 'match', ...}，最后一条为{'type': 'done', ...}
+    """
+    pool = get_grep_pool()
+    files = iter(files)
+    max_pending = GREP_MAX_WORKERS * PENDING_TASKS_PER_WORKER
+    pending: Set[Future] = set()
+    exhausted = False
+    total_files = 0
+    files_scanned = 0
+    results = 0
+    truncated = False
+
+    try:
+        while not exhausted or pending:
+            # 按需取出文件并提交任务，避免达到结果上限或取消后仍有大量任务排队
+            while not exhausted and len(pending) < max_pending:
+                chunk = list(islice(files, GREP_CHUNK_SIZE))
+                if not chunk:
+                    exhausted = True
+                    break
+                total_files += len(chunk)
+                pending.add(pool.submit(
+                    grep_files, chunk, pattern.pattern, pattern.flags, max_results - results, storage
+                ))
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                scanned, matches, stopped = future.result()
+                files_scanned += scanned
+                truncated = truncated or stopped
+                for match in matches:
+                    if results >= max_results:
+                        truncated = True
+                        break
+                    results += 1
+                    yield dict(match, type='match')
+
+            if results >= max_results:
+                truncated = truncated or not exhausted or bool(pending)
+                break
+
+        yield {
+            'type': 'done',
+            'files_scanned': files_scanned,
+            # 提前停止时为已取出的文件数
+            'total_files': total_files,
+            'matches': results,
+            'truncated': truncated
+        }
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,499 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = '1'
+
+# 索引的数据来源：解压目录、ZIP中央目录或打包文件
+SOURCE_DIRECTORY = 'directory'
+SOURCE_ARCHIVE = 'archive'
+SOURCE_PACK = 'pack'
+
+# 依次尝试的文本编码，与文件读取接口保持一致
+TEXT_ENCODINGS = ('utf-8', 'gbk')
+
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE entries (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    mtime REAL NOT NULL,
+    extension TEXT,
+    is_code INTEGER NOT NULL DEFAULT 0,
+    content_hash TEXT,
+    line_count INTEGER,
+    encoding TEXT
+);
+CREATE INDEX idx_entries_parent ON entries(parent);
+CREATE INDEX idx_entries_code ON entries(is_code, extension);
+"""
+
+INSERT_ENTRY = (
+    "INSERT INTO entries (path, parent, name, is_dir, size, mtime, extension, "
+    "is_code, content_hash, line_count, encoding) "
+    "VALUES (:path, :parent, :name, :is_dir, :size, :mtime, :extension, "
+    ":is_code, :content_hash, :line_count, :encoding)"
+)
+
+
+def detect_encoding(data: bytes) -> Tuple[Optional[str], Optional[str]]:
+    """
+    检测文本编码
+
+    Args:
+        data: 文件内容
+
+    Returns:
+        (编码, 解码后的文本)，无法以支持的编码解码时返回(None, None)
+    """
+    for encoding in TEXT_ENCODINGS:
+        try:
+            return encoding, data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return None, None
+
+
+def describe_content(data: bytes) -> Dict:
+    """
+    计算文件内容的哈希、行数与编码
+
+    Args:
+        data: 文件内容
+
+    Returns:
+        content_hash、line_count、encoding
+    """
+    encoding, text = detect_encoding(data)
+    return {
+        'content_hash': hashlib.sha256(data).hexdigest(),
+        'line_count': len(text.split('\n')) if text is not None else None,
+        'encoding': encoding
+    }
+
+
+class ProjectIndex:
+    """
+    项目文件索引（SQLite），在解压后构建一次，记录每个文件和目录的路径、父目录、大小、
+    mtime、扩展名，以及代码文件的内容哈希、行数和编码。项目结构、统计与文件搜索接口
+    直接查询索引，不再遍历解压目录。
+    """
+
+    def __init__(self, db_path: str, code_extensions: Set[str]):
+        """
+        初始化项目索引
+
+        Args:
+            db_path: 索引数据库路径
+            code_extensions: 代码文件扩展名
+        """
+        self.db_path = db_path
+        self.code_extensions = code_extensions
+
+    def exists(self) -> bool:
+        return os.path.exists(self.db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def build(self, root: str):
+        """
+        遍历项目目录并重建索引，先写入临时文件再原子替换，构建过程中旧索引仍可读取
+
+        Args:
+            root: 项目解压目录
+        """
+        self._write(root, self._iter_entries(root), SOURCE_DIRECTORY, os.stat(root).st_mtime)
+
+    def build_from_storage(self, storage):
+        """
+        从未解压项目的存储（ZIP中央目录或打包文件）重建索引，不读取任何文件内容
+
+        Args:
+            storage: ProjectStorage
+        """
+        self._write(storage.location, storage.iter_entries(self.code_extensions), storage.kind, storage.mtime)
+
+    def _write(self, root: str, entries: Iterator[Dict], source: str, root_mtime: float):
+        started = time.time()
+        Path(os.path.dirname(self.db_path)).mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.db_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        count = 0
+        with closing(sqlite3.connect(tmp_path)) as conn:
+            conn.executescript(SCHEMA)
+            conn.executemany(INSERT_ENTRY, entries)
+            count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+                ('schema_version', SCHEMA_VERSION),
+                ('source', source),
+                ('root', os.path.abspath(root)),
+                ('root_mtime', repr(root_mtime)),
+                ('built_at', datetime.now().isoformat())
+            ])
+            conn.commit()
+
+        os.replace(tmp_path, self.db_path)
+        logger.info(f"项目索引构建完成 {root}: {count} 个条目，耗时 {time.time() - started:.2f}s")
+
+    def _iter_entries(self, root: str) -> Iterator[Dict]:
+        """使用os.scandir遍历项目目录，产出索引行"""
+        stack = ['']
+        while stack:
+            relative_dir = stack.pop()
+            directory = os.path.join(root, relative_dir) if relative_dir else root
+            try:
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError as e:
+                logger.warning(f"读取目录失败: {directory}, 错误: {e}")
+                continue
+
+            for entry in entries:
+                relative_path = os.path.join(relative_dir, entry.name) if relative_dir else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError as e:
+                    logger.warning(f"读取文件信息失败: {entry.path}, 错误: {e}")
+                    continue
+
+                row = {
+                    'path': relative_path,
+                    'parent': relative_dir,
+                    'name': entry.name,
+                    'is_dir': int(is_dir),
+                    'size': 0 if is_dir else stat.st_size,
+                    'mtime': stat.st_mtime,
+                    'extension': None,
+                    'is_code': 0,
+                    'content_hash': None,
+                    'line_count': None,
+                    'encoding': None
+                }
+
+                if is_dir:
+                    stack.append(relative_path)
+                elif entry.is_file():
+                    extension = Path(entry.name).suffix.lower()
+                    row['extension'] = extension
+                    if extension in self.code_extensions:
+                        row['is_code'] = 1
+                        try:
+                            with open(entry.path, 'rb') as f:
+                                row.update(describe_content(f.read()))
+                        except OSError as e:
+                            logger.warning(f"读取文件失败: {entry.path}, 错误: {e}")
+                else:
+                    continue
+
+                yield row
+
+    def _stat_row(self, root: str, relative_path: str) -> Optional[Dict]:
+        """按相对路径stat单个条目并生成索引行，不存在时返回None"""
+        full_path = os.path.join(root, relative_path)
+        try:
+            stat = os.stat(full_path, follow_symlinks=False)
+        except OSError:
+            return None
+        is_dir = os.path.isdir(full_path)
+        name = os.path.basename(relative_path)
+        row = {
+            'path': relative_path,
+            'parent': os.path.dirname(relative_path),
+            'name': name,
+            'is_dir': int(is_dir),
+            'size': 0 if is_dir else stat.st_size,
+            'mtime': stat.st_mtime,
+            'extension': None,
+            'is_code': 0,
+            'content_hash': None,
+            'line_count': None,
+            'encoding': None
+        }
+        if not is_dir:
+            row['extension'] = Path(name).suffix.lower()
+            if row['extension'] in self.code_extensions:
+                row['is_code'] = 1
+                with open(full_path, 'rb') as f:
+                    row.update(describe_content(f.read()))
+        return row
+
+    def apply_changes(self, root: str, paths: List[str]):
+        """
+        增量更新索引：只重新读取变化的文件，并刷新其上级目录的mtime，
+        更新后版本号（built_at）随之变化，依赖索引的派生数据按内容哈希增量同步
+
+        Args:
+            root: 项目解压目录
+            paths: 新增、修改或删除的文件（或目录）的相对路径；新增的目录需同时列出其中的文件
+        """
+        if self.is_stale_source(root):
+            self.build(root)
+            return
+
+        started = time.time()
+        directories: Set[str] = set()
+        with closing(self._connect()) as conn:
+            for path in paths:
+                row = self._stat_row(root, path)
+                if row is None:
+                    # 已删除：目录连同其下的全部条目一起删除
+                    conn.execute("DELETE FROM entries WHERE path = ? OR substr(path, 1, ?) = ?",
+                                 (path, len(path) + 1, path + os.sep))
+                elif row['is_dir']:
+                    # 目录本身只需刷新mtime，其中变化的文件由调用方逐个列出
+                    directories.add(path)
+                else:
+                    conn.execute("DELETE FROM entries WHERE path = ?", (path,))
+                    conn.execute(INSERT_ENTRY, row)
+                parent = os.path.dirname(path)
+                while parent:
+                    directories.add(parent)
+                    parent = os.path.dirname(parent)
+
+            for directory in sorted(directories):
+                row = self._stat_row(root, directory)
+                if row is None:
+                    continue
+                if conn.execute("UPDATE entries SET mtime = ? WHERE path = ?",
+                                (row['mtime'], directory)).rowcount == 0:
+                    conn.execute(INSERT_ENTRY, row)
+            conn.executemany("UPDATE meta SET value = ? WHERE key = ?", [
+                (repr(os.stat(root).st_mtime), 'root_mtime'),
+                (datetime.now().isoformat(), 'built_at')
+            ])
+            conn.commit()
+
+        logger.info(f"项目索引增量更新 {root}: {len(paths)} 个路径，耗时 {time.time() - started:.2f}s")
+
+    def is_stale_source(self, root: str) -> bool:
+        """索引不存在、版本不符或不是由该解压目录构建时需要完整重建"""
+        if not self.exists():
+            return True
+        try:
+            with closing(self._connect()) as conn:
+                meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        except sqlite3.Error:
+            return True
+        return meta.get('schema_version') != SCHEMA_VERSION \
+            or meta.get('source', SOURCE_DIRECTORY) != SOURCE_DIRECTORY \
+            or meta.get('root') != os.path.abspath(root)
+
+    def is_stale(self, root: str, full: bool = False) -> bool:
+        """
+        判断索引是否需要重建：索引不存在、版本不符或项目根目录的mtime发生变化；
+        经由接口写入的变更已通过apply_changes更新索引，因此默认不检查子目录。
+        full为True时再逐个stat索引中的目录（不列举目录也不读取文件），发现在外部被修改的子目录
+
+        Args:
+            root: 项目解压目录
+            full: 是否检查全部目录的mtime
+
+        Returns:
+            是否需要重建
+        """
+        if not self.exists():
+            return True
+        try:
+            with closing(self._connect()) as conn:
+                meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+                if meta.get('schema_version') != SCHEMA_VERSION:
+                    return True
+                if meta.get('source', SOURCE_DIRECTORY) != SOURCE_DIRECTORY:
+                    return True
+                if os.stat(root).st_mtime != float(meta['root_mtime']):
+                    return True
+                if not full:
+                    return False
+                for row in conn.execute("SELECT path, mtime FROM entries WHERE is_dir = 1"):
+                    if os.stat(os.path.join(root, row['path'])).st_mtime != row['mtime']:
+                        return True
+        except (OSError, sqlite3.Error, KeyError, ValueError):
+            return True
+        return False
+
+    def ensure_built(self, root: str, revalidate: bool = False) -> 'ProjectIndex':
+        """索引不存在或已过期时重建，revalidate为True时检查全部目录的mtime"""
+        if self.is_stale(root, full=revalidate):
+            self.build(root)
+        return self
+
+    def ensure_built_from_storage(self, storage) -> 'ProjectIndex':
+        """索引不存在、来自其他数据来源或存储已被替换时重建"""
+        stale = True
+        try:
+            if self.exists():
+                with closing(self._connect()) as conn:
+                    meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+                stale = meta.get('schema_version') != SCHEMA_VERSION \
+                    or meta.get('source') != storage.kind \
+                    or meta.get('root') != os.path.abspath(storage.location) \
+                    or float(meta['root_mtime']) != storage.mtime
+        except (sqlite3.Error, KeyError, ValueError):
+            pass
+        if stale:
+            self.build_from_storage(storage)
+        return self
+
+    def built_at(self) -> Optional[str]:
+        """索引构建时间，可作为依赖索引的派生数据的版本号"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'built_at'").fetchone()
+            return row['value'] if row else None
+
+    def code_files(self) -> List[Dict]:
+        """按路径顺序获取所有代码文件的路径、扩展名、大小、mtime、编码与内容哈希"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT path, extension, size, mtime, encoding, content_hash FROM entries "
+                "WHERE is_code = 1 ORDER BY path"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def totals(self) -> Dict[str, int]:
+        """索引中全部文件的数量、代码文件数量与总大小"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS total_files, COALESCE(SUM(is_code), 0) AS code_files, "
+                "COALESCE(SUM(size), 0) AS total_size FROM entries WHERE is_dir = 0"
+            ).fetchone()
+        return dict(row)
+
+    def get_entry(self, path: str) -> Optional[Dict]:
+        """按相对路径查询单个条目"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM entries WHERE path = ?", (path,)).fetchone()
+            return dict(row) if row else None
+
+    def structure(self) -> Tuple[List[Dict], Dict]:
+        """
+        获取项目结构：全部目录与代码文件的嵌套列表（目录在前，按名称排序）
+
+        Returns:
+            (结构列表, 统计信息)
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT path, parent, name, is_dir, size, mtime, extension FROM entries "
+                "WHERE is_dir = 1 OR is_code = 1"
+            ).fetchall()
+
+        children: Dict[str, List[Dict]] = {}
+        stats = {'total_files': 0, 'total_directories': 0, 'total_size': 0}
+        for row in rows:
+            if row['is_dir']:
+                item = {
+                    'name': row['name'],
+                    'type': 'directory',
+                    'path': row['path'],
+                    'children': children.setdefault(row['path'], [])
+                }
+                stats['total_directories'] += 1
+            else:
+                item = {
+                    'name': row['name'],
+                    'type': 'file',
+                    'path': row['path'],
+                    'extension': row['extension'],
+                    'size': row['size'],
+                    'modified_at': datetime.fromtimestamp(row['mtime']).isoformat()
+                }
+                stats['total_files'] += 1
+                stats['total_size'] += row['size']
+            children.setdefault(row['parent'], []).append(item)
+
+        for items in children.values():
+            # 排序：目录在前，文件在后
+            items.sort(key=lambda x: (x['type'] != 'directory', x['name'].lower()))
+
+        return children.get('', []), stats
+
+    def stats(self, largest_limit: int = 10) -> Dict:
+        """
+        获取项目统计信息
+
+        Args:
+            largest_limit: 返回的最大文件数量
+
+        Returns:
+            统计信息
+        """
+        with closing(self._connect()) as conn:
+            total_files, total_size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE is_code = 1"
+            ).fetchone()
+            total_directories = conn.execute(
+                "SELECT COUNT(*) FROM entries WHERE is_dir = 1"
+            ).fetchone()[0]
+            extensions = conn.execute(
+                "SELECT extension, COUNT(*) AS count FROM entries WHERE is_code = 1 "
+                "GROUP BY extension ORDER BY count DESC"
+            ).fetchall()
+            largest = conn.execute(
+                "SELECT name, path, size, extension FROM entries WHERE is_code = 1 "
+                "ORDER BY size DESC LIMIT ?", (largest_limit,)
+            ).fetchall()
+
+        return {
+            'total_files': total_files,
+            'total_directories': total_directories,
+            'total_size': total_size,
+            'extensions': [{'extension': row['extension'], 'count': row['count']} for row in extensions],
+            'largest_files': [dict(row) for row in largest]
+        }
+
+    def search_by_name(self, query: str, extension: Optional[str] = None) -> List[Dict]:
+        """
+        按文件名搜索代码文件（不区分大小写的子串匹配）
+
+        Args:
+            query: 搜索关键词
+            extension: 扩展名过滤
+
+        Returns:
+            匹配的文件列表
+        """
+        sql = ("SELECT name, path, extension, size, mtime FROM entries "
+               "WHERE is_code = 1 AND instr(lower(name), ?) > 0")
+        params: List = [query.lower()]
+        if extension:
+            sql += " AND extension = ?"
+            params.append(extension.lower())
+        sql += " ORDER BY path"
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        return [{
+            'name': row['name'],
+            'path': row['path'],
+            'extension': row['extension'],
+            'size': row['size'],
+            'modified_at': datetime.fromtimestamp(row['mtime']).isoformat()
+        } for row in rows]
+
+    def delete(self):
+        """删除索引文件"""
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
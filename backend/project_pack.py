@@ -0,0 +1,394 @@
+import hashlib
+import logging
+import os
+import posixpath
+import shutil
+import sqlite3
+import threading
+import time
+import zipfile
+import zlib
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from zip_project import ZipProject
+
+logger = logging.getLogger(__name__)
+
+BLOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    compressed INTEGER NOT NULL,
+    refcount INTEGER NOT NULL
+);
+"""
+
+PACK_SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE files (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE directories (
+    path TEXT PRIMARY KEY
+);
+"""
+
+PACK_SCHEMA_VERSION = '1'
+
+# 每个写事务写入的文件数，构建大项目时不长时间占用内容存储的写锁
+PACK_BATCH_SIZE = 256
+
+# 小于该大小的内容压缩收益很小，直接保存
+MIN_COMPRESS_SIZE = 256
+COMPRESS_LEVEL = 6
+
+
+def _encode_blob(sha256: str, data: bytes) -> Tuple[str, bytes, int, int]:
+    """压缩内容，压缩后没有变小时保存原内容"""
+    if len(data) >= MIN_COMPRESS_SIZE:
+        compressed = zlib.compress(data, COMPRESS_LEVEL)
+        if len(compressed) < len(data):
+            return sha256, compressed, len(data), 1
+    return sha256, data, len(data), 0
+
+
+class BlobStore:
+    """
+    按内容哈希去重的共享内容存储（SQLite），所有项目的打包文件共用；
+    每个内容记录被引用的次数，最后一个引用释放后删除
+    """
+
+    def __init__(self, db_path: str):
+        """
+        初始化内容存储
+
+        Args:
+            db_path: 数据库路径
+        """
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        Path(os.path.dirname(self.db_path)).mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        # WAL模式下写入新项目时其他项目的读取不被阻塞
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(BLOB_SCHEMA)
+        return conn
+
+    def add(self, blobs: Dict[str, bytes], refs: Dict[str, int]) -> int:
+        """
+        增加一批内容的引用，尚未保存的内容在写事务之外压缩后写入
+
+        Args:
+            blobs: 内容哈希 -> 内容
+            refs: 内容哈希 -> 本次增加的引用数
+
+        Returns:
+            新写入的内容数
+        """
+        with closing(self._connect()) as conn:
+            hashes = list(blobs)
+            existing = set()
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                existing.update(row[0] for row in conn.execute(
+                    f"SELECT sha256 FROM blobs WHERE sha256 IN ({','.join('?' * len(chunk))})", chunk
+                ))
+            rows = [_encode_blob(sha256, data) for sha256, data in blobs.items() if sha256 not in existing]
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 检查之后其他项目可能已写入相同内容，忽略即可
+                conn.executemany(
+                    "INSERT OR IGNORE INTO blobs (sha256, data, size, compressed, refcount) "
+                    "VALUES (?, ?, ?, ?, 0)", rows
+                )
+                # 检查之后也可能被其他项目释放并删除，在同一事务中补写
+                for sha256 in existing:
+                    if conn.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha256,)).fetchone() is None:
+                        conn.execute(
+                            "INSERT INTO blobs (sha256, data, size, compressed, refcount) "
+                            "VALUES (?, ?, ?, ?, 0)", _encode_blob(sha256, blobs[sha256])
+                        )
+                conn.executemany("UPDATE blobs SET refcount = refcount + ? WHERE sha256 = ?",
+                                 [(count, sha256) for sha256, count in refs.items()])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def release(self, refs: Dict[str, int]):
+        """
+        释放内容的引用，引用数归零的内容随之删除
+
+        Args:
+            refs: 内容哈希 -> 释放的引用数
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("UPDATE blobs SET refcount = refcount - ? WHERE sha256 = ?",
+                                 [(count, sha256) for sha256, count in refs.items()])
+                conn.executemany("DELETE FROM blobs WHERE sha256 = ? AND refcount <= 0",
+                                 [(sha256,) for sha256 in refs])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> Dict:
+        """内容数、去重前后的大小与压缩后占用的大小"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(size * refcount), 0), "
+                "COALESCE(SUM(LENGTH(data)), 0) FROM blobs"
+            ).fetchone()
+        return {
+            'blobs': row[0],
+            'unique_size': row[1],
+            'referenced_size': row[2],
+            'stored_size': row[3]
+        }
+
+
+class ProjectPack:
+    """
+    单个项目的打包文件（SQLite）：记录路径到内容哈希、大小和mtime的映射以及全部目录，
+    文件内容保存在共享的BlobStore中，项目之间相同的文件只保存一份。
+    一个项目只占用一个文件，不再在磁盘上展开成大量小文件。
+    """
+
+    def __init__(self, pack_path: str, blob_store: BlobStore):
+        """
+        初始化打包文件
+
+        Args:
+            pack_path: 打包文件路径
+            blob_store: 共享内容存储
+        """
+        self.pack_path = pack_path
+        self.blob_store = blob_store
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # 在进程池中使用时只传递路径，连接在工作进程中重新打开
+        return {'pack_path': self.pack_path, 'blob_store': self.blob_store}
+
+    def __setstate__(self, state):
+        self.__init__(state['pack_path'], state['blob_store'])
+
+    def exists(self) -> bool:
+        return os.path.exists(self.pack_path)
+
+    @property
+    def mtime(self) -> float:
+        return os.path.getmtime(self.pack_path)
+
+    def _connection(self) -> sqlite3.Connection:
+        """每个线程一个只读连接，打包文件以pack附加到内容存储上，一次查询即可读到内容"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.blob_store.db_path, timeout=30)
+            conn.execute("ATTACH DATABASE ? AS pack", (self.pack_path,))
+            self._local.conn = conn
+        return conn
+
+    def build(self, zip_path: str, members: Dict[str, zipfile.ZipInfo], directories: Set[str]) -> Dict:
+        """
+        将压缩包中选中的成员写入打包文件与共享内容存储，先写入临时文件再原子替换
+
+        Args:
+            zip_path: ZIP文件路径
+            members: 相对路径 -> 成员信息（scan_archive的members）
+            directories: 全部目录的相对路径
+
+        Returns:
+            files、size、new_blobs统计
+        """
+        started = time.time()
+        Path(os.path.dirname(self.pack_path)).mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.pack_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        refs: Dict[str, int] = {}
+        total_size = 0
+        new_blobs = 0
+        try:
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref, closing(sqlite3.connect(tmp_path)) as conn:
+                conn.executescript(PACK_SCHEMA)
+                # 补全各级上级目录，与解压后的目录结构一致
+                all_directories = set()
+                for path in list(directories) + [posixpath.dirname(path) for path in members]:
+                    while path and path not in all_directories:
+                        all_directories.add(path)
+                        path = posixpath.dirname(path)
+                conn.executemany("INSERT INTO directories (path) VALUES (?)",
+                                 [(path,) for path in sorted(all_directories)])
+                items = list(members.items())
+                for i in range(0, len(items), PACK_BATCH_SIZE):
+                    blobs: Dict[str, bytes] = {}
+                    batch_refs: Dict[str, int] = {}
+                    rows = []
+                    for path, info in items[i:i + PACK_BATCH_SIZE]:
+                        data = zip_ref.read(info)
+                        sha256 = hashlib.sha256(data).hexdigest()
+                        blobs[sha256] = data
+                        batch_refs[sha256] = batch_refs.get(sha256, 0) + 1
+                        rows.append((path, sha256, len(data), ZipProject.member_mtime(info)))
+                        total_size += len(data)
+                    # 先增加引用再写入打包文件：中途失败最多多留内容，不会丢失被引用的内容
+                    new_blobs += self.blob_store.add(blobs, batch_refs)
+                    for sha256, count in batch_refs.items():
+                        refs[sha256] = refs.get(sha256, 0) + count
+                    conn.executemany("INSERT INTO files (path, sha256, size, mtime) VALUES (?, ?, ?, ?)", rows)
+                conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+                    ('schema_version', PACK_SCHEMA_VERSION),
+                    ('source', os.path.abspath(zip_path))
+                ])
+                conn.commit()
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            if refs:
+                self.blob_store.release(refs)
+            raise
+
+        previous = self._refs() if self.exists() else {}
+        os.replace(tmp_path, self.pack_path)
+        if previous:
+            self.blob_store.release(previous)
+
+        logger.info(f"项目打包完成 {self.pack_path}: {len(members)} 个文件，{total_size} 字节，"
+                    f"新增内容 {new_blobs} 个，耗时 {time.time() - started:.2f}s")
+        return {'files': len(members), 'size': total_size, 'new_blobs': new_blobs}
+
+    def _refs(self) -> Dict[str, int]:
+        """打包文件中每个内容哈希被引用的次数"""
+        with closing(sqlite3.connect(self.pack_path)) as conn:
+            return dict(conn.execute("SELECT sha256, COUNT(*) FROM files GROUP BY sha256").fetchall())
+
+    def delete(self):
+        """删除打包文件并释放其引用的内容；先删除文件，中途失败只会多留内容"""
+        if not self.exists():
+            return
+        refs = self._refs()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        os.remove(self.pack_path)
+        if refs:
+            self.blob_store.release(refs)
+
+    def stat(self, path: str) -> Optional[Dict]:
+        """查询文件或目录，不存在时返回None"""
+        conn = self._connection()
+        row = conn.execute("SELECT size, mtime FROM pack.files WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            return {'is_dir': False, 'size': row[0], 'mtime': row[1]}
+        if conn.execute("SELECT 1 FROM pack.directories WHERE path = ?", (path,)).fetchone():
+            return {'is_dir': True, 'size': 0, 'mtime': self.mtime}
+        return None
+
+    def read(self, path: str) -> bytes:
+        """
+        读取单个文件的内容
+
+        Args:
+            path: 相对路径（以/分隔）
+
+        Returns:
+            文件内容，文件不存在时抛出KeyError
+        """
+        row = self._connection().execute(
+            "SELECT b.data, b.compressed FROM pack.files f JOIN blobs b ON b.sha256 = f.sha256 "
+            "WHERE f.path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(path)
+        return zlib.decompress(row[0]) if row[1] else bytes(row[0])
+
+    def iter_entries(self, code_extensions: Set[str]) -> Iterator[Dict]:
+        """
+        产出与项目索引格式一致的条目；内容哈希与解压目录的索引一样是SHA-256，
+        不需要读取任何内容
+
+        Args:
+            code_extensions: 代码文件扩展名
+        """
+        mtime = self.mtime
+        with closing(sqlite3.connect(self.pack_path)) as conn:
+            for (path,) in conn.execute("SELECT path FROM directories"):
+                yield {
+                    'path': path,
+                    'parent': posixpath.dirname(path),
+                    'name': posixpath.basename(path),
+                    'is_dir': 1,
+                    'size': 0,
+                    'mtime': mtime,
+                    'extension': None,
+                    'is_code': 0,
+                    'content_hash': None,
+                    'line_count': None,
+                    'encoding': None
+                }
+            for path, sha256, size, file_mtime in conn.execute("SELECT path, sha256, size, mtime FROM files"):
+                extension = Path(path).suffix.lower()
+                is_code = extension in code_extensions
+                yield {
+                    'path': path,
+                    'parent': posixpath.dirname(path),
+                    'name': posixpath.basename(path),
+                    'is_dir': 0,
+                    'size': size,
+                    'mtime': file_mtime,
+                    'extension': extension,
+                    'is_code': int(is_code),
+                    'content_hash': sha256 if is_code else None,
+                    'line_count': None,
+                    'encoding': None
+                }
+
+    def extract(self, target_dir: str) -> int:
+        """
+        将打包的文件展开到目录（总结等需要真实路径的操作使用），
+        先写入同级临时目录再重命名
+
+        Args:
+            target_dir: 目标目录
+
+        Returns:
+            写出的文件数
+        """
+        tmp_dir = f"{target_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        count = 0
+        try:
+            with closing(sqlite3.connect(self.pack_path)) as conn:
+                directories = [row[0] for row in conn.execute("SELECT path FROM directories")]
+                paths = [row[0] for row in conn.execute("SELECT path FROM files")]
+            Path(tmp_dir).mkdir(parents=True)
+            for directory in sorted(directories):
+                os.makedirs(os.path.join(tmp_dir, directory), exist_ok=True)
+            for path in paths:
+                full_path = os.path.join(tmp_dir, path)
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                with open(full_path, 'wb') as f:
+                    f.write(self.read(path))
+                count += 1
+            os.rename(tmp_dir, target_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return count
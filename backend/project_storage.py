@@ -0,0 +1,221 @@
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Set
+
+from project_index import SOURCE_ARCHIVE, SOURCE_DIRECTORY, SOURCE_PACK, detect_encoding
+from project_pack import ProjectPack
+from zip_extract import normalize_member_name
+from zip_project import ZipProject, ZipProjectCache
+
+# 进程池工作进程中打开的压缩包：同一压缩包的多个任务复用，不必每个任务都重新解析中央目录；
+# 工作进程中每个文件通常只读取一次，不缓存解压内容
+_worker_archives: Optional[ZipProjectCache] = None
+_worker_archives_lock = threading.Lock()
+
+
+def _open_worker_archive(key: str, zip_path: str) -> ZipProject:
+    """在工作进程中获取压缩包项目，压缩包被替换（mtime变化）后重新打开"""
+    global _worker_archives
+    with _worker_archives_lock:
+        if _worker_archives is None:
+            _worker_archives = ZipProjectCache(blob_cache_size=0)
+    return _worker_archives.get(key, zip_path)
+
+
+class ProjectStorage:
+    """
+    上传项目文件的读取接口，分析接口只通过它读取文件，不关心项目保存为
+    解压目录、打包文件还是未解压的压缩包。路径均为相对项目根目录的路径。
+    """
+
+    # 存储类型，同时作为项目索引的数据来源
+    kind: str = None
+
+    def __init__(self, key: str):
+        """
+        Args:
+            key: 存储ID
+        """
+        self.key = key
+
+    @property
+    def location(self) -> str:
+        """存储在磁盘上的路径"""
+        raise NotImplementedError
+
+    @property
+    def mtime(self) -> float:
+        """存储整体的修改时间，非目录存储据此判断项目索引是否需要重建"""
+        raise NotImplementedError
+
+    def normalize(self, path: str) -> Optional[str]:
+        """规范化相对路径，指向项目之外的路径返回None"""
+        path = normalize_member_name(path)
+        return path.replace('/', os.sep) if path else None
+
+    def stat(self, path: str) -> Optional[Dict]:
+        """
+        查询文件或目录
+
+        Returns:
+            is_dir、size、mtime，不存在时返回None
+        """
+        raise NotImplementedError
+
+    def read(self, path: str) -> bytes:
+        """读取文件内容，文件不存在时抛出KeyError"""
+        raise NotImplementedError
+
+    def read_text(self, path: str) -> Optional[str]:
+        """读取文本文件，无法读取或解码时返回None"""
+        try:
+            data = self.read(path)
+        except (KeyError, OSError):
+            return None
+        return detect_encoding(data)[1]
+
+    def read_head(self, path: str, limit: int) -> str:
+        """读取文件开头的至多limit个字符（忽略无法解码的字节），读取失败返回空字符串"""
+        try:
+            data = self.read(path)
+        except (KeyError, OSError):
+            return ''
+        return data.decode('utf-8', errors='ignore')[:limit]
+
+    def iter_entries(self, code_extensions: Set[str]) -> Iterator[Dict]:
+        """产出项目索引条目；解压目录的索引由ProjectIndex.build遍历目录构建"""
+        raise NotImplementedError
+
+    def describe(self, path: str) -> Optional[Dict]:
+        """文件的大小与修改时间（ISO格式），供文件读取接口返回"""
+        stat = self.stat(path)
+        if stat is None:
+            return None
+        return {**stat, 'modified_at': datetime.fromtimestamp(stat['mtime']).isoformat()}
+
+
+class DirectoryStorage(ProjectStorage):
+    """解压到目录中的项目"""
+
+    kind = SOURCE_DIRECTORY
+
+    def __init__(self, key: str, root: str):
+        super().__init__(key)
+        self.root = root
+
+    @property
+    def location(self) -> str:
+        return self.root
+
+    @property
+    def mtime(self) -> float:
+        return os.stat(self.root).st_mtime
+
+    def _full_path(self, path: str) -> str:
+        full_path = os.path.realpath(os.path.join(self.root, path))
+        # 符号链接与..都不能指向解压目录之外
+        if not full_path.startswith(os.path.realpath(self.root) + os.sep):
+            raise KeyError(path)
+        return full_path
+
+    def normalize(self, path: str) -> Optional[str]:
+        try:
+            self._full_path(path)
+        except KeyError:
+            return None
+        return os.path.normpath(path)
+
+    def stat(self, path: str) -> Optional[Dict]:
+        try:
+            full_path = self._full_path(path)
+            stat = os.stat(full_path)
+        except (KeyError, OSError):
+            return None
+        is_dir = os.path.isdir(full_path)
+        return {'is_dir': is_dir, 'size': 0 if is_dir else stat.st_size, 'mtime': stat.st_mtime}
+
+    def read(self, path: str) -> bytes:
+        full_path = self._full_path(path)
+        if not os.path.isfile(full_path):
+            raise KeyError(path)
+        with open(full_path, 'rb') as f:
+            return f.read()
+
+    def read_head(self, path: str, limit: int) -> str:
+        # 只读取开头部分，不读入整个文件
+        try:
+            with open(self._full_path(path), 'r', encoding='utf-8', errors='ignore') as f:
+                return f.read(limit)
+        except (KeyError, OSError):
+            return ''
+
+
+class ArchiveStorage(ProjectStorage):
+    """未解压的项目，按需从压缩包中解压单个成员"""
+
+    kind = SOURCE_ARCHIVE
+
+    def __init__(self, archive: ZipProject):
+        super().__init__(archive.key)
+        self.archive = archive
+
+    def __getstate__(self):
+        # 在进程池中使用时只传递路径，工作进程重新打开压缩包
+        return {'key': self.key, 'zip_path': self.archive.zip_path}
+
+    def __setstate__(self, state):
+        self.__init__(_open_worker_archive(state['key'], state['zip_path']))
+
+    @property
+    def location(self) -> str:
+        return self.archive.zip_path
+
+    @property
+    def mtime(self) -> float:
+        return self.archive.mtime
+
+    def stat(self, path: str) -> Optional[Dict]:
+        info = self.archive.get_info(path)
+        if info is not None:
+            return {'is_dir': False, 'size': info.file_size, 'mtime': self.archive.member_mtime(info)}
+        if self.archive.is_dir(path):
+            return {'is_dir': True, 'size': 0, 'mtime': self.archive.mtime}
+        return None
+
+    def read(self, path: str) -> bytes:
+        return self.archive.read(path)
+
+    def iter_entries(self, code_extensions: Set[str]) -> Iterator[Dict]:
+        return self.archive.iter_entries(code_extensions)
+
+
+class PackStorage(ProjectStorage):
+    """保存在打包文件中的项目，内容在项目之间按哈希去重"""
+
+    kind = SOURCE_PACK
+
+    def __init__(self, key: str, pack: ProjectPack):
+        super().__init__(key)
+        self.pack = pack
+
+    @property
+    def location(self) -> str:
+        return self.pack.pack_path
+
+    @property
+    def mtime(self) -> float:
+        return self.pack.mtime
+
+    def stat(self, path: str) -> Optional[Dict]:
+        path = normalize_member_name(path)
+        return self.pack.stat(path) if path else None
+
+    def read(self, path: str) -> bytes:
+        normalized = normalize_member_name(path)
+        if normalized is None:
+            raise KeyError(path)
+        return self.pack.read(normalized)
+
+    def iter_entries(self, code_extensions: Set[str]) -> Iterator[Dict]:
+        return self.pack.iter_entries(code_extensions)
@@ -0,0 +1,150 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_RUNNING = 'running'
+JOB_PAUSED = 'paused'
+JOB_CANCELLING = 'cancelling'
+
+# 暂停时轮询取消信号的间隔（秒），保证取消在1秒内生效
+PAUSE_POLL_INTERVAL = 0.2
+
+
+class JobCancelled(Exception):
+    """总结任务被取消"""
+    pass
+
+
+class SummarizeJob:
+    """运行中的总结任务的控制句柄，提供取消与暂停/继续"""
+
+    def __init__(self, run):
+        """
+        初始化任务句柄
+
+        Args:
+            run: 对应的SummarizeRun检查点
+        """
+        self.run = run
+        self.run_id = run.run_id
+        # 置位表示已取消，同时作为LLM请求的中止信号
+        self.cancel_event = threading.Event()
+        # 置位表示允许继续派发，清除表示暂停
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def state(self) -> str:
+        if self.cancel_event.is_set():
+            return JOB_CANCELLING
+        if not self._running.is_set():
+            return JOB_PAUSED
+        return JOB_RUNNING
+
+    def cancel(self):
+        """取消任务：停止派发新的LLM调用并中止进行中的请求"""
+        self.cancel_event.set()
+        # 唤醒可能处于暂停等待中的工作线程
+        self._running.set()
+
+    def pause(self):
+        """暂停任务：进行中的LLM调用完成后不再派发新的调用"""
+        if not self.cancel_event.is_set():
+            self._running.clear()
+
+    def unpause(self):
+        self._running.set()
+
+    def checkpoint(self):
+        """
+        派发下一次LLM调用前调用：暂停时阻塞，已取消时抛出JobCancelled
+        """
+        while not self._running.wait(timeout=PAUSE_POLL_INTERVAL):
+            if self.cancel_event.is_set():
+                break
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"任务已取消: {self.run_id}")
+
+    def to_dict(self) -> Dict:
+        return {
+            'run_id': self.run_id,
+            'project_path': self.run.project_path,
+            'state': self.state
+        }
+
+
+class SummarizeJobManager:
+    """
+    管理当前进程中的总结任务
+
+    后台任务在有界线程池中执行；同步请求中执行的任务也在此登记，
+    以便其他请求对其取消或暂停。
+    """
+
+    def __init__(self, max_workers: int = 2):
+        """
+        初始化任务管理器
+
+        Args:
+            max_workers: 后台任务的最大并发数
+        """
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='summarize'
+        )
+        self._jobs: Dict[str, SummarizeJob] = {}
+        self._lock = threading.Lock()
+
+    def register(self, run) -> Optional[SummarizeJob]:
+        """
+        登记任务，同一任务已在运行时返回None
+
+        Args:
+            run: SummarizeRun检查点
+
+        Returns:
+            新的任务句柄
+        """
+        with self._lock:
+            if run.run_id in self._jobs:
+                return None
+            job = SummarizeJob(run)
+            self._jobs[run.run_id] = job
+            return job
+
+    def release(self, run_id: str):
+        """任务结束后释放登记"""
+        with self._lock:
+            self._jobs.pop(run_id, None)
+
+    def get(self, run_id: str) -> Optional[SummarizeJob]:
+        with self._lock:
+            return self._jobs.get(run_id)
+
+    def list_jobs(self) -> List[Dict]:
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def submit(self, job: SummarizeJob, fn: Callable[[SummarizeJob], object]) -> Future:
+        """
+        在线程池中执行任务，结束（包括取消和异常）后自动释放登记
+
+        Args:
+            job: 已登记的任务句柄
+            fn: 以任务句柄为参数的执行函数
+
+        Returns:
+            Future对象
+        """
+        def runner():
+            try:
+                return fn(job)
+            except Exception as e:
+                logger.error(f"后台总结任务失败 {job.run_id}: {e}")
+                raise
+            finally:
+                self.release(job.run_id)
+
+        return self._executor.submit(runner)
@@ -0,0 +1,282 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_SUCCESS = 'success'
+STATUS_ERROR = 'error'
+
+RUN_RUNNING = 'running'
+RUN_COMPLETED = 'completed'
+RUN_INTERRUPTED = 'interrupted'
+RUN_CANCELLED = 'cancelled'
+
+
+class SummarizeRun:
+    """
+    项目技术总结任务的持久化检查点
+
+    检查点以追加写入的JSONL日志保存：第一行记录任务信息和按优先级排好序的文件列表，
+    之后每处理完一个文件追加一行事件。进程中途退出后重放日志即可恢复各文件的状态，
+    写入成本与已处理文件数无关。
+    """
+
+    def __init__(self, runs_dir: str, header: Dict):
+        """
+        初始化任务检查点
+
+        Args:
+            runs_dir: 检查点文件所在目录
+            header: 任务信息（run_id、项目路径、文件列表等）
+        """
+        self.runs_dir = runs_dir
+        self.run_id = header['run_id']
+        self.project_path = header['project_path']
+        self.project_name = header['project_name']
+        self.summary_docs_dir = header['summary_docs_dir']
+        self.created_at = header['created_at']
+        self.files = header['files']
+        self.skipped_files = header.get('skipped_files', [])
+        self.pruned_directories = header.get('pruned_directories', [])
+        self.finished_at = None
+        self.cancelled_at = None
+        self.resume_count = 0
+        # relative_path -> 最新的处理结果
+        self.results: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.runs_dir, f"{self.run_id}.jsonl")
+
+    @classmethod
+    def create(cls, runs_dir: str, project_path: str, project_name: str,
+               summary_docs_dir: str, code_files: List[Dict],
+               skipped_files: Optional[List[Dict]] = None,
+               pruned_directories: Optional[List[str]] = None) -> 'SummarizeRun':
+        """
+        创建新任务并写入检查点头部
+
+        Args:
+            runs_dir: 检查点文件所在目录
+            project_path: 项目目录路径
+            project_name: 项目名称
+            summary_docs_dir: 总结文档输出目录
+            code_files: 已排序的待处理代码文件列表
+            skipped_files: 筛除的生成/压缩文件及原因
+            pruned_directories: 遍历时跳过的目录
+
+        Returns:
+            新建的任务
+        """
+        Path(runs_dir).mkdir(parents=True, exist_ok=True)
+        header = {
+            'type': 'run',
+            'run_id': str(uuid.uuid4()),
+            'project_path': project_path,
+            'project_name': project_name,
+            'summary_docs_dir': summary_docs_dir,
+            'created_at': datetime.now().isoformat(),
+            'files': code_files,
+            'skipped_files': skipped_files or [],
+            'pruned_directories': pruned_directories or []
+        }
+        run = cls(runs_dir, header)
+        run._append(header)
+        return run
+
+    @classmethod
+    def load(cls, runs_dir: str, run_id: str) -> Optional['SummarizeRun']:
+        """
+        从检查点日志恢复任务
+
+        Args:
+            runs_dir: 检查点文件所在目录
+            run_id: 任务ID
+
+        Returns:
+            恢复的任务，检查点不存在时返回None
+        """
+        # run_id 来自URL，只接受合法的uuid，防止路径穿越
+        try:
+            run_id = str(uuid.UUID(run_id))
+        except ValueError:
+            return None
+
+        checkpoint_path = os.path.join(runs_dir, f"{run_id}.jsonl")
+        if not os.path.exists(checkpoint_path):
+            return None
+
+        run = None
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # 进程在写入过程中退出时最后一行可能不完整
+                    logger.warning(f"忽略损坏的检查点记录: {checkpoint_path}")
+                    continue
+
+                if event['type'] == 'run':
+                    run = cls(runs_dir, event)
+                elif run is None:
+                    continue
+                elif event['type'] == 'file':
+                    run.results[event['relative_path']] = event['result']
+                elif event['type'] == 'finished':
+                    run.finished_at = event['at']
+                elif event['type'] == 'cancelled':
+                    run.cancelled_at = event['at']
+                elif event['type'] == 'resumed':
+                    run.finished_at = None
+                    run.cancelled_at = None
+                    run.resume_count += 1
+
+        return run
+
+    @classmethod
+    def list_runs(cls, runs_dir: str, project_name: Optional[str] = None) -> List['SummarizeRun']:
+        """
+        加载目录下的所有任务，按创建时间升序排列
+
+        Args:
+            runs_dir: 检查点文件所在目录
+            project_name: 只返回该项目的任务
+
+        Returns:
+            任务列表
+        """
+        if not os.path.isdir(runs_dir):
+            return []
+        runs = []
+        for filename in os.listdir(runs_dir):
+            if not filename.endswith('.jsonl'):
+                continue
+            run = cls.load(runs_dir, filename[:-len('.jsonl')])
+            if run is not None and (project_name is None or run.project_name == project_name):
+                runs.append(run)
+        runs.sort(key=lambda run: run.created_at)
+        return runs
+
+    def _append(self, event: Dict):
+        """追加一条事件并立即落盘"""
+        line = json.dumps(event, ensure_ascii=False)
+        with self._lock:
+            with open(self.checkpoint_path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def file_status(self, relative_path: str) -> str:
+        result = self.results.get(relative_path)
+        return result['status'] if result else STATUS_PENDING
+
+    def pending_files(self, retry_failed: bool = True) -> List[Dict]:
+        """
+        获取尚需处理的文件，已成功且文档仍存在的文件不会重复处理
+
+        Args:
+            retry_failed: 是否重新处理失败的文件
+
+        Returns:
+            按原优先级排序的待处理文件列表
+        """
+        pending = []
+        for code_file in self.files:
+            result = self.results.get(code_file['relative_path'])
+            if result is None:
+                pending.append(code_file)
+            elif result['status'] == STATUS_SUCCESS:
+                if not os.path.exists(result.get('doc_path', '')):
+                    pending.append(code_file)
+            elif retry_failed:
+                pending.append(code_file)
+        return pending
+
+    def record_result(self, relative_path: str, result: Dict):
+        """
+        记录单个文件的处理结果
+
+        Args:
+            relative_path: 文件相对路径
+            result: 处理结果，status为success或error
+        """
+        self.results[relative_path] = result
+        self._append({
+            'type': 'file',
+            'relative_path': relative_path,
+            'result': result,
+            'at': datetime.now().isoformat()
+        })
+
+    def mark_resumed(self):
+        self.finished_at = None
+        self.cancelled_at = None
+        self.resume_count += 1
+        self._append({'type': 'resumed', 'at': datetime.now().isoformat()})
+
+    def mark_finished(self):
+        self.finished_at = datetime.now().isoformat()
+        self._append({'type': 'finished', 'at': self.finished_at})
+
+    def mark_cancelled(self):
+        self.cancelled_at = datetime.now().isoformat()
+        self._append({'type': 'cancelled', 'at': self.cancelled_at})
+
+    @property
+    def status(self) -> str:
+        """
+        任务状态：已结束的任务为completed，被取消的为cancelled，否则为interrupted
+        （运行中的状态由调用方根据当前进程中的活动任务判断）
+        """
+        if self.finished_at:
+            return RUN_COMPLETED
+        if self.cancelled_at:
+            return RUN_CANCELLED
+        return RUN_INTERRUPTED
+
+    def counts(self) -> Dict[str, int]:
+        """统计各状态的文件数"""
+        counts = {STATUS_SUCCESS: 0, STATUS_ERROR: 0, STATUS_PENDING: 0}
+        for code_file in self.files:
+            counts[self.file_status(code_file['relative_path'])] += 1
+        return counts
+
+    def ordered_results(self) -> List[Dict]:
+        """按文件优先级顺序返回已有的处理结果"""
+        return [
+            self.results[code_file['relative_path']]
+            for code_file in self.files
+            if code_file['relative_path'] in self.results
+        ]
+
+    def to_dict(self) -> Dict:
+        counts = self.counts()
+        return {
+            'run_id': self.run_id,
+            'project_path': self.project_path,
+            'project_name': self.project_name,
+            'summary_docs_dir': self.summary_docs_dir,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'cancelled_at': self.cancelled_at,
+            'resume_count': self.resume_count,
+            'status': self.status,
+            'total_files': len(self.files),
+            'success_count': counts[STATUS_SUCCESS],
+            'error_count': counts[STATUS_ERROR],
+            'pending_count': counts[STATUS_PENDING],
+            'skipped_count': len(self.skipped_files),
+            'skipped_files': self.skipped_files,
+            'pruned_directories': self.pruned_directories
+        }
@@ -0,0 +1,809 @@
+import ast
+import bisect
+import logging
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from project_index import detect_encoding
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = '1'
+
+PYTHON_EXTENSIONS = {'.py'}
+SCRIPT_EXTENSIONS = {'.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs'}
+SYMBOL_EXTENSIONS = PYTHON_EXTENSIONS | SCRIPT_EXTENSIONS
+
+# 超过该大小的文件不提取符号
+MAX_SYMBOL_FILE_SIZE = 1024 * 1024  # 1MB
+
+# 待提取文件数达到该值时使用进程池，否则在当前进程中直接提取（避免启动进程的开销）
+PARALLEL_THRESHOLD = 64
+
+# 每个进程池任务处理的文件数
+EXTRACT_CHUNK_SIZE = 32
+
+# 符号签名最多保留的字符数
+MAX_SIGNATURE_LENGTH = 200
+
+KIND_CLASS = 'class'
+KIND_FUNCTION = 'function'
+KIND_METHOD = 'method'
+KIND_INTERFACE = 'interface'
+KIND_TYPE = 'type'
+KIND_ENUM = 'enum'
+KIND_VARIABLE = 'variable'
+KIND_EXPORT = 'export'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    content_hash TEXT,
+    symbol_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    qualified_name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    parent TEXT,
+    line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    column INTEGER NOT NULL,
+    exported INTEGER NOT NULL DEFAULT 0,
+    signature TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_symbols_name ON symbols(name_lower);
+CREATE INDEX IF NOT EXISTS idx_symbols_qualified ON symbols(qualified_name);
+CREATE INDEX IF NOT EXISTS idx_symbols_path ON symbols(path, line);
+"""
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# 每个索引数据库一把同步锁，不同项目的同步互不阻塞
+_sync_locks: Dict[str, threading.Lock] = {}
+_sync_locks_lock = threading.Lock()
+
+
+def get_extract_pool() -> ProcessPoolExecutor:
+    """
+    获取共享的符号提取进程池（首次使用时创建）。使用spawn方式启动工作进程，
+    避免在多线程的服务进程中fork；工作进程在多次同步之间复用
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def shutdown_extract_pool():
+    """关闭进程池，取消尚未开始的任务"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _get_sync_lock(db_path: str) -> threading.Lock:
+    with _sync_locks_lock:
+        return _sync_locks.setdefault(os.path.abspath(db_path), threading.Lock())
+
+
+def _symbol(name: str, kind: str, parent: Optional[str], line: int, end_line: int,
+            column: int, exported: bool = False, signature: Optional[str] = None) -> Dict:
+    return {
+        'name': name,
+        'qualified_name': f"{parent}.{name}" if parent else name,
+        'kind': kind,
+        'parent': parent,
+        'line': line,
+        'end_line': max(end_line, line),
+        'column': column,
+        'exported': exported,
+        'signature': signature[:MAX_SIGNATURE_LENGTH] if signature else None
+    }
+
+
+# ---- Python ----
+
+def _python_exports(tree: ast.Module) -> Optional[List[str]]:
+    """读取模块级__all__，未定义时返回None"""
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == '__all__' for target in node.targets):
+            if isinstance(node.value, (ast.List, ast.Tuple)):
+                return [item.value for item in node.value.elts
+                        if isinstance(item, ast.Constant) and isinstance(item.value, str)]
+    return None
+
+
+def extract_python_symbols(text: str) -> List[Dict]:
+    """
+    使用ast提取Python源码中的类、函数与方法
+
+    Args:
+        text: 源码
+
+    Returns:
+        符号列表，语法错误时返回空列表
+    """
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return []
+
+    exports = _python_exports(tree)
+    symbols = []
+
+    def visit(body, parent, parent_kind):
+        for node in body:
+            if isinstance(node, ast.If):
+                # 条件定义（如TYPE_CHECKING、兼容性导入）与所在层级相同
+                visit(node.body + node.orelse, parent, parent_kind)
+                continue
+            if isinstance(node, ast.Try) or type(node).__name__ == 'TryStar':
+                blocks = node.body + node.orelse + node.finalbody
+                for handler in node.handlers:
+                    blocks += handler.body
+                visit(blocks, parent, parent_kind)
+                continue
+
+            if isinstance(node, ast.ClassDef):
+                kind = KIND_CLASS
+                bases = ', '.join(ast.unparse(base) for base in node.bases)
+                signature = f"class {node.name}({bases})" if bases else f"class {node.name}"
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = KIND_METHOD if parent_kind == KIND_CLASS else KIND_FUNCTION
+                prefix = 'async def' if isinstance(node, ast.AsyncFunctionDef) else 'def'
+                signature = f"{prefix} {node.name}({ast.unparse(node.args)})"
+                if node.returns is not None:
+                    signature += f" -> {ast.unparse(node.returns)}"
+            else:
+                continue
+
+            if parent is None:
+                exported = node.name in exports if exports is not None else not node.name.startswith('_')
+            else:
+                exported = False
+            symbol = _symbol(node.name, kind, parent, node.lineno, node.end_lineno or node.lineno,
+                             node.col_offset + 1, exported, signature)
+            symbols.append(symbol)
+            visit(node.body, symbol['qualified_name'], kind)
+
+    visit(tree.body, None, None)
+
+    # __all__中列出但不是类或函数的名称（常量、重新导出的导入）
+    if exports:
+        defined = {symbol['name'] for symbol in symbols if symbol['parent'] is None}
+        line = next(node.lineno for node in tree.body if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == '__all__' for target in node.targets))
+        for name in exports:
+            if name not in defined:
+                symbols.append(_symbol(name, KIND_EXPORT, None, line, line, 1, True))
+    symbols.sort(key=lambda symbol: (symbol['line'], symbol['column']))
+    return symbols
+
+
+# ---- JavaScript / TypeScript ----
+
+_SCRIPT_TOKEN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>'(?:\\.|[^'\\\n])*'?|"(?:\\.|[^"\\\n])*"?)
+  | (?P<template>`(?:\\.|[^`\\])*`?)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<number>\d[\w.]*)
+  | (?P<punct>=>|\.\.\.|\?\.|[{}()\[\];,<>=:*.?!&|+\-%^~@#/])
+  | (?P<other>.)
+""", re.S | re.X)
+
+# 斜杠跟在这些记号之后时是正则字面量而不是除号
+_REGEX_PRECEDERS = {
+    '(', ',', '=', ':', '[', '!', '&', '|', '?', '{', '}', ';', '+', '-', '*', '%', '^', '~', '=>',
+    'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw', 'yield',
+    'await', None
+}
+_REGEX_BODY = re.compile(r"(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])*/[A-Za-z]*")
+
+# 类成员名前可能出现的修饰符
+_MEMBER_MODIFIERS = {
+    'public', 'private', 'protected', 'static', 'readonly', 'async', 'abstract', 'override',
+    'declare', 'get', 'set', 'accessor', '*', '#'
+}
+# 形如 name(...) { 但不是方法定义的关键字
+_CONTROL_KEYWORDS = {'if', 'for', 'while', 'switch', 'catch', 'with', 'return', 'function', 'super'}
+# 声明前可能出现的修饰符
+_DECLARATION_PREFIXES = {'async', 'abstract', 'declare', 'default'}
+
+
+def _tokenize_script(text: str) -> List[Tuple[str, str, int]]:
+    """
+    将JS/TS源码切分为有意义的记号（跳过空白与注释），返回(类型, 值, 偏移)列表。
+    单双引号字符串不跨行，JSX文本中的撇号最多影响一行。
+    """
+    tokens = []
+    pos = 0
+    length = len(text)
+    previous = None
+    while pos < length:
+        match = _SCRIPT_TOKEN.match(text, pos)
+        kind = match.lastgroup
+        value = match.group()
+        if kind == 'punct' and value == '/' and previous in _REGEX_PRECEDERS:
+            regex = _REGEX_BODY.match(text, pos + 1)
+            if regex:
+                tokens.append(('regex', text[pos:regex.end()], pos))
+                previous = 'regex'
+                pos = regex.end()
+                continue
+        pos = match.end()
+        if kind in ('space', 'comment'):
+            continue
+        tokens.append((kind, value, match.start()))
+        previous = value if kind in ('punct', 'name') else kind
+    return tokens
+
+
+def extract_script_symbols(text: str) -> List[Dict]:
+    """
+    基于记号扫描提取JS/TS源码中的类、函数、方法、接口、类型、枚举与导出，
+    通过花括号配对得到各定义的结束行
+
+    Args:
+        text: 源码
+
+    Returns:
+        符号列表
+    """
+    tokens = _tokenize_script(text)
+    line_starts = [0] + [match.end() for match in re.finditer('\n', text)]
+    symbols: List[Dict] = []
+    top_level: Dict[str, Dict] = {}
+    exported_names: List[Tuple[str, str, int]] = []
+
+    def value(index: int) -> Optional[str]:
+        return tokens[index][1] if 0 <= index < len(tokens) else None
+
+    def is_name(index: int) -> bool:
+        return 0 <= index < len(tokens) and tokens[index][0] == 'name'
+
+    def line_of(index: int) -> int:
+        return bisect.bisect_right(line_starts, tokens[min(index, len(tokens) - 1)][2])
+
+    def column_of(index: int) -> int:
+        offset = tokens[index][2]
+        return offset - line_starts[bisect.bisect_right(line_starts, offset) - 1] + 1
+
+    def new_line(index: int) -> bool:
+        """index处的记号是否位于语句开头（行首或分号、花括号之后）"""
+        return index == 0 or value(index - 1) in (';', '{', '}') or line_of(index - 1) != line_of(index)
+
+    def statement_start(index: int) -> int:
+        """声明关键字所在语句的起点（包含export/async等前缀）"""
+        while value(index - 1) in _DECLARATION_PREFIXES or value(index - 1) == 'export':
+            index -= 1
+        return index
+
+    def is_exported(index: int) -> bool:
+        return value(statement_start(index)) == 'export'
+
+    def matching(index: int, open_char: str, close_char: str) -> int:
+        """与index处括号配对的位置"""
+        depth = 0
+        for j in range(index, len(tokens)):
+            if tokens[j][0] != 'punct':
+                continue
+            if tokens[j][1] == open_char:
+                depth += 1
+            elif tokens[j][1] == close_char:
+                depth -= 1
+                if depth == 0:
+                    return j
+        return len(tokens) - 1
+
+    def function_after(index: int) -> Tuple[bool, int]:
+        """判断index处开始的表达式是否为箭头函数或function表达式，返回(是否函数, 函数体或function关键字的位置)"""
+        j = index
+        if value(j) == 'async':
+            j += 1
+        if value(j) == 'function':
+            return True, j
+        if value(j) == '<':
+            j = matching(j, '<', '>') + 1
+        if value(j) == '(':
+            j = matching(j, '(', ')') + 1
+            if value(j) == ':':
+                # 返回类型注解
+                for k in range(j + 1, min(j + 30, len(tokens))):
+                    if value(k) == '=>':
+                        return True, k + 1
+                    if value(k) in (';', '{', '='):
+                        break
+                return False, j
+            return value(j) == '=>', j + 1
+        if is_name(j) and value(j + 1) == '=>':
+            return True, j + 2
+        return False, j
+
+    def current_parent() -> Optional[str]:
+        for scope in reversed(scopes):
+            if scope['symbol'] is not None:
+                return scope['symbol']['qualified_name']
+        return None
+
+    def add(name_index: int, kind: str, exported: bool = False,
+            signature_start: Optional[int] = None, signature_end: Optional[int] = None) -> Dict:
+        parent = current_parent()
+        signature = None
+        if signature_start is not None and signature_end is not None:
+            end_offset = tokens[signature_end][2] if signature_end < len(tokens) else len(text)
+            signature = ' '.join(text[tokens[signature_start][2]:end_offset].split())
+        symbol = _symbol(value(name_index), kind, parent, line_of(name_index), line_of(name_index),
+                         column_of(name_index), exported, signature)
+        symbols.append(symbol)
+        if parent is None:
+            top_level.setdefault(symbol['name'], symbol)
+        return symbol
+
+    def expect_body(symbol: Optional[Dict], scope_kind: str = 'block'):
+        """下一个同层级的左花括号是symbol的定义体"""
+        nonlocal pending
+        pending = (symbol, scope_kind, paren_depth)
+
+    def expect_function_body(symbol: Dict, body: int):
+        # 箭头函数的函数体不一定是花括号
+        if value(body) == '{' or value(body) == 'function':
+            expect_body(symbol)
+
+    scopes: List[Dict] = []
+    pending = None
+    paren_depth = 0
+    i = 0
+    while i < len(tokens):
+        kind, token, _ = tokens[i]
+
+        if kind == 'punct':
+            if token in ('(', '['):
+                paren_depth += 1
+            elif token in (')', ']'):
+                paren_depth = max(paren_depth - 1, 0)
+            elif token == '{':
+                if pending is not None and pending[2] == paren_depth:
+                    scopes.append({'symbol': pending[0], 'kind': pending[1], 'paren_depth': paren_depth})
+                    pending = None
+                else:
+                    scopes.append({'symbol': None, 'kind': 'block', 'paren_depth': paren_depth})
+            elif token == '}':
+                if scopes:
+                    scope = scopes.pop()
+                    if scope['symbol'] is not None:
+                        scope['symbol']['end_line'] = line_of(i)
+                    paren_depth = scope['paren_depth']
+            elif token == ';' and pending is not None and pending[2] == paren_depth:
+                # 抽象方法、重载签名等没有定义体
+                pending = None
+            i += 1
+            continue
+
+        if kind != 'name':
+            i += 1
+            continue
+
+        # 类成员：方法与箭头函数属性
+        if scopes and scopes[-1]['kind'] == KIND_CLASS and scopes[-1]['symbol'] is not None \
+                and paren_depth == scopes[-1]['paren_depth']:
+            if new_line(i):
+                j = i
+                while value(j) in _MEMBER_MODIFIERS and (is_name(j + 1) or value(j + 1) in ('*', '#')):
+                    j += 1
+                if value(j) == '#':
+                    j += 1
+                after = j + 1
+                if value(after) in ('?', '!'):
+                    after += 1
+                if is_name(j) and value(j) not in _CONTROL_KEYWORDS:
+                    if value(after) in ('(', '<'):
+                        paren = matching(after, '<', '>') + 1 if value(after) == '<' else after
+                        symbol = add(j, KIND_METHOD, signature_start=i,
+                                     signature_end=matching(paren, '(', ')') + 1)
+                        expect_body(symbol)
+                        i = after
+                        continue
+                    if value(after) == '=':
+                        is_function, body = function_after(after + 1)
+                        if is_function:
+                            symbol = add(j, KIND_METHOD, signature_start=i, signature_end=body)
+                            expect_function_body(symbol, body)
+                        i = after + 1
+                        continue
+            i += 1
+            continue
+
+        if value(i - 1) == '.':
+            i += 1
+            continue
+
+        if token == 'class':
+            start = statement_start(i)
+            body = i + 1
+            while body < len(tokens) and value(body) != '{':
+                body += 1
+            if is_name(i + 1) and value(i + 1) not in ('extends', 'implements'):
+                symbol = add(i + 1, KIND_CLASS, is_exported(i), start, body)
+                expect_body(symbol, KIND_CLASS)
+                i += 2
+            else:
+                if pending is None:
+                    expect_body(None, KIND_CLASS)
+                i += 1
+            continue
+
+        if token == 'function':
+            j = i + 2 if value(i + 1) == '*' else i + 1
+            if is_name(j):
+                paren = matching(j + 1, '<', '>') + 1 if value(j + 1) == '<' else j + 1
+                symbol = add(j, KIND_FUNCTION, is_exported(i), statement_start(i),
+                             matching(paren, '(', ')') + 1)
+                expect_body(symbol)
+            elif pending is None:
+                # 匿名函数表达式；赋值给变量时定义体已由变量声明登记
+                expect_body(None)
+            i = j + 1
+            continue
+
+        if token in ('interface', 'enum') and is_name(i + 1) and value(i + 2) in ('{', '<', 'extends'):
+            symbol = add(i + 1, KIND_INTERFACE if token == 'interface' else KIND_ENUM, is_exported(i),
+                         statement_start(i), i + 2)
+            expect_body(symbol)
+            i += 2
+            continue
+
+        if token == 'type' and is_name(i + 1) and value(i + 2) in ('=', '<') and new_line(statement_start(i)):
+            add(i + 1, KIND_TYPE, is_exported(i))
+            i += 2
+            continue
+
+        if token in ('const', 'let', 'var') and is_name(i + 1) and value(i + 1) != 'enum':
+            j = i + 2
+            if value(j) == ':':
+                # 变量类型注解
+                while j < len(tokens) and value(j) not in ('=', ';'):
+                    j += 1
+            if value(j) != '=':
+                i = j
+                continue
+            exported = is_exported(i)
+            if value(j + 1) == 'class':
+                symbol = add(i + 1, KIND_CLASS, exported)
+                expect_body(symbol, KIND_CLASS)
+                i = j + 2
+                continue
+            is_function, body = function_after(j + 1)
+            if is_function:
+                symbol = add(i + 1, KIND_FUNCTION, exported, statement_start(i), body)
+                expect_function_body(symbol, body)
+            elif exported:
+                add(i + 1, KIND_VARIABLE, exported)
+            i = j + 1
+            continue
+
+        if token == 'export' and not scopes:
+            j = i + 2 if value(i + 1) == 'type' and value(i + 2) == '{' else i + 1
+            if value(j) == '{':
+                # export { a, b as c } [from '...']
+                end = matching(j, '{', '}')
+                k = j + 1
+                while k < end:
+                    if is_name(k) and value(k) != 'type':
+                        alias = value(k + 2) if value(k + 1) == 'as' and is_name(k + 2) else value(k)
+                        exported_names.append((value(k), alias, k))
+                        k += 3 if value(k + 1) == 'as' else 1
+                    else:
+                        k += 1
+                i = end + 1
+                continue
+            if value(i + 1) == 'default' and is_name(i + 2) and value(i + 2) not in (
+                    'function', 'class', 'async', 'abstract', 'interface', 'new') \
+                    and value(i + 3) not in ('(', '.', '=>', '[', '`'):
+                # export default Name
+                exported_names.append((value(i + 2), 'default', i + 2))
+                i += 3
+                continue
+
+        # CommonJS：module.exports = X / module.exports = { a, b } / exports.name = ...
+        if token == 'module' and value(i + 1) == '.' and value(i + 2) == 'exports' \
+                and value(i + 3) == '=' and not scopes:
+            if is_name(i + 4) and value(i + 5) != '(':
+                exported_names.append((value(i + 4), value(i + 4), i + 4))
+            elif value(i + 4) == '{':
+                end = matching(i + 4, '{', '}')
+                depth = 0
+                for k in range(i + 5, end):
+                    if value(k) in ('{', '(', '['):
+                        depth += 1
+                    elif value(k) in ('}', ')', ']'):
+                        depth -= 1
+                    elif depth == 0 and is_name(k) and value(k - 1) in ('{', ','):
+                        exported_names.append((value(k), value(k), k))
+            i += 4
+            continue
+        if token == 'exports' and value(i + 1) == '.' and is_name(i + 2) and value(i + 3) == '=' and not scopes:
+            is_function, body = function_after(i + 4)
+            symbol = add(i + 2, KIND_FUNCTION if is_function else KIND_EXPORT, True)
+            if is_function:
+                expect_function_body(symbol, body)
+            i += 4
+            continue
+
+        i += 1
+
+    for local, alias, index in exported_names:
+        symbol = top_level.get(local)
+        if symbol is not None and alias in (local, 'default'):
+            symbol['exported'] = True
+        else:
+            # 重新导出或以别名导出，记录为导出符号，签名为原名称
+            symbols.append(_symbol(alias, KIND_EXPORT, None, line_of(index), line_of(index),
+                                   column_of(index), True, local if alias != local else None))
+
+    symbols.sort(key=lambda symbol: (symbol['line'], symbol['column']))
+    return symbols
+
+
+def extract_symbols(text: str, extension: str) -> List[Dict]:
+    """按扩展名选择提取方式"""
+    if extension in PYTHON_EXTENSIONS:
+        return extract_python_symbols(text)
+    if extension in SCRIPT_EXTENSIONS:
+        return extract_script_symbols(text)
+    return []
+
+
+def extract_file_batch(storage, files: List[Tuple[str, str]]) -> List[Tuple[str, List[Dict]]]:
+    """
+    进程池任务：读取一批文件并提取符号
+
+    Args:
+        storage: 项目存储（ProjectStorage）
+        files: (相对路径, 扩展名)列表
+
+    Returns:
+        (相对路径, 符号列表)列表
+    """
+    results = []
+    for relative_path, extension in files:
+        try:
+            data = storage.read(relative_path)
+        except (KeyError, OSError) as e:
+            logger.warning(f"读取文件失败: {relative_path}, 错误: {e}")
+            results.append((relative_path, []))
+            continue
+        text = detect_encoding(data)[1]
+        try:
+            symbols = extract_symbols(text, extension) if text is not None else []
+        except (RecursionError, ValueError) as e:
+            logger.warning(f"提取符号失败: {relative_path}, 错误: {e}")
+            symbols = []
+        results.append((relative_path, symbols))
+    return results
+
+
+class SymbolIndex:
+    """
+    项目符号索引（SQLite）：记录Python与JS/TS源码中的类、函数、方法、接口、类型和导出及其行范围，
+    用于跳转到定义、符号搜索和文件大纲。与项目索引同步时只重新提取内容哈希变化的文件，
+    文件较多时在进程池中并行提取。
+    """
+
+    def __init__(self, db_path: str):
+        """
+        初始化符号索引
+
+        Args:
+            db_path: 索引数据库路径
+        """
+        self.db_path = db_path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        Path(os.path.dirname(self.db_path)).mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def version(self) -> Optional[str]:
+        """已同步的项目索引版本"""
+        if not self.exists():
+            return None
+        try:
+            with closing(self._connect()) as conn:
+                meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        except sqlite3.Error:
+            return None
+        if meta.get('schema_version') != SCHEMA_VERSION:
+            return None
+        return meta.get('version')
+
+    def sync(self, version: str, storage, files: List[Dict]) -> int:
+        """
+        与项目索引的代码文件列表同步：提取新增或内容变化的文件，删除已不存在的文件
+
+        Args:
+            version: 项目索引版本
+            storage: 项目存储（ProjectStorage）
+            files: 代码文件列表（包含path、extension、size、content_hash）
+
+        Returns:
+            重新提取的文件数
+        """
+        with _get_sync_lock(self.db_path):
+            if self.version() == version:
+                return 0
+            started = time.time()
+            if self.exists() and self.version() is None:
+                # 版本不符的旧索引直接重建
+                os.remove(self.db_path)
+
+            with closing(self._connect()) as conn:
+                conn.executescript(SCHEMA)
+                known = dict(conn.execute("SELECT path, content_hash FROM files").fetchall())
+
+            current = {}
+            changed = []
+            for file_info in files:
+                if file_info['extension'] not in SYMBOL_EXTENSIONS or file_info['size'] > MAX_SYMBOL_FILE_SIZE:
+                    continue
+                current[file_info['path']] = file_info['content_hash']
+                if known.get(file_info['path']) != file_info['content_hash'] or file_info['path'] not in known:
+                    changed.append((file_info['path'], file_info['extension']))
+            removed = [path for path in known if path not in current]
+
+            extracted = self._extract(storage, changed)
+
+            with closing(self._connect()) as conn:
+                conn.executemany("DELETE FROM symbols WHERE path = ?",
+                                 [(path,) for path in removed] + [(path,) for path, _ in changed])
+                conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+                for path, symbols in extracted:
+                    conn.executemany(
+                        "INSERT INTO symbols (path, name, name_lower, qualified_name, kind, parent, "
+                        "line, end_line, column, exported, signature) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(path, s['name'], s['name'].lower(), s['qualified_name'], s['kind'], s['parent'],
+                          s['line'], s['end_line'], s['column'], int(s['exported']), s['signature'])
+                         for s in symbols]
+                    )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO files (path, content_hash, symbol_count) VALUES (?, ?, ?)",
+                        (path, current[path], len(symbols))
+                    )
+                conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                    ('schema_version', SCHEMA_VERSION),
+                    ('version', version)
+                ])
+                conn.commit()
+
+            logger.info(f"符号索引同步完成 {storage.location}: 提取 {len(changed)} 个文件，删除 {len(removed)} 个文件，"
+                        f"耗时 {time.time() - started:.2f}s")
+            return len(changed)
+
+    def _extract(self, storage, files: List[Tuple[str, str]]) -> List[Tuple[str, List[Dict]]]:
+        """提取一批文件的符号，文件较多时使用进程池"""
+        if len(files) < PARALLEL_THRESHOLD:
+            return extract_file_batch(storage, files)
+
+        chunks = [files[i:i + EXTRACT_CHUNK_SIZE] for i in range(0, len(files), EXTRACT_CHUNK_SIZE)]
+        results = []
+        for batch in get_extract_pool().map(extract_file_batch, [storage] * len(chunks), chunks):
+            results.extend(batch)
+        return results
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        symbol = dict(row)
+        symbol.pop('id', None)
+        symbol.pop('name_lower', None)
+        symbol['exported'] = bool(symbol['exported'])
+        return symbol
+
+    def definitions(self, name: str, path: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """
+        查找符号定义：优先同一文件，其次导出的顶层定义
+
+        Args:
+            name: 符号名，或Class.method形式的限定名
+            path: 发起跳转的文件
+            limit: 返回的最大数量
+
+        Returns:
+            定义列表
+        """
+        column = 'qualified_name' if '.' in name else 'name'
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT * FROM symbols WHERE {column} = ? "
+                "ORDER BY path = ? DESC, exported DESC, parent IS NULL DESC, "
+                "kind = 'export' ASC, path, line LIMIT ?",
+                (name, path or '', limit)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def search(self, query: str, kind: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """
+        按名称搜索符号（不区分大小写），完全匹配在前，其次前缀匹配、子串匹配
+
+        Args:
+            query: 搜索关键词
+            kind: 符号类型过滤
+            limit: 返回的最大数量
+
+        Returns:
+            符号列表
+        """
+        query = query.lower()
+        sql = "SELECT * FROM symbols WHERE instr(name_lower, ?) > 0"
+        params: List = [query]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        sql += (" ORDER BY CASE WHEN name_lower = ? THEN 0 WHEN substr(name_lower, 1, ?) = ? THEN 1 "
+                "ELSE 2 END, exported DESC, length(name), path, line LIMIT ?")
+        params.extend([query, len(query), query, limit])
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def outline(self, path: str) -> List[Dict]:
+        """
+        获取文件大纲：按行号排列的嵌套符号树
+
+        Args:
+            path: 文件相对路径
+
+        Returns:
+            顶层符号列表，子符号位于children中
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT * FROM symbols WHERE path = ? ORDER BY line, column",
+                                (path,)).fetchall()
+
+        nodes = {}
+        outline = []
+        for row in rows:
+            node = self._to_dict(row)
+            node['children'] = []
+            parent = nodes.get(node['parent']) if node['parent'] else None
+            (parent['children'] if parent else outline).append(node)
+            nodes.setdefault(node['qualified_name'], node)
+        return outline
+
+    def has_file(self, path: str) -> bool:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM files WHERE path = ?", (path,)).fetchone() is not None
+
+    def delete(self):
+        """删除索引文件"""
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
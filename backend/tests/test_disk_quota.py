@@ -0,0 +1,180 @@
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from disk_quota import (
+    AREA_DOCS, AREA_EXTRACTED, AREA_TEMP, AREA_UPLOADS, QUOTA_TOTAL, AccessTracker, DiskQuotaManager
+)
+
+HOUR = 3600
+
+
+def _write(path, size, age=0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+def _manager(tmp_path, quotas, evict=None, is_busy=lambda key: False, **kwargs):
+    folders = {area: os.path.join(tmp_path, area) for area in (AREA_TEMP, AREA_EXTRACTED, AREA_UPLOADS, AREA_DOCS)}
+    for folder in folders.values():
+        os.makedirs(folder, exist_ok=True)
+    evicted = []
+
+    def default_evict(area, key):
+        evicted.append((area, key))
+        if area == AREA_UPLOADS:
+            os.remove(os.path.join(folders[area], f"{key}.zip"))
+        else:
+            shutil.rmtree(os.path.join(folders[area], key))
+        return True
+
+    manager = DiskQuotaManager(folders, quotas, AccessTracker(os.path.join(tmp_path, 'access.sqlite')),
+                               evict or default_evict, is_busy, min_idle=HOUR, temp_max_age=HOUR, **kwargs)
+    return manager, folders, evicted
+
+
+def test_evicts_least_recently_used_until_under_quota(tmp_path):
+    manager, folders, evicted = _manager(tmp_path, {AREA_UPLOADS: 250})
+    for key, age in (('new', 2 * HOUR), ('old', 5 * HOUR), ('older', 9 * HOUR)):
+        _write(os.path.join(folders[AREA_UPLOADS], f"{key}.zip"), 100, age)
+
+    result = manager.run_once()
+    assert evicted == [(AREA_UPLOADS, 'older')]
+    assert result['usage_before'][AREA_UPLOADS] == 300
+    assert result['usage_after'][AREA_UPLOADS] == 200
+
+    # 访问记录比文件修改时间更能反映冷热
+    manager.tracker.touch('old')
+    manager.quotas[AREA_UPLOADS] = 150
+    manager.run_once()
+    assert evicted[-1] == (AREA_UPLOADS, 'new')
+
+
+def test_skips_busy_and_recently_used_projects(tmp_path):
+    manager, folders, evicted = _manager(tmp_path, {QUOTA_TOTAL: 10}, is_busy=lambda key: key == 'busy')
+    _write(os.path.join(folders[AREA_EXTRACTED], 'busy', 'a.py'), 100, 5 * HOUR)
+    _write(os.path.join(folders[AREA_EXTRACTED], 'recent', 'a.py'), 100)
+    _write(os.path.join(folders[AREA_EXTRACTED], 'idle', 'a.py'), 100, 5 * HOUR)
+    for key in ('busy', 'idle'):
+        old = time.time() - 5 * HOUR
+        os.utime(os.path.join(folders[AREA_EXTRACTED], key), (old, old))
+
+    result = manager.run_once()
+    assert evicted == [(AREA_EXTRACTED, 'idle')]
+    # 仍超出配额，但剩余的项目都不能清理
+    assert result['usage_after'][AREA_EXTRACTED] == 200
+
+
+def test_refused_eviction_keeps_usage(tmp_path):
+    manager, folders, _ = _manager(tmp_path, {AREA_UPLOADS: 10}, evict=lambda area, key: False)
+    _write(os.path.join(folders[AREA_UPLOADS], 'only.zip'), 100, 5 * HOUR)
+
+    result = manager.run_once()
+    assert result['evicted'] == 0
+    assert result['usage_after'][AREA_UPLOADS] == 100
+    assert os.path.exists(os.path.join(folders[AREA_UPLOADS], 'only.zip'))
+
+
+def test_temp_groups_removed_together_when_expired(tmp_path):
+    manager, folders, evicted = _manager(tmp_path, {AREA_TEMP: 1})
+    _write(os.path.join(folders[AREA_TEMP], 'sessions', 'stale.json'), 10, 5 * HOUR)
+    _write(os.path.join(folders[AREA_TEMP], 'sessions', 'stale.part'), 100, 5 * HOUR)
+    _write(os.path.join(folders[AREA_TEMP], 'sessions', 'active.json'), 10, 5 * HOUR)
+    _write(os.path.join(folders[AREA_TEMP], 'sessions', 'active.part'), 100)
+
+    result = manager.run_once()
+    assert [item['key'] for item in result['evictions']] == [os.path.join('sessions', 'stale')]
+    assert result['freed_bytes'] == 110
+    assert sorted(os.listdir(os.path.join(folders[AREA_TEMP], 'sessions'))) == ['active.json', 'active.part']
+    # 临时文件不经过项目的清理回调
+    assert evicted == []
+
+
+def test_docs_only_evicted_when_enabled(tmp_path):
+    manager, folders, evicted = _manager(tmp_path, {AREA_DOCS: 10})
+    _write(os.path.join(folders[AREA_DOCS], 'p', 'a.md'), 100, 5 * HOUR)
+    old = time.time() - 5 * HOUR
+    os.utime(os.path.join(folders[AREA_DOCS], 'p'), (old, old))
+
+    manager.run_once()
+    assert evicted == []
+    manager.evict_docs = True
+    manager.run_once()
+    assert evicted == [(AREA_DOCS, 'p')]
+
+
+@pytest.fixture
+def app_folders(tmp_path, monkeypatch):
+    import app as app_module
+    for key in ('UPLOAD_FOLDER', 'EXTRACTED_FOLDER', 'DOCS_FOLDER', 'META_FOLDER'):
+        folder = os.path.join(tmp_path, key.lower())
+        os.makedirs(folder)
+        monkeypatch.setitem(app_module.app.config, key, folder)
+    return app_module
+
+
+def _project(app_module, storage_id, zip_file=True, extracted=True):
+    if zip_file:
+        _write(app_module.get_zip_path(storage_id), 10)
+    if extracted:
+        _write(os.path.join(app_module.app.config['EXTRACTED_FOLDER'], storage_id, 'a.py'), 10)
+
+
+def test_evict_project_area_keeps_last_readable_copy(app_folders):
+    app_module = app_folders
+    extracted = os.path.join(app_module.app.config['EXTRACTED_FOLDER'], 'p')
+
+    _project(app_module, 'p')
+    assert app_module.evict_project_area(AREA_EXTRACTED, 'p')
+    assert not os.path.exists(extracted)
+    # 压缩包已是唯一的副本
+    assert not app_module.evict_project_area(AREA_UPLOADS, 'p')
+    assert os.path.exists(app_module.get_zip_path('p'))
+
+    _project(app_module, 'q')
+    assert app_module.evict_project_area(AREA_UPLOADS, 'q')
+    assert not app_module.evict_project_area(AREA_EXTRACTED, 'q')
+
+    # 增量更新过的项目只有解压目录
+    _project(app_module, 'r', zip_file=False)
+    assert not app_module.evict_project_area(AREA_EXTRACTED, 'r')
+    assert not app_module.evict_project_area(AREA_TEMP, 'r')
+
+
+def test_evict_project_area_skips_locked_project(app_folders):
+    app_module = app_folders
+    _project(app_module, 'busy')
+    lock = app_module.get_extract_lock('busy')
+    with lock:
+        assert app_module.is_project_busy('busy')
+        assert not app_module.evict_project_area(AREA_EXTRACTED, 'busy')
+    assert not lock.locked()
+    assert app_module.evict_project_area(AREA_EXTRACTED, 'busy')
+
+
+def test_concurrent_runs_are_serialized(tmp_path):
+    calls = []
+    gate = threading.Event()
+
+    def evict(area, key):
+        calls.append(key)
+        gate.wait(1)
+        return False
+
+    manager, folders, _ = _manager(tmp_path, {AREA_UPLOADS: 10}, evict=evict)
+    _write(os.path.join(folders[AREA_UPLOADS], 'a.zip'), 100, 5 * HOUR)
+    threads = [threading.Thread(target=manager.run_once) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    assert calls == ['a']
+    gate.set()
+    for thread in threads:
+        thread.join()
+    assert calls == ['a', 'a']
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from doc_catalog import DocCatalog
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return DocCatalog(os.path.join(tmp_path, 'meta', 'docs.sqlite'))
+
+
+def _doc(doc_path, source_path, **fields):
+    return {'doc_path': doc_path, 'source_path': source_path, 'size': 1, **fields}
+
+
+def test_record_replaces_previous_doc(catalog):
+    assert catalog.record('p', _doc('old.md', 'a.py', title='旧标题')) is None
+
+    previous = catalog.record('p', _doc('new.md', 'a.py', title='新标题', total_tokens=30))
+    assert previous['doc_path'] == 'old.md'
+    assert [doc['doc_path'] for doc in catalog.list_docs('p')] == ['new.md']
+    assert catalog.get('p', 'a.py')['total_tokens'] == 30
+
+    # 文档路径不变时同样替换，返回的旧记录供调用方比较
+    assert catalog.record('p', _doc('new.md', 'a.py'))['title'] == '新标题'
+    assert catalog.count('p') == 1
+
+
+def test_record_keeps_projects_apart(catalog):
+    catalog.record('p', _doc('a.md', 'a.py'))
+    catalog.record('q', _doc('a.md', 'a.py'))
+    assert catalog.record('q', _doc('b.md', 'a.py'))['doc_path'] == 'a.md'
+    assert catalog.get('p', 'a.py')['doc_path'] == 'a.md'
+    assert catalog.get('p', 'a.py')['created_at']
+
+
+def test_remove_sources_handles_directory_prefixes(catalog):
+    sources = ['app.py', os.path.join('pkg', 'a.py'), os.path.join('pkg', 'sub', 'b.py'),
+               os.path.join('pkg2', 'c.py'), 'pkg.py']
+    for i, source in enumerate(sources):
+        catalog.record('p', _doc(f"{i}.md", source))
+
+    removed = catalog.remove_sources('p', ['pkg', 'missing.py'])
+    assert sorted(doc['source_path'] for doc in removed) == sorted(sources[1:3])
+    # 同名前缀的兄弟目录与文件不受影响
+    assert sorted(doc['source_path'] for doc in catalog.list_docs('p')) == sorted(
+        ['app.py', os.path.join('pkg2', 'c.py'), 'pkg.py']
+    )
+    assert [doc['source_path'] for doc in catalog.remove_sources('p', ['app.py'])] == ['app.py']
+
+
+def test_import_docs_runs_once(catalog):
+    catalog.record('p', _doc('current.md', 'a.py'))
+    assert not catalog.is_imported('p')
+
+    catalog.import_docs('p', [
+        _doc('legacy_a.md', 'a.py'),
+        _doc('legacy_b.md', 'b.py'),
+        _doc('orphan.md', None),
+        _doc('current.md', 'other.py'),
+    ])
+    assert catalog.is_imported('p')
+    docs = {doc['doc_path']: doc['source_path'] for doc in catalog.list_docs('p')}
+    # 已登记的文档不覆盖；源文件已有文档的旧文档不再对应源文件
+    assert docs == {'current.md': 'a.py', 'legacy_a.md': None, 'legacy_b.md': 'b.py', 'orphan.md': None}
+
+    catalog.import_docs('p', [_doc('late.md', 'c.py')])
+    assert catalog.count('p') == 4
+
+
+def test_copy_and_delete_project(catalog):
+    catalog.record('p', _doc('a.md', 'a.py'))
+    catalog.import_docs('p', [])
+    catalog.copy('p', 'q')
+    assert catalog.get('q', 'a.py')['doc_path'] == 'a.md'
+    assert catalog.is_imported('q')
+
+    catalog.delete_project('p')
+    assert catalog.count('p') == 0
+    assert catalog.count('q') == 1
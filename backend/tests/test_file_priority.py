@@ -0,0 +1,59 @@
+import os
+
+from file_priority import rank_code_files
+
+BODY = 'x = 1\n' * 100
+
+
+def _files(root, contents):
+    code_files = []
+    for relative_path, content in contents.items():
+        path = os.path.join(root, *relative_path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        code_files.append({'path': path, 'relative_path': relative_path.replace('/', os.sep)})
+    return code_files
+
+
+def _order(ranked):
+    return [item['relative_path'].replace(os.sep, '/') for item in ranked]
+
+
+def test_rank_by_fan_in_entry_points_and_location(tmp_path):
+    code_files = _files(str(tmp_path), {
+        'tests/test_core.py': BODY,
+        'pkg/deep/helpers.py': BODY,
+        'pkg/__init__.py': '',
+        'pkg/core.py': BODY,
+        'main.py': BODY,
+    })
+    ranked = rank_code_files(code_files, fan_in={'pkg/core.py': 6})
+
+    assert _order(ranked) == ['pkg/core.py', 'main.py', 'pkg/deep/helpers.py', 'tests/test_core.py', 'pkg/__init__.py']
+    assert ranked[0]['fan_in'] == 6
+    assert [item['priority'] for item in ranked] == sorted((item['priority'] for item in ranked), reverse=True)
+
+
+def test_fan_in_scanned_from_imports(tmp_path):
+    code_files = _files(str(tmp_path), {
+        'a.py': 'from pkg import util\n' + BODY,
+        'b.py': 'import pkg.util\n' + BODY,
+        'pkg/util.py': BODY,
+    })
+    ranked = rank_code_files(code_files)
+
+    fan_in = {item['relative_path'].replace(os.sep, '/'): item['fan_in'] for item in ranked}
+    assert fan_in == {'a.py': 0, 'b.py': 0, 'pkg/util.py': 2}
+    assert _order(ranked)[0] == 'pkg/util.py'
+
+
+def test_equal_priority_ordered_by_path(tmp_path):
+    code_files = _files(str(tmp_path), {'b.py': BODY, 'c.py': BODY, 'a.py': BODY})
+    assert _order(rank_code_files(code_files, fan_in={})) == ['a.py', 'b.py', 'c.py']
+
+
+def test_missing_file_counts_as_empty(tmp_path):
+    code_files = _files(str(tmp_path), {'gone.py': BODY, 'kept.py': BODY})
+    os.remove(code_files[0]['path'])
+    assert _order(rank_code_files(code_files, fan_in={})) == ['kept.py', 'gone.py']
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from file_triage import (
+    REASON_GENERATED_MARKER, REASON_MINIFIED, detect_generated_content, triage_files, triage_project
+)
+
+HAND_WRITTEN = ''.join(f"def handler_{i}(value):\n    return value + {i}\n\n" for i in range(40))
+
+
+def _write(root, relative_path, content='x = 1\n'):
+    path = os.path.join(root, *relative_path.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def test_triage_files_matches_full_triage(tmp_path):
+    root = str(tmp_path)
+    _write(root, '.gitignore', 'gen/\n*.tmp.py\n')
+    _write(root, 'a.py')
+    _write(root, 'gen/b.py')
+    _write(root, 'node_modules/dep/c.py')
+    _write(root, 'pkg/.gitignore', '/local.py\n')
+    _write(root, 'pkg/local.py')
+    _write(root, 'pkg/ok.py')
+    _write(root, 'pkg/x.tmp.py')
+    _write(root, 'pkg/bundle.min.js', 'x')
+    paths = ['a.py', 'gen/b.py', 'node_modules/dep/c.py', 'pkg/local.py', 'pkg/ok.py',
+             'pkg/x.tmp.py', 'pkg/bundle.min.js', 'missing.py']
+
+    code_files, skipped_files = triage_files(root, [path.replace('/', os.sep) for path in paths])
+    full_code, full_skipped, _ = triage_project(root, {'.py', '.js'})
+
+    assert [f['relative_path'] for f in code_files] == [f['relative_path'] for f in full_code]
+    assert sorted(map(str, skipped_files)) == sorted(map(str, full_skipped))
+    assert code_files[0]['path'] == os.path.join(root, 'a.py')
+
+
+@pytest.mark.parametrize('header', [
+    '// Code generated by protoc-gen-go. DO NOT EDIT.',
+    '# @generated by tool',
+    '/* This file was generated by swagger-codegen */',
+    '# Autogenerated from schema.yaml',
+    '# Generated by the protocol buffer compiler.  DO NOT EDIT!',
+])
+def test_generator_markers(header):
+    assert detect_generated_content(header + '\n' + HAND_WRITTEN) == REASON_GENERATED_MARKER
+
+
+@pytest.mark.parametrize('header', [
+    '# Settings module. Do not edit values here, override them in local.py',
+    '// TODO: do not edit this list by hand',
+    '# Helpers for generated reports',
+])
+def test_hand_written_comments_are_not_markers(header):
+    assert detect_generated_content(header + '\n' + HAND_WRITTEN) is None
+
+
+def test_single_long_constant_is_not_minified():
+    path = ' '.join(f"L{i} {i * 2}" for i in range(600))
+    sample = HAND_WRITTEN + f"ICON_PATH = 'M0 0 {path} Z'\n" + HAND_WRITTEN
+    assert max(len(line) for line in sample.splitlines()) > 5000
+    assert detect_generated_content(sample) is None
+
+
+def test_minified_code():
+    code = ';'.join(f"var a{i}=function(b){{return b+{i}}}" for i in range(300))
+    assert detect_generated_content(code) == REASON_MINIFIED
+    # 带许可证头部的压缩文件
+    assert detect_generated_content('/*! lib v1.0 | MIT */\n' + code + '\n') == REASON_MINIFIED
+    # 多行超长代码，平均行长未超出阈值
+    spaced = ' '.join(f"var a{i} = function (b) {{ return b + {i} }};" for i in range(40))
+    lines = [spaced[:1200]] + ['x = 1'] * 5
+    assert detect_generated_content('\n'.join(lines * 3)) == REASON_MINIFIED
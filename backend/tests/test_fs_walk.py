@@ -0,0 +1,138 @@
+import os
+
+from fs_walk import IgnoreSpec, iter_tree_files, scan_tree
+
+
+def _spec(*lines):
+    return IgnoreSpec([line + '\n' for line in lines])
+
+
+def test_blank_lines_and_comments_are_skipped():
+    spec = _spec('', '# build', '   ', '*.log')
+    assert len(spec.rules) == 1
+    assert spec.match('build', True) is None
+    assert spec.match('debug.log', False) is True
+
+
+def test_unanchored_pattern_matches_name_at_any_depth():
+    spec = _spec('*.pyc')
+    assert spec.match('a.pyc', False) is True
+    assert spec.match('pkg/sub/a.pyc', False) is True
+    assert spec.match('a.py', False) is None
+
+
+def test_pattern_with_slash_is_anchored():
+    spec = _spec('/build', 'docs/*.md')
+    assert spec.match('build', True) is True
+    assert spec.match('src/build', True) is None
+    assert spec.match('docs/a.md', False) is True
+    assert spec.match('docs/sub/a.md', False) is None
+    assert spec.match('src/docs/a.md', False) is None
+
+
+def test_trailing_slash_only_matches_directories():
+    spec = _spec('out/')
+    assert spec.match('out', True) is True
+    assert spec.match('out', False) is None
+
+
+def test_double_star():
+    spec = _spec('**/generated', 'logs/**')
+    assert spec.match('generated', True) is True
+    assert spec.match('a/b/generated', True) is True
+    assert spec.match('logs/2024/app.txt', False) is True
+    assert spec.match('app/logs', True) is None
+
+
+def test_wildcards_and_character_classes():
+    spec = _spec('file?.txt', 'v[0-9].js', 'tmp[!a].txt')
+    assert spec.match('file1.txt', False) is True
+    assert spec.match('file12.txt', False) is None
+    assert spec.match('v3.js', False) is True
+    assert spec.match('vx.js', False) is None
+    assert spec.match('tmpb.txt', False) is True
+    assert spec.match('tmpa.txt', False) is None
+
+
+def test_negation_last_rule_wins():
+    spec = _spec('*.log', '!keep.log')
+    assert spec.match('debug.log', False) is True
+    assert spec.match('keep.log', False) is False
+
+    spec = _spec('!keep.log', '*.log')
+    assert spec.match('keep.log', False) is True
+
+
+def test_escaped_and_trailing_spaces():
+    spec = _spec('\\#notes', '\\!bang', 'trailing   ', 'space\\ ')
+    assert spec.match('#notes', False) is True
+    assert spec.match('!bang', False) is True
+    assert spec.match('trailing', False) is True
+    assert spec.match('space ', False) is True
+
+
+def test_malformed_patterns_are_dropped():
+    spec = _spec('[z-a]', '*.log', '[b-a]*.txt')
+    assert len(spec.rules) == 1
+    assert spec.match('debug.log', False) is True
+    assert spec.match('[z-a]', False) is None
+
+
+def test_from_file(tmp_path):
+    assert IgnoreSpec.from_file(os.path.join(tmp_path, 'missing')) is None
+
+    ignore_path = os.path.join(tmp_path, '.gitignore')
+    with open(ignore_path, 'w', encoding='utf-8') as f:
+        f.write('# only comments\n\n')
+    assert IgnoreSpec.from_file(ignore_path) is None
+
+    with open(ignore_path, 'w', encoding='utf-8') as f:
+        f.write('[z-a]\n*.tmp\n')
+    assert len(IgnoreSpec.from_file(ignore_path).rules) == 1
+
+
+def _write(root, relative_path, content=''):
+    path = os.path.join(root, *relative_path.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def test_scan_tree_applies_nested_ignore_files(tmp_path):
+    root = str(tmp_path)
+    _write(root, '.gitignore', '[z-a]\n*.log\nbuild/\n')
+    _write(root, 'main.py')
+    _write(root, 'debug.log')
+    _write(root, 'build/out.py')
+    _write(root, 'pkg/.gitignore', '!keep.log\n/local.py\n')
+    _write(root, 'pkg/keep.log')
+    _write(root, 'pkg/drop.log')
+    _write(root, 'pkg/local.py')
+    _write(root, 'pkg/sub/local.py')
+    _write(root, 'node_modules/dep.js')
+
+    pruned = []
+    tree = scan_tree(root, on_pruned=lambda path, is_dir: pruned.append(path))
+
+    assert sorted(entry.relative_path for entry in tree.iter_files()) == [
+        'main.py', 'pkg/keep.log', 'pkg/sub/local.py'
+    ]
+    assert {'debug.log', 'build', 'pkg/drop.log', 'pkg/local.py', 'node_modules'} <= set(pruned)
+
+
+def test_iter_tree_files_matches_scan_tree(tmp_path):
+    root = str(tmp_path)
+    _write(root, '.gitignore', '*.log\nbuild/\n')
+    _write(root, 'b.py')
+    _write(root, 'a.py')
+    _write(root, 'skip.log')
+    _write(root, 'build/out.py')
+    _write(root, 'pkg/.gitignore', '/local.py\n')
+    _write(root, 'pkg/local.py')
+    _write(root, 'pkg/sub/main.py')
+
+    lazy = [entry.relative_path for entry in iter_tree_files(root, {'.py'})]
+    full = [entry.relative_path for entry in scan_tree(root, {'.py'}).iter_files()]
+    assert sorted(lazy) == sorted(full) == ['a.py', 'b.py', 'pkg/sub/main.py']
+    # 同一目录中的文件按文件名顺序产出
+    assert lazy[:2] == ['a.py', 'b.py']
@@ -0,0 +1,126 @@
+from fuzzy_finder import PathList, PathListCache, _subsequence_pattern
+
+
+def _path_list(paths, mtimes=None, version='v1'):
+    return PathList(version, [{
+        'path': path,
+        'extension': '.' + path.rsplit('.', 1)[-1].lower(),
+        'size': 1,
+        'mtime': mtimes[i] if mtimes else 100.0
+    } for i, path in enumerate(paths)])
+
+
+PATHS = [
+    'app/app.py',
+    'app/util.py',
+    'src/main.py',
+    'backend/appConfig.py',
+    'src/snapshot.py',
+    'docs/readme.md',
+]
+
+
+def _paths(found):
+    return [result['path'] for result in found['results']]
+
+
+def test_subsequence_pattern_counts_matched_prefix():
+    pattern = _subsequence_pattern('abc')
+    assert pattern.match('xaxbxc').lastindex == 3
+    assert pattern.match('xaxbyy').lastindex == 2
+    assert pattern.match('zzz') is None
+    # 不使用Python 3.11才支持的独占量词
+    assert '*+' not in pattern.pattern
+
+
+def test_subsequence_pattern_escapes_regex_characters():
+    pattern = _subsequence_pattern('a.(')
+    assert pattern.match('a-.-(').lastindex == 3
+    assert pattern.match('abc(').lastindex == 1
+
+
+def test_file_name_match_ranks_first():
+    found = _path_list(PATHS).find('app')
+    paths = _paths(found)
+    # 完整匹配文件名开头的文件排在只在目录中匹配的文件之前
+    assert paths[:2] == ['app/app.py', 'backend/appConfig.py']
+    assert paths.index('app/util.py') > 1
+
+
+def test_each_file_is_returned_once():
+    # app/app.py 同时在文件名与目录中匹配，只保留得分最高的一项，matched按不同文件计数
+    found = _path_list(PATHS).find('app', limit=50)
+    paths = _paths(found)
+    assert len(paths) == len(set(paths))
+    assert found['matched'] == len(paths) == 4
+    assert found['results'][0]['positions'] == [4, 5, 6]
+
+
+def test_query_split_between_directory_and_name():
+    found = _path_list(PATHS).find('apputil')
+    assert _paths(found) == ['app/util.py']
+    assert found['results'][0]['positions'] == [0, 1, 2, 4, 5, 6, 7]
+    assert found['matched'] == 1
+
+
+def test_camel_case_boundaries():
+    found = _path_list(PATHS).find('ac')
+    assert _paths(found) == ['backend/appConfig.py']
+    assert found['results'][0]['positions'] == [8, 11]
+
+
+def test_query_ignores_case_and_whitespace():
+    path_list = _path_list(PATHS)
+    assert _paths(path_list.find('A pp C')) == _paths(path_list.find('appc'))
+
+
+def test_no_match():
+    found = _path_list(PATHS).find('xyz')
+    assert found == {'results': [], 'matched': 0}
+
+
+def test_extension_filter():
+    path_list = _path_list(PATHS)
+    assert _paths(path_list.find('read', extension='.MD')) == ['docs/readme.md']
+    assert path_list.find('app', extension='.md')['matched'] == 0
+
+
+def test_empty_query_returns_most_recent_files():
+    found = _path_list(['a.py', 'b.py', 'c.py'], mtimes=[1.0, 3.0, 2.0]).find('', limit=2)
+    assert _paths(found) == ['b.py', 'c.py']
+    assert found['matched'] == 3
+
+
+def test_single_character_matches_name_start():
+    found = _path_list(PATHS).find('s')
+    assert _paths(found) == ['src/snapshot.py']
+    assert found['results'][0]['positions'] == [4]
+
+
+def test_recent_file_wins_tie():
+    found = _path_list(['a/main.py', 'b/main.py'], mtimes=[1.0, 2.0]).find('main')
+    assert _paths(found) == ['b/main.py', 'a/main.py']
+
+
+def test_windows_separators_are_normalized():
+    assert _paths(_path_list(['pkg\\mod\\file.py']).find('file')) == ['pkg/mod/file.py']
+
+
+def test_cache_reloads_when_version_changes():
+    cache = PathListCache(max_loaded=1)
+    loads = []
+
+    def loader(paths):
+        def load():
+            loads.append(paths)
+            return [{'path': path, 'extension': '.py', 'size': 1, 'mtime': 1.0} for path in paths]
+        return load
+
+    first = cache.get('p', 'v1', loader(['a.py']))
+    assert cache.get('p', 'v1', loader(['b.py'])) is first
+    assert _paths(cache.get('p', 'v2', loader(['b.py'])).find('b')) == ['b.py']
+
+    # 超出数量上限时淘汰最久未使用的项目
+    cache.get('q', 'v1', loader(['c.py']))
+    cache.get('p', 'v2', loader(['d.py']))
+    assert loads == [['a.py'], ['b.py'], ['c.py'], ['d.py']]
@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+
+import pytest
+
+from summarize_jobs import JOB_CANCELLING, JOB_PAUSED, JobCancelled, SummarizeJob, SummarizeJobManager
+from summarize_runs import (
+    RUN_CANCELLED, RUN_INTERRUPTED, STATUS_ERROR, STATUS_SUCCESS, SummarizeRun
+)
+
+FILES = [{'relative_path': name, 'name': name} for name in ('a.py', 'b.py', 'c.py')]
+
+
+class StubLLMClient:
+    """按调用顺序记录提示词，on_call在每次调用时执行（模拟调用过程中用户的操作）"""
+
+    def __init__(self, on_call=None):
+        self.calls = []
+        self.on_call = on_call
+
+    def simple_chat(self, prompt, system_prompt=None, cancel_event=None, usage=None):
+        self.calls.append(prompt)
+        if self.on_call:
+            self.on_call(len(self.calls))
+        return f"summary of {prompt}"
+
+
+def _create_run(tmp_path, files=FILES):
+    return SummarizeRun.create(os.path.join(tmp_path, 'runs'), '/project', 'project',
+                               os.path.join(tmp_path, 'docs'), files)
+
+
+def _summarize(job, llm_client):
+    """与execute_summarize_run相同的派发方式：每次LLM调用前检查暂停与取消"""
+    try:
+        for code_file in job.run.pending_files():
+            job.checkpoint()
+            llm_client.simple_chat(code_file['relative_path'], cancel_event=job.cancel_event)
+            doc_path = os.path.join(job.run.summary_docs_dir, code_file['relative_path'] + '.md')
+            os.makedirs(os.path.dirname(doc_path), exist_ok=True)
+            open(doc_path, 'w').close()
+            job.run.record_result(code_file['relative_path'], {'status': STATUS_SUCCESS, 'doc_path': doc_path})
+    except JobCancelled:
+        job.run.mark_cancelled()
+        return
+    job.run.mark_finished()
+
+
+def _start_checkpoint(job):
+    outcome = {}
+
+    def target():
+        try:
+            job.checkpoint()
+            outcome['result'] = 'continued'
+        except JobCancelled:
+            outcome['result'] = 'cancelled'
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread, outcome
+
+
+def test_pause_blocks_until_unpaused(tmp_path):
+    job = SummarizeJob(_create_run(tmp_path))
+    job.pause()
+    assert job.state == JOB_PAUSED
+
+    thread, outcome = _start_checkpoint(job)
+    thread.join(0.3)
+    assert thread.is_alive()
+
+    job.unpause()
+    thread.join(1)
+    assert outcome == {'result': 'continued'}
+
+
+def test_cancel_wakes_paused_job(tmp_path):
+    job = SummarizeJob(_create_run(tmp_path))
+    job.pause()
+    thread, outcome = _start_checkpoint(job)
+    thread.join(0.1)
+
+    started = time.time()
+    job.cancel()
+    thread.join(1)
+    assert outcome == {'result': 'cancelled'}
+    assert time.time() - started < 1
+    assert job.cancel_event.is_set()
+
+    # 已取消的任务不能再暂停
+    job.pause()
+    assert job.state == JOB_CANCELLING
+
+
+def test_manager_pause_and_cancel_background_job(tmp_path):
+    manager = SummarizeJobManager(max_workers=1)
+    run = _create_run(tmp_path)
+    job = manager.register(run)
+    assert manager.register(run) is None
+
+    first_call = threading.Event()
+
+    def on_call(count):
+        # 第一次调用进行中暂停：该调用完成后不再派发新的调用
+        if count == 1:
+            job.pause()
+            first_call.set()
+
+    llm_client = StubLLMClient(on_call)
+    future = manager.submit(job, lambda job: _summarize(job, llm_client))
+    assert first_call.wait(1)
+    time.sleep(0.3)
+    assert llm_client.calls == ['a.py']
+    assert manager.list_jobs()[0]['state'] == JOB_PAUSED
+
+    job.cancel()
+    future.result(timeout=1)
+    assert manager.get(run.run_id) is None
+
+    loaded = SummarizeRun.load(run.runs_dir, run.run_id)
+    assert loaded.status == RUN_CANCELLED
+    assert list(loaded.results) == ['a.py']
+    assert [f['relative_path'] for f in loaded.pending_files()] == ['b.py', 'c.py']
+
+
+def test_load_replays_partial_results(tmp_path):
+    run = _create_run(tmp_path)
+    doc_path = os.path.join(tmp_path, 'a.md')
+    open(doc_path, 'w').close()
+    run.record_result('a.py', {'status': STATUS_ERROR, 'error': 'timeout'})
+    run.record_result('a.py', {'status': STATUS_SUCCESS, 'doc_path': doc_path})
+    run.record_result('b.py', {'status': STATUS_ERROR, 'error': 'empty'})
+    run.mark_cancelled()
+    # 进程在写入过程中退出时留下的不完整记录
+    with open(run.checkpoint_path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "file", "relative_pa')
+
+    loaded = SummarizeRun.load(run.runs_dir, run.run_id)
+    assert loaded.status == RUN_CANCELLED
+    assert loaded.results['a.py']['status'] == STATUS_SUCCESS
+    assert loaded.to_dict()['success_count'] == 1
+    assert loaded.to_dict()['error_count'] == 1
+    assert [f['relative_path'] for f in loaded.pending_files()] == ['b.py', 'c.py']
+    assert [f['relative_path'] for f in loaded.pending_files(retry_failed=False)] == ['c.py']
+
+    # 文档被删除的成功文件需要重新处理
+    os.remove(doc_path)
+    assert [f['relative_path'] for f in loaded.pending_files(retry_failed=False)] == ['a.py', 'c.py']
+
+
+def test_resume_clears_cancelled_state(tmp_path):
+    run = _create_run(tmp_path)
+    run.mark_cancelled()
+    SummarizeRun.load(run.runs_dir, run.run_id).mark_resumed()
+
+    loaded = SummarizeRun.load(run.runs_dir, run.run_id)
+    assert loaded.status == RUN_INTERRUPTED
+    assert loaded.resume_count == 1
+    assert loaded.cancelled_at is None
+
+
+@pytest.mark.parametrize('run_id', ['../etc/passwd', 'not-a-uuid'])
+def test_load_rejects_invalid_run_id(tmp_path, run_id):
+    assert SummarizeRun.load(os.path.join(tmp_path, 'runs'), run_id) is None
@@ -0,0 +1,91 @@
+import re
+
+import pytest
+
+from trigram_index import TrigramIndex, _required_literals
+
+FILES = {
+    'a.py': 'import os\nvalue = read_config()\n',
+    'b.py': 'def read_cache():\n    return Hello\n',
+    'c.js': 'const hello = readConfig();\n',
+    'd.py': 'x = 1\n',
+}
+
+
+def _index(files=FILES):
+    return TrigramIndex.build('v1', [{'path': path, 'size': len(text)} for path, text in files.items()],
+                              lambda file_info: files[file_info['path']])
+
+
+def _paths(index, literals):
+    return [index.paths[doc_id] for doc_id in index.candidates(literals)]
+
+
+@pytest.mark.parametrize('pattern, expected', [
+    ('read_config', ['read_config']),
+    # 分支的公共前缀仍是必需的，其余部分截断片段
+    ('foo(bar|baz)qux', ['fooba', 'qux']),
+    ('a|bcd', []),
+    # 可选或可重复零次的分组不是必需的
+    ('abc(def)?ghi', ['abc', 'ghi']),
+    ('abc(def)*ghi', ['abc', 'ghi']),
+    ('abc(def){0}ghi', ['abc', 'ghi']),
+    ('abc(def)+ghi', ['abc', 'def', 'ghi']),
+    ('^import\\s+os$', ['import', 'os']),
+    ('[ab]cd', ['cd']),
+    ('(unclosed', []),
+])
+def test_required_literals(pattern, expected):
+    assert _required_literals(pattern) == expected
+
+
+def test_required_literals_keep_case():
+    # 三字符组统一小写化，字面量保持原样即可
+    assert _required_literals('HeLLo', re.IGNORECASE) == ['HeLLo']
+
+
+def test_candidates_intersect_all_literals():
+    index = _index()
+    assert _paths(index, ['read_c']) == ['a.py', 'b.py']
+    assert _paths(index, ['read_c', 'config']) == ['a.py']
+    assert _paths(index, ['missing']) == []
+
+
+def test_candidates_ignore_case():
+    assert _paths(_index(), ['HELLO']) == ['b.py', 'c.js']
+
+
+def test_short_literals_match_every_file():
+    index = _index()
+    assert _paths(index, ['x']) == list(FILES)
+    assert _paths(index, []) == list(FILES)
+
+
+def test_search_case_sensitivity():
+    index = _index()
+    found = index.search('hello', FILES.get)
+    assert [r['path'] for r in found['results']] == ['b.py', 'c.js']
+    found = index.search('hello', FILES.get, case_sensitive=True)
+    assert [r['path'] for r in found['results']] == ['c.js']
+    # 正则中的可选分组不参与预筛选
+    found = index.search('read_?(cache)?', FILES.get, regex=True)
+    assert [r['path'] for r in found['results']] == ['a.py', 'b.py', 'c.js']
+
+
+def test_search_pages_across_files():
+    files = {f"m{i}.py": 'token = 1\nother\ntoken = 2\n' for i in range(3)}
+    index = _index(files)
+    matches = []
+    offset = 0
+    while True:
+        page = index.search('token', files.get, offset=offset, limit=4, context=0)
+        matches += [(r['path'], r['line_number']) for r in page['results']]
+        offset += len(page['results'])
+        if not page['has_more']:
+            break
+    assert matches == [(f"m{i}.py", line) for i in range(3) for line in (1, 3)]
+
+    page = index.search('token', files.get, offset=3, limit=2, context=1)
+    assert [(r['path'], r['line_number']) for r in page['results']] == [('m1.py', 3), ('m2.py', 1)]
+    assert page['results'][0]['before'] == ['other']
+    assert page['has_more']
@@ -0,0 +1,150 @@
+import os
+
+import pytest
+
+from upload_registry import (
+    PROJECT_FAILED, PROJECT_READY, UploadRegistry, decode_cursor, encode_cursor
+)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return UploadRegistry(os.path.join(tmp_path, 'meta', 'uploads.sqlite'))
+
+
+def test_same_content_shares_storage(registry):
+    assert registry.acquire('h1', 'a', 'a.zip', 10) == ('a', True)
+    assert registry.acquire('h1', 'b', 'b.zip', 10) == ('a', False)
+    assert registry.acquire('h2', 'c', 'c.zip', 20) == ('c', True)
+
+    assert registry.resolve('a') == 'a'
+    assert registry.resolve('b') == 'a'
+    assert registry.get_storage('a')['refcount'] == 2
+
+
+def test_release_keeps_storage_until_last_reference(registry):
+    registry.acquire('h1', 'a', 'a.zip', 10)
+    registry.acquire('h1', 'b', 'b.zip', 10)
+
+    assert registry.release('a') == ('a', 1)
+    # 首次上传已删除，但存储仍被b引用，不能再按a访问
+    assert registry.resolve('a') is None
+    assert registry.resolve('b') == 'a'
+
+    assert registry.release('b') == ('a', 0)
+    assert registry.get_storage('a') is None
+    assert registry.release('b') is None
+
+
+def test_resolve_unregistered_id_is_returned_unchanged(registry):
+    assert registry.resolve('legacy') == 'legacy'
+
+
+def test_detach_sole_reference_keeps_storage(registry):
+    registry.acquire('h1', 'a', 'a.zip', 10)
+
+    assert registry.detach('a') == ('a', 'a')
+    # 修改后的存储不再按原内容哈希复用
+    assert registry.acquire('h1', 'b', 'b.zip', 10) == ('b', True)
+    assert registry.resolve('a') == 'a'
+
+
+def test_detach_shared_storage_allocates_new_storage(registry):
+    registry.acquire('h1', 'a', 'a.zip', 10, stats={'total_files': 3, 'code_files': 2, 'total_size': 30})
+    registry.acquire('h1', 'b', 'b.zip', 10)
+
+    source_id, storage_id = registry.detach('b')
+    assert source_id == 'a'
+    assert storage_id != 'a'
+    assert registry.resolve('b') == storage_id
+    assert registry.resolve('a') == 'a'
+    assert registry.get_storage('a')['refcount'] == 1
+
+    detached = registry.get_storage(storage_id)
+    assert detached['refcount'] == 1
+    assert (detached['total_files'], detached['code_files'], detached['total_size']) == (3, 2, 30)
+
+    # 原内容再次上传仍复用未修改的存储
+    assert registry.acquire('h1', 'c', 'c.zip', 10) == ('a', False)
+
+
+def test_detach_unknown_upload(registry):
+    assert registry.detach('missing') is None
+
+
+def test_update_storage_ignores_unknown_fields(registry):
+    registry.acquire('h1', 'a', 'a.zip', 10)
+    registry.update_storage('a', status=PROJECT_FAILED, doc_count=4, refcount=9)
+
+    storage = registry.get_storage('a')
+    assert storage['status'] == PROJECT_FAILED
+    assert storage['doc_count'] == 4
+    assert storage['refcount'] == 1
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(12, 'a')) == (12, 'a')
+    assert decode_cursor('not a cursor') is None
+    assert decode_cursor(encode_cursor(12, 34)) is None
+
+
+def _list_all(registry, **kwargs):
+    pages = []
+    cursor = None
+    first_total = None
+    while True:
+        rows, next_cursor, total = registry.list_projects(cursor=cursor, **kwargs)
+        if cursor is None:
+            first_total = total
+        else:
+            # 总数只在第一页统计
+            assert total is None
+        pages.append([row['file_id'] for row in rows])
+        if next_cursor is None:
+            return pages, first_total
+        cursor = decode_cursor(next_cursor)
+
+
+def test_list_projects_pages_without_gaps_or_duplicates(registry):
+    # 大小相同的项目按file_id排序，跨页时不重复也不遗漏
+    for i in range(7):
+        registry.acquire(f"h{i}", f"p{i}", f"project{i}.zip", 100 if i % 2 else 50)
+
+    pages, total = _list_all(registry, limit=3, sort='size', descending=False)
+    assert total == 7
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [file_id for page in pages for file_id in page] == ['p0', 'p2', 'p4', 'p6', 'p1', 'p3', 'p5']
+
+    pages, _ = _list_all(registry, limit=3, sort='name', descending=True)
+    assert [file_id for page in pages for file_id in page] == [f"p{i}" for i in reversed(range(7))]
+
+
+def test_list_projects_filters(registry):
+    registry.acquire('h1', 'a', 'alpha.zip', 10)
+    registry.acquire('h2', 'b', 'beta_1.zip', 10, status=PROJECT_FAILED)
+    registry.acquire('h3', 'c', 'beta%2.zip', 10)
+    registry.update_storage('c', doc_count=2)
+
+    rows, next_cursor, total = registry.list_projects(query='beta')
+    assert {row['file_id'] for row in rows} == {'b', 'c'}
+    assert (next_cursor, total) == (None, 2)
+
+    # LIKE的通配符按字面匹配
+    assert [row['file_id'] for row in registry.list_projects(query='%')[0]] == ['c']
+    assert [row['file_id'] for row in registry.list_projects(query='_')[0]] == ['b']
+
+    assert [row['file_id'] for row in registry.list_projects(status=PROJECT_FAILED)[0]] == ['b']
+    assert {row['file_id'] for row in registry.list_projects(status=PROJECT_READY)[0]} == {'a', 'c'}
+    assert [row['file_id'] for row in registry.list_projects(has_docs=True)[0]] == ['c']
+    assert {row['file_id'] for row in registry.list_projects(has_docs=False)[0]} == {'a', 'b'}
+
+
+def test_list_projects_total_on_request(registry):
+    for i in range(3):
+        registry.acquire(f"h{i}", f"p{i}", f"project{i}.zip", 10)
+
+    _, next_cursor, total = registry.list_projects(limit=1, with_total=False)
+    assert total is None
+    cursor = decode_cursor(next_cursor)
+    assert registry.list_projects(limit=1, cursor=cursor)[2] is None
+    assert registry.list_projects(limit=1, cursor=cursor, with_total=True)[2] == 3
@@ -0,0 +1,77 @@
+import hashlib
+import io
+
+import pytest
+
+from upload_sessions import OffsetMismatch, UploadSession, UploadTooLarge
+
+CONTENT = bytes(range(256)) * 40
+
+
+class DisconnectingStream:
+    """返回指定数量的字节后模拟连接中断"""
+
+    def __init__(self, data: bytes, fail_after: int):
+        self.stream = io.BytesIO(data[:fail_after])
+
+    def read(self, size=-1):
+        data = self.stream.read(min(size, 1000))
+        if not data:
+            raise OSError('连接中断')
+        return data
+
+
+@pytest.fixture
+def session(tmp_path):
+    return UploadSession.create(str(tmp_path), 'project.zip', len(CONTENT))
+
+
+def test_chunks_hash_matches_whole_file(session):
+    offset = 0
+    for size in (1000, 3000, len(CONTENT) - 4000):
+        offset = session.write_chunk(io.BytesIO(CONTENT[offset:offset + size]), offset)
+    assert offset == len(CONTENT)
+    assert session.is_complete
+    # 分片之间沿用进程内的哈希状态
+    assert UploadSession._hashers[session.upload_id][0] == len(CONTENT)
+    assert session.sha256() == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_offset_mismatch(session):
+    session.write_chunk(io.BytesIO(CONTENT[:1000]), 0)
+    for offset in (0, 500, 2000):
+        with pytest.raises(OffsetMismatch) as excinfo:
+            session.write_chunk(io.BytesIO(CONTENT[offset:offset + 100]), offset)
+        assert excinfo.value.received == 1000
+    assert session.received == 1000
+
+
+def test_resume_after_disconnect(session):
+    with pytest.raises(OSError):
+        session.write_chunk(DisconnectingStream(CONTENT, 2500), 0)
+    # 中断前写入的部分保留，客户端查询状态后从该位置继续
+    received = UploadSession.load(session.sessions_dir, session.upload_id).to_dict()['received']
+    assert received == 2500
+
+    assert session.write_chunk(io.BytesIO(CONTENT[received:]), received) == len(CONTENT)
+    assert session.sha256() == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_hash_recomputed_after_restart(session):
+    session.write_chunk(io.BytesIO(CONTENT[:3000]), 0)
+    # 服务重启后进程内的哈希状态丢失
+    UploadSession._hashers.clear()
+
+    loaded = UploadSession.load(session.sessions_dir, session.upload_id)
+    loaded.write_chunk(io.BytesIO(CONTENT[3000:]), 3000)
+    assert loaded.sha256() == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_chunk_beyond_total_size(session):
+    with pytest.raises(UploadTooLarge):
+        session.write_chunk(io.BytesIO(CONTENT + b'x'), 0)
+    assert session.received == 0
+
+
+def test_load_rejects_invalid_upload_id(tmp_path):
+    assert UploadSession.load(str(tmp_path), '../secret') is None
@@ -0,0 +1,90 @@
+import os
+import zipfile
+
+import pytest
+
+from zip_extract import extract_archive, is_extracted_member, normalize_member_name, scan_archive
+
+CODE_EXTENSIONS = {'.py', '.js'}
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('src/app.py', 'src/app.py'),
+    ('src/pkg/', 'src/pkg'),
+    ('./src//app.py', 'src/app.py'),
+    ('src/./pkg/./app.py', 'src/pkg/app.py'),
+    ('src\\pkg\\app.py', 'src/pkg/app.py'),
+    ('a..b/c.py', 'a..b/c.py'),
+    ('/etc/passwd', None),
+    ('\\windows\\system.ini', None),
+    ('C:/boot.ini', None),
+    ('c:boot.ini', None),
+    ('../evil.py', None),
+    ('src/../../evil.py', None),
+    ('src\\..\\evil.py', None),
+    ('', None),
+    ('./', None),
+])
+def test_normalize_member_name(name, expected):
+    assert normalize_member_name(name) == expected
+
+
+def test_is_extracted_member():
+    assert is_extracted_member('src/app.py', CODE_EXTENSIONS)
+    assert is_extracted_member('src/App.JS', CODE_EXTENSIONS)
+    assert is_extracted_member('docs/guide.md', CODE_EXTENSIONS)
+    assert is_extracted_member('pkg/.gitignore', CODE_EXTENSIONS)
+    assert is_extracted_member('Dockerfile', CODE_EXTENSIONS)
+    assert not is_extracted_member('assets/logo.png', CODE_EXTENSIONS)
+    assert not is_extracted_member('bin/tool', CODE_EXTENSIONS)
+
+
+def _make_zip(path, entries):
+    with zipfile.ZipFile(path, 'w') as zip_ref:
+        for name, content in entries:
+            zip_ref.writestr(name, content)
+    return path
+
+
+@pytest.mark.filterwarnings('ignore:Duplicate name')
+def test_scan_archive_selects_members(tmp_path):
+    zip_path = _make_zip(os.path.join(tmp_path, 'p.zip'), [
+        ('project/', ''),
+        ('project/src/app.py', 'print(1)'),
+        ('project/README.md', '# readme'),
+        ('project/logo.png', 'png'),
+        ('../evil.py', 'x'),
+        ('project/src/app.py', 'print(2)'),
+    ])
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        scan = scan_archive(zip_ref, CODE_EXTENSIONS)
+
+    assert scan['total_files'] == 6
+    assert scan['directories'] == 1
+    assert scan['code_files'] == 3
+    assert sorted(scan['members']) == ['project/README.md', 'project/src/app.py']
+    # 同名成员以中央目录中靠后的为准
+    assert scan['selected_size'] == len('print(2)') + len('# readme')
+    # 中央目录没有的父目录从文件路径补全
+    assert scan['directory_paths'] == {'project', 'project/src'}
+    assert scan['skipped'] == ['project/logo.png', '../evil.py']
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_extract_archive(tmp_path, max_workers):
+    entries = [(f"pkg/mod{i}/file{i}.py", f"value = {i}") for i in range(80)]
+    entries += [('pkg/data.bin', 'skip'), ('../outside.py', 'skip'), ('pkg/empty/', '')]
+    zip_path = _make_zip(os.path.join(tmp_path, 'p.zip'), entries)
+    target = os.path.join(tmp_path, 'out')
+
+    result = extract_archive(zip_path, target, CODE_EXTENSIONS, max_workers=max_workers)
+
+    assert result['extracted_files'] == 80
+    assert result['total_files'] == 83
+    with open(os.path.join(target, 'pkg', 'mod42', 'file42.py'), encoding='utf-8') as f:
+        assert f.read() == 'value = 42'
+    assert os.path.isdir(os.path.join(target, 'pkg', 'empty'))
+    assert not os.path.exists(os.path.join(target, 'pkg', 'data.bin'))
+    assert not os.path.exists(os.path.join(tmp_path, 'outside.py'))
+    # 解压完成后不留下临时目录
+    assert sorted(os.listdir(tmp_path)) == ['out', 'p.zip']
@@ -0,0 +1,208 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from fs_walk import DirectoryNode, IgnoreStack, scan_into, scan_tree
+
+logger = logging.getLogger(__name__)
+
+# 最多缓存的根目录数量，超出时淘汰最久未使用的
+DEFAULT_MAX_ROOTS = 16
+
+
+class DirectoryTreeCache:
+    """
+    目录树缓存：每个根目录只完整遍历一次，之后任意子目录的视图都从缓存的树中获取
+
+    每次读取前逐个stat子树中的目录并与遍历时记录的mtime比较（不需要列举目录或stat文件），
+    只重新遍历发生变化的子树。格式化结果同样按目录缓存，子树变化时连同祖先目录一起失效。
+    遍历与校验只持有所在根目录的锁，不同根目录互不阻塞。
+    """
+
+    def __init__(self, extensions: Optional[Set[str]] = None, max_roots: int = DEFAULT_MAX_ROOTS):
+        """
+        初始化目录树缓存
+
+        Args:
+            extensions: 只保留这些扩展名的文件，None表示保留全部
+            max_roots: 最多缓存的根目录数量
+        """
+        self.extensions = extensions
+        self.max_roots = max_roots
+        self._roots: 'OrderedDict[str, DirectoryNode]' = OrderedDict()
+        # 目录绝对路径 -> 格式化结果
+        self._formatted: Dict[str, str] = {}
+        # 只保护上面两个字典，遍历与校验目录时不持有
+        self._lock = threading.Lock()
+        # 根目录 -> 该根目录的锁，遍历与校验同一棵树的线程互斥，不同根目录互不阻塞
+        self._root_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, directory_path: str) -> DirectoryNode:
+        """
+        获取目录对应的树节点，缓存的树中不存在或已失效时重新遍历
+
+        Args:
+            directory_path: 目录路径
+
+        Returns:
+            目录树节点（relative_path相对其所在的缓存根目录）
+        """
+        return self._get(os.path.abspath(directory_path))[1]
+
+    def get_formatted(self, directory_path: str, formatter: Callable[[DirectoryNode], str]) -> str:
+        """
+        获取目录的格式化视图，未变化时直接返回缓存结果
+
+        Args:
+            directory_path: 目录路径
+            formatter: 由树节点生成格式化字符串的函数
+
+        Returns:
+            格式化结果
+        """
+        path = os.path.abspath(directory_path)
+        root_path, node = self._get(path)
+        with self._root_lock(root_path):
+            with self._lock:
+                formatted = self._formatted.get(path)
+            if formatted is None:
+                formatted = formatter(node)
+                with self._lock:
+                    self._formatted[path] = formatted
+            return formatted
+
+    def invalidate(self, directory_path: Optional[str] = None):
+        """
+        手动使缓存失效
+
+        Args:
+            directory_path: 需要失效的目录，为None时清空全部缓存
+        """
+        with self._lock:
+            if directory_path is None:
+                self._roots.clear()
+                self._formatted.clear()
+                self._root_locks.clear()
+                return
+            path = os.path.abspath(directory_path)
+            for root_path in list(self._roots):
+                if _is_within(root_path, path) or _is_within(path, root_path):
+                    self._remove_root(root_path)
+            self._drop_formatted(path, include_ancestors=True)
+
+    def _root_lock(self, root_path: str) -> threading.Lock:
+        with self._lock:
+            return self._root_locks.setdefault(root_path, threading.Lock())
+
+    def _get(self, path: str) -> Tuple[str, DirectoryNode]:
+        """
+        在缓存的根目录中查找路径并校验其子树，找不到时把路径作为新的根目录完整遍历
+
+        Returns:
+            (所在的缓存根目录, 目录树节点)
+        """
+        while True:
+            with self._lock:
+                candidates = [root_path for root_path in self._roots if _is_within(path, root_path)]
+            for root_path in candidates:
+                with self._root_lock(root_path):
+                    with self._lock:
+                        root = self._roots.get(root_path)
+                        if root is not None:
+                            self._roots.move_to_end(root_path)
+                    if root is None:
+                        # 等待期间已被淘汰或合并
+                        continue
+                    chain = self._navigate(root, os.path.relpath(path, root_path))
+                    if chain is not None:
+                        self._refresh(chain)
+                        return root_path, chain[-1]
+
+            with self._root_lock(path):
+                with self._lock:
+                    if path in self._roots:
+                        # 其他线程已完成遍历
+                        continue
+                root = scan_tree(path, self.extensions)
+                with self._lock:
+                    self._add_root(path, root)
+                return path, root
+
+    def _navigate(self, root: DirectoryNode, relative: str) -> Optional[List[DirectoryNode]]:
+        """从根节点按相对路径逐级查找，返回节点链，不存在时返回None"""
+        chain = [root]
+        if relative == '.':
+            return chain
+        for part in relative.split(os.sep):
+            child = chain[-1].directories.get(part)
+            if child is None:
+                # 目录可能是遍历后新建的：祖先目录已变化时重新遍历后再查找一次；
+                # 否则该目录被剪枝或忽略，由调用方单独遍历
+                stale = [node for node in chain if node.is_stale()]
+                if not stale:
+                    return None
+                self._refresh(chain[:chain.index(stale[0]) + 1])
+                return self._navigate(root, relative)
+            chain.append(child)
+        return chain
+
+    def _add_root(self, path: str, root: DirectoryNode):
+        """登记完整遍历的新根目录，已缓存的下级根目录被合并（调用方持有self._lock）"""
+        for root_path in list(self._roots):
+            if _is_within(root_path, path):
+                self._remove_root(root_path)
+        self._roots[path] = root
+        while len(self._roots) > self.max_roots:
+            self._remove_root(next(iter(self._roots)))
+        self._drop_formatted(path)
+
+    def _remove_root(self, root_path: str):
+        """移除缓存的根目录及其格式化结果（调用方持有self._lock）"""
+        del self._roots[root_path]
+        self._root_locks.pop(root_path, None)
+        self._drop_formatted(root_path)
+
+    def _refresh(self, chain: List[DirectoryNode]):
+        """
+        校验目标节点所在子树，重新遍历发生变化的目录
+
+        Args:
+            chain: 从根到目标节点的节点链
+        """
+        parents = {id(node): parent for parent, node in zip(chain, chain[1:])}
+        target = chain[-1]
+
+        stale = []
+        pending = [(target, parents.get(id(target)))]
+        while pending:
+            node, parent = pending.pop()
+            if node.is_stale():
+                stale.append((node, parent))
+                continue
+            pending.extend((child, node) for child in node.directories.values())
+
+        for node, parent in stale:
+            logger.debug(f"目录已变化，重新遍历: {node.path}")
+            fresh = DirectoryNode(path=node.path, relative_path=node.relative_path, name=node.name)
+            scan_into(fresh, parent.ignores if parent else IgnoreStack(), self.extensions)
+            # 原地替换节点内容，持有该节点引用的调用方也能看到最新结果
+            node.directories = fresh.directories
+            node.files = fresh.files
+            node.mtime = fresh.mtime
+            node.ignores = fresh.ignores
+            node.ignore_files = fresh.ignore_files
+            with self._lock:
+                self._drop_formatted(node.path, include_ancestors=True)
+
+    def _drop_formatted(self, path: str, include_ancestors: bool = False):
+        """删除目录子树（以及祖先目录）的格式化缓存（调用方持有self._lock）"""
+        for cached_path in list(self._formatted):
+            if _is_within(cached_path, path) or (include_ancestors and _is_within(path, cached_path)):
+                del self._formatted[cached_path]
+
+
+def _is_within(path: str, ancestor: str) -> bool:
+    """path是否为ancestor本身或其子路径"""
+    return path == ancestor or path.startswith(ancestor.rstrip(os.sep) + os.sep)
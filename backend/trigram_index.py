@@ -0,0 +1,332 @@
+import logging
+import os
+import pickle
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+try:  # Python 3.11+
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:
+    import sre_constants
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+# 超过该大小的文件不建立索引（与文件查看接口的上限一致）
+MAX_INDEXED_FILE_SIZE = 1024 * 1024  # 1MB
+
+# 内存中最多保留的项目索引数量
+MAX_LOADED_INDEXES = 4
+
+
+def extract_trigrams(text: str) -> Set[str]:
+    """提取文本（小写化后）中的所有三字符组"""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _required_literals(pattern: str, flags: int = 0) -> List[str]:
+    """
+    从正则表达式中提取所有匹配都必须包含的字面量片段，用于三字符组预筛选。
+    只分析顶层序列（以及其中的分组），遇到分支、重复等结构即截断当前片段，
+    结果是必要条件的保守子集。
+
+    Args:
+        pattern: 正则表达式
+        flags: 编译标志
+
+    Returns:
+        字面量片段列表
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return []
+
+    literals = []
+    current = []
+
+    def flush():
+        if current:
+            literals.append(''.join(current))
+            current.clear()
+
+    def walk(items):
+        for op, value in items:
+            if op == sre_constants.LITERAL:
+                current.append(chr(value))
+            elif op == sre_constants.SUBPATTERN:
+                # (group, add_flags, del_flags, pattern)
+                walk(value[-1])
+            elif op == sre_constants.MAX_REPEAT or op == sre_constants.MIN_REPEAT:
+                low, _, sub = value
+                flush()
+                if low >= 1:
+                    walk(sub)
+                flush()
+            elif op == sre_constants.AT:
+                continue
+            else:
+                flush()
+
+    walk(parsed)
+    flush()
+    return literals
+
+
+class TrigramIndex:
+    """
+    项目内容的三字符组倒排索引：每个（小写化的）三字符组对应包含它的文件编号列表。
+    子串与正则查询先用三字符组求交集得到候选文件，再逐个读取候选文件确认匹配并给出行号。
+    """
+
+    def __init__(self, version: str, paths: List[str], postings: Dict[str, array]):
+        """
+        初始化索引
+
+        Args:
+            version: 构建时对应的项目索引版本
+            paths: 文件编号到相对路径的映射
+            postings: 三字符组到有序文件编号数组的映射
+        """
+        self.version = version
+        self.paths = paths
+        self.postings = postings
+
+    @classmethod
+    def build(cls, version: str, files: List[Dict],
+              read_text: Callable[[Dict], Optional[str]]) -> 'TrigramIndex':
+        """
+        为项目的代码文件构建索引
+
+        Args:
+            version: 项目索引版本
+            files: 代码文件列表（包含path、size）
+            read_text: 读取文件文本的函数，无法读取时返回None
+
+        Returns:
+            构建好的索引
+        """
+        started = time.time()
+        paths = []
+        postings: Dict[str, array] = {}
+
+        for file_info in files:
+            if file_info['size'] > MAX_INDEXED_FILE_SIZE:
+                continue
+            text = read_text(file_info)
+            if text is None:
+                continue
+            doc_id = len(paths)
+            paths.append(file_info['path'])
+            for trigram in extract_trigrams(text):
+                posting = postings.get(trigram)
+                if posting is None:
+                    posting = postings[trigram] = array('I')
+                posting.append(doc_id)
+
+        logger.info(f"三字符组索引构建完成: {len(paths)} 个文件, {len(postings)} 个三字符组, "
+                    f"耗时 {time.time() - started:.2f}s")
+        return cls(version, paths, postings)
+
+    def save(self, index_path: str):
+        """保存到文件（先写临时文件再原子替换）"""
+        Path(os.path.dirname(index_path)).mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        payload = {
+            'format': INDEX_FORMAT_VERSION,
+            'version': self.version,
+            'paths': self.paths,
+            'postings': {trigram: posting.tobytes() for trigram, posting in self.postings.items()}
+        }
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, index_path)
+
+    @classmethod
+    def load(cls, index_path: str) -> Optional['TrigramIndex']:
+        """从文件加载，文件不存在或格式不符时返回None"""
+        try:
+            with open(index_path, 'rb') as f:
+                payload = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"加载三字符组索引失败 {index_path}: {e}")
+            return None
+        if payload.get('format') != INDEX_FORMAT_VERSION:
+            return None
+
+        postings = {}
+        for trigram, data in payload['postings'].items():
+            posting = array('I')
+            posting.frombytes(data)
+            postings[trigram] = posting
+        return cls(payload['version'], payload['paths'], postings)
+
+    def candidates(self, literals: List[str]) -> List[int]:
+        """
+        求包含所有字面量片段的候选文件
+
+        Args:
+            literals: 必须出现的字面量片段
+
+        Returns:
+            候选文件编号（升序）
+        """
+        trigrams = set()
+        for literal in literals:
+            trigrams |= extract_trigrams(literal)
+        if not trigrams:
+            return list(range(len(self.paths)))
+
+        postings = []
+        for trigram in trigrams:
+            posting = self.postings.get(trigram)
+            if posting is None:
+                return []
+            postings.append(posting)
+
+        # 从最短的倒排列表开始求交集
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result.intersection_update(posting)
+            if not result:
+                break
+        return sorted(result)
+
+    def search(self, query: str, read_text: Callable[[str], Optional[str]], regex: bool = False,
+               case_sensitive: bool = False, extension: Optional[str] = None, context: int = 2,
+               offset: int = 0, limit: int = 50) -> Dict:
+        """
+        搜索文件内容，按文件路径、行号顺序返回匹配的行
+
+        Args:
+            query: 子串或正则表达式
+            read_text: 按相对路径读取文件文本的函数
+            regex: query是否为正则表达式
+            case_sensitive: 是否区分大小写
+            extension: 扩展名过滤
+            context: 匹配行前后附带的上下文行数
+            offset: 跳过的匹配数（分页）
+            limit: 返回的最大匹配数
+
+        Returns:
+            results、has_more、candidate_files
+        """
+        flags = 0 if case_sensitive else re.IGNORECASE
+        if regex:
+            matcher = re.compile(query, flags)
+            literals = _required_literals(query, flags)
+        else:
+            matcher = re.compile(re.escape(query), flags)
+            literals = [query]
+
+        candidate_ids = self.candidates(literals)
+        if extension:
+            extension = extension.lower()
+            candidate_ids = [i for i in candidate_ids if self.paths[i].lower().endswith(extension)]
+
+        results = []
+        skipped = 0
+        has_more = False
+        for doc_id in candidate_ids:
+            path = self.paths[doc_id]
+            text = read_text(path)
+            if text is None:
+                continue
+            lines = text.split('\n')
+            for line_index, line in enumerate(lines):
+                if not matcher.search(line):
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                if len(results) >= limit:
+                    has_more = True
+                    break
+                results.append({
+                    'path': path,
+                    'line_number': line_index + 1,
+                    'line': line,
+                    'before': lines[max(0, line_index - context):line_index],
+                    'after': lines[line_index + 1:line_index + 1 + context]
+                })
+            if has_more:
+                break
+
+        return {
+            'results': results,
+            'has_more': has_more,
+            'candidate_files': len(candidate_ids)
+        }
+
+
+class TrigramIndexCache:
+    """进程内的索引缓存，按项目保留最近使用的若干个索引"""
+
+    def __init__(self, max_loaded: int = MAX_LOADED_INDEXES):
+        self.max_loaded = max_loaded
+        self._indexes: 'OrderedDict[str, TrigramIndex]' = OrderedDict()
+        self._lock = threading.Lock()
+        # 项目 -> 加载或构建锁，不同项目的构建互不阻塞
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def _cached(self, key: str, version: str) -> Optional[TrigramIndex]:
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None and index.version == version:
+                self._indexes.move_to_end(key)
+                return index
+            return None
+
+    def get(self, key: str, index_path: str, version: str,
+            builder: Callable[[], TrigramIndex]) -> TrigramIndex:
+        """
+        获取项目索引：优先使用内存中的索引，其次加载索引文件，版本不符时重新构建
+
+        加载与构建只持有该项目的锁，其他项目的查询不受影响；同一项目的并发请求等待同一次构建
+
+        Args:
+            key: 项目标识
+            index_path: 索引文件路径
+            version: 当前的项目索引版本
+            builder: 构建索引的函数
+
+        Returns:
+            三字符组索引
+        """
+        index = self._cached(key, version)
+        if index is not None:
+            return index
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # 等待期间其他请求可能已完成构建
+            index = self._cached(key, version)
+            if index is not None:
+                return index
+
+            index = TrigramIndex.load(index_path)
+            if index is None or index.version != version:
+                index = builder()
+                index.save(index_path)
+
+            with self._lock:
+                self._indexes[key] = index
+                while len(self._indexes) > self.max_loaded:
+                    self._indexes.popitem(last=False)
+            return index
+
+    def discard(self, key: str):
+        with self._lock:
+            self._indexes.pop(key, None)
@@ -0,0 +1,276 @@
+import json
+import logging
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 上传后处理的各阶段
+STAGE_EXTRACT = 'extract'
+STAGE_INDEX = 'index'
+STAGE_STATS = 'stats'
+STAGE_SYMBOLS = 'symbols'
+STAGE_SUMMARIZE = 'summarize'
+
+STAGE_PENDING = 'pending'
+STAGE_RUNNING = 'running'
+STAGE_DONE = 'done'
+STAGE_SKIPPED = 'skipped'
+STAGE_ERROR = 'error'
+
+PIPELINE_QUEUED = 'queued'
+PIPELINE_RUNNING = 'running'
+PIPELINE_COMPLETED = 'completed'
+PIPELINE_FAILED = 'failed'
+PIPELINE_INTERRUPTED = 'interrupted'
+
+# 阶段函数：无参数，返回写入状态的结果（可为None）
+StageFunc = Callable[[], Optional[Dict]]
+
+
+class PipelineState:
+    """
+    单个上传项目的后处理进度，每次阶段状态变化时写入JSON文件，
+    服务重启后仍可查询（未完成的流水线报告为interrupted）
+    """
+
+    def __init__(self, pipelines_dir: str, info: Dict):
+        """
+        初始化进度
+
+        Args:
+            pipelines_dir: 进度文件所在目录
+            info: 进度信息（file_id、各阶段状态等）
+        """
+        self.pipelines_dir = pipelines_dir
+        self.file_id = info['file_id']
+        self.created_at = info['created_at']
+        self.finished_at = info.get('finished_at')
+        self.stages: List[Dict] = info['stages']
+        self._lock = threading.Lock()
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.pipelines_dir, f"{self.file_id}.json")
+
+    @classmethod
+    def create(cls, pipelines_dir: str, file_id: str, stage_names: List[str],
+               skipped: Optional[List[str]] = None) -> 'PipelineState':
+        """
+        创建进度并写入文件
+
+        Args:
+            pipelines_dir: 进度文件所在目录
+            file_id: 项目ID
+            stage_names: 按执行顺序排列的阶段名称
+            skipped: 本次不执行的阶段
+
+        Returns:
+            新建的进度
+        """
+        Path(pipelines_dir).mkdir(parents=True, exist_ok=True)
+        skipped = skipped or []
+        state = cls(pipelines_dir, {
+            'file_id': file_id,
+            'created_at': datetime.now().isoformat(),
+            'stages': [{
+                'name': name,
+                'status': STAGE_SKIPPED if name in skipped else STAGE_PENDING,
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None
+            } for name in stage_names]
+        })
+        state.save()
+        return state
+
+    @classmethod
+    def load(cls, pipelines_dir: str, file_id: str) -> Optional['PipelineState']:
+        """
+        读取进度文件
+
+        Args:
+            pipelines_dir: 进度文件所在目录
+            file_id: 项目ID
+
+        Returns:
+            进度，不存在时返回None
+        """
+        # file_id 来自URL，只接受合法的uuid，防止路径穿越
+        try:
+            file_id = str(uuid.UUID(file_id))
+        except ValueError:
+            return None
+
+        try:
+            with open(os.path.join(pipelines_dir, f"{file_id}.json"), 'r', encoding='utf-8') as f:
+                return cls(pipelines_dir, json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save(self):
+        """写入临时文件后原子替换，读取方不会看到写了一半的文件"""
+        with self._lock:
+            data = json.dumps({
+                'file_id': self.file_id,
+                'created_at': self.created_at,
+                'finished_at': self.finished_at,
+                'stages': self.stages
+            }, ensure_ascii=False)
+        tmp_path = f"{self.state_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.state_path)
+
+    def delete(self):
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def _stage(self, name: str) -> Dict:
+        return next(stage for stage in self.stages if stage['name'] == name)
+
+    def update_stage(self, name: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        """更新阶段状态并写入文件"""
+        with self._lock:
+            stage = self._stage(name)
+            stage['status'] = status
+            if status == STAGE_RUNNING:
+                stage['started_at'] = datetime.now().isoformat()
+            else:
+                stage['finished_at'] = datetime.now().isoformat()
+                stage['result'] = result
+                stage['error'] = error
+        self.save()
+
+    def mark_finished(self):
+        self.finished_at = datetime.now().isoformat()
+        self.save()
+
+    def status(self, active: bool) -> str:
+        """
+        流水线状态
+
+        Args:
+            active: 当前进程中是否有对应的流水线在排队或执行
+        """
+        statuses = [stage['status'] for stage in self.stages]
+        if STAGE_ERROR in statuses:
+            return PIPELINE_FAILED
+        if self.finished_at:
+            return PIPELINE_COMPLETED
+        if not active:
+            return PIPELINE_INTERRUPTED
+        if STAGE_RUNNING in statuses or STAGE_DONE in statuses:
+            return PIPELINE_RUNNING
+        return PIPELINE_QUEUED
+
+    def to_dict(self, active: bool) -> Dict:
+        with self._lock:
+            stages = [dict(stage) for stage in self.stages]
+        current = next((stage['name'] for stage in stages if stage['status'] == STAGE_RUNNING), None)
+        finished = sum(1 for stage in stages if stage['status'] in (STAGE_DONE, STAGE_SKIPPED))
+        return {
+            'file_id': self.file_id,
+            'status': self.status(active),
+            'current_stage': current,
+            'completed_stages': finished,
+            'total_stages': len(stages),
+            'progress': round(finished / len(stages) * 100) if stages else 100,
+            'stages': stages,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+
+
+class UploadPipelineManager:
+    """
+    在有界线程池中按顺序执行各项目的后处理阶段；某一阶段失败时跳过后续阶段，
+    未完成的工作仍由各接口在首次访问时按需完成
+    """
+
+    def __init__(self, max_workers: int = 2):
+        """
+        初始化流水线管理器
+
+        Args:
+            max_workers: 同时处理的项目数
+        """
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='upload-pipeline'
+        )
+        self._active: Dict[str, PipelineState] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, state: PipelineState, stages: List[Tuple[str, StageFunc]],
+               on_finish: Optional[Callable[[str], None]] = None):
+        """
+        提交流水线
+
+        Args:
+            state: 已创建的进度
+            stages: 按执行顺序排列的(阶段名称, 阶段函数)，进度中已标记为skipped的阶段不执行
+            on_finish: 流水线结束后以最终状态（completed、failed等）调用
+        """
+        with self._lock:
+            self._active[state.file_id] = state
+        self._executor.submit(self._run, state, stages, on_finish)
+
+    def _run(self, state: PipelineState, stages: List[Tuple[str, StageFunc]],
+             on_finish: Optional[Callable[[str], None]] = None):
+        try:
+            failed = False
+            for name, func in stages:
+                if state._stage(name)['status'] == STAGE_SKIPPED:
+                    continue
+                if failed:
+                    state.update_stage(name, STAGE_SKIPPED)
+                    continue
+                state.update_stage(name, STAGE_RUNNING)
+                try:
+                    state.update_stage(name, STAGE_DONE, result=func())
+                except Exception as e:
+                    logger.error(f"上传后处理阶段失败 {state.file_id}/{name}: {e}\n{traceback.format_exc()}")
+                    state.update_stage(name, STAGE_ERROR, error=str(e))
+                    failed = True
+            if not failed:
+                state.mark_finished()
+        except Exception as e:
+            # 进度文件无法写入（如项目已被删除）
+            logger.error(f"上传后处理失败 {state.file_id}: {e}")
+        finally:
+            with self._lock:
+                self._active.pop(state.file_id, None)
+        if on_finish is not None:
+            try:
+                on_finish(state.status(active=False))
+            except Exception as e:
+                logger.error(f"上传后处理结束回调失败 {state.file_id}: {e}")
+
+    def get(self, pipelines_dir: str, file_id: str) -> Optional[Dict]:
+        """
+        查询项目的后处理进度
+
+        Args:
+            pipelines_dir: 进度文件所在目录
+            file_id: 项目ID
+
+        Returns:
+            进度信息，项目没有后处理记录时返回None
+        """
+        with self._lock:
+            state = self._active.get(file_id)
+        if state is not None:
+            return state.to_dict(active=True)
+        state = PipelineState.load(pipelines_dir, file_id)
+        return state.to_dict(active=False) if state else None
+
+    def is_active(self, file_id: str) -> bool:
+        with self._lock:
+            return file_id in self._active
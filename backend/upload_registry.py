@@ -0,0 +1,408 @@
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 项目状态：后台流水线处理中、可用、后台处理失败
+PROJECT_PROCESSING = 'processing'
+PROJECT_READY = 'ready'
+PROJECT_FAILED = 'failed'
+
+# 项目列表可排序的字段 -> uploads表中的列
+SORT_COLUMNS = {
+    'uploaded_at': 'uploaded_at',
+    'name': 'original_name',
+    'size': 'file_size'
+}
+
+# 存储的元数据中可更新的字段
+STORAGE_FIELDS = ('status', 'total_files', 'code_files', 'total_size', 'doc_count')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contents (
+    sha256 TEXT PRIMARY KEY,
+    storage_id TEXT NOT NULL UNIQUE,
+    refcount INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS uploads (
+    file_id TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    original_name TEXT NOT NULL,
+    uploaded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_sha256 ON uploads(sha256);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# 登记表建立之后新增的列，打开已有的数据库时补齐
+MIGRATIONS = [
+    ('contents', 'total_files', "INTEGER NOT NULL DEFAULT 0"),
+    ('contents', 'code_files', "INTEGER NOT NULL DEFAULT 0"),
+    ('contents', 'total_size', "INTEGER NOT NULL DEFAULT 0"),
+    ('contents', 'status', f"TEXT NOT NULL DEFAULT '{PROJECT_READY}'"),
+    ('contents', 'doc_count', "INTEGER NOT NULL DEFAULT 0"),
+    ('contents', 'updated_at', "TEXT"),
+    ('uploads', 'file_size', "INTEGER NOT NULL DEFAULT 0")
+]
+
+# 项目列表的排序索引，按(排序字段, file_id)翻页
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_uploads_uploaded_at ON uploads(uploaded_at, file_id);
+CREATE INDEX IF NOT EXISTS idx_uploads_name ON uploads(original_name, file_id);
+CREATE INDEX IF NOT EXISTS idx_uploads_size ON uploads(file_size, file_id);
+CREATE INDEX IF NOT EXISTS idx_contents_status ON contents(status);
+"""
+
+_migrated = set()
+_migrate_lock = threading.Lock()
+
+
+def encode_cursor(value, file_id: str) -> str:
+    """将上一页最后一项的(排序值, file_id)编码为翻页游标"""
+    return base64.urlsafe_b64encode(json.dumps([value, file_id]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple]:
+    """解析翻页游标，格式错误时返回None"""
+    try:
+        value, file_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(file_id, str):
+        return None
+    return value, file_id
+
+
+class UploadRegistry:
+    """
+    按压缩包内容哈希登记上传（SQLite）
+
+    内容相同的多次上传共享同一份存储（压缩包、解压目录、索引与总结文档），存储以首次上传的
+    file_id命名（storage_id）；每次上传仍有自己的file_id，删除时引用计数减一，
+    最后一个引用删除后才删除存储。
+
+    同时保存项目列表所需的元数据（原始文件名、大小、文件数、状态、文档数、时间），
+    项目列表直接分页查询登记表，不再遍历上传目录
+    """
+
+    def __init__(self, db_path: str):
+        """
+        初始化上传登记表
+
+        Args:
+            db_path: 数据库路径
+        """
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        Path(os.path.dirname(self.db_path)).mkdir(parents=True, exist_ok=True)
+        # isolation_level=None 由调用方显式控制事务，引用计数的读改写在同一个写事务中完成
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(SCHEMA)
+        self._migrate(conn)
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """补齐新增的列与索引，每个进程每个数据库只检查一次"""
+        with _migrate_lock:
+            if self.db_path in _migrated:
+                return
+            for table, column, definition in MIGRATIONS:
+                columns = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                    if table == 'uploads' and column == 'file_size':
+                        conn.execute(
+                            "UPDATE uploads SET file_size = "
+                            "(SELECT size FROM contents WHERE contents.sha256 = uploads.sha256)"
+                        )
+            conn.executescript(INDEXES)
+            _migrated.add(self.db_path)
+
+    def acquire(self, sha256: str, file_id: str, original_name: str, size: int,
+                stats: Optional[Dict] = None, status: str = PROJECT_READY) -> Tuple[str, bool]:
+        """
+        登记一次上传
+
+        Args:
+            sha256: 压缩包内容哈希
+            file_id: 本次上传的ID
+            original_name: 原始文件名
+            size: 压缩包大小
+            stats: 压缩包中的文件数（total_files）、代码文件数（code_files）与解压后大小（total_size）
+            status: 新内容的项目状态
+
+        Returns:
+            (storage_id, 是否为新内容)；内容已存在时storage_id为已有存储的ID，
+            调用方应删除本次保存的压缩包
+        """
+        now = datetime.now().isoformat()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT storage_id FROM contents WHERE sha256 = ?", (sha256,)
+                ).fetchone()
+                if row is not None:
+                    storage_id = row['storage_id']
+                    conn.execute("UPDATE contents SET refcount = refcount + 1 WHERE sha256 = ?", (sha256,))
+                else:
+                    storage_id = file_id
+                    stats = stats or {}
+                    conn.execute(
+                        "INSERT INTO contents (sha256, storage_id, refcount, size, created_at, total_files, "
+                        "code_files, total_size, status, updated_at) VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?)",
+                        (sha256, storage_id, size, now, stats.get('total_files', 0), stats.get('code_files', 0),
+                         stats.get('total_size', 0), status, now)
+                    )
+                conn.execute(
+                    "INSERT INTO uploads (file_id, sha256, original_name, uploaded_at, file_size) "
+                    "VALUES (?, ?, ?, ?, ?)", (file_id, sha256, original_name, now, size)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return storage_id, row is None
+
+    def release(self, file_id: str) -> Optional[Tuple[str, int]]:
+        """
+        删除一次上传的登记
+
+        Args:
+            file_id: 上传ID
+
+        Returns:
+            (storage_id, 剩余引用数)，剩余为0时调用方应删除存储；未登记的上传返回None
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT c.sha256, c.storage_id, c.refcount FROM uploads u "
+                    "JOIN contents c ON c.sha256 = u.sha256 WHERE u.file_id = ?", (file_id,)
+                ).fetchone()
+                if row is None:
+                    conn.execute("ROLLBACK")
+                    return None
+                conn.execute("DELETE FROM uploads WHERE file_id = ?", (file_id,))
+                remaining = row['refcount'] - 1
+                if remaining > 0:
+                    conn.execute("UPDATE contents SET refcount = ? WHERE sha256 = ?", (remaining, row['sha256']))
+                else:
+                    conn.execute("DELETE FROM contents WHERE sha256 = ?", (row['sha256'],))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return row['storage_id'], remaining
+
+    def detach(self, file_id: str) -> Optional[Tuple[str, str]]:
+        """
+        上传的内容将被就地修改，之后上传的相同压缩包不能再复用这份存储：
+        存储只被该上传引用时改用唯一的内容键，继续使用原存储；
+        被多个上传共享时为该上传分配新的存储，由调用方复制原存储的内容
+
+        Args:
+            file_id: 上传ID
+
+        Returns:
+            (原storage_id, 修改后使用的storage_id)，未登记的上传返回None
+        """
+        key = f"delta:{uuid.uuid4()}"
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT c.sha256, c.storage_id, c.refcount, c.size FROM uploads u "
+                    "JOIN contents c ON c.sha256 = u.sha256 WHERE u.file_id = ?", (file_id,)
+                ).fetchone()
+                if row is None:
+                    conn.execute("ROLLBACK")
+                    return None
+                if row['refcount'] == 1:
+                    storage_id = row['storage_id']
+                    conn.execute("UPDATE contents SET sha256 = ? WHERE sha256 = ?", (key, row['sha256']))
+                else:
+                    storage_id = str(uuid.uuid4())
+                    conn.execute("UPDATE contents SET refcount = refcount - 1 WHERE sha256 = ?", (row['sha256'],))
+                    # 新存储复制自原存储，元数据一并复制
+                    conn.execute(
+                        "INSERT INTO contents (sha256, storage_id, refcount, size, created_at, total_files, "
+                        "code_files, total_size, status, doc_count, updated_at) "
+                        "SELECT ?, ?, 1, size, ?, total_files, code_files, total_size, status, doc_count, ? "
+                        "FROM contents WHERE sha256 = ?",
+                        (key, storage_id, datetime.now().isoformat(), datetime.now().isoformat(), row['sha256'])
+                    )
+                conn.execute("UPDATE uploads SET sha256 = ? WHERE file_id = ?", (key, file_id))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return row['storage_id'], storage_id
+
+    def resolve(self, file_id: str) -> Optional[str]:
+        """
+        将上传ID解析为存储ID
+
+        Args:
+            file_id: 上传ID
+
+        Returns:
+            存储ID；未登记的ID（登记表建立前的上传）原样返回；
+            本身已删除、存储仍被其他上传引用的ID返回None
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT c.storage_id FROM uploads u JOIN contents c ON c.sha256 = u.sha256 "
+                "WHERE u.file_id = ?", (file_id,)
+            ).fetchone()
+            if row is not None:
+                return row['storage_id']
+            if conn.execute("SELECT 1 FROM contents WHERE storage_id = ?", (file_id,)).fetchone():
+                return None
+        return file_id
+
+    def get_storage(self, storage_id: str) -> Optional[Dict]:
+        """存储的元数据，未登记时返回None"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM contents WHERE storage_id = ?", (storage_id,)).fetchone()
+        return dict(row) if row else None
+
+    def update_storage(self, storage_id: str, **fields):
+        """
+        更新存储的元数据（状态、文件数、大小、文档数），未登记的存储忽略
+
+        Args:
+            storage_id: 存储ID
+            fields: STORAGE_FIELDS中的字段
+        """
+        fields = {name: value for name, value in fields.items() if name in STORAGE_FIELDS}
+        if not fields:
+            return
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"UPDATE contents SET {assignments}, updated_at = ? WHERE storage_id = ?",
+                (*fields.values(), datetime.now().isoformat(), storage_id)
+            )
+
+    def list_projects(self, limit: int = 50, cursor: Optional[Tuple] = None, sort: str = 'uploaded_at',
+                      descending: bool = True, status: Optional[str] = None, query: Optional[str] = None,
+                      has_docs: Optional[bool] = None,
+                      with_total: Optional[bool] = None) -> Tuple[List[Dict], Optional[str], Optional[int]]:
+        """
+        分页查询已登记的上传及其存储的元数据，按(排序字段, file_id)的索引翻页，
+        每页的查询代价与总项目数无关；总数需要统计全部符合条件的项目，默认只在第一页统计
+
+        Args:
+            limit: 每页条数
+            cursor: 上一页返回的游标（decode_cursor解析后的值），None表示第一页
+            sort: 排序字段（SORT_COLUMNS中的键）
+            descending: 是否倒序
+            status: 只返回该状态的项目
+            query: 只返回原始文件名包含该字符串的项目
+            has_docs: 只返回有（或没有）总结文档的项目
+            with_total: 是否统计项目总数，None表示只在第一页统计
+
+        Returns:
+            (本页项目, 下一页游标（没有下一页时为None）, 符合条件的项目总数（未统计时为None）)
+        """
+        column = f"u.{SORT_COLUMNS[sort]}"
+        conditions = []
+        params = []
+        if status:
+            conditions.append("c.status = ?")
+            params.append(status)
+        if query:
+            conditions.append("u.original_name LIKE ? ESCAPE '\\'")
+            escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{escaped}%")
+        if has_docs is not None:
+            conditions.append("c.doc_count > 0" if has_docs else "c.doc_count = 0")
+        filter_conditions = list(conditions)
+        filter_params = list(params)
+
+        if cursor is not None:
+            op = '<' if descending else '>'
+            conditions.append(f"({column} {op} ? OR ({column} = ? AND u.file_id {op} ?))")
+            params.extend([cursor[0], cursor[0], cursor[1]])
+
+        direction = 'DESC' if descending else 'ASC'
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        filter_where = f"WHERE {' AND '.join(filter_conditions)}" if filter_conditions else ''
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT u.file_id, u.original_name, u.uploaded_at, u.file_size, u.sha256, c.storage_id, "
+                "c.refcount, c.total_files, c.code_files, c.total_size, c.status, c.doc_count, c.updated_at "
+                f"FROM uploads u JOIN contents c ON c.sha256 = u.sha256 {where} "
+                f"ORDER BY {column} {direction}, u.file_id {direction} LIMIT ?",
+                (*params, limit + 1)
+            ).fetchall()
+            total = None
+            if with_total or (with_total is None and cursor is None):
+                total = conn.execute(
+                    f"SELECT COUNT(*) FROM uploads u JOIN contents c ON c.sha256 = u.sha256 {filter_where}",
+                    filter_params
+                ).fetchone()[0]
+
+        projects = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = projects[-1]
+            next_cursor = encode_cursor(last[SORT_COLUMNS[sort]], last['file_id'])
+        return projects, next_cursor, total
+
+    def is_legacy_imported(self) -> bool:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone() is not None
+
+    def import_legacy(self, uploads: List[Dict]):
+        """
+        登记登记表建立之前的上传（只执行一次），这些上传没有内容哈希，各自使用独立的内容键
+
+        Args:
+            uploads: file_id、original_name、size、uploaded_at
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone() is None:
+                    for upload in uploads:
+                        if conn.execute(
+                            "SELECT 1 FROM contents WHERE storage_id = ?", (upload['file_id'],)
+                        ).fetchone():
+                            continue
+                        key = f"legacy:{upload['file_id']}"
+                        conn.execute(
+                            "INSERT INTO contents (sha256, storage_id, refcount, size, created_at, updated_at) "
+                            "VALUES (?, ?, 1, ?, ?, ?)",
+                            (key, upload['file_id'], upload['size'], upload['uploaded_at'], upload['uploaded_at'])
+                        )
+                        conn.execute(
+                            "INSERT INTO uploads (file_id, sha256, original_name, uploaded_at, file_size) "
+                            "VALUES (?, ?, ?, ?, ?)",
+                            (upload['file_id'], key, upload['original_name'], upload['uploaded_at'], upload['size'])
+                        )
+                    conn.execute(
+                        "INSERT INTO meta (key, value) VALUES ('legacy_imported', ?)", (datetime.now().isoformat(),)
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 每次从请求流读取并写入磁盘的字节数，单个上传占用的内存与压缩包大小无关
+STREAM_BUFFER_SIZE = 1024 * 1024  # 1MB
+
+# 建议客户端使用的分片大小
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+
+# 用于判断文件类型的头部字节数
+HEADER_SIZE = 4096
+
+
+class UploadTooLarge(Exception):
+    """上传内容超过大小限制"""
+
+
+class OffsetMismatch(Exception):
+    """分片偏移量与已接收的字节数不一致"""
+
+    def __init__(self, received: int):
+        super().__init__(f"offset应为 {received}")
+        self.received = received
+
+
+def stream_to_file(stream: BinaryIO, target: BinaryIO, hasher, limit: int,
+                   header: Optional[bytearray] = None) -> int:
+    """
+    将输入流分块写入文件，同时更新SHA-256
+
+    Args:
+        stream: 输入流（如request.stream）
+        target: 以二进制追加/写入模式打开的文件
+        hasher: hashlib哈希对象
+        limit: 最多接收的字节数，超过时抛出UploadTooLarge
+        header: 不为None时收集文件开头的若干字节，用于判断文件类型
+
+    Returns:
+        写入的字节数
+    """
+    written = 0
+    while True:
+        data = stream.read(STREAM_BUFFER_SIZE)
+        if not data:
+            break
+        if written + len(data) > limit:
+            raise UploadTooLarge(f"上传内容超过 {limit} 字节")
+        target.write(data)
+        hasher.update(data)
+        written += len(data)
+        if header is not None and len(header) < HEADER_SIZE:
+            header.extend(data[:HEADER_SIZE - len(header)])
+    return written
+
+
+class UploadSession:
+    """
+    可续传的分片上传会话
+
+    分片按顺序追加写入临时文件，已接收的字节数即临时文件的大小，连接中断后客户端查询会话状态，
+    从已接收的位置继续上传。SHA-256在写入时增量计算，哈希状态保存在进程内；
+    服务重启后首次写入前从临时文件重新计算一次。
+    """
+
+    # upload_id -> (已计算哈希的字节数, 哈希对象)
+    _hashers: Dict[str, Tuple[int, object]] = {}
+    _locks: Dict[str, threading.Lock] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, sessions_dir: str, info: Dict):
+        """
+        初始化会话
+
+        Args:
+            sessions_dir: 会话信息与临时文件所在目录
+            info: 会话信息（upload_id、文件名、总大小等）
+        """
+        self.sessions_dir = sessions_dir
+        self.upload_id = info['upload_id']
+        self.filename = info['filename']
+        self.total_size = info['total_size']
+        self.created_at = info['created_at']
+
+    @property
+    def info_path(self) -> str:
+        return os.path.join(self.sessions_dir, f"{self.upload_id}.json")
+
+    @property
+    def data_path(self) -> str:
+        return os.path.join(self.sessions_dir, f"{self.upload_id}.part")
+
+    @classmethod
+    def create(cls, sessions_dir: str, filename: str, total_size: int) -> 'UploadSession':
+        """
+        创建会话
+
+        Args:
+            sessions_dir: 会话目录
+            filename: 原始文件名
+            total_size: 文件总大小（字节）
+
+        Returns:
+            新建的会话
+        """
+        Path(sessions_dir).mkdir(parents=True, exist_ok=True)
+        info = {
+            'upload_id': str(uuid.uuid4()),
+            'filename': filename,
+            'total_size': total_size,
+            'created_at': datetime.now().isoformat()
+        }
+        session = cls(sessions_dir, info)
+        with open(session.info_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False)
+        open(session.data_path, 'wb').close()
+        return session
+
+    @classmethod
+    def load(cls, sessions_dir: str, upload_id: str) -> Optional['UploadSession']:
+        """
+        加载会话
+
+        Args:
+            sessions_dir: 会话目录
+            upload_id: 会话ID
+
+        Returns:
+            会话，不存在时返回None
+        """
+        # upload_id 来自URL，只接受合法的uuid，防止路径穿越
+        try:
+            upload_id = str(uuid.UUID(upload_id))
+        except ValueError:
+            return None
+
+        info_path = os.path.join(sessions_dir, f"{upload_id}.json")
+        try:
+            with open(info_path, 'r', encoding='utf-8') as f:
+                return cls(sessions_dir, json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def _lock(self) -> threading.Lock:
+        with self._registry_lock:
+            return self._locks.setdefault(self.upload_id, threading.Lock())
+
+    @property
+    def received(self) -> int:
+        try:
+            return os.path.getsize(self.data_path)
+        except OSError:
+            return 0
+
+    @property
+    def is_complete(self) -> bool:
+        return self.received == self.total_size
+
+    def _hasher(self, received: int):
+        """获取与已接收字节数一致的哈希对象，进程内没有对应状态时从临时文件重新计算"""
+        state = self._hashers.get(self.upload_id)
+        if state is not None and state[0] == received:
+            return state[1]
+        hasher = hashlib.sha256()
+        with open(self.data_path, 'rb') as f:
+            while True:
+                data = f.read(STREAM_BUFFER_SIZE)
+                if not data:
+                    break
+                hasher.update(data)
+        return hasher
+
+    def write_chunk(self, stream: BinaryIO, offset: int) -> int:
+        """
+        从offset处追加一个分片
+
+        Args:
+            stream: 分片内容的输入流
+            offset: 分片在文件中的起始位置，必须等于已接收的字节数
+
+        Returns:
+            写入后已接收的字节数
+        """
+        with self._lock():
+            received = self.received
+            if offset != received:
+                raise OffsetMismatch(received)
+            hasher = self._hasher(received)
+            written = 0
+            try:
+                with open(self.data_path, 'ab') as f:
+                    written = stream_to_file(stream, f, hasher, self.total_size - received)
+            finally:
+                # 连接中断时保留已写入的部分，客户端可从新的位置继续
+                received = self.received
+                if received == offset + written:
+                    self._hashers[self.upload_id] = (received, hasher)
+                else:
+                    self._hashers.pop(self.upload_id, None)
+            return received
+
+    def sha256(self) -> str:
+        """已接收内容的SHA-256"""
+        with self._lock():
+            return self._hasher(self.received).hexdigest()
+
+    def header(self) -> bytes:
+        """文件开头的字节，用于判断文件类型"""
+        with open(self.data_path, 'rb') as f:
+            return f.read(HEADER_SIZE)
+
+    def finish(self, target_path: str):
+        """将已接收完整的文件移动到目标位置并清理会话"""
+        with self._lock():
+            # 确认内容已落盘后再移动，上传接口返回后后台流水线直接读取目标文件
+            with open(self.data_path, 'rb') as f:
+                os.fsync(f.fileno())
+            os.replace(self.data_path, target_path)
+        self.discard()
+
+    def discard(self):
+        """删除会话信息与临时文件"""
+        for path in (self.data_path, self.info_path):
+            if os.path.exists(path):
+                os.remove(path)
+        with self._registry_lock:
+            self._hashers.pop(self.upload_id, None)
+            self._locks.pop(self.upload_id, None)
+
+    def to_dict(self) -> Dict:
+        received = self.received
+        return {
+            'upload_id': self.upload_id,
+            'filename': self.filename,
+            'total_size': self.total_size,
+            'received': received,
+            'complete': received == self.total_size,
+            'chunk_size': DEFAULT_CHUNK_SIZE,
+            'created_at': self.created_at
+        }
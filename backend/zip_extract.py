@@ -0,0 +1,194 @@
+import logging
+import os
+import posixpath
+import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from constants import EXTRACT_EXTRA_EXTENSIONS, EXTRACT_EXTRA_FILENAMES
+
+logger = logging.getLogger(__name__)
+
+# 解压线程数，zlib解压时会释放GIL
+EXTRACT_MAX_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+# 每个任务解压的成员数，减少小文件的调度开销
+EXTRACT_BATCH_SIZE = 32
+
+COPY_BUFFER_SIZE = 1024 * 1024  # 1MB
+
+
+def normalize_member_name(name: str) -> Optional[str]:
+    """
+    规范化压缩包成员名称为相对路径
+
+    Args:
+        name: 中央目录中的成员名称
+
+    Returns:
+        以/分隔的相对路径，绝对路径或包含..的名称返回None
+    """
+    name = name.replace('\\', '/')
+    if name.startswith('/') or (len(name) > 1 and name[1] == ':'):
+        return None
+    parts = [part for part in name.split('/') if part not in ('', '.')]
+    if not parts or '..' in parts:
+        return None
+    return '/'.join(parts)
+
+
+def is_extracted_member(path: str, code_extensions: Set[str]) -> bool:
+    """代码文件以及文档、配置白名单中的文件需要解压"""
+    name = posixpath.basename(path)
+    extension = Path(name).suffix.lower()
+    return extension in code_extensions or extension in EXTRACT_EXTRA_EXTENSIONS \
+        or name in EXTRACT_EXTRA_FILENAMES
+
+
+def scan_archive(zip_ref: zipfile.ZipFile, code_extensions: Set[str]) -> Dict:
+    """
+    一次遍历中央目录，统计文件数并选出需要解压的成员
+
+    Args:
+        zip_ref: 已打开的ZIP文件
+        code_extensions: 代码文件扩展名
+
+    Returns:
+        total_files、code_files、directories、total_size（全部文件解压后的大小）、selected_size，
+        members（相对路径 -> 需要解压的成员）、directory_paths（全部目录），
+        以及skipped（不解压的文件：不在解压范围内或路径不安全，按压缩包中的名称）
+    """
+    result = {
+        'total_files': 0,
+        'code_files': 0,
+        'directories': 0,
+        'total_size': 0,
+        'selected_size': 0,
+        'members': {},
+        'directory_paths': set(),
+        'skipped': []
+    }
+    for info in zip_ref.infolist():
+        result['total_files'] += 1
+        path = normalize_member_name(info.filename)
+        if info.is_dir():
+            result['directories'] += 1
+            if path:
+                result['directory_paths'].add(path)
+            continue
+        result['total_size'] += info.file_size
+        if Path(info.filename).suffix.lower() in code_extensions:
+            result['code_files'] += 1
+        if path is None:
+            result['skipped'].append(info.filename)
+            continue
+        # 中央目录不一定包含目录条目，从文件路径补全
+        parent = posixpath.dirname(path)
+        if parent:
+            result['directory_paths'].add(parent)
+        if is_extracted_member(path, code_extensions):
+            # 同名成员以中央目录中靠后的为准，与extractall的结果一致
+            previous = result['members'].pop(path, None)
+            if previous is not None:
+                result['selected_size'] -= previous.file_size
+            result['members'][path] = info
+            result['selected_size'] += info.file_size
+        else:
+            result['skipped'].append(path)
+    return result
+
+
+def extract_members(zip_path: str, scan: Dict, target_dir: str,
+                    max_workers: int = EXTRACT_MAX_WORKERS) -> int:
+    """
+    使用线程池并行解压选中的成员，每个线程使用独立的ZIP文件句柄
+
+    Args:
+        zip_path: ZIP文件路径
+        scan: scan_archive的结果
+        target_dir: 解压目录
+        max_workers: 解压线程数
+
+    Returns:
+        解压的文件数
+    """
+    started = time.time()
+    Path(target_dir).mkdir(parents=True, exist_ok=True)
+    # 先创建全部目录，线程中只需写文件
+    for directory in sorted(scan['directory_paths']):
+        os.makedirs(os.path.join(target_dir, directory), exist_ok=True)
+
+    local = threading.local()
+    handles: List[zipfile.ZipFile] = []
+    handles_lock = threading.Lock()
+
+    def extract_batch(batch):
+        zip_ref = getattr(local, 'zip_ref', None)
+        if zip_ref is None:
+            zip_ref = local.zip_ref = zipfile.ZipFile(zip_path, 'r')
+            with handles_lock:
+                handles.append(zip_ref)
+        for path, info in batch:
+            with zip_ref.open(info) as source, open(os.path.join(target_dir, path), 'wb') as target:
+                shutil.copyfileobj(source, target, COPY_BUFFER_SIZE)
+
+    members = list(scan['members'].items())
+    batches = [members[i:i + EXTRACT_BATCH_SIZE] for i in range(0, len(members), EXTRACT_BATCH_SIZE)]
+    try:
+        if len(batches) <= 1 or max_workers <= 1:
+            for batch in batches:
+                extract_batch(batch)
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(batches)),
+                                    thread_name_prefix='zip-extract') as executor:
+                # list()取出结果，任一成员解压失败时抛出异常
+                list(executor.map(extract_batch, batches))
+    finally:
+        for zip_ref in handles:
+            zip_ref.close()
+
+    logger.info(f"解压完成 {zip_path}: {len(members)} 个文件，"
+                f"{scan['selected_size']} 字节，耗时 {time.time() - started:.2f}s")
+    return len(members)
+
+
+def extract_archive(zip_path: str, target_dir: str, code_extensions: Set[str],
+                    scan: Optional[Dict] = None, max_workers: int = EXTRACT_MAX_WORKERS) -> Dict:
+    """
+    只解压代码文件与白名单中的文档、配置文件；先解压到同级临时目录再重命名，
+    其他请求不会看到解压了一半的目录
+
+    Args:
+        zip_path: ZIP文件路径
+        target_dir: 解压目录
+        code_extensions: 代码文件扩展名
+        scan: 已有的scan_archive结果，为None时读取中央目录
+        max_workers: 解压线程数
+
+    Returns:
+        scan_archive的统计结果（不含成员列表）与解压的文件数extracted_files
+    """
+    if scan is None:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            scan = scan_archive(zip_ref, code_extensions)
+
+    tmp_dir = f"{target_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    try:
+        extracted_files = extract_members(zip_path, scan, tmp_dir, max_workers)
+        os.rename(tmp_dir, target_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return {
+        'total_files': scan['total_files'],
+        'code_files': scan['code_files'],
+        'directories': scan['directories'],
+        'extracted_files': extracted_files,
+        'extracted_size': scan['selected_size']
+    }
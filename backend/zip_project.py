@@ -0,0 +1,241 @@
+import logging
+import os
+import posixpath
+import threading
+import zipfile
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set
+
+from zip_extract import extract_archive, normalize_member_name
+
+logger = logging.getLogger(__name__)
+
+# 解压后内容的缓存总大小与可缓存的单个成员大小
+BLOB_CACHE_SIZE = 32 * 1024 * 1024  # 32MB
+MAX_CACHED_BLOB_SIZE = 1024 * 1024  # 1MB
+
+# 同时保持打开的压缩包数量
+MAX_OPEN_ARCHIVES = 16
+
+
+class BlobCache:
+    """按总字节数限制的LRU缓存，保存最近读取的成员解压后的内容"""
+
+    def __init__(self, max_bytes: int = BLOB_CACHE_SIZE, max_blob_size: int = MAX_CACHED_BLOB_SIZE):
+        self.max_bytes = max_bytes
+        self.max_blob_size = max_blob_size
+        self.size = 0
+        self._blobs: 'OrderedDict[tuple, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            data = self._blobs.get(key)
+            if data is not None:
+                self._blobs.move_to_end(key)
+            return data
+
+    def put(self, key: tuple, data: bytes):
+        if len(data) > self.max_blob_size:
+            return
+        with self._lock:
+            previous = self._blobs.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._blobs[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._blobs.popitem(last=False)
+                self.size -= len(evicted)
+
+    def discard(self, archive_key: str):
+        """移除某个压缩包的全部缓存内容"""
+        with self._lock:
+            for key in [key for key in self._blobs if key[0] == archive_key]:
+                self.size -= len(self._blobs.pop(key))
+
+
+class ZipProject:
+    """
+    未解压的上传项目：直接从ZIP中央目录得到文件列表，读取文件时按需解压单个成员，
+    不在磁盘上保留解压目录
+    """
+
+    def __init__(self, key: str, zip_path: str, blob_cache: BlobCache):
+        """
+        初始化压缩包项目
+
+        Args:
+            key: 项目标识
+            zip_path: ZIP文件路径
+            blob_cache: 解压内容缓存
+        """
+        self.key = key
+        self.zip_path = zip_path
+        self.blob_cache = blob_cache
+        self.mtime = os.path.getmtime(zip_path)
+        self._zip: Optional[zipfile.ZipFile] = zipfile.ZipFile(zip_path, 'r')
+        self._lock = threading.Lock()
+        # 规范化路径 -> 成员信息，同名成员以中央目录中靠后的为准（与解压结果一致）
+        self.members: Dict[str, zipfile.ZipInfo] = {}
+        self.directories: Set[str] = set()
+        for info in self._zip.infolist():
+            path = normalize_member_name(info.filename)
+            if path is None:
+                continue
+            if info.is_dir():
+                self.directories.add(path)
+            else:
+                self.members[path] = info
+            # 中央目录不一定包含目录条目，从文件路径补全
+            parent = posixpath.dirname(path)
+            while parent:
+                self.directories.add(parent)
+                parent = posixpath.dirname(parent)
+
+    def close(self):
+        with self._lock:
+            self._zip.close()
+            self._zip = None
+
+    @staticmethod
+    def member_mtime(info: zipfile.ZipInfo) -> float:
+        try:
+            return datetime(*info.date_time).timestamp()
+        except ValueError:
+            return 0.0
+
+    def get_info(self, path: str) -> Optional[zipfile.ZipInfo]:
+        """按相对路径查询文件成员"""
+        path = normalize_member_name(path)
+        return self.members.get(path) if path else None
+
+    def is_dir(self, path: str) -> bool:
+        path = normalize_member_name(path)
+        return path is not None and path in self.directories
+
+    def read(self, path: str) -> bytes:
+        """
+        读取单个文件的内容，最近读取的内容保存在缓存中
+
+        Args:
+            path: 相对路径
+
+        Returns:
+            解压后的内容，文件不存在时抛出KeyError
+        """
+        info = self.get_info(path)
+        if info is None:
+            raise KeyError(path)
+        key = (self.key, info.filename)
+        data = self.blob_cache.get(key)
+        if data is None:
+            # ZipFile对象不支持多线程同时读取
+            with self._lock:
+                if self._zip is not None:
+                    data = self._zip.read(info)
+            if data is None:
+                # 已被缓存关闭（如项目在读取期间被按需解压），仍在使用的请求临时打开压缩包读取
+                with zipfile.ZipFile(self.zip_path, 'r') as zip_ref:
+                    data = zip_ref.read(info)
+            self.blob_cache.put(key, data)
+        return data
+
+    def iter_entries(self, code_extensions: Set[str]) -> Iterator[Dict]:
+        """
+        产出与项目索引格式一致的条目；代码文件的内容哈希使用中央目录中的CRC32与大小，
+        不需要解压任何成员
+
+        Args:
+            code_extensions: 代码文件扩展名
+        """
+        for path in self.directories:
+            yield {
+                'path': path,
+                'parent': posixpath.dirname(path),
+                'name': posixpath.basename(path),
+                'is_dir': 1,
+                'size': 0,
+                'mtime': self.mtime,
+                'extension': None,
+                'is_code': 0,
+                'content_hash': None,
+                'line_count': None,
+                'encoding': None
+            }
+        for path, info in self.members.items():
+            extension = Path(path).suffix.lower()
+            is_code = extension in code_extensions
+            yield {
+                'path': path,
+                'parent': posixpath.dirname(path),
+                'name': posixpath.basename(path),
+                'is_dir': 0,
+                'size': info.file_size,
+                'mtime': self.member_mtime(info),
+                'extension': extension,
+                'is_code': int(is_code),
+                'content_hash': f"crc32:{info.CRC:08x}:{info.file_size}" if is_code else None,
+                'line_count': None,
+                'encoding': None
+            }
+
+    def extract(self, target_dir: str, code_extensions: Set[str]) -> Dict:
+        """
+        解压代码文件与文档、配置文件到目标目录
+
+        Args:
+            target_dir: 解压目录
+            code_extensions: 代码文件扩展名
+
+        Returns:
+            解压统计
+        """
+        return extract_archive(self.zip_path, target_dir, code_extensions)
+
+
+class ZipProjectCache:
+    """进程内保持打开的压缩包项目，按项目保留最近使用的若干个，共享同一个解压内容缓存"""
+
+    def __init__(self, max_open: int = MAX_OPEN_ARCHIVES, blob_cache_size: int = BLOB_CACHE_SIZE):
+        self.max_open = max_open
+        self.blob_cache = BlobCache(blob_cache_size)
+        self._projects: 'OrderedDict[str, ZipProject]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, zip_path: str) -> ZipProject:
+        """
+        获取压缩包项目，压缩包被替换后重新读取中央目录
+
+        Args:
+            key: 项目标识
+            zip_path: ZIP文件路径
+
+        Returns:
+            压缩包项目
+        """
+        with self._lock:
+            project = self._projects.get(key)
+            if project is not None and project.mtime == os.path.getmtime(zip_path):
+                self._projects.move_to_end(key)
+                return project
+            if project is not None:
+                self._close(key)
+
+            project = ZipProject(key, zip_path, self.blob_cache)
+            self._projects[key] = project
+            while len(self._projects) > self.max_open:
+                self._close(next(iter(self._projects)))
+            return project
+
+    def _close(self, key: str):
+        project = self._projects.pop(key)
+        project.close()
+        self.blob_cache.discard(key)
+
+    def discard(self, key: str):
+        with self._lock:
+            if key in self._projects:
+                self._close(key)
@@ -1,5 +1,5 @@
-import React, { useState, useEffect } from 'react';
-import { Layout, Menu, theme, Select, message } from 'antd';
+import React, { useState, useEffect, useRef } from 'react';
+import { Layout, Menu, theme, Select, Button, Space, message } from 'antd';
 import { FileTextOutlined, UploadOutlined, BarChartOutlined, SearchOutlined, BookOutlined } from '@ant-design/icons';
 import axios from 'axios';
 import UploadComponent from './components/UploadComponent';
@@ -11,22 +11,51 @@ import DocsExplorer from './components/DocsExplorer';
 const { Header, Content, Sider } = Layout;
 const { Option } = Select;
 
+// 项目列表每页条数
+const PROJECT_PAGE_SIZE = 50;
+
+// 项目列表的排序方式
+const PROJECT_SORTS = {
+  recent: { label: '最近上传', sort: 'uploaded_at', order: 'desc' },
+  name: { label: '名称', sort: 'name', order: 'asc' },
+  size: { label: '大小', sort: 'size', order: 'desc' },
+};
+
 function App() {
   const [currentFileId, setCurrentFileId] = useState(null);
   const [currentView, setCurrentView] = useState('upload');
   const [projects, setProjects] = useState([]);
   const [loadingProjects, setLoadingProjects] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [projectQuery, setProjectQuery] = useState('');
+  const [projectSort, setProjectSort] = useState('recent');
+  const searchTimer = useRef(null);
+  // 只采用最近一次请求的结果，避免较早的搜索结果覆盖较新的
+  const requestSeq = useRef(0);
   const {
     token: { colorBgContainer, borderRadiusLG },
   } = theme.useToken();
 
-  // 加载项目列表
-  const loadProjects = async () => {
+  // 加载项目列表：搜索与排序由服务端完成，cursor为空时加载第一页，否则追加下一页
+  const loadProjects = async (cursor = null, query = projectQuery, sortKey = projectSort) => {
+    const seq = ++requestSeq.current;
     try {
       setLoadingProjects(true);
-      const response = await axios.get('/api/projects');
+      const { sort, order } = PROJECT_SORTS[sortKey];
+      const response = await axios.get('/api/projects', {
+        params: {
+          limit: PROJECT_PAGE_SIZE,
+          sort,
+          order,
+          ...(query ? { q: query } : {}),
+          ...(cursor ? { cursor } : {})
+        }
+      });
+      if (seq !== requestSeq.current) return;
       if (response.data.success) {
-        setProjects(response.data.data.projects);
+        const page = response.data.data.projects;
+        setProjects(previous => (cursor ? [...previous, ...page] : page));
+        setNextCursor(response.data.data.next_cursor);
       } else {
         message.error('加载项目列表失败');
       }
@@ -34,15 +63,44 @@ function App() {
       console.error('加载项目列表错误:', error);
       message.error('加载项目列表失败');
     } finally {
-      setLoadingProjects(false);
+      if (seq === requestSeq.current) {
+        setLoadingProjects(false);
+      }
     }
   };
 
-  // 组件挂载时加载项目列表
+  // 组件挂载时加载项目列表第一页
   useEffect(() => {
     loadProjects();
+    return () => clearTimeout(searchTimer.current);
   }, []);
 
+  // 输入搜索关键字后稍作等待再请求，避免每次按键都查询
+  const handleProjectSearch = (value) => {
+    setProjectQuery(value);
+    clearTimeout(searchTimer.current);
+    searchTimer.current = setTimeout(() => loadProjects(null, value, projectSort), 300);
+  };
+
+  const handleProjectSortChange = (sortKey) => {
+    setProjectSort(sortKey);
+    loadProjects(null, projectQuery, sortKey);
+  };
+
+  const loadMoreProjects = () => {
+    if (nextCursor && !loadingProjects) {
+      loadProjects(nextCursor);
+    }
+  };
+
+  // 下拉列表滚动到底部时加载下一页
+  const handleProjectScroll = (event) => {
+    const { scrollTop, scrollHeight, clientHeight } = event.target;
+    if (scrollTop + clientHeight >= scrollHeight - 20) {
+      loadMoreProjects();
+    }
+  };
+
   const menuItems = [
     {
       key: 'upload',
@@ -88,6 +146,12 @@ function App() {
 
   const handleProjectChange = (fileId) => {
     setCurrentFileId(fileId);
+    // 选中项目后清空搜索，恢复完整的项目列表
+    if (projectQuery) {
+      clearTimeout(searchTimer.current);
+      setProjectQuery('');
+      loadProjects(null, '', projectSort);
+    }
   };
 
   const formatFileSize = (bytes) => {
@@ -124,28 +188,50 @@ function App() {
       <Header style={{ display: 'flex', alignItems: 'center', justifyContent: 'space-between' }}>
         <div className="logo">代码项目解析器</div>
         {currentView !== 'upload' && (
-          <Select
-            placeholder="选择项目"
-            value={currentFileId}
-            onChange={handleProjectChange}
-            style={{ width: 300 }}
-            loading={loadingProjects}
-            showSearch
-            filterOption={(input, option) =>
-              option.children.toLowerCase().indexOf(input.toLowerCase()) >= 0
-            }
-          >
-            {projects.map(project => (
-              <Option key={project.file_id} value={project.file_id}>
-                <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
-                  <span>{project.original_name}</span>
-                  <span style={{ fontSize: '12px', color: '#999' }}>
-                    {formatFileSize(project.file_size)}
-                  </span>
-                </div>
-              </Option>
-            ))}
-          </Select>
+          <Space>
+            <Select
+              value={projectSort}
+              onChange={handleProjectSortChange}
+              style={{ width: 110 }}
+            >
+              {Object.entries(PROJECT_SORTS).map(([key, item]) => (
+                <Option key={key} value={key}>{item.label}</Option>
+              ))}
+            </Select>
+            <Select
+              placeholder="选择项目"
+              value={currentFileId}
+              onChange={handleProjectChange}
+              style={{ width: 300 }}
+              loading={loadingProjects}
+              showSearch
+              filterOption={false}
+              searchValue={projectQuery}
+              onSearch={handleProjectSearch}
+              onPopupScroll={handleProjectScroll}
+              dropdownRender={(menu) => (
+                <>
+                  {menu}
+                  {nextCursor && (
+                    <Button type="link" block loading={loadingProjects} onClick={loadMoreProjects}>
+                      加载更多
+                    </Button>
+                  )}
+                </>
+              )}
+            >
+              {projects.map(project => (
+                <Option key={project.file_id} value={project.file_id}>
+                  <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
+                    <span>{project.original_name}</span>
+                    <span style={{ fontSize: '12px', color: '#999' }}>
+                      {formatFileSize(project.file_size)}
+                    </span>
+                  </div>
+                </Option>
+              ))}
+            </Select>
+          </Space>
         )}
       </Header>
       <Layout>
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useRef } from 'react';
 import { Input, Button, Card, List, Typography, Select, Space, message, Spin } from 'antd';
 import { SearchOutlined, FileOutlined, DownloadOutlined } from '@ant-design/icons';
 import axios from 'axios';
@@ -12,6 +12,9 @@ const FileSearch = ({ fileId }) => {
   const [extension, setExtension] = useState('');
   const [searchResults, setSearchResults] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [totalResults, setTotalResults] = useState(0);
+  // 逐键查询时只采用最后一次请求的结果
+  const requestSeq = useRef(0);
 
   const fileExtensions = [
     { value: '.js', label: 'JavaScript (.js)' },
@@ -32,43 +35,86 @@ const FileSearch = ({ fileId }) => {
     { value: '.txt', label: 'Text (.txt)' },
   ];
 
-  const handleSearch = async () => {
-    if (!searchQuery.trim()) {
-      message.warning('请输入搜索关键词');
-      return;
+  const runSearch = async (query, ext, notify) => {
+    const seq = ++requestSeq.current;
+    const params = { query: query.trim(), limit: 50 };
+    if (ext) {
+      params.extension = ext;
     }
 
     try {
       setLoading(true);
-      const params = { query: searchQuery.trim() };
-      if (extension) {
-        params.extension = extension;
+      const response = await axios.get(`/api/analysis/find/${fileId}`, { params });
+      if (seq !== requestSeq.current) {
+        return;
       }
 
-      const response = await axios.get(`/api/analysis/search/${fileId}`, { params });
-      
       if (response.data.success) {
         setSearchResults(response.data.data.results);
-        if (response.data.data.totalResults === 0) {
-          message.info('未找到匹配的文件');
-        } else {
-          message.success(`找到 ${response.data.data.totalResults} 个文件`);
+        setTotalResults(response.data.data.total_results);
+        if (notify) {
+          if (response.data.data.total_results === 0) {
+            message.info('未找到匹配的文件');
+          } else {
+            message.success(`找到 ${response.data.data.total_results} 个文件`);
+          }
         }
       } else {
         message.error('搜索失败');
       }
     } catch (error) {
+      if (seq !== requestSeq.current) {
+        return;
+      }
       console.error('搜索错误:', error);
       message.error('搜索失败，请重试');
     } finally {
-      setLoading(false);
+      if (seq === requestSeq.current) {
+        setLoading(false);
+      }
     }
   };
 
+  const handleSearch = async () => {
+    if (!searchQuery.trim()) {
+      message.warning('请输入搜索关键词');
+      return;
+    }
+    await runSearch(searchQuery, extension, true);
+  };
+
+  const handleQueryChange = (value) => {
+    setSearchQuery(value);
+    if (value.trim()) {
+      runSearch(value, extension, false);
+    } else {
+      requestSeq.current += 1;
+      setSearchResults([]);
+      setTotalResults(0);
+    }
+  };
+
+  const handleExtensionChange = (value) => {
+    setExtension(value);
+    if (searchQuery.trim()) {
+      runSearch(searchQuery, value, false);
+    }
+  };
+
+  const renderHighlightedPath = (item) => {
+    // positions为匹配字符在完整路径中的位置
+    const matched = new Set(item.positions || []);
+    return item.path.split('').map((ch, index) => (
+      matched.has(index) ? <Text key={index} mark>{ch}</Text> : ch
+    ));
+  };
+
   const handleClear = () => {
+    requestSeq.current += 1;
     setSearchQuery('');
     setExtension('');
     setSearchResults([]);
+    setTotalResults(0);
   };
 
   const formatFileSize = (bytes) => {
@@ -99,7 +145,7 @@ const FileSearch = ({ fileId }) => {
     <div>
       <Title level={2}>文件搜索</Title>
       <Text type="secondary">
-        在项目中搜索文件名，支持按文件类型过滤
+        在项目中模糊查找文件，输入文件名或路径中的部分字符即可（如 fs 匹配 FileSearch），支持按文件类型过滤
       </Text>
 
       <Card style={{ marginTop: 24 }}>
@@ -108,7 +154,7 @@ const FileSearch = ({ fileId }) => {
             <Search
               placeholder="输入文件名关键词"
               value={searchQuery}
-              onChange={(e) => setSearchQuery(e.target.value)}
+              onChange={(e) => handleQueryChange(e.target.value)}
               onSearch={handleSearch}
               style={{ width: 300 }}
               enterButton={<SearchOutlined />}
@@ -117,7 +163,7 @@ const FileSearch = ({ fileId }) => {
             <Select
               placeholder="选择文件类型"
               value={extension}
-              onChange={setExtension}
+              onChange={handleExtensionChange}
               allowClear
               style={{ width: 200 }}
             >
@@ -146,7 +192,7 @@ const FileSearch = ({ fileId }) => {
 
           {searchResults.length > 0 && (
             <div>
-              <Text strong>搜索结果 ({searchResults.length} 个文件):</Text>
+              <Text strong>搜索结果 (显示 {searchResults.length} / {totalResults} 个文件):</Text>
               <List
                 style={{ marginTop: 16 }}
                 dataSource={searchResults}
@@ -178,7 +224,7 @@ const FileSearch = ({ fileId }) => {
                       description={
                         <Space direction="vertical" size="small">
                           <Text type="secondary" style={{ fontSize: 12 }}>
-                            路径: {item.path}
+                            路径: {renderHighlightedPath(item)}
                           </Text>
                           <Space>
                             <Text type="secondary" style={{ fontSize: 12 }}>
@@ -6,6 +6,9 @@ import axios from 'axios';
 const { Dragger } = Upload;
 const { Title, Text } = Typography;
 
+// 单个分片的最大重试次数
+const CHUNK_MAX_RETRIES = 3;
+
 const UploadComponent = ({ onUploadSuccess }) => {
   const [uploading, setUploading] = useState(false);
   const [uploadProgress, setUploadProgress] = useState(0);
@@ -37,6 +40,49 @@ const UploadComponent = ({ onUploadSuccess }) => {
     },
   };
 
+  // 分片上传：每个分片失败后查询服务端已接收的位置并从该位置继续，网络中断时不必从头上传
+  const uploadInChunks = async (file) => {
+    const created = await axios.post('/api/upload/sessions', {
+      filename: file.name,
+      size: file.size,
+    });
+    const { upload_id: uploadId, chunk_size: chunkSize } = created.data.data;
+
+    let offset = 0;
+    let failures = 0;
+    while (offset < file.size) {
+      const chunkStart = offset;
+      try {
+        const response = await axios.put(
+          `/api/upload/sessions/${uploadId}`,
+          file.slice(chunkStart, chunkStart + chunkSize),
+          {
+            params: { offset: chunkStart },
+            headers: { 'Content-Type': 'application/octet-stream' },
+            onUploadProgress: (progressEvent) => {
+              // 解析完成前最多显示99%
+              setUploadProgress(Math.min(
+                99,
+                Math.round(((chunkStart + progressEvent.loaded) * 100) / file.size)
+              ));
+            },
+          }
+        );
+        offset = response.data.data.received;
+        failures = 0;
+      } catch (error) {
+        failures += 1;
+        if (failures > CHUNK_MAX_RETRIES) {
+          throw error;
+        }
+        const status = await axios.get(`/api/upload/sessions/${uploadId}`);
+        offset = status.data.data.received;
+      }
+    }
+
+    return axios.post(`/api/upload/sessions/${uploadId}/complete`);
+  };
+
   const handleUpload = async (file) => {
     if (!file) return;
 
@@ -44,34 +90,9 @@ const UploadComponent = ({ onUploadSuccess }) => {
     setUploadProgress(0);
     setUploadResult(null);
 
-    const formData = new FormData();
-    formData.append('zipFile', file);
-
     try {
-      // 模拟上传进度
-      const progressInterval = setInterval(() => {
-        setUploadProgress(prev => {
-          if (prev >= 90) {
-            clearInterval(progressInterval);
-            return 90;
-          }
-          return prev + 10;
-        });
-      }, 200);
-
-      const response = await axios.post('/api/upload/zip', formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data',
-        },
-        onUploadProgress: (progressEvent) => {
-          const percentCompleted = Math.round(
-            (progressEvent.loaded * 100) / progressEvent.total
-          );
-          setUploadProgress(percentCompleted);
-        },
-      });
-
-      clearInterval(progressInterval);
+      const response = await uploadInChunks(file);
+
       setUploadProgress(100);
 
       if (response.data.success) {